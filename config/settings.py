@@ -93,7 +93,81 @@ class Settings(BaseSettings):
     LIVE_TRADING: bool = False   # Set to True to enable real orders
     PAPER_TRADING_BALANCE: float = 10000.0 # Virtual balance (USDT) for paper trading
     SLEEP_INTERVAL: int = 10    # Sleep time between scans in seconds
-    
+
+    # Exchange Client
+    EXCHANGE_BACKEND: str = 'sync'     # 'sync' (ccxt + thread) veya 'async' (ccxt.async_support + aiohttp, isteğe bağlı)
+
+    # Candle Store (incremental OHLCV)
+    CANDLE_STORE_ENABLED: bool = True
+    CANDLE_STORE_CAPACITY: int = 1000  # Sembol/timeframe başına tutulan maksimum mum
+    CANDLE_STORE_WARMUP: int = 200     # İlk (tam) çekimde alınan mum sayısı
+
+    # Candle Archive (diskte kolon bazlı kapanmış mumlar)
+    CANDLE_ARCHIVE_ENABLED: bool = True
+    CANDLE_ARCHIVE_DIR: str = "data/candles"
+
+    # Local Resampling (üst zaman dilimlerini eldeki mumlardan türet)
+    RESAMPLE_ENABLED: bool = True
+    RESAMPLE_SOURCE_TIMEFRAMES: List[str] = ['1h', '15m']  # Tercih sırası (büyükten küçüğe = daha uzun geçmiş)
+    RESAMPLE_TARGET_TIMEFRAMES: List[str] = ['2h', '4h', '6h', '8h', '12h', '1d', '1w']
+    RESAMPLE_SOURCE_MAX_AGE_SEC: float = 30.0  # Kaynak mumlar en fazla bu kadar eski olabilir
+
+    # Kline WebSocket Stream (candle store'u canlı besler)
+    KLINE_STREAM_ENABLED: bool = True
+    KLINE_STREAM_TIMEFRAMES: List[str] = ['15m', '1h', '4h']
+    KLINE_STREAMS_PER_CONNECTION: int = 200  # Binance limiti: spot 1024, futures 200 stream/bağlantı
+    KLINE_STREAM_STALE_SEC: float = 90.0     # Bu süre mesaj gelmezse REST'e geri dönülür
+
+    # Rate Limiting (Binance request weight)
+    RATE_LIMIT_HEADROOM: float = 0.9          # Veri istekleri ağırlık limitinin bu oranını kullanır, kalanı emirlere ayrılır
+    RATE_LIMIT_BAN_BACKOFF_SEC: float = 60.0  # 429/418 yanıtında Retry-After yoksa bekleme süresi
+
+    # Request Coalescing
+    NEGATIVE_CACHE_BASE_SEC: float = 60.0   # Hata veren sembol/timeframe bu süre tekrar sorgulanmaz (her hatada 2x)
+    NEGATIVE_CACHE_MAX_SEC: float = 900.0   # Negatif cache üst sınırı
+
+    # Ticker Snapshot
+    TICKER_SNAPSHOT_MAX_AGE_SEC: float = 15.0  # Toplu fetch_tickers sonucu bu süre boyunca tekrar kullanılır
+    TICKER_STREAM_ENABLED: bool = True         # !miniTicker@arr ile snapshot canlı tutulur (REST gerekmez)
+
+    # Market Scan
+    SCAN_CONCURRENCY: int = 8          # Aynı anda işlenen sembol sayısı (1 = sıralı tarama)
+    SCAN_SYMBOL_TIMEOUT_SEC: float = 30.0  # Tek sembol için analiz zaman aşımı (emir yürütme hariç)
+    BATCH_INDICATORS_ENABLED: bool = True  # Tüm evrenin göstergeleri (sembol x zaman x OHLCV) tek geçişte hesaplanır
+    ANALYSIS_MEMO_ENABLED: bool = True     # Kapanmış mum sonuçları (gösterge, rejim, oy, hacim profili) mum kapanana kadar tekrar kullanılır
+    ANALYSIS_MEMO_MAX_ENTRIES: int = 4096  # LRU memo kapasitesi (bileşen başına)
+    VOLUME_PROFILE_INCREMENTAL: bool = True    # Hacim profili binleri sembol başına artımlı güncellenir (sadece giren/çıkan mumlar)
+    VOLUME_PROFILE_INTRABAR: bool = False    # True: mum hacmi high-low aralığına yayılır, False: tipik fiyata (eski davranış)
+    CORRELATION_ENGINE_ENABLED: bool = True  # Taranan evren için hizalı getiri matrisi (korelasyon sorguları tablodan okunur)
+    CORRELATION_WINDOW: int = 48             # Korelasyon penceresi (kapanmış mum / getiri sayısı)
+    CORRELATION_MIN_PERIODS: int = 30        # Bir çift için gereken minimum ortak getiri sayısı
+    CORRELATION_MATRIX_FILE: str = "data/correlation_matrix.json"  # Dashboard için tam matris
+    CORRELATION_MAX_HELD: float = 0.80       # Eldeki pozisyonla getiri korelasyonu bunu aşarsa giriş atlanır (eski fiyat eşiği 0.85)
+    CORRELATION_SWAP_MAX: float = 0.75       # Swap adayı ile portföy arasında izin verilen maks. getiri korelasyonu (eski fiyat eşiği 0.80)
+    ORDERBOOK_ANALYSIS_ENABLED: bool = True  # Tarama öncesi en likit adaylar için emir defteri toplu analizi (imbalance, duvar, microprice)
+    ORDERBOOK_TOP_K: int = 20                # Emir defteri çekilen aday sayısı (son 24 mum USDT hacmine göre)
+    ORDERBOOK_FETCH_LIMIT: int = 50          # Çekilen seviye sayısı (taraf başına)
+    ORDERBOOK_DEPTH_BPS: List[int] = [10, 25, 50]  # Mid fiyatın ±N bps içindeki USDT derinliği
+    LOCAL_ORDER_BOOK_ENABLED: bool = True       # Diff-depth stream ile yerel L2 defter (REST'siz top-N/spread/derinlik)
+    LOCAL_ORDER_BOOK_MAX_SYMBOLS: int = 20      # Yerel defter tutulan sembol sayısı (hacme göre ilk N)
+    LOCAL_ORDER_BOOK_MAX_PENDING: int = 2000    # Snapshot beklerken tamponlanan en fazla olay (taşarsa tampon sıfırlanır, yeniden senkron)
+    LOCAL_ORDER_BOOK_SNAPSHOT_LIMIT: int = 100  # REST snapshot seviye sayısı (yerel defter bu derinlikte tutulur)
+    LOCAL_ORDER_BOOK_STALE_SEC: float = 10.0    # Bu süre güncelleme gelmezse REST'e geri dönülür
+    ML_BATCH_INFERENCE_ENABLED: bool = True     # Ensemble tahmini tüm evren için döngü başına tek seferde (N x F matris)
+    FEATURE_STORE_ENABLED: bool = True          # ML snapshot'ları günlük Parquet bölümlerine toplu yazılır (CSV yerine)
+    FEATURE_STORE_DIR: str = "data/feature_store"  # Bölüm kökü: date=YYYY-MM-DD/part-*.parquet
+    FEATURE_STORE_FLUSH_ROWS: int = 500         # Bellekteki tampon bu satır sayısına ulaşınca diske yazılır
+    FEATURE_STORE_FLUSH_SEC: float = 300.0      # ...veya son yazımdan bu kadar saniye geçince
+    FEATURE_STORE_RETENTION_DAYS: int = 30      # Daha eski günlük bölümler bütün olarak silinir (0 = sınırsız)
+    MODEL_REGISTRY_KEEP_VERSIONS: int = 3       # data/models/versions altında tutulan model sürümü sayısı
+    MODEL_RELOAD_CHECK_SEC: float = 60.0        # Manifest kontrol aralığı; yeni sürüm arka planda yüklenip atomik devreye alınır
+    ML_TRAINING_INTERVAL_HOURS: float = 0.0     # >0: bot eğitimi bu aralıkla ayrı süreçte başlatır (0 = cron / train_models.py)
+    ML_COMPILED_INFERENCE_ENABLED: bool = True  # Sürümde derlenmiş ağaç dizileri varsa tahmin NumPy ile yapılır (sklearn/xgb/lgbm yüklenmez)
+    ML_WALK_FORWARD_FOLDS: int = 5              # Purged walk-forward doğrulama fold sayısı (genişleyen pencere)
+    ML_WALK_FORWARD_PURGE_HOURS: float = 2.0    # Etiket bitiş zamanı (label_end) olmayan veride varsayılan etiket ufku
+    ML_TRAINING_WORKERS: int = 0                # Paralel fold süreci sayısı (0 = tüm çekirdekler)
+    ML_TRAINING_MAX_MEMORY_MB: float = 1024.0   # Eğitim verisi bellek sınırı; en yeni satırlar tutulur (0 = sınırsız)
+
     # Feature Flags
     SENTIMENT_ENABLED: bool = False
     DISABLE_SENTIMENT_ANALYSIS: bool = True
@@ -17,16 +17,12 @@ EXIT_CODE=$?
 if [ $EXIT_CODE -eq 0 ]; then
     echo "Training completed successfully." >> $LOG_FILE
     
-    # 2. Move new model to data directory (which is volume mounted)
-    # The training script saves to /app/models/ inside container
-    # We move it to /app/data/models/ so it persists and is detected by Hot Reload
-    
-    echo "Updating model files..." >> $LOG_FILE
-    sudo docker exec kripto-bot-live bash -c "mkdir -p /app/data/models && cp /app/models/*.pkl /app/data/models/ 2>/dev/null || true" >> $LOG_FILE 2>&1
-    
+    # 2. The training script publishes a new version into /app/data/models
+    # (versions/<id>/ + manifest.json, volume mounted); nothing to copy.
+
     # 3. NO RESTART NEEDED - Hot Reload is active
-    # The bot (EnsembleManager) checks file modification times every minute
-    # and will reload the models automatically.
+    # The bot (EnsembleManager) checks manifest.json every minute, loads the
+    # new version in a background thread and swaps it in atomically.
     
     # echo "Restarting bot to load new models..." >> $LOG_FILE
     # sudo docker-compose restart bot-live >> $LOG_FILE 2>&1
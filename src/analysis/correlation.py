@@ -0,0 +1,173 @@
+import json
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from src.utils.logger import log
+
+
+def pairwise_correlation(returns: np.ndarray, min_periods: int) -> np.ndarray:
+    """
+    Pearson correlation of every column pair over the rows where both are valid
+    (pandas corr() semantics) using masked matrix products instead of a pair loop.
+    returns: (time, symbols) with NaN for missing values.
+    """
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype(np.float64)
+    n = m.T @ m
+    sx = x.T @ m              # sx[i, j] = sum of x_i where both i and j are valid
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sx.T / n
+        var_x = sxx - sx * sx / n
+        var_y = var_x.T
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[n < min_periods] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    return corr
+
+
+def log_returns(closes: np.ndarray) -> np.ndarray:
+    """
+    Row-to-row log returns of a close series or (time, symbols) matrix; non-positive or
+    missing closes give NaN. Both the engine and the per-pair fallbacks correlate these.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.diff(np.log(closes), axis=0)
+    returns[~np.isfinite(returns)] = np.nan
+    return returns
+
+
+class CorrelationEngine:
+    """
+    Timestamp-aligned returns matrix for the scanned universe.
+
+    update() ingests only the closed candles newer than what each symbol already holds
+    (once per cycle, from the candles the scan fetched anyway); the (symbols x symbols)
+    correlation matrix of log returns over the last `window` candles is rebuilt lazily on
+    the first lookup after an update. Lookups are O(1) per pair.
+    """
+    def __init__(self, window: Optional[int] = None, min_periods: Optional[int] = None, timeframe: str = '1h'):
+        self.window = int(window if window is not None else settings.CORRELATION_WINDOW)
+        self.min_periods = int(min_periods if min_periods is not None else settings.CORRELATION_MIN_PERIODS)
+        self.timeframe = timeframe
+        # symbol -> closed (timestamp, close) pairs, newest last
+        self._closes: Dict[str, Deque[Tuple[int, float]]] = {}
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.matrix = np.empty((0, 0))
+        self.timestamps = np.empty(0, dtype=np.int64)
+        self._dirty = False
+        self.updated_at = 0.0
+        self.stats = {'updates': 0, 'rebuilds': 0, 'lookups': 0}
+
+    def update(self, candles_by_symbol: Dict[str, List[List]]):
+        """Appends new closed candles (the last row of each list is treated as forming)."""
+        for symbol, candles in candles_by_symbol.items():
+            if not candles or len(candles) < 2:
+                continue
+            history = self._closes.get(symbol)
+            if history is None:
+                history = self._closes[symbol] = deque(maxlen=self.window + 1)
+            last_ts = history[-1][0] if history else -1
+            for row in candles[-(self.window + 2):-1]:
+                ts = int(row[0])
+                if ts > last_ts:
+                    history.append((ts, float(row[4])))
+                    last_ts = ts
+                    self._dirty = True
+        self.stats['updates'] += 1
+
+    def _rebuild(self):
+        symbols = [s for s, history in self._closes.items() if len(history) > 1]
+        if not symbols:
+            self.symbols, self._index, self.matrix = [], {}, np.empty((0, 0))
+            self._dirty = False
+            return
+        all_ts = np.unique(np.fromiter((ts for s in symbols for ts, _ in self._closes[s]), dtype=np.int64))
+        timeline = all_ts[-(self.window + 1):]
+        closes = np.full((len(timeline), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            history = np.asarray(self._closes[symbol], dtype=np.float64)
+            ts = history[:, 0].astype(np.int64)
+            keep = ts >= timeline[0]
+            closes[np.searchsorted(timeline, ts[keep]), j] = history[keep, 1]
+        self.matrix = pairwise_correlation(log_returns(closes), self.min_periods)
+        self.symbols = symbols
+        self._index = {s: i for i, s in enumerate(symbols)}
+        self.timestamps = timeline
+        self._dirty = False
+        self.updated_at = time.time()
+        self.stats['rebuilds'] += 1
+
+    def _ensure(self):
+        if self._dirty:
+            self._rebuild()
+
+    def __contains__(self, symbol: str) -> bool:
+        self._ensure()
+        return symbol in self._index
+
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        """Correlation of two symbols' returns; None when unknown or without enough overlap."""
+        self._ensure()
+        self.stats['lookups'] += 1
+        i, j = self._index.get(a), self._index.get(b)
+        if i is None or j is None:
+            return None
+        value = self.matrix[i, j]
+        return None if math.isnan(value) else float(value)
+
+    def max_correlation(self, symbol: str, others: Iterable[str]) -> Tuple[Optional[float], Optional[str]]:
+        """Highest correlation of `symbol` against `others` (e.g. holdings) and who it is with."""
+        self._ensure()
+        self.stats['lookups'] += 1
+        i = self._index.get(symbol)
+        if i is None:
+            return None, None
+        columns = [(self._index[o], o) for o in others if o != symbol and o in self._index]
+        if not columns:
+            return None, None
+        row = self.matrix[i, [c for c, _ in columns]]
+        if np.isnan(row).all():
+            return None, None
+        k = int(np.nanargmax(row))
+        return float(row[k]), columns[k][1]
+
+    def matrix_frame(self, symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        self._ensure()
+        frame = pd.DataFrame(self.matrix, index=self.symbols, columns=self.symbols)
+        if symbols is not None:
+            keep = [s for s in symbols if s in self._index]
+            frame = frame.loc[keep, keep]
+        return frame
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """Writes the full matrix as JSON for the dashboard (null = not enough overlap)."""
+        self._ensure()
+        path = path or settings.CORRELATION_MATRIX_FILE
+        payload = {
+            'updated_at': self.updated_at,
+            'timeframe': self.timeframe,
+            'window': self.window,
+            'symbols': self.symbols,
+            'matrix': [[None if math.isnan(v) else round(float(v), 4) for v in row] for row in self.matrix],
+        }
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            log(f"⚠️ Korelasyon matrisi yazılamadı: {e}")
+            return None
+        return path
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.indicators import ATR_PERIOD, IndicatorFrame, compute_indicators, ema, rolling
+
+
+def candles_key(candles: List[List]) -> tuple:
+    """Identity of a candle window; a forming candle changes the last close."""
+    return (len(candles), candles[0][0], candles[-1][0], candles[-1][4])
+
+
+class FeatureFrame:
+    """
+    Per-symbol features for one cycle, computed once and shared read-only.
+
+    Wraps the indicator table (IndicatorFrame, or a DataFrame from calculate_indicators)
+    and derives the volatility measures the risk and ML layers used to recompute on
+    their own: ATR (SMA or Wilder/TA-Lib smoothing of the same True Range) and ATR%.
+    Columns are handed out as non-writeable views; `df` is built once and shared.
+    """
+    __slots__ = ('symbol', 'key', 'table', '_df', '_cache')
+
+    def __init__(self, symbol: str, table: Union[IndicatorFrame, pd.DataFrame], key: Optional[tuple] = None):
+        self.symbol = symbol
+        self.key = key
+        self.table = table
+        self._df = table if isinstance(table, pd.DataFrame) else None
+        self._cache: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_candles(cls, symbol: str, candles: List[List]) -> 'FeatureFrame':
+        return cls(symbol, compute_indicators(candles), candles_key(candles))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.table
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """Pandas view for DataFrame consumers (strategies, ML); built at most once."""
+        if self._df is None:
+            self._df = self.table.to_pandas()
+        return self._df
+
+    def column(self, name: str) -> np.ndarray:
+        values = np.asarray(self.table[name], dtype=np.float64).view()
+        values.flags.writeable = False
+        return values
+
+    def last(self, name: str, default: float = 0.0) -> float:
+        if name not in self.table or self.empty:
+            return default
+        value = float(self.column(name)[-1])
+        return default if np.isnan(value) else value
+
+    def true_range(self) -> np.ndarray:
+        if 'TR' in self.table:
+            return self.column('TR')
+        return self._cached(('TR',), self._true_range)
+
+    def _true_range(self) -> np.ndarray:
+        high, low, close = self.column('high'), self.column('low'), self.column('close')
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        ranges = np.stack([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        with np.errstate(invalid='ignore'):
+            return np.fmax(np.fmax(ranges[0], ranges[1]), ranges[2])
+
+    def atr(self, period: int = 14, method: str = 'sma') -> np.ndarray:
+        """
+        ATR series. 'sma' = rolling mean of TR (analyzer / VolatilityCalculator / backtester),
+        'wilder' = TA-Lib ATR (first value is the mean of TR[1..period], then Wilder smoothing).
+        """
+        if method == 'sma' and period == ATR_PERIOD and 'ATR' in self.table:
+            return self.column('ATR')
+        return self._cached(('ATR', period, method), lambda: self._atr(period, method))
+
+    def _atr(self, period: int, method: str) -> np.ndarray:
+        tr = self.true_range()
+        if method == 'sma':
+            return rolling(tr, period)
+        if method != 'wilder':
+            raise ValueError(f"Unknown ATR method: {method}")
+        out = np.full(len(tr), np.nan)
+        if len(tr) > period:
+            seeded = tr[period:].copy()
+            seeded[0] = tr[1:period + 1].mean()
+            out[period:] = ema(seeded, 1.0 / period)
+        return out
+
+    def atr_last(self, period: int = 14, method: str = 'sma') -> float:
+        """Latest ATR, 0.0 when there is not enough history."""
+        series = self.atr(period, method)
+        if not len(series) or np.isnan(series[-1]):
+            return 0.0
+        return float(series[-1])
+
+    def volatility_pct(self, period: int = 14) -> float:
+        """ATR(period) as % of the latest close (VolatilityCalculator.get_volatility_pct)."""
+        if len(self) < period:
+            return 0.0
+        price = self.last('close')
+        if price == 0:
+            return 0.0
+        return float(self.atr(period)[-1] / price * 100)
+
+    def _cached(self, key: Tuple, compute) -> np.ndarray:
+        values = self._cache.get(key)
+        if values is None:
+            values = compute()
+            values.flags.writeable = False
+            self._cache[key] = values
+        return values
+
+
+class FeatureFrameBook:
+    """Latest FeatureFrame per symbol; a frame is reused while its candle window is unchanged."""
+    def __init__(self):
+        self.frames: Dict[str, FeatureFrame] = {}
+        self.stats = {'reused': 0, 'built': 0}
+
+    def put(self, frame: FeatureFrame) -> FeatureFrame:
+        self.frames[frame.symbol] = frame
+        return frame
+
+    def get(self, symbol: str, candles: Optional[List[List]] = None) -> Optional[FeatureFrame]:
+        frame = self.frames.get(symbol)
+        if frame is None or (candles and frame.key != candles_key(candles)):
+            return None
+        return frame
+
+    def get_or_build(self, symbol: str, candles: List[List]) -> Optional[FeatureFrame]:
+        if not candles:
+            return None
+        frame = self.get(symbol, candles)
+        if frame is not None:
+            self.stats['reused'] += 1
+            return frame
+        self.stats['built'] += 1
+        return self.put(FeatureFrame.from_candles(symbol, candles))
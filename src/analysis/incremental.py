@@ -0,0 +1,297 @@
+import math
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.analysis.indicators import ADX_PERIOD, ATR_MULTIPLIER, ATR_PERIOD, RSI_PERIOD
+
+NAN = float('nan')
+
+
+def _div(a: float, b: float) -> float:
+    """a / b with NumPy semantics (x/0 -> ±inf, 0/0 -> nan)."""
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class _Window:
+    """
+    Fixed rolling window; any NaN inside makes the aggregates NaN (like Series.rolling).
+    Aggregates are exact sums over at most 25 values, so a flat stretch yields exact zeros
+    (0/0 -> NaN) instead of running-sum residue.
+    """
+    __slots__ = ('size', 'values', 'nans')
+
+    def __init__(self, size: int, values=()):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.nans = 0
+        for value in values:
+            self.push(value)
+
+    def push(self, x: float):
+        if len(self.values) == self.size and self.values[0] != self.values[0]:
+            self.nans -= 1
+        self.values.append(x)
+        if x != x:
+            self.nans += 1
+
+    def _ready(self) -> bool:
+        return len(self.values) == self.size and self.nans == 0
+
+    def sum(self) -> float:
+        return math.fsum(self.values) if self._ready() else NAN
+
+    def mean(self) -> float:
+        return math.fsum(self.values) / self.size if self._ready() else NAN
+
+    def std(self) -> float:
+        if not self._ready():
+            return NAN
+        mean = math.fsum(self.values) / self.size
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / (self.size - 1))
+
+    def mad(self) -> float:
+        if not self._ready():
+            return NAN
+        mean = math.fsum(self.values) / self.size
+        return math.fsum(abs(v - mean) for v in self.values) / self.size
+
+    def min(self) -> float:
+        return min(self.values) if self._ready() else NAN
+
+    def max(self) -> float:
+        return max(self.values) if self._ready() else NAN
+
+    def clone(self) -> '_Window':
+        other = _Window.__new__(_Window)
+        other.size, other.values, other.nans = self.size, deque(self.values, maxlen=self.size), self.nans
+        return other
+
+
+class _Ewm:
+    """ewm(alpha, adjust=False).mean() one value at a time (pandas NaN handling)."""
+    __slots__ = ('alpha', 'value', 'old_wt')
+
+    def __init__(self, alpha: float, value: float = NAN, old_wt: float = 1.0):
+        self.alpha = alpha
+        self.value = value
+        self.old_wt = old_wt
+
+    def push(self, x: float) -> float:
+        if self.value != self.value:
+            if x == x:
+                self.value = x
+                self.old_wt = 1.0
+            return self.value
+        self.old_wt *= 1.0 - self.alpha
+        if x == x:
+            if self.value != x:
+                self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.value
+
+    def clone(self) -> '_Ewm':
+        return _Ewm(self.alpha, self.value, self.old_wt)
+
+
+_WINDOWS = {
+    'close7': 7, 'close25': 25, 'close20': 20, 'volume20': 20, 'returns20': 20,
+    'gain': RSI_PERIOD, 'loss': RSI_PERIOD, 'rsi14': 14, 'tr': ATR_PERIOD, 'tp20': 20,
+    'pos_mf': 14, 'neg_mf': 14, 'mf24': 24, 'volume24': 24,
+}
+_EWMS = {
+    'ema9': 2.0 / 10, 'ema21': 2.0 / 22, 'ema12': 2.0 / 13, 'ema26': 2.0 / 27, 'signal': 2.0 / 10,
+    'tr_s': 1.0 / ADX_PERIOD, 'plus_dm_s': 1.0 / ADX_PERIOD, 'minus_dm_s': 1.0 / ADX_PERIOD, 'adx': 1.0 / ADX_PERIOD,
+}
+_SCALARS = ('last_ts', 'count', 'prev_open', 'prev_high', 'prev_low', 'prev_close', 'prev_tp',
+            'st_upper', 'st_lower', 'st_direction', 'cum_pv', 'cum_volume')
+
+
+class IncrementalIndicators:
+    """
+    Streaming version of compute_indicators for one (symbol, timeframe).
+
+    Closed candles are committed in O(1) (fixed-size windows, recursive EMAs/Wilder smoothing);
+    a forming candle is evaluated on a throw-away copy so it never disturbs the committed
+    state. Values match compute_indicators on the same history; VWAP is cumulative since
+    the first candle fed in. snapshot()/restore() round-trip the full state as plain data.
+    """
+    def __init__(self, timeframe_ms: Optional[int] = None):
+        self.timeframe_ms = timeframe_ms
+        self.windows: Dict[str, _Window] = {name: _Window(size) for name, size in _WINDOWS.items()}
+        self.ewms: Dict[str, _Ewm] = {name: _Ewm(alpha) for name, alpha in _EWMS.items()}
+        self.last_ts: Optional[int] = None
+        self.count = 0
+        self.prev_open = self.prev_high = self.prev_low = self.prev_close = self.prev_tp = NAN
+        self.st_upper = self.st_lower = NAN
+        self.st_direction = 1.0
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+        self.values: Dict[str, float] = {}
+
+    @classmethod
+    def from_candles(cls, candles, timeframe_ms: Optional[int] = None) -> 'IncrementalIndicators':
+        state = cls(timeframe_ms)
+        for row in np.asarray(candles, dtype=np.float64).reshape(-1, 6).tolist():
+            state.update(row, closed=True)
+        return state
+
+    def is_contiguous(self, ts: int) -> bool:
+        """False if `ts` would skip candles after the last committed one."""
+        if self.last_ts is None or self.timeframe_ms is None:
+            return True
+        return ts <= self.last_ts + self.timeframe_ms
+
+    def update(self, candle, closed: bool = True) -> Dict[str, float]:
+        """
+        Feeds one candle [ts, o, h, l, c, v]. Closed candles are committed; a forming candle
+        returns its indicator values without changing the state. Stale candles (at or before
+        the last committed one) leave the state unchanged.
+        """
+        ts = int(candle[0])
+        if self.last_ts is not None and ts <= self.last_ts:
+            return self.values
+        if closed:
+            self._apply(candle)
+            return self.values
+        preview = self._clone()
+        preview._apply(candle)
+        return preview.values
+
+    def _apply(self, candle):
+        ts, o, h, l, c, v = int(candle[0]), float(candle[1]), float(candle[2]), float(candle[3]), float(candle[4]), float(candle[5])
+        w, e = self.windows, self.ewms
+        pc = self.prev_close
+        out = {'timestamp': ts, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+
+        out['EMA_Short'] = e['ema9'].push(c)
+        out['EMA_Long'] = e['ema21'].push(c)
+        w['close7'].push(c)
+        w['close25'].push(c)
+        out['SMA_Short'] = w['close7'].mean()
+        out['SMA_Long'] = w['close25'].mean()
+
+        w['volume20'].push(v)
+        out['SMA_Volume'] = w['volume20'].mean()
+        out['Volume_Ratio'] = _div(v, out['SMA_Volume'])
+        returns = _div(c, pc) - 1.0
+        w['returns20'].push(returns)
+        out['Returns'] = returns
+        out['Volatility'] = w['returns20'].std() * 100
+
+        macd = e['ema12'].push(c) - e['ema26'].push(c)
+        out['MACD'] = macd
+        out['Signal_Line'] = e['signal'].push(macd)
+
+        w['close20'].push(c)
+        bb_mid, bb_std = w['close20'].mean(), w['close20'].std()
+        out.update({'BB_Middle': bb_mid, 'BB_Std': bb_std, 'BB_Upper': bb_mid + bb_std * 2, 'BB_Lower': bb_mid - bb_std * 2})
+
+        delta = c - pc
+        w['gain'].push(delta if delta > 0 else 0.0)
+        w['loss'].push(-delta if delta < 0 else 0.0)
+        rsi = 100 - (100 / (1 + _div(w['gain'].mean(), w['loss'].mean())))
+        out['RSI'] = rsi
+        w['rsi14'].push(rsi)
+        rsi_min, rsi_max = w['rsi14'].min(), w['rsi14'].max()
+        denom = rsi_max - rsi_min
+        out['Stoch_RSI'] = 0.5 if denom == 0 else _div(rsi - rsi_min, denom)
+
+        tr1, tr2, tr3 = h - l, abs(h - pc), abs(l - pc)
+        tr = max(x for x in (tr1, tr2, tr3) if x == x) if (tr1 == tr1 or tr2 == tr2 or tr3 == tr3) else NAN
+        w['tr'].push(tr)
+        atr = w['tr'].mean()
+        out.update({'tr1': tr1, 'tr2': tr2, 'tr3': tr3, 'TR': tr, 'ATR': atr})
+
+        hl2 = (h + l) / 2
+        upper_basic, lower_basic = hl2 + ATR_MULTIPLIER * atr, hl2 - ATR_MULTIPLIER * atr
+        out.update({'ST_Upper_Basic': upper_basic, 'ST_Lower_Basic': lower_basic,
+                    'ST_Upper': upper_basic, 'ST_Lower': lower_basic})
+        if self.count == 0:
+            upper, lower, direction, st = upper_basic, lower_basic, 1.0, upper_basic
+        else:
+            pu, pl = self.st_upper, self.st_lower
+            upper = pu if not (upper_basic < pu or pc > pu) else upper_basic
+            lower = pl if not (lower_basic > pl or pc < pl) else lower_basic
+            if self.st_direction == 1:
+                direction, st = (-1.0, upper) if c <= pl else (1.0, lower)
+            else:
+                direction, st = (1.0, lower) if c >= pu else (-1.0, upper)
+        self.st_upper, self.st_lower, self.st_direction = upper, lower, direction
+        out['SuperTrend'], out['ST_Direction'] = st, direction
+
+        tp = (h + l + c) / 3
+        w['tp20'].push(tp)
+        out['CCI'] = _div(tp - w['tp20'].mean(), 0.015 * w['tp20'].mad())
+
+        up_move, down_move = h - self.prev_high, self.prev_low - l
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        tr_s = e['tr_s'].push(tr)
+        plus_di = 100 * _div(e['plus_dm_s'].push(plus_dm), tr_s)
+        minus_di = 100 * _div(e['minus_dm_s'].push(minus_dm), tr_s)
+        adx = e['adx'].push(100 * _div(abs(plus_di - minus_di), plus_di + minus_di))
+        out.update({'plus_di': plus_di, 'minus_di': minus_di, 'ADX': adx})
+        uptrend = adx > 25 and plus_di > minus_di
+        downtrend = adx > 25 and minus_di > plus_di
+        out['RSI_Overbought'] = 80 if uptrend else (60 if downtrend else 70)
+        out['RSI_Oversold'] = 40 if uptrend else (20 if downtrend else 30)
+
+        money_flow = tp * v
+        w['pos_mf'].push(money_flow if tp > self.prev_tp else 0.0)
+        w['neg_mf'].push(money_flow if tp < self.prev_tp else 0.0)
+        out['MFI'] = 100 - (100 / (1 + _div(w['pos_mf'].sum(), w['neg_mf'].sum())))
+
+        self.cum_pv += money_flow
+        self.cum_volume += v
+        out['VWAP'] = _div(self.cum_pv, self.cum_volume)
+        w['mf24'].push(money_flow)
+        w['volume24'].push(v)
+        out['VWAP_24'] = _div(w['mf24'].sum(), w['volume24'].sum())
+
+        body = abs(c - o)
+        out['is_doji'] = body <= (h - l) * 0.1
+        out['is_hammer'] = (min(o, c) - l > 2 * body) and (h - max(o, c) < body)
+        out['is_bullish_engulfing'] = c > o and pc < self.prev_open and o < pc and c > self.prev_open
+
+        self.prev_open, self.prev_high, self.prev_low, self.prev_close, self.prev_tp = o, h, l, c, tp
+        self.last_ts = ts
+        self.count += 1
+        self.values = out
+
+    def _clone(self) -> 'IncrementalIndicators':
+        other = IncrementalIndicators.__new__(IncrementalIndicators)
+        other.timeframe_ms = self.timeframe_ms
+        other.windows = {name: window.clone() for name, window in self.windows.items()}
+        other.ewms = {name: ewm.clone() for name, ewm in self.ewms.items()}
+        for name in _SCALARS:
+            setattr(other, name, getattr(self, name))
+        other.values = self.values
+        return other
+
+    def snapshot(self) -> Dict:
+        """Plain-data copy of the committed state (JSON/pickle friendly)."""
+        return {
+            'timeframe_ms': self.timeframe_ms,
+            'windows': {name: list(window.values) for name, window in self.windows.items()},
+            'ewms': {name: [ewm.value, ewm.old_wt] for name, ewm in self.ewms.items()},
+            'scalars': {name: getattr(self, name) for name in _SCALARS},
+            'values': dict(self.values),
+        }
+
+    @classmethod
+    def restore(cls, snapshot: Dict) -> 'IncrementalIndicators':
+        state = cls(snapshot.get('timeframe_ms'))
+        for name, values in snapshot['windows'].items():
+            state.windows[name] = _Window(_WINDOWS[name], values)
+        for name, (value, old_wt) in snapshot['ewms'].items():
+            state.ewms[name] = _Ewm(_EWMS[name], value, old_wt)
+        for name, value in snapshot['scalars'].items():
+            setattr(state, name, value)
+        state.values = dict(snapshot.get('values', {}))
+        return state
@@ -0,0 +1,415 @@
+import math
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Column order of the legacy pandas calculate_indicators output
+COLUMNS = (
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'EMA_Short', 'EMA_Long', 'SMA_Short', 'SMA_Long', 'SMA_Volume', 'Volume_Ratio',
+    'Returns', 'Volatility', 'MACD', 'Signal_Line',
+    'BB_Middle', 'BB_Std', 'BB_Upper', 'BB_Lower', 'RSI', 'Stoch_RSI',
+    'tr1', 'tr2', 'tr3', 'TR', 'ATR',
+    'ST_Upper_Basic', 'ST_Lower_Basic', 'ST_Upper', 'ST_Lower', 'SuperTrend', 'ST_Direction',
+    'CCI', 'plus_di', 'minus_di', 'ADX', 'RSI_Overbought', 'RSI_Oversold',
+    'MFI', 'VWAP', 'VWAP_24', 'is_doji', 'is_hammer', 'is_bullish_engulfing',
+)
+
+RSI_PERIOD = 14
+ATR_PERIOD = 10
+ATR_MULTIPLIER = 3.0
+ADX_PERIOD = 14
+# Largest r**-k used by the blocked EMA (keeps the closed form far from float64 overflow)
+_EMA_MAX_SCALE = 1e100
+
+
+# --- Primitives (pandas-equivalent semantics: NaN until the window is full) ---
+# All of them work along the last axis, so (time,) and (symbols, time) inputs are both fine.
+
+def shift(x: np.ndarray, n: int = 1) -> np.ndarray:
+    out = np.empty(x.shape, dtype=np.float64)
+    out[..., :n] = np.nan
+    out[..., n:] = x[..., :-n]
+    return out
+
+
+def rolling(x: np.ndarray, window: int, func: str = 'mean', ddof: int = 0) -> np.ndarray:
+    """Rolling mean/sum/std/min/max, like Series.rolling(window).<func>()."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < window:
+        return out
+    if func in ('mean', 'sum'):
+        # O(T) prefix sums; NaNs are counted separately so a window containing one is NaN
+        nan_mask = np.isnan(x)
+        csum = np.cumsum(np.where(nan_mask, 0.0, x), axis=-1)
+        totals = csum[..., window - 1:].copy()
+        totals[..., 1:] -= csum[..., :-window]
+        if nan_mask.any():
+            nans = np.cumsum(nan_mask, axis=-1)
+            counts = nans[..., window - 1:].copy()
+            counts[..., 1:] -= nans[..., :-window]
+            totals[counts > 0] = np.nan
+        out[..., window - 1:] = totals / window if func == 'mean' else totals
+        return out
+    view = sliding_window_view(x, window, axis=-1)
+    if func == 'std':
+        out[..., window - 1:] = view.std(axis=-1, ddof=ddof)
+    else:
+        out[..., window - 1:] = getattr(view, func)(axis=-1)
+    return out
+
+
+def ema(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Series.ewm(alpha=alpha, adjust=False).mean() without a Python loop over time.
+
+    y[n] = r*y[n-1] + a*x[n] unrolls to r**n * (y0 + sum a*x[k]*r**-k); evaluated with a
+    cumulative sum in blocks short enough that r**-k stays finite. Rows sharing the same
+    leading-NaN length are evaluated together; rows with NaN after their first valid value
+    use the exact pandas recursion instead.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    rows = x.reshape(-1, x.shape[-1])
+    out = np.full(rows.shape, np.nan)
+    length = rows.shape[1]
+    if length == 0:
+        return out.reshape(x.shape)
+    valid = ~np.isnan(rows)
+    lead = np.where(valid.any(axis=1), valid.argmax(axis=1), length)
+    clean = valid.sum(axis=1) == length - lead
+    for i in np.flatnonzero(~clean):
+        _ema_with_gaps(rows[i], alpha, out[i], int(lead[i]))
+    for start in np.unique(lead[clean]):
+        if start >= length:
+            continue
+        idx = np.flatnonzero(clean & (lead == start))
+        out[idx, start:] = _ema_block(rows[idx, start:], alpha)
+    return out.reshape(x.shape)
+
+
+def _ema_block(tail: np.ndarray, alpha: float) -> np.ndarray:
+    r = 1.0 - alpha
+    length = tail.shape[1]
+    block = length if r <= 0 else max(1, min(length, int(math.log(_EMA_MAX_SCALE) / -math.log(r))))
+    out = np.empty(tail.shape)
+    out[:, 0] = tail[:, 0]
+    carry = tail[:, 0]
+    pos = 1
+    while pos < length:
+        chunk = tail[:, pos:pos + block]
+        k = np.arange(1, chunk.shape[1] + 1)
+        out[:, pos:pos + chunk.shape[1]] = (r ** k) * (carry[:, None] + np.cumsum(alpha * chunk * (r ** -k), axis=1))
+        carry = out[:, pos + chunk.shape[1] - 1]
+        pos += chunk.shape[1]
+    return out
+
+
+def _ema_with_gaps(x: np.ndarray, alpha: float, out: np.ndarray, start: int) -> np.ndarray:
+    # pandas ewma (adjust=False, ignore_na=False): skipped steps keep decaying the old weight
+    if start >= len(x):
+        return out
+    r = 1.0 - alpha
+    values = x.tolist()
+    weighted = values[start]
+    old_wt = 1.0
+    out[start] = weighted
+    for i in range(start + 1, len(values)):
+        cur = values[i]
+        old_wt *= r
+        if cur == cur:
+            if weighted != cur:
+                weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+            old_wt = 1.0
+        out[i] = weighted
+    return out
+
+
+def _divide(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return a / b
+
+
+# Below this many symbols the per-row float loop beats stepping NumPy across symbols
+_SUPERTREND_VECTOR_MIN_ROWS = 8
+
+
+def supertrend(close: np.ndarray, upper_basic: np.ndarray, lower_basic: np.ndarray):
+    """Final bands + direction. Sequential in time; vectorized across symbols for big batches."""
+    if close.ndim == 1:
+        st, direction = _supertrend_row(close, upper_basic, lower_basic)
+        return st, direction
+    if close.shape[0] < _SUPERTREND_VECTOR_MIN_ROWS:
+        pairs = [_supertrend_row(close[i], upper_basic[i], lower_basic[i]) for i in range(close.shape[0])]
+        return (np.array([p[0] for p in pairs]).reshape(close.shape),
+                np.array([p[1] for p in pairs]).reshape(close.shape))
+
+    upper = upper_basic.copy()
+    lower = lower_basic.copy()
+    st = np.zeros(close.shape)
+    direction = np.zeros(close.shape)
+    if close.shape[1] == 0:
+        return st, direction
+    st[:, 0] = upper[:, 0]
+    direction[:, 0] = 1.0
+    with np.errstate(invalid='ignore'):
+        for i in range(1, close.shape[1]):
+            pu, pl, pc = upper[:, i - 1], lower[:, i - 1], close[:, i - 1]
+            keep_upper = ~((upper[:, i] < pu) | (pc > pu))
+            upper[:, i] = np.where(keep_upper, pu, upper[:, i])
+            keep_lower = ~((lower[:, i] > pl) | (pc < pl))
+            lower[:, i] = np.where(keep_lower, pl, lower[:, i])
+            bullish = np.where(direction[:, i - 1] == 1, ~(close[:, i] <= pl), close[:, i] >= pu)
+            direction[:, i] = np.where(bullish, 1.0, -1.0)
+            st[:, i] = np.where(bullish, lower[:, i], upper[:, i])
+    return st, direction
+
+
+def _supertrend_row(close: np.ndarray, upper_basic: np.ndarray, lower_basic: np.ndarray):
+    # Runs over plain floats: far cheaper than NumPy scalar indexing for a single series
+    n = len(close)
+    upper = upper_basic.tolist()
+    lower = lower_basic.tolist()
+    closes = close.tolist()
+    st = [0.0] * n
+    direction = [0.0] * n
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    st[0] = upper[0]
+    direction[0] = 1.0
+    for i in range(1, n):
+        if not (upper[i] < upper[i - 1] or closes[i - 1] > upper[i - 1]):
+            upper[i] = upper[i - 1]
+        if not (lower[i] > lower[i - 1] or closes[i - 1] < lower[i - 1]):
+            lower[i] = lower[i - 1]
+        if direction[i - 1] == 1:
+            if closes[i] <= lower[i - 1]:
+                direction[i] = -1.0
+                st[i] = upper[i]
+            else:
+                direction[i] = 1.0
+                st[i] = lower[i]
+        else:
+            if closes[i] >= upper[i - 1]:
+                direction[i] = 1.0
+                st[i] = lower[i]
+            else:
+                direction[i] = -1.0
+                st[i] = upper[i]
+    return np.array(st), np.array(direction)
+
+
+class IndicatorRow(dict):
+    """One candle of an IndicatorFrame; supports row['RSI'] and row.get('ADX', 0) like a pandas row."""
+    __slots__ = ()
+
+
+class _RowIndexer:
+    __slots__ = ('frame',)
+
+    def __init__(self, frame: 'IndicatorFrame'):
+        self.frame = frame
+
+    def __getitem__(self, index: int) -> IndicatorRow:
+        return self.frame.row(index)
+
+
+class IndicatorFrame:
+    """
+    Struct-of-arrays result of compute_indicators: one contiguous array per column.
+
+    Columns are read with frame['RSI'] (full array) or frame.last('RSI', -2). The
+    `empty` / len() / `iloc[i]` subset of the DataFrame API is supported, so row-based
+    consumers (strategies, regime detection) take a frame directly; to_pandas() builds
+    the legacy DataFrame for code that still expects one.
+    """
+    __slots__ = ('columns',)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['close'])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def iloc(self) -> _RowIndexer:
+        return _RowIndexer(self)
+
+    def last(self, name: str, index: int = -1, default: Optional[float] = None):
+        values = self.columns.get(name)
+        if values is None or not len(values):
+            return default
+        return values[index].item()
+
+    def row(self, index: int = -1) -> IndicatorRow:
+        return IndicatorRow((name, values[index].item()) for name, values in self.columns.items())
+
+    def replace_last(self, values: Dict[str, float]) -> 'IndicatorFrame':
+        """Copy of the frame with the last (forming) row overwritten by `values`."""
+        columns = {}
+        for name, column in self.columns.items():
+            column = column.copy()
+            if name in values:
+                column[-1] = values[name]
+            columns[name] = column
+        return IndicatorFrame(columns)
+
+    def to_pandas(self) -> pd.DataFrame:
+        # Zero-copy: the DataFrame shares the arrays, the frame should not be reused after adapting
+        return pd.DataFrame(self.columns, copy=False)
+
+
+class IndicatorBatch:
+    """compute_indicators_batch result: (symbols, time) arrays; frame(i) is a zero-copy view per symbol."""
+    __slots__ = ('columns',)
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return self.columns['close'].shape[0]
+
+    def frame(self, index: int) -> IndicatorFrame:
+        return IndicatorFrame({name: values[index] for name, values in self.columns.items()})
+
+
+def compute_indicators(candles) -> IndicatorFrame:
+    """
+    Computes the full indicator set of MarketAnalyzer on float64 arrays.
+    Candles: [timestamp, open, high, low, close, volume] rows (list or (N, 6) array).
+    """
+    data = np.asarray(candles, dtype=np.float64).reshape(1, -1, 6)
+    return compute_indicators_batch(data).frame(0)
+
+
+def compute_indicators_batch(ohlcv: np.ndarray) -> 'IndicatorBatch':
+    """
+    Same indicators for a whole universe in one pass.
+    ohlcv: (symbols, time, 6) array of equally long candle histories.
+    """
+    data = np.asarray(ohlcv, dtype=np.float64)
+    ts, o, h, l, c, v = (np.ascontiguousarray(data[:, :, i]) for i in range(6))
+    cols: Dict[str, np.ndarray] = {
+        'timestamp': ts.astype(np.int64), 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v,
+    }
+
+    # Trend (EMA 9/21 + legacy SMA 7/25)
+    cols['EMA_Short'] = ema(c, 2.0 / 10)
+    cols['EMA_Long'] = ema(c, 2.0 / 22)
+    cols['SMA_Short'] = rolling(c, 7)
+    cols['SMA_Long'] = rolling(c, 25)
+
+    # Volume & volatility
+    cols['SMA_Volume'] = rolling(v, 20)
+    cols['Volume_Ratio'] = _divide(v, cols['SMA_Volume'])
+    prev_close = shift(c)
+    returns = _divide(c, prev_close) - 1.0
+    cols['Returns'] = returns
+    cols['Volatility'] = rolling(returns, 20, 'std', ddof=1) * 100
+
+    # MACD
+    macd = ema(c, 2.0 / 13) - ema(c, 2.0 / 27)
+    cols['MACD'] = macd
+    cols['Signal_Line'] = ema(macd, 2.0 / 10)
+
+    # Bollinger Bands
+    bb_mid = rolling(c, 20)
+    bb_std = rolling(c, 20, 'std', ddof=1)
+    cols['BB_Middle'] = bb_mid
+    cols['BB_Std'] = bb_std
+    cols['BB_Upper'] = bb_mid + bb_std * 2
+    cols['BB_Lower'] = bb_mid - bb_std * 2
+
+    # RSI (simple moving average of gains/losses) + Stochastic RSI
+    delta = c - prev_close
+    gain = rolling(np.where(delta > 0, delta, 0.0), RSI_PERIOD)
+    loss = rolling(np.where(delta < 0, -delta, 0.0), RSI_PERIOD)
+    rsi = 100 - (100 / (1 + _divide(gain, loss)))
+    cols['RSI'] = rsi
+    rsi_min = rolling(rsi, 14, 'min')
+    rsi_max = rolling(rsi, 14, 'max')
+    denom = rsi_max - rsi_min
+    cols['Stoch_RSI'] = np.where(denom == 0, 0.5, _divide(rsi - rsi_min, denom))
+
+    # ATR + SuperTrend
+    tr1 = h - l
+    tr2 = np.abs(h - prev_close)
+    tr3 = np.abs(l - prev_close)
+    tr = np.fmax(np.fmax(tr1, tr2), tr3)
+    atr = rolling(tr, ATR_PERIOD)
+    cols.update({'tr1': tr1, 'tr2': tr2, 'tr3': tr3, 'TR': tr, 'ATR': atr})
+    hl2 = (h + l) / 2
+    upper_basic = hl2 + ATR_MULTIPLIER * atr
+    lower_basic = hl2 - ATR_MULTIPLIER * atr
+    cols['ST_Upper_Basic'] = upper_basic
+    cols['ST_Lower_Basic'] = lower_basic
+    cols['ST_Upper'] = upper_basic
+    cols['ST_Lower'] = lower_basic
+    cols['SuperTrend'], cols['ST_Direction'] = supertrend(c, upper_basic, lower_basic)
+
+    # CCI (mean absolute deviation over the window)
+    tp = (h + l + c) / 3
+    cci = np.full(c.shape, np.nan)
+    if c.shape[-1] >= 20:
+        window = sliding_window_view(tp, 20, axis=-1)
+        mean_tp = window.mean(axis=-1)
+        mad = np.abs(window - mean_tp[..., None]).mean(axis=-1)
+        cci[..., 19:] = _divide(tp[..., 19:] - mean_tp, 0.015 * mad)
+    cols['CCI'] = cci
+
+    # ADX (Wilder smoothing)
+    up_move = h - shift(h)
+    down_move = shift(l) - l
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    alpha = 1.0 / ADX_PERIOD
+    tr_smooth = ema(tr, alpha)
+    plus_di = 100 * _divide(ema(plus_dm, alpha), tr_smooth)
+    minus_di = 100 * _divide(ema(minus_dm, alpha), tr_smooth)
+    dx = 100 * _divide(np.abs(plus_di - minus_di), plus_di + minus_di)
+    adx = ema(dx, alpha)
+    cols.update({'plus_di': plus_di, 'minus_di': minus_di, 'ADX': adx})
+
+    # Dynamic RSI thresholds: strong uptrend 80/40, strong downtrend 60/20
+    trend = adx > 25
+    uptrend = trend & (plus_di > minus_di)
+    downtrend = trend & (minus_di > plus_di)
+    cols['RSI_Overbought'] = np.where(uptrend, 80, np.where(downtrend, 60, 70)).astype(np.int64)
+    cols['RSI_Oversold'] = np.where(uptrend, 40, np.where(downtrend, 20, 30)).astype(np.int64)
+
+    # MFI
+    money_flow = tp * v
+    prev_tp = shift(tp)
+    positive_mf = rolling(np.where(tp > prev_tp, money_flow, 0.0), 14, 'sum')
+    negative_mf = rolling(np.where(tp < prev_tp, money_flow, 0.0), 14, 'sum')
+    cols['MFI'] = 100 - (100 / (1 + _divide(positive_mf, negative_mf)))
+
+    # VWAP (window-cumulative and rolling 24)
+    cols['VWAP'] = _divide(np.cumsum(money_flow, axis=-1), np.cumsum(v, axis=-1))
+    cols['VWAP_24'] = _divide(rolling(money_flow, 24, 'sum'), rolling(v, 24, 'sum'))
+
+    # Candle patterns
+    body = np.abs(c - o)
+    candle_range = h - l
+    cols['is_doji'] = body <= candle_range * 0.1
+    lower_wick = np.minimum(o, c) - l
+    upper_wick = h - np.maximum(o, c)
+    cols['is_hammer'] = (lower_wick > 2 * body) & (upper_wick < body)
+    prev_open = shift(o)
+    cols['is_bullish_engulfing'] = (c > o) & (prev_close < prev_open) & (o < prev_close) & (c > prev_open)
+
+    return IndicatorBatch(cols)
@@ -2,6 +2,8 @@ from typing import Dict, Any
 import pandas as pd
 import numpy as np
 
+from src.analysis.feature_frame import FeatureFrame
+
 class MarketRegimeDetector:
     """
     Analyzes market regime (Trending vs Ranging) and identifies No-Trade Zones.
@@ -15,7 +17,10 @@ class MarketRegimeDetector:
         """
         Detects the current market regime based on indicators.
         Requires DF with: ADX, BB_Upper, BB_Lower, BB_Middle, RSI, VWAP, close
+        A FeatureFrame is read through its indicator table (row access, no DataFrame needed).
         """
+        if isinstance(df, FeatureFrame):
+            df = df.table
         if df.empty or len(df) < 2:
             return {'regime': 'UNKNOWN', 'details': 'Insufficient data'}
             
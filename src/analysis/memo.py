@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+from config.settings import settings
+
+_MISSING = object()
+
+
+def closed_candle_key(symbol: str, timeframe: str, candles: Sequence, params: Hashable = None) -> Optional[tuple]:
+    """
+    Memo key for results that only read closed candles.
+
+    The last row is the forming candle, so the key is the history window (first timestamp,
+    length) up to the last closed timestamp. Returns None when there is no closed candle.
+    """
+    if candles is None or len(candles) < 2:
+        return None
+    return (symbol, timeframe, int(candles[0][0]), int(candles[-2][0]), len(candles), params)
+
+
+def closed_frame_key(symbol: str, timeframe: str, df, params: Hashable = None) -> Optional[tuple]:
+    """closed_candle_key for an indicator DataFrame/IndicatorFrame (uses its timestamp column)."""
+    if df is None or len(df) < 2 or 'timestamp' not in df:
+        return None
+    ts = np.asarray(df['timestamp'])
+    return (symbol, timeframe, ts[0].item(), ts[-2].item(), len(ts), params)
+
+
+def param_hash(*objects) -> int:
+    """Hash of the scalar attributes of the given objects (strategy thresholds, periods, weights)."""
+    items = []
+    for obj in objects:
+        attrs = vars(obj) if hasattr(obj, '__dict__') else {}
+        items.append((type(obj).__name__, tuple(sorted(
+            (k, v) for k, v in attrs.items() if isinstance(v, (int, float, str, bool, type(None)))
+        ))))
+    return hash(tuple(items))
+
+
+class AnalysisCache:
+    """
+    LRU memo for analysis results keyed by closed_candle_key.
+
+    Between candle closes the inputs of these results do not change, so every
+    SLEEP_INTERVAL cycle is served from here instead of being recomputed.
+    """
+    def __init__(self, maxsize: Optional[int] = None, enabled: Optional[bool] = None):
+        self.maxsize = max(1, int(maxsize if maxsize is not None else settings.ANALYSIS_MEMO_MAX_ENTRIES))
+        self.enabled = settings.ANALYSIS_MEMO_ENABLED if enabled is None else enabled
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.stats['misses'] += 1
+            return default
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get_or_compute(self, key: Optional[Hashable], compute: Callable[[], Any]) -> Any:
+        """Returns the memoized value for `key`, computing and storing it on a miss (key None = no memo)."""
+        if key is None or not self.enabled:
+            return compute()
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def hit_rate(self) -> float:
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {**self.stats, 'size': len(self._entries), 'hit_rate': round(self.hit_rate(), 3)}
@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 import time
 from typing import List, Dict
 from src.strategies.analyzer import MarketAnalyzer, TradeSignal
+from src.analysis.feature_frame import FeatureFrame
+from src.collectors.candle_archive import CandleArchive
+from src.collectors.candle_store import timeframe_to_ms
 
 class Backtester:
     def __init__(self, symbol: str, timeframe: str = '1h', initial_balance: float = 1000.0, exchange_id: str = 'binance'):
@@ -24,27 +27,43 @@ class Backtester:
         self.commission = 0.001 # 0.1%
         self.slippage = 0.001 # 0.1%
         
-    def fetch_data(self, days: int = 30):
-        """Fetches historical data from Binance (Public API)"""
-        print(f"⏳ Fetching {days} days of history for {self.symbol} via {self.exchange_id}...")
-        if not hasattr(ccxt, self.exchange_id):
-            raise ValueError(f"Unsupported exchange_id: {self.exchange_id}")
-        exchange = getattr(ccxt, self.exchange_id)()
-        since = exchange.milliseconds() - (days * 24 * 60 * 60 * 1000)
-        all_candles = []
+    def fetch_data(self, days: int = 30, archive: CandleArchive = None):
+        """
+        Historical data from the local candle archive; only history the archive
+        does not hold yet is backfilled from Binance (Public API).
+        """
+        archive = archive or CandleArchive()
+        now_ms = int(time.time() * 1000)
+        tf_ms = timeframe_to_ms(self.timeframe)
+        day_ms = 24 * 60 * 60 * 1000
+        since = now_ms - days * day_ms
+        until = since + days * day_ms
+        last_closed = until - until % tf_ms - tf_ms
         
-        while since < exchange.milliseconds():
-            candles = exchange.fetch_ohlcv(self.symbol, self.timeframe, since, limit=1000)
-            if not candles:
-                break
-            
-            since = candles[-1][0] + 1
-            all_candles.extend(candles)
-            time.sleep(0.5) # Rate limit
-            
-        # Convert to DataFrame
-        df = pd.DataFrame(all_candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        first_ts = archive.first_ts(self.symbol, self.timeframe)
+        last_ts = archive.last_ts(self.symbol, self.timeframe)
+        # Start of the range held without holes; then only the tail may be missing
+        head_covered = (first_ts is not None and first_ts <= since + tf_ms
+                        and not archive.gaps(self.symbol, self.timeframe, since=since, until=until))
+        
+        if head_covered and last_ts >= last_closed:
+            print(f"💾 Using archived history for {self.symbol} ({days} days)")
+        else:
+            if head_covered:
+                start = max(since, last_ts + tf_ms)
+                print(f"⏳ Fetching {(last_closed - start) // tf_ms + 1} new candles for {self.symbol} via {self.exchange_id}...")
+            else:
+                start = since
+                print(f"⏳ Fetching {days} days of history for {self.symbol} via {self.exchange_id}...")
+            if not hasattr(ccxt, self.exchange_id):
+                raise ValueError(f"Unsupported exchange_id: {self.exchange_id}")
+            # ccxt's own rate limiter paces the pages
+            exchange = getattr(ccxt, self.exchange_id)({'enableRateLimit': True})
+            archive.backfill(exchange, self.symbol, self.timeframe, start, until=until)
+        
+        rows = archive.read(self.symbol, self.timeframe, since=since)
+        df = pd.DataFrame(rows, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'].astype('int64'), unit='ms')
         print(f"✅ Loaded {len(df)} candles.")
         return df
 
@@ -82,14 +101,19 @@ class Backtester:
             
             # Analyze
             signal = self.analyzer.analyze_spot(self.symbol, current_candles)
+            # Stops read ATR from the FeatureFrame the analysis just built
+            features = None
+            if hasattr(self.analyzer, 'feature_frame'):
+                features = self.analyzer.feature_frame(self.symbol, current_candles)
+            risk_data = features if features is not None else window_df
             
             # Execute Logic
             if signal:
-                self._process_signal(signal, current_price, current_time, window_df)
+                self._process_signal(signal, current_price, current_time, risk_data)
             
             # Stop Loss / Take Profit Logic (if holding)
             if self.position:
-                self._check_risk_management(current_price, current_time, window_df)
+                self._check_risk_management(current_price, current_time, risk_data)
                 
             # Record Equity
             total_value = self.balance
@@ -220,6 +244,8 @@ class Backtester:
     def _calc_atr(self, window_df: pd.DataFrame, period: int = 14) -> float:
         if window_df.empty or len(window_df) < period:
             return 0.0
+        if isinstance(window_df, FeatureFrame):
+            return window_df.atr_last(period)
         h = window_df['high']
         l = window_df['low']
         c = window_df['close']
@@ -1,11 +1,17 @@
-import ccxt
 import asyncio
 import random
+import numpy as np
 import time
 from typing import Dict, List, Optional
 from config.settings import settings
-from src.utils.rate_limiter import RateLimiter
-from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.rate_limiter import shared_rate_limiter
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.collectors.exchange_client import create_exchange, exchange_call, close_exchange, attach_rate_limiter
+from src.collectors.candle_store import CandleStore, timeframe_to_ms, TS
+from src.collectors.resampler import can_resample, resample_ohlcv
+from src.collectors.candle_archive import CandleArchive
+from src.collectors.ticker_snapshot import TickerSnapshot
+from src.collectors.order_book import OrderBookStore
 
 class BinanceDataLoader:
     def __init__(self):
@@ -14,19 +20,35 @@ class BinanceDataLoader:
         
         # Caching & Rate Limiting
         self._cache = {}
-        self.rate_limiter = RateLimiter(max_requests=1200, time_window=60)
+        # Single-flight: "SYMBOL_TF" -> (limit, in-flight task); negative cache: "SYMBOL_TF" -> (retry_at, failures)
+        self._inflight: Dict[str, tuple] = {}
+        self._failures: Dict[str, tuple] = {}
+        self.fetch_stats = {'coalesced': 0, 'negative_hits': 0, 'failures': 0, 'breaker_rejects': 0}
+        # Binance request-weight limiter, charged by every exchange_call on self.exchange
+        self.rate_limiter = shared_rate_limiter('futures' if settings.TRADING_MODE == 'futures' else 'spot')
         self.circuit_breaker = CircuitBreaker()
         
+        # Incremental candle store (delta fetch with `since` instead of full refetch)
+        self.candle_store = CandleStore() if settings.CANDLE_STORE_ENABLED else None
+        # On-disk archive of closed candles (warm restarts, shared with Backtester)
+        self.candle_archive = CandleArchive() if settings.CANDLE_ARCHIVE_ENABLED and self.candle_store is not None else None
+        
+        # Cycle-scoped bulk ticker snapshot shared with the executor
+        self.tickers = TickerSnapshot()
+        
+        # Local L2 books fed by the diff-depth stream (shared with the executor)
+        self.local_books = OrderBookStore() if settings.LOCAL_ORDER_BOOK_ENABLED else None
+        
         if not self.mock:
             mode = 'future' if settings.TRADING_MODE == 'futures' else 'spot'
-            print(f"🌍 Using Binance Global Client (Sync CCXT) - Mode: {mode.upper()}")
+            print(f"🌍 Using Binance Global Client ({settings.EXCHANGE_BACKEND} CCXT) - Mode: {mode.upper()}")
             
             # Fetch keys directly from env to ensure they are loaded
             import os
             api_key = os.getenv("BINANCE_API_KEY", settings.BINANCE_API_KEY)
             secret_key = os.getenv("BINANCE_SECRET_KEY", settings.BINANCE_SECRET_KEY)
             
-            self.exchange = ccxt.binance({
+            self.exchange = create_exchange({
                 'apiKey': api_key,
                 'secret': secret_key,
                 'enableRateLimit': True,
@@ -37,41 +59,45 @@ class BinanceDataLoader:
                     'defaultType': mode, # 'spot' or 'future'
                 }
             })
+            attach_rate_limiter(self.exchange, self.rate_limiter)
+            self.tickers.exchange = self.exchange
         
     async def initialize(self):
         """Load markets"""
         if not self.mock:
             try:
-                await asyncio.wait_for(asyncio.to_thread(self.exchange.load_markets), timeout=30.0)
+                await asyncio.wait_for(exchange_call(self.exchange.load_markets), timeout=30.0)
             except Exception as e:
                 print(f"Authenticated load_markets failed: {e}")
                 print("Retrying with Public Client for Data Loading...")
                 # Re-init as public (no keys)
-                self.exchange = ccxt.binance({
+                await close_exchange(self.exchange)
+                self.exchange = create_exchange({
                     'enableRateLimit': True,
                     'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                     'verify': False, # Disable SSL verification
                     'timeout': 60000, # Increase timeout for large exchangeInfo
                     'options': {'defaultType': 'future' if settings.TRADING_MODE == 'futures' else 'spot'}
                 })
+                attach_rate_limiter(self.exchange, self.rate_limiter)
+                self.tickers.exchange = self.exchange
                 try:
-                    await asyncio.wait_for(asyncio.to_thread(self.exchange.load_markets), timeout=30.0)
+                    await asyncio.wait_for(exchange_call(self.exchange.load_markets), timeout=30.0)
                     print("✅ Public Client Initialized (Real Data)")
                 except Exception as e2:
                     print(f"Public connect failed: {repr(e2)}. Switching to Mock Mode.")
                     self.mock = True
         
     async def close(self):
-        # Sync ccxt doesn't need close
-        pass
+        # Async client owns a pooled HTTP session; sync ccxt doesn't need close
+        await close_exchange(getattr(self, 'exchange', None))
 
     async def get_current_price(self, symbol: str) -> float:
         if self.mock:
             base = 95000 if 'BTC' in symbol else 2700
             return base + random.uniform(-50, 50)
             
-        ticker = await asyncio.to_thread(self.exchange.fetch_ticker, symbol)
-        return float(ticker['last'])
+        return await self.tickers.get_price(symbol)
 
     async def get_funding_rate(self, symbol: str) -> Dict:
         if self.mock:
@@ -83,7 +109,7 @@ class BinanceDataLoader:
             }
 
         try:
-            funding_info = await asyncio.to_thread(self.exchange.fetch_funding_rate, symbol)
+            funding_info = await exchange_call(self.exchange.fetch_funding_rate, symbol)
             return {
                 'symbol': symbol,
                 'fundingRate': funding_info['fundingRate'],
@@ -101,6 +127,30 @@ class BinanceDataLoader:
                 'nextFundingTime': int(time.time() * 1000) + 28800000
             }
 
+    async def get_order_book(self, symbol: str, limit: int = 50, use_local: bool = True) -> Optional[Dict]:
+        """
+        Order book {'bids': [[price, qty], ...], 'asks': [...]}; None on failure.
+        Served from the local diff-depth book when it is synced, otherwise over REST.
+        """
+        if use_local and self.local_books is not None:
+            book = self.local_books.order_book(symbol, limit)
+            if book is not None:
+                return book
+
+        if self.mock:
+            mid = 95000 if 'BTC' in symbol else 2700
+            tick = mid * 0.0001
+            return {
+                'bids': [[mid - tick * (i + 1), random.uniform(0.1, 5)] for i in range(limit)],
+                'asks': [[mid + tick * (i + 1), random.uniform(0.1, 5)] for i in range(limit)],
+            }
+
+        try:
+            return await exchange_call(self.exchange.fetch_order_book, symbol, limit)
+        except Exception as e:
+            print(f"⚠️ Order book fetch failed for {symbol}: {e}")
+            return None
+
     async def get_ohlcv(self, symbol: str, timeframe: str = '1h', limit: int = 100, use_cache: bool = True) -> List[List]:
         # DEBUG LOG
         print(f"DEBUG: get_ohlcv {symbol} Mock={self.mock}")
@@ -120,6 +170,12 @@ class BinanceDataLoader:
                 data.append([ts, o, h, l, c, v])
             return data
             
+        # Live kline stream keeps the store current -> serve from memory, no REST
+        if self.candle_store is not None and self.candle_store.is_live(symbol, timeframe):
+            buffer = self.candle_store.get(symbol, timeframe)
+            if buffer is not None and len(buffer) >= limit:
+                return buffer.tail(limit)
+            
         # Cache Check
         cache_key = f"{symbol}_{timeframe}"
         now = time.time()
@@ -127,27 +183,190 @@ class BinanceDataLoader:
         if use_cache and cache_key in self._cache:
             data, timestamp = self._cache[cache_key]
             # 30 seconds cache validity to prevent redundant calls in same scan cycle
-            if now - timestamp < 30: 
-                return data
+            if now - timestamp < 30 and len(data) >= limit:
+                return data[-limit:]
+
+        # Negative cache: failing symbols are not retried until their backoff expires
+        # (also for use_cache=False refreshes such as the kline stream's gap fill)
+        failure = self._failures.get(cache_key)
+        if failure is not None and now < failure[0]:
+            self.fetch_stats['negative_hits'] += 1
+            return []
 
-        # Rate Limit Enforcer
-        await self.rate_limiter.wait_if_needed()
+        return await self._single_flight(cache_key, limit, lambda: self._load_ohlcv(symbol, timeframe, limit))
+
+    async def _single_flight(self, key: str, limit: int, factory) -> List[List]:
+        """
+        Concurrent requests for the same symbol/timeframe share one in-flight fetch.
+        A request joins if the running fetch asks for at least as many candles.
+        """
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] >= limit:
+            self.fetch_stats['coalesced'] += 1
+            data = await asyncio.shield(entry[1])
+            return data[-limit:] if data else data
         
-        try:
-            # Circuit Breaker Wrapping
-            # We run circuit_breaker.call inside the thread to handle sync exceptions properly
-            def _fetch():
-                return self.circuit_breaker.call(self.exchange.fetch_ohlcv, symbol, timeframe, limit=limit)
-            
-            data = await asyncio.to_thread(_fetch)
-            
-            # Update Cache
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = (limit, task)
+        
+        def _release(done, key=key):
+            current = self._inflight.get(key)
+            if current is not None and current[1] is done:
+                del self._inflight[key]
+        task.add_done_callback(_release)
+        # Shielded so a cancelled caller doesn't cancel the fetch other callers are waiting on
+        return await asyncio.shield(task)
+
+    async def _load_ohlcv(self, symbol: str, timeframe: str, limit: int) -> List[List]:
+        cache_key = f"{symbol}_{timeframe}"
+        
+        # Higher timeframes derived locally from fresh lower-timeframe candles
+        if self.candle_store is not None and settings.RESAMPLE_ENABLED and timeframe in settings.RESAMPLE_TARGET_TIMEFRAMES:
+            try:
+                data = await self._derive_ohlcv(symbol, timeframe, limit)
+            except Exception:
+                data = None
             if data:
-                last_ts = data[-1][0]
-                readable_ts = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_ts/1000))
-                print(f"DEBUG: {symbol} Last Candle Time: {readable_ts} | Close: {data[-1][4]}")
                 self._cache[cache_key] = (data, time.time())
-            return data
+                return data
+
+        try:
+            data = await self._fetch_ohlcv(symbol, timeframe, limit)
+        except CircuitOpenError:
+            # Shared breaker rejected the call: not this symbol's failure, retry once it recovers
+            self.fetch_stats['breaker_rejects'] += 1
+            return []
         except Exception as e:
-            # print(f"⚠️ Fetch Error {symbol}: {e}")
+            self._record_failure(cache_key, e)
+            return []
+        
+        self._failures.pop(cache_key, None)
+        # Update Cache
+        if data:
+            last_ts = data[-1][0]
+            readable_ts = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_ts/1000))
+            print(f"DEBUG: {symbol} Last Candle Time: {readable_ts} | Close: {data[-1][4]}")
+            self._cache[cache_key] = (data, time.time())
+        return data
+
+    def _record_failure(self, cache_key: str, error: Exception):
+        """Exponential backoff per symbol/timeframe (NEGATIVE_CACHE_BASE_SEC doubling up to the max)."""
+        _, count = self._failures.get(cache_key, (0.0, 0))
+        count += 1
+        backoff = min(settings.NEGATIVE_CACHE_BASE_SEC * (2 ** (count - 1)), settings.NEGATIVE_CACHE_MAX_SEC)
+        self._failures[cache_key] = (time.time() + backoff, count)
+        self.fetch_stats['failures'] += 1
+        if count == 1 or backoff >= settings.NEGATIVE_CACHE_MAX_SEC:
+            print(f"⚠️ Fetch Error {cache_key}: {error} -> {backoff:.0f}s beklemeye alındı")
+
+    async def _fetch_raw_ohlcv(self, symbol: str, timeframe: str, limit: int, since: Optional[int] = None) -> List[List]:
+        # Circuit Breaker Wrapping (sync backend runs circuit_breaker.call inside the worker thread)
+        kwargs = {'limit': limit}
+        if since is not None:
+            kwargs['since'] = since
+        return await exchange_call(
+            self.exchange.fetch_ohlcv, symbol, timeframe, breaker=self.circuit_breaker, **kwargs
+        )
+
+    async def _fetch_ohlcv(self, symbol: str, timeframe: str, limit: int) -> List[List]:
+        """
+        Returns the newest `limit` candles. With the candle store enabled only candles
+        newer than the last stored one are requested; the forming candle is updated in
+        place and a gap triggers a full refetch.
+        """
+        store = self.candle_store
+        if store is None or limit > store.capacity:
+            return await self._fetch_raw_ohlcv(symbol, timeframe, limit)
+        
+        if store.get(symbol, timeframe) is None:
+            self._warm_from_archive(symbol, timeframe)
+        
+        since = store.delta_since(symbol, timeframe, limit)
+        if since is not None:
+            rows = await self._fetch_raw_ohlcv(symbol, timeframe, limit, since=since)
+            if store.merge_delta(symbol, timeframe, rows or []):
+                self.archive_closed(symbol, timeframe)
+                return store.tail(symbol, timeframe, limit)
+        
+        warmup = min(store.capacity, max(limit, settings.CANDLE_STORE_WARMUP))
+        rows = await self._fetch_raw_ohlcv(symbol, timeframe, warmup)
+        if not rows:
             return []
+        store.replace(symbol, timeframe, rows)
+        self.archive_closed(symbol, timeframe)
+        return store.tail(symbol, timeframe, limit)
+
+    def _warm_from_archive(self, symbol: str, timeframe: str):
+        """Seeds an empty store buffer from disk so the first fetch after a restart is a delta."""
+        if self.candle_archive is None:
+            return
+        try:
+            rows = self.candle_archive.read(symbol, timeframe, limit=self.candle_store.capacity)
+        except Exception as e:
+            print(f"⚠️ Candle archive read failed ({symbol} {timeframe}): {e}")
+            return
+        if len(rows):
+            self.candle_store.put(symbol, timeframe, rows)
+
+    def archive_closed(self, symbol: str, timeframe: str):
+        if self.candle_archive is None:
+            return
+        buffer = self.candle_store.get(symbol, timeframe)
+        last = self.candle_archive.last_ts(symbol, timeframe)
+        if buffer is None or len(buffer) == 0 or (last is not None and buffer.last_ts <= last):
+            return
+        try:
+            self.candle_archive.append(symbol, timeframe, buffer.to_array())
+        except Exception as e:
+            print(f"⚠️ Candle archive write failed ({symbol} {timeframe}): {e}")
+
+    def _resample_local(self, symbol: str, timeframe: str) -> Optional[np.ndarray]:
+        store = self.candle_store
+        for source_tf in settings.RESAMPLE_SOURCE_TIMEFRAMES:
+            if not can_resample(source_tf, timeframe):
+                continue
+            buffer = store.get(symbol, source_tf)
+            if buffer is None or len(buffer) == 0:
+                continue
+            if not store.is_fresh(symbol, source_tf, settings.RESAMPLE_SOURCE_MAX_AGE_SEC):
+                continue
+            derived = resample_ohlcv(buffer.to_array(), source_tf, timeframe)
+            if len(derived):
+                return derived
+        return None
+
+    async def _derive_ohlcv(self, symbol: str, timeframe: str, limit: int) -> Optional[List[List]]:
+        """
+        Builds `timeframe` candles from fresh lower-timeframe candles in the store.
+        History older than the local window is kept in the target timeframe's own buffer;
+        REST is only asked for the part of it that is not held yet.
+        Returns None if nothing can be derived (caller falls back to REST).
+        """
+        store = self.candle_store
+        if limit > store.capacity:
+            return None
+        derived = self._resample_local(symbol, timeframe)
+        if derived is None:
+            return None
+        
+        tf_ms = timeframe_to_ms(timeframe)
+        first_ts = int(derived[0, TS])
+        held = store.get(symbol, timeframe)
+        older = held.to_array() if held is not None else np.empty((0, 6))
+        older = older[older[:, TS] < first_ts]
+        if len(older) and int(older[-1, TS]) != first_ts - tf_ms:
+            older = np.empty((0, 6))
+        
+        missing = limit - len(derived) - len(older)
+        if missing > 0:
+            end_ts = int(older[0, TS]) if len(older) else first_ts
+            rows = await self._fetch_raw_ohlcv(symbol, timeframe, missing, since=end_ts - missing * tf_ms)
+            fetched = np.asarray([r[:6] for r in rows or [] if r[0] < end_ts], dtype=np.float64).reshape(-1, 6)
+            older = np.concatenate((fetched, older))
+        
+        combined = np.concatenate((older, derived))
+        if len(combined) > 1 and np.any(np.diff(combined[:, TS]) != tf_ms):
+            return None
+        store.put(symbol, timeframe, combined[-store.capacity:])
+        store.stats['resampled'] += 1
+        return store.tail(symbol, timeframe, limit)
@@ -1,7 +1,19 @@
 import asyncio
 import json
 import logging
-from binance import AsyncClient, BinanceSocketManager
+from typing import Dict, List, Optional, Tuple
+from config.settings import settings
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    from binance import AsyncClient, BinanceSocketManager
+except ImportError:
+    AsyncClient = None
+    BinanceSocketManager = None
 
 # Logger kurulumu (basit)
 logger = logging.getLogger(__name__)
@@ -86,3 +98,399 @@ class BinanceWebSocket:
     def get_latest_price(self, symbol: str) -> dict:
         """En güncel fiyatı getir"""
         return self.price_cache.get(symbol)
+
+
+class BinanceKlineStream:
+    """
+    Combined kline streams (<symbol>@kline_<tf>) for the whole scan universe.
+
+    Every update is merged into loader.candle_store, which lets get_ohlcv serve the
+    streamed (symbol, timeframe) pairs from memory. Streams are sharded over several
+    connections to respect the per-connection stream limit. After every (re)connect
+    the shard's buffers are gap-filled over REST before they are marked live again.
+    """
+    SPOT_URL = "wss://stream.binance.com:9443/stream?streams="
+    FUTURES_URL = "wss://fstream.binance.com/stream?streams="
+
+    def __init__(self, loader, symbols: List[str], timeframes: Optional[List[str]] = None,
+                 streams_per_connection: Optional[int] = None):
+        self.loader = loader
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes or settings.KLINE_STREAM_TIMEFRAMES)
+        self.streams_per_connection = streams_per_connection or settings.KLINE_STREAMS_PER_CONNECTION
+        self.base_url = self.FUTURES_URL if settings.TRADING_MODE == 'futures' else self.SPOT_URL
+        self.callbacks = []
+        self.running = False
+        self.session = None
+        self._tasks: List[asyncio.Task] = []
+        # Binance stream symbol (BTCUSDT) -> CCXT symbol (BTC/USDT)
+        self._symbol_map = {self.stream_symbol(s): s for s in self.symbols}
+        # Keys whose REST gap-fill is running; stream updates are dropped meanwhile
+        self._filling = set()
+        self._fill_tasks = set()
+        self.stats = {'messages': 0, 'reconnects': 0, 'gap_fills': 0, 'dropped': 0}
+
+    @staticmethod
+    def stream_symbol(symbol: str) -> str:
+        return symbol.split(':')[0].replace('/', '').upper()
+
+    def stream_names(self) -> List[str]:
+        return [f"{self.stream_symbol(s).lower()}@kline_{tf}" for s in self.symbols for tf in self.timeframes]
+
+    def shards(self) -> List[List[str]]:
+        streams = self.stream_names()
+        size = max(1, self.streams_per_connection)
+        return [streams[i:i + size] for i in range(0, len(streams), size)]
+
+    def _keys_for(self, streams: List[str]) -> List[Tuple[str, str]]:
+        keys = []
+        for name in streams:
+            sym_id, _, tf = name.partition('@kline_')
+            symbol = self._symbol_map.get(sym_id.upper())
+            if symbol:
+                keys.append((symbol, tf))
+        return keys
+
+    def register_callback(self, callback):
+        """callback(symbol, timeframe, row, is_closed)"""
+        self.callbacks.append(callback)
+
+    async def start(self):
+        if aiohttp is None:
+            logger.error("aiohttp not installed, kline stream disabled")
+            return
+        if self.loader.candle_store is None:
+            logger.error("Candle store disabled, kline stream has nowhere to write")
+            return
+        self.running = True
+        self.session = aiohttp.ClientSession()
+        for index, streams in enumerate(self.shards()):
+            self._tasks.append(asyncio.create_task(self._run_shard(index, streams)))
+        logger.info(f"Kline stream started: {len(self.stream_names())} streams on {len(self._tasks)} connection(s)")
+
+    async def stop(self):
+        self.running = False
+        tasks = self._tasks + list(self._fill_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _run_shard(self, index: int, streams: List[str]):
+        keys = self._keys_for(streams)
+        url = self.base_url + "/".join(streams)
+        backoff = 1.0
+        while self.running:
+            self._begin_fill(keys)
+            try:
+                async with self.session.ws_connect(url, heartbeat=30) as ws:
+                    backoff = 1.0
+                    # Fill what was missed while disconnected; buffered updates are dropped until done
+                    fill_task = asyncio.create_task(self._gap_fill(keys))
+                    try:
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self.process_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    finally:
+                        if not fill_task.done():
+                            fill_task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Kline stream shard {index} error: {e}")
+            if not self.running:
+                break
+            self.stats['reconnects'] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def _begin_fill(self, keys: List[Tuple[str, str]]):
+        store = self.loader.candle_store
+        for symbol, tf in keys:
+            self._filling.add((symbol, tf))
+            store.mark_live(symbol, tf, False)
+
+    async def _gap_fill(self, keys: List[Tuple[str, str]], concurrency: int = 5):
+        """REST delta (or full) refresh for each key, then hands it back to the stream."""
+        semaphore = asyncio.Semaphore(concurrency)
+        limit = settings.CANDLE_STORE_WARMUP
+
+        async def _fill(key):
+            symbol, tf = key
+            async with semaphore:
+                try:
+                    data = await self.loader.get_ohlcv(symbol, tf, limit=limit, use_cache=False)
+                    if data:
+                        self.stats['gap_fills'] += 1
+                finally:
+                    self._filling.discard(key)
+
+        await asyncio.gather(*(_fill(k) for k in keys), return_exceptions=True)
+
+    async def process_message(self, msg: dict):
+        data = msg.get('data') if isinstance(msg, dict) else None
+        if not data or data.get('e') != 'kline':
+            return
+        try:
+            k = data['k']
+            symbol = self._symbol_map.get(data['s'])
+            if symbol is None:
+                return
+            tf = k['i']
+            row = [int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+            is_closed = bool(k['x'])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error parsing kline message: {e}")
+            return
+
+        self.stats['messages'] += 1
+        if (symbol, tf) in self._filling:
+            self.stats['dropped'] += 1
+            return
+        if not self.loader.candle_store.merge_stream(symbol, tf, row):
+            # Stream jumped ahead of the buffer -> refill from REST in the background
+            self._begin_fill([(symbol, tf)])
+            task = asyncio.create_task(self._gap_fill([(symbol, tf)]))
+            self._fill_tasks.add(task)
+            task.add_done_callback(self._fill_tasks.discard)
+            return
+        if is_closed:
+            self.loader.archive_closed(symbol, tf)
+
+        for callback in self.callbacks:
+            try:
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(symbol, tf, row, is_closed)
+                else:
+                    callback(symbol, tf, row, is_closed)
+            except Exception as e:
+                logger.error(f"Kline callback error for {symbol}: {e}")
+
+
+class BinanceDepthStream:
+    """
+    Diff-depth streams (<symbol>@depth@100ms) keeping loader.local_books in sync.
+
+    Follows Binance's local order book procedure: after every (re)connect the events are
+    buffered by the OrderBookStore while a REST snapshot is fetched per symbol; a sequence
+    gap triggers a background resync of that symbol only.
+    """
+    SPOT_URL = "wss://stream.binance.com:9443/stream?streams="
+    FUTURES_URL = "wss://fstream.binance.com/stream?streams="
+
+    def __init__(self, loader, symbols: List[str], streams_per_connection: Optional[int] = None):
+        self.loader = loader
+        self.store = loader.local_books
+        self.symbols = list(symbols)
+        self.streams_per_connection = streams_per_connection or settings.KLINE_STREAMS_PER_CONNECTION
+        self.base_url = self.FUTURES_URL if settings.TRADING_MODE == 'futures' else self.SPOT_URL
+        self.running = False
+        self.session = None
+        self._tasks: List[asyncio.Task] = []
+        self._sync_tasks = set()
+        # symbol -> background resync (one per symbol; retries back off while snapshots fail)
+        self._resyncs: Dict[str, asyncio.Task] = {}
+        self._symbol_map = {BinanceKlineStream.stream_symbol(s): s for s in self.symbols}
+        self.stats = {'messages': 0, 'reconnects': 0, 'resyncs': 0, 'sync_failures': 0}
+
+    @staticmethod
+    def most_liquid(symbols: List[str], tickers: Dict[str, Dict], limit: int) -> List[str]:
+        """The `limit` symbols with the highest 24h quote volume (unknown volume ranks last)."""
+        def volume(symbol):
+            try:
+                return float((tickers.get(symbol) or {}).get('quoteVolume') or 0)
+            except (TypeError, ValueError):
+                return 0.0
+        return sorted(symbols, key=volume, reverse=True)[:limit]
+
+    def stream_names(self) -> List[str]:
+        return [f"{BinanceKlineStream.stream_symbol(s).lower()}@depth@100ms" for s in self.symbols]
+
+    def shards(self) -> List[List[str]]:
+        streams = self.stream_names()
+        size = max(1, self.streams_per_connection)
+        return [streams[i:i + size] for i in range(0, len(streams), size)]
+
+    async def start(self):
+        if aiohttp is None:
+            logger.error("aiohttp not installed, depth stream disabled")
+            return
+        if self.store is None:
+            logger.error("Local order books disabled, depth stream has nowhere to write")
+            return
+        self.running = True
+        self.session = aiohttp.ClientSession()
+        for index, streams in enumerate(self.shards()):
+            self._tasks.append(asyncio.create_task(self._run_shard(index, streams)))
+        logger.info(f"Depth stream started: {len(self.symbols)} books on {len(self._tasks)} connection(s)")
+
+    async def stop(self):
+        self.running = False
+        tasks = self._tasks + list(self._sync_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _run_shard(self, index: int, streams: List[str]):
+        symbols = [self._symbol_map[name.split('@')[0].upper()] for name in streams]
+        url = self.base_url + "/".join(streams)
+        backoff = 1.0
+        while self.running:
+            for symbol in symbols:
+                self.store.begin_sync(symbol)
+            try:
+                async with self.session.ws_connect(url, heartbeat=30) as ws:
+                    backoff = 1.0
+                    # Events are buffered by the store until each snapshot lands
+                    sync_task = asyncio.create_task(self._sync_shard(symbols))
+                    try:
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self.process_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                    finally:
+                        if not sync_task.done():
+                            sync_task.cancel()
+                        for symbol in symbols:
+                            resync = self._resyncs.get(symbol)
+                            if resync is not None:
+                                resync.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Depth stream shard {index} error: {e}")
+            if not self.running:
+                break
+            self.stats['reconnects'] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    async def _sync(self, symbols: List[str], concurrency: int = 5, attempts: int = 3) -> List[str]:
+        """
+        REST snapshot for each symbol until its buffered events connect. Returns the
+        symbols that gave up (REST error, rate limit, open breaker); their buffers are dropped.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(symbol):
+            for _ in range(attempts):
+                async with semaphore:
+                    snapshot = await self.loader.get_order_book(
+                        symbol, limit=settings.LOCAL_ORDER_BOOK_SNAPSHOT_LIMIT, use_local=False)
+                if snapshot and self.store.apply_snapshot(symbol, snapshot):
+                    return True
+                await asyncio.sleep(1.0)
+            return False
+
+        results = await asyncio.gather(*(_one(s) for s in symbols), return_exceptions=True)
+        failed = [symbol for symbol, ok in zip(symbols, results) if ok is not True]
+        for symbol in failed:
+            self.store.begin_sync(symbol)
+            self.stats['sync_failures'] += 1
+        return failed
+
+    async def _sync_shard(self, symbols: List[str]):
+        for symbol in await self._sync(symbols):
+            self._schedule_resync(symbol, delay=2.0)
+
+    def _schedule_resync(self, symbol: str, delay: float = 0.0):
+        """Starts a background resync unless one is already running or waiting for this symbol."""
+        task = self._resyncs.get(symbol)
+        if not self.running or (task is not None and not task.done()):
+            return
+        self.stats['resyncs'] += 1
+        task = asyncio.create_task(self._resync(symbol, delay))
+        self._resyncs[symbol] = task
+        self._sync_tasks.add(task)
+        task.add_done_callback(self._sync_tasks.discard)
+
+    async def _resync(self, symbol: str, delay: float = 0.0):
+        """Snapshot retries for one symbol, backing off (up to 60s) while they keep failing."""
+        while self.running:
+            if delay:
+                await asyncio.sleep(delay)
+            if not await self._sync([symbol]):
+                return
+            delay = min(max(delay * 2, 2.0), 60.0)
+
+    def process_message(self, msg: dict):
+        data = msg.get('data') if isinstance(msg, dict) else None
+        if not data or data.get('e') != 'depthUpdate':
+            return
+        symbol = self._symbol_map.get(data.get('s'))
+        if symbol is None:
+            return
+        self.stats['messages'] += 1
+        try:
+            connected = self.store.apply_event(symbol, data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Error applying depth update for {symbol}: {e}")
+            self.store.begin_sync(symbol)
+            connected = False
+        if not connected:
+            # Sequence gap or buffer overflow -> the store buffers again; fetch a fresh snapshot
+            self._schedule_resync(symbol)
+
+
+class BinanceMiniTickerStream:
+    """
+    All-market !miniTicker@arr stream feeding a TickerSnapshot, so price lookups
+    stay fresh without REST polling.
+    """
+    SPOT_URL = "wss://stream.binance.com:9443/ws/!miniTicker@arr"
+    FUTURES_URL = "wss://fstream.binance.com/ws/!miniTicker@arr"
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.url = self.FUTURES_URL if settings.TRADING_MODE == 'futures' else self.SPOT_URL
+        self.running = False
+        self.session = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if aiohttp is None:
+            logger.error("aiohttp not installed, mini ticker stream disabled")
+            return
+        self.running = True
+        self.session = aiohttp.ClientSession()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _run(self):
+        backoff = 1.0
+        while self.running:
+            try:
+                async with self.session.ws_connect(self.url, heartbeat=30) as ws:
+                    backoff = 1.0
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self.snapshot.apply_mini_tickers(json.loads(msg.data))
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Mini ticker stream error: {e}")
+            if not self.running:
+                break
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
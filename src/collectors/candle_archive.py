@@ -0,0 +1,245 @@
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from config.settings import settings
+from src.collectors.candle_store import timeframe_to_ms, TS
+from src.utils.logger import log
+
+# One raw little-endian file per column
+COLUMNS = (('timestamp', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'))
+ROW_BYTES = {name: np.dtype(dtype).itemsize for name, dtype in COLUMNS}
+
+
+class CandleArchive:
+    """
+    On-disk columnar OHLCV archive: {root}/{SYMBOL}/{timeframe}/{column}.bin
+
+    Only closed candles are stored. Writes are append-only (plus a rare full rewrite
+    when older history is prepended or a hole is filled), reads are memory-mapped and
+    sliced by timestamp. Holes (e.g. downtime longer than the restart delta) are kept
+    visible through gaps() and repaired by backfill().
+    Shared by BinanceDataLoader (warm restarts) and Backtester (offline history).
+    """
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.CANDLE_ARCHIVE_DIR
+        # (symbol, timeframe) -> last archived timestamp (None = empty)
+        self._last_ts: Dict[Tuple[str, str], Optional[int]] = {}
+
+    @staticmethod
+    def _safe(symbol: str) -> str:
+        return symbol.replace('/', '_').replace(':', '_')
+
+    def _dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.root, self._safe(symbol), timeframe)
+
+    def _path(self, directory: str, column: str) -> str:
+        return os.path.join(directory, f"{column}.bin")
+
+    def _recover(self, directory: str):
+        """Finishes an interrupted rewrite and trims columns to a common length."""
+        old_dir = directory + '.old'
+        if not os.path.isdir(directory) and os.path.isdir(old_dir):
+            os.replace(old_dir, directory)
+        elif os.path.isdir(old_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+        if not os.path.isdir(directory):
+            return 0
+        sizes = []
+        for name, _ in COLUMNS:
+            path = self._path(directory, name)
+            sizes.append(os.path.getsize(path) // ROW_BYTES[name] if os.path.exists(path) else 0)
+        rows = min(sizes)
+        if rows != max(sizes):
+            for name, _ in COLUMNS:
+                path = self._path(directory, name)
+                if os.path.exists(path):
+                    with open(path, 'r+b') as f:
+                        f.truncate(rows * ROW_BYTES[name])
+        return rows
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        return self._recover(self._dir(symbol, timeframe))
+
+    def last_ts(self, symbol: str, timeframe: str) -> Optional[int]:
+        key = (symbol, timeframe)
+        if key not in self._last_ts:
+            rows = self.count(symbol, timeframe)
+            last = None
+            if rows:
+                ts = np.memmap(self._path(self._dir(symbol, timeframe), 'timestamp'), dtype='<i8', mode='r')
+                last = int(ts[rows - 1])
+                del ts
+            self._last_ts[key] = last
+        return self._last_ts[key]
+
+    def first_ts(self, symbol: str, timeframe: str) -> Optional[int]:
+        rows = self.count(symbol, timeframe)
+        if not rows:
+            return None
+        ts = np.memmap(self._path(self._dir(symbol, timeframe), 'timestamp'), dtype='<i8', mode='r')
+        first = int(ts[0])
+        del ts
+        return first
+
+    def gaps(self, symbol: str, timeframe: str, since: Optional[int] = None,
+             until: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Missing [start, end) spans between archived candles with since <= ts < until."""
+        directory = self._dir(symbol, timeframe)
+        rows = self._recover(directory)
+        if rows < 2:
+            return []
+        ts = np.memmap(self._path(directory, 'timestamp'), dtype='<i8', mode='r', shape=(rows,))
+        lo = int(np.searchsorted(ts, since, side='left')) if since is not None else 0
+        hi = int(np.searchsorted(ts, until, side='left')) if until is not None else rows
+        window = np.array(ts[lo:hi])
+        del ts
+        tf_ms = timeframe_to_ms(timeframe)
+        breaks = np.flatnonzero(np.diff(window) > tf_ms)
+        return [(int(window[i]) + tf_ms, int(window[i + 1])) for i in breaks]
+
+    def read(self, symbol: str, timeframe: str, since: Optional[int] = None, until: Optional[int] = None,
+             limit: Optional[int] = None) -> np.ndarray:
+        """Closed candles with since <= ts < until (newest `limit` of them) as an (N, 6) float64 array."""
+        directory = self._dir(symbol, timeframe)
+        rows = self._recover(directory)
+        if not rows:
+            return np.empty((0, 6), dtype=np.float64)
+        ts = np.memmap(self._path(directory, 'timestamp'), dtype='<i8', mode='r', shape=(rows,))
+        lo = int(np.searchsorted(ts, since, side='left')) if since is not None else 0
+        hi = int(np.searchsorted(ts, until, side='left')) if until is not None else rows
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        out = np.empty((max(0, hi - lo), 6), dtype=np.float64)
+        if len(out):
+            for i, (name, dtype) in enumerate(COLUMNS):
+                col = ts if name == 'timestamp' else np.memmap(self._path(directory, name), dtype=dtype, mode='r', shape=(rows,))
+                out[:, i] = col[lo:hi]
+                del col
+        del ts
+        return out
+
+    def append(self, symbol: str, timeframe: str, rows, now_ms: Optional[int] = None) -> int:
+        """
+        Appends closed candles newer than the last archived one. Returns rows written.
+        """
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6) if len(rows) else np.empty((0, 6))
+        if not len(data):
+            return 0
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        tf_ms = timeframe_to_ms(timeframe)
+        last = self.last_ts(symbol, timeframe)
+        mask = data[:, TS] + tf_ms <= now_ms
+        if last is not None:
+            mask &= data[:, TS] > last
+        data = data[mask]
+        if not len(data):
+            return 0
+        data = data[np.argsort(data[:, TS], kind='stable')]
+        if last is not None and data[0, TS] > last + tf_ms:
+            missing = int((data[0, TS] - last) // tf_ms) - 1
+            log(f"⚠️ Candle archive gap {symbol} {timeframe}: {missing} candles missing before {int(data[0, TS])} (backfill repairs it)")
+        directory = self._dir(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        self._write_columns(directory, data, mode='ab')
+        self._last_ts[(symbol, timeframe)] = int(data[-1, TS])
+        return len(data)
+
+    def _write_columns(self, directory: str, data: np.ndarray, mode: str):
+        # Timestamp column last: a crash leaves it shortest, so _recover trims the rest to it
+        for i, (name, dtype) in reversed(list(enumerate(COLUMNS))):
+            with open(self._path(directory, name), mode) as f:
+                f.write(np.ascontiguousarray(data[:, i]).astype(dtype).tobytes())
+
+    def prepend(self, symbol: str, timeframe: str, rows) -> int:
+        """Adds history older than the first archived candle (full rewrite, swapped in atomically)."""
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        first = self.first_ts(symbol, timeframe)
+        if first is None:
+            return self.append(symbol, timeframe, data)
+        return self._merge(symbol, timeframe, data[data[:, TS] < first])
+
+    def fill(self, symbol: str, timeframe: str, rows) -> int:
+        """Adds candles missing inside the archived range (full rewrite, swapped in atomically)."""
+        data = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        last = self.last_ts(symbol, timeframe)
+        if last is None:
+            return 0
+        return self._merge(symbol, timeframe, data[data[:, TS] < last])
+
+    def _merge(self, symbol: str, timeframe: str, data: np.ndarray) -> int:
+        existing = self.read(symbol, timeframe)
+        data = data[~np.isin(data[:, TS], existing[:, TS])]
+        if not len(data):
+            return 0
+        _, unique = np.unique(data[:, TS], return_index=True)
+        data = data[unique]
+        merged = np.concatenate((data, existing))
+        merged = merged[np.argsort(merged[:, TS], kind='stable')]
+        directory = self._dir(symbol, timeframe)
+        tmp_dir, old_dir = directory + '.tmp', directory + '.old'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        self._write_columns(tmp_dir, merged, mode='wb')
+        os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return len(data)
+
+    def backfill(self, exchange, symbol: str, timeframe: str, since: int, until: Optional[int] = None,
+                 page_limit: int = 1000) -> int:
+        """
+        Makes the archive cover [since, until) with blocking exchange.fetch_ohlcv pages:
+        older history, holes inside the archived range and the newer tail.
+        Resumable: newer pages are appended as they arrive, so an interrupted run
+        continues from the last archived candle next time.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        until = until if until is not None else int(time.time() * 1000)
+        written = 0
+
+        # Older history than what we hold -> fetch [since, first) and prepend once
+        first = self.first_ts(symbol, timeframe)
+        if first is not None and since < first:
+            older = []
+            cursor = since
+            while cursor < first:
+                page = exchange.fetch_ohlcv(symbol, timeframe, cursor, limit=page_limit)
+                if not page:
+                    break
+                older.extend(r for r in page if r[0] < first)
+                if page[-1][0] + tf_ms <= cursor:
+                    break
+                cursor = page[-1][0] + tf_ms
+            written += self.prepend(symbol, timeframe, older)
+
+        # Holes left by downtime (append only ever extends the tail)
+        for start, end in self.gaps(symbol, timeframe, since=since, until=until):
+            missing = []
+            cursor = start
+            while cursor < end:
+                page = exchange.fetch_ohlcv(symbol, timeframe, cursor, limit=page_limit)
+                if not page:
+                    break
+                missing.extend(r for r in page if start <= r[0] < end)
+                if page[-1][0] + tf_ms <= cursor:
+                    break
+                cursor = page[-1][0] + tf_ms
+            written += self.fill(symbol, timeframe, missing)
+
+        last = self.last_ts(symbol, timeframe)
+        cursor = since if last is None else max(since, last + tf_ms)
+        while cursor < until:
+            page = exchange.fetch_ohlcv(symbol, timeframe, cursor, limit=page_limit)
+            if not page:
+                break
+            written += self.append(symbol, timeframe, page)
+            next_cursor = page[-1][0] + tf_ms
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+        if written:
+            log(f"💾 Candle archive {symbol} {timeframe}: +{written} candles")
+        return written
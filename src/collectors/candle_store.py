@@ -0,0 +1,194 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+import ccxt
+import numpy as np
+from config.settings import settings
+
+# Column layout of every stored row (same as CCXT OHLCV)
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+def timeframe_to_ms(timeframe: str) -> int:
+    return int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+
+
+class CandleRingBuffer:
+    """
+    Fixed-capacity OHLCV buffer (capacity x 6 float64).
+    Rows are kept in chronological order; once full, the oldest row is overwritten.
+    """
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros((capacity, 6), dtype=np.float64)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _index(self, i: int) -> int:
+        return (self._start + i) % self.capacity
+
+    @property
+    def last_ts(self) -> Optional[int]:
+        if self._size == 0:
+            return None
+        return int(self._data[self._index(self._size - 1), TS])
+
+    @property
+    def first_ts(self) -> Optional[int]:
+        if self._size == 0:
+            return None
+        return int(self._data[self._start, TS])
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def append(self, row):
+        if self._size < self.capacity:
+            self._data[self._index(self._size)] = row
+            self._size += 1
+        else:
+            self._data[self._start] = row
+            self._start = (self._start + 1) % self.capacity
+
+    def update_last(self, row):
+        self._data[self._index(self._size - 1)] = row
+
+    def merge(self, rows) -> int:
+        """
+        Merges chronologically sorted rows: a row with the last stored timestamp
+        replaces it in place (still-forming candle), newer rows are appended and
+        older rows are ignored. Returns the number of appended rows.
+        """
+        appended = 0
+        for row in rows:
+            ts = row[TS]
+            last = self.last_ts
+            if last is None or ts > last:
+                self.append(row)
+                appended += 1
+            elif ts == last:
+                self.update_last(row)
+        return appended
+
+    def to_array(self, limit: Optional[int] = None) -> np.ndarray:
+        """Chronological copy of the newest `limit` rows."""
+        n = self._size if limit is None else max(0, min(limit, self._size))
+        if n == 0:
+            return np.empty((0, 6), dtype=np.float64)
+        begin = self._index(self._size - n)
+        end = begin + n
+        if end <= self.capacity:
+            return self._data[begin:end].copy()
+        return np.concatenate((self._data[begin:], self._data[:end - self.capacity]))
+
+    def tail(self, limit: Optional[int] = None) -> List[List]:
+        rows = self.to_array(limit).tolist()
+        for row in rows:
+            row[TS] = int(row[TS])
+        return rows
+
+
+class CandleStore:
+    """
+    Per-(symbol, timeframe) candle buffers used by BinanceDataLoader for delta fetching.
+
+    delta_since() tells the loader whether it can fetch only the candles newer than
+    the last stored one (returns the `since` timestamp) or needs a full refetch (None).
+    """
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or settings.CANDLE_STORE_CAPACITY
+        self._buffers: Dict[Tuple[str, str], CandleRingBuffer] = {}
+        # (symbol, timeframe) -> last time a live stream update was merged
+        self._live: Dict[Tuple[str, str], float] = {}
+        # (symbol, timeframe) -> last time the buffer was brought up to date (REST or stream)
+        self._updated: Dict[Tuple[str, str], float] = {}
+        self.stats = {'full': 0, 'delta': 0, 'gap_resync': 0, 'stream': 0, 'resampled': 0}
+
+    def get(self, symbol: str, timeframe: str) -> Optional[CandleRingBuffer]:
+        return self._buffers.get((symbol, timeframe))
+
+    def delta_since(self, symbol: str, timeframe: str, limit: int, now_ms: Optional[int] = None) -> Optional[int]:
+        buffer = self.get(symbol, timeframe)
+        if buffer is None or len(buffer) < limit or limit > self.capacity:
+            return None
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        missing = (now_ms - buffer.last_ts) // timeframe_to_ms(timeframe) + 1
+        # Too far behind for a single delta request -> cheaper to refetch
+        if missing > limit:
+            return None
+        return buffer.last_ts
+
+    def replace(self, symbol: str, timeframe: str, rows: List[List]):
+        self.put(symbol, timeframe, rows)
+        self._updated[(symbol, timeframe)] = time.time()
+        self.stats['full'] += 1
+
+    def put(self, symbol: str, timeframe: str, rows):
+        """Overwrites the buffer contents without touching freshness/stats."""
+        buffer = self._buffers.get((symbol, timeframe))
+        if buffer is None:
+            buffer = CandleRingBuffer(self.capacity)
+            self._buffers[(symbol, timeframe)] = buffer
+        buffer.clear()
+        buffer.merge(rows)
+
+    def is_fresh(self, symbol: str, timeframe: str, max_age: float) -> bool:
+        """True if the buffer was updated (REST or live stream) within max_age seconds."""
+        if self.is_live(symbol, timeframe):
+            return True
+        updated = self._updated.get((symbol, timeframe))
+        return updated is not None and time.time() - updated <= max_age
+
+    def merge_delta(self, symbol: str, timeframe: str, rows: List[List]) -> bool:
+        """
+        Merges a delta response. Returns False if it does not connect to the stored
+        candles (gap), in which case the caller should do a full refetch.
+        """
+        buffer = self.get(symbol, timeframe)
+        if buffer is None or len(buffer) == 0:
+            return False
+        if rows and rows[0][TS] > buffer.last_ts + timeframe_to_ms(timeframe):
+            self.stats['gap_resync'] += 1
+            return False
+        buffer.merge(rows)
+        self._updated[(symbol, timeframe)] = time.time()
+        self.stats['delta'] += 1
+        return True
+
+    def merge_stream(self, symbol: str, timeframe: str, row: List) -> bool:
+        """
+        Merges a single streamed candle. Returns False (and drops the live flag) if the
+        buffer is empty or the candle does not connect, so a REST gap-fill is needed.
+        """
+        buffer = self.get(symbol, timeframe)
+        if buffer is None or len(buffer) == 0 or row[TS] > buffer.last_ts + timeframe_to_ms(timeframe):
+            self.mark_live(symbol, timeframe, False)
+            return False
+        buffer.merge((row,))
+        self.stats['stream'] += 1
+        self.mark_live(symbol, timeframe, True)
+        return True
+
+    def mark_live(self, symbol: str, timeframe: str, live: bool = True):
+        if live:
+            self._live[(symbol, timeframe)] = time.time()
+        else:
+            self._live.pop((symbol, timeframe), None)
+
+    def is_live(self, symbol: str, timeframe: str, max_age: Optional[float] = None) -> bool:
+        """True if a stream has kept this buffer up to date recently."""
+        updated = self._live.get((symbol, timeframe))
+        if updated is None:
+            return False
+        max_age = max_age if max_age is not None else settings.KLINE_STREAM_STALE_SEC
+        return time.time() - updated <= max_age
+
+    def tail(self, symbol: str, timeframe: str, limit: int) -> List[List]:
+        buffer = self.get(symbol, timeframe)
+        return buffer.tail(limit) if buffer is not None else []
@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Optional
+
+import ccxt
+from config.settings import settings
+from src.utils.logger import log
+from src.utils.rate_limiter import BinanceRateLimiter, request_weight
+
+try:
+    import aiohttp
+    import ccxt.async_support as ccxt_async
+except ImportError:
+    aiohttp = None
+    ccxt_async = None
+
+
+def async_backend_available() -> bool:
+    return ccxt_async is not None and aiohttp is not None
+
+
+def create_exchange(config: Dict, backend: Optional[str] = None):
+    """
+    Creates the Binance client used by both the data loader and the executor.
+
+    backend='async' -> ccxt.async_support client (ccxt opens its own aiohttp session on first request)
+    backend='sync'  -> classic ccxt.binance (calls are pushed to worker threads)
+    """
+    backend = (backend or settings.EXCHANGE_BACKEND or 'sync').lower()
+    if backend == 'async':
+        if async_backend_available():
+            return ccxt_async.binance(dict(config))
+        log("⚠️ Async exchange backend unavailable (ccxt.async_support/aiohttp missing), using sync ccxt.")
+    return ccxt.binance(dict(config))
+
+
+def is_async_exchange(exchange) -> bool:
+    return ccxt_async is not None and isinstance(exchange, ccxt_async.Exchange)
+
+
+def sync_twin(exchange):
+    """
+    Returns a blocking ccxt client mirroring an async one, for legacy synchronous
+    call sites that cannot await. Non-async exchanges are returned unchanged.
+    """
+    if not is_async_exchange(exchange):
+        return exchange
+    twin = getattr(exchange, '_sync_twin', None)
+    if twin is None:
+        twin = ccxt.binance({
+            'apiKey': exchange.apiKey,
+            'secret': exchange.secret,
+            'enableRateLimit': True,
+            'timeout': exchange.timeout,
+            'verify': exchange.verify,
+            'options': {'defaultType': exchange.options.get('defaultType', 'spot')},
+        })
+        if exchange.markets:
+            twin.set_markets(exchange.markets, exchange.currencies)
+        exchange._sync_twin = twin
+    return twin
+
+
+def attach_rate_limiter(exchange, limiter) -> None:
+    """
+    Routes every exchange_call on this client through a BinanceRateLimiter.
+    ccxt's own fixed-cost throttle is turned off, the limiter accounts real weights.
+    """
+    if exchange is None:
+        return
+    exchange._rate_limiter = limiter
+    if limiter is not None:
+        exchange.enableRateLimit = False
+
+
+def _sync_rate_limiter(limiter, exchange, error: Optional[Exception] = None) -> None:
+    headers = getattr(exchange, 'last_response_headers', None)
+    limiter.update_from_headers(headers)
+    if error is not None:
+        retry_after = None
+        if headers:
+            retry_after = headers.get('Retry-After') or headers.get('retry-after')
+        limiter.penalize(retry_after)
+
+
+def _is_native_async(func: Callable) -> bool:
+    if inspect.iscoroutinefunction(func):
+        return True
+    # ccxt implicit API methods (sapi_get_...) are plain functions returning coroutines
+    return is_async_exchange(getattr(func, '__self__', None))
+
+
+async def exchange_call(func: Callable, *args, breaker=None, **kwargs) -> Any:
+    """
+    Calls an exchange method regardless of backend.
+    Async clients are awaited directly on the event loop; sync clients run in a worker thread.
+    If a CircuitBreaker is given, the call goes through it. If the client has a rate
+    limiter attached, the call's Binance weight is charged first and usage headers synced after.
+    """
+    exchange = getattr(func, '__self__', None)
+    limiter = getattr(exchange, '_rate_limiter', None)
+    if not isinstance(limiter, BinanceRateLimiter):
+        return await _dispatch(func, args, kwargs, breaker)
+
+    weight, orders = request_weight(getattr(func, '__name__', ''), args, kwargs, limiter.market)
+    await limiter.acquire(weight, orders)
+    try:
+        result = await _dispatch(func, args, kwargs, breaker)
+    except (ccxt.RateLimitExceeded, ccxt.DDoSProtection) as e:
+        _sync_rate_limiter(limiter, exchange, error=e)
+        raise
+    _sync_rate_limiter(limiter, exchange)
+    return result
+
+
+async def _dispatch(func: Callable, args, kwargs, breaker) -> Any:
+    if _is_native_async(func):
+        if breaker is not None:
+            return await breaker.call_async(func, *args, **kwargs)
+        return await func(*args, **kwargs)
+
+    if breaker is not None:
+        result = await asyncio.to_thread(breaker.call, func, *args, **kwargs)
+    else:
+        result = await asyncio.to_thread(func, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def close_exchange(exchange) -> None:
+    if is_async_exchange(exchange):
+        try:
+            await exchange.close()
+        except Exception as e:
+            log(f"⚠️ Exchange close error: {e}")
@@ -0,0 +1,212 @@
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+
+
+class LocalOrderBook:
+    """
+    L2 book of one symbol kept in sorted price arrays.
+
+    Each side is a pair of parallel lists (price key, qty) ordered best-first; bids use
+    the negated price as key so both sides sort ascending. A level update finds its slot
+    with a binary search (O(log n)); qty 0 removes the level.
+    """
+    __slots__ = ('symbol', 'last_update_id', 'updated_at', 'max_levels', 'streaming', '_keys', '_qty')
+
+    def __init__(self, symbol: str, max_levels: int = 1000):
+        self.symbol = symbol
+        self.last_update_id = 0
+        self.updated_at = 0.0
+        self.max_levels = max_levels
+        # False until the first stream event after the snapshot has been applied
+        self.streaming = False
+        self._keys = {'bids': [], 'asks': []}
+        self._qty = {'bids': [], 'asks': []}
+
+    def load_snapshot(self, bids: List, asks: List, last_update_id: int):
+        for side, levels in (('bids', bids), ('asks', asks)):
+            sign = -1.0 if side == 'bids' else 1.0
+            pairs = sorted((sign * float(p), float(q)) for p, q, *_ in levels if float(q) > 0)
+            self._keys[side] = [k for k, _ in pairs]
+            self._qty[side] = [q for _, q in pairs]
+        self.last_update_id = int(last_update_id)
+        self.updated_at = time.monotonic()
+
+    def update(self, side: str, price: float, qty: float):
+        keys, qtys = self._keys[side], self._qty[side]
+        key = -price if side == 'bids' else price
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if qty > 0:
+                qtys[i] = qty
+            else:
+                del keys[i]
+                del qtys[i]
+        elif qty > 0 and i < self.max_levels:
+            keys.insert(i, key)
+            qtys.insert(i, qty)
+            if len(keys) > self.max_levels:
+                keys.pop()
+                qtys.pop()
+
+    def apply(self, bids: List, asks: List, final_update_id: int):
+        for side, levels in (('bids', bids), ('asks', asks)):
+            for level in levels:
+                self.update(side, float(level[0]), float(level[1]))
+        self.last_update_id = int(final_update_id)
+        self.updated_at = time.monotonic()
+
+    def top(self, side: str, n: int) -> np.ndarray:
+        """(n, 2) array of [price, qty], best level first."""
+        keys, qtys = self._keys[side][:n], self._qty[side][:n]
+        out = np.empty((len(keys), 2))
+        out[:, 0] = keys
+        out[:, 1] = qtys
+        if side == 'bids':
+            out[:, 0] *= -1.0
+        return out
+
+    def best_bid(self) -> Optional[float]:
+        return -self._keys['bids'][0] if self._keys['bids'] else None
+
+    def best_ask(self) -> Optional[float]:
+        return self._keys['asks'][0] if self._keys['asks'] else None
+
+    def spread_pct(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None or bid <= 0:
+            return None
+        return (ask - bid) / bid * 100
+
+    def depth(self, side: str, bps: float) -> float:
+        """Quote notional resting within `bps` of mid on one side."""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return 0.0
+        mid = (bid + ask) / 2
+        keys, qtys = self._keys[side], self._qty[side]
+        if side == 'bids':
+            end = bisect_right(keys, -mid * (1 - bps / 10000))
+        else:
+            end = bisect_right(keys, mid * (1 + bps / 10000))
+        return float(sum(abs(k) * q for k, q in zip(keys[:end], qtys[:end])))
+
+    def __len__(self) -> int:
+        return len(self._keys['bids']) + len(self._keys['asks'])
+
+
+class OrderBookStore:
+    """
+    Local order books of the subscribed symbols, following Binance's diff-depth protocol:
+    buffer stream events, load a REST snapshot (lastUpdateId), drop events it already
+    covers, then apply events in sequence. A sequence gap marks the book for resync.
+
+    Readers (loader.get_order_book, the executor's maker pricing) only see books that are
+    synced and fresh; otherwise they fall back to REST.
+    """
+    def __init__(self, max_levels: Optional[int] = None, max_age: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.max_levels = int(max_levels if max_levels is not None else settings.LOCAL_ORDER_BOOK_SNAPSHOT_LIMIT)
+        self.max_age = float(max_age if max_age is not None else settings.LOCAL_ORDER_BOOK_STALE_SEC)
+        self.max_pending = int(max_pending if max_pending is not None else settings.LOCAL_ORDER_BOOK_MAX_PENDING)
+        self.books: Dict[str, LocalOrderBook] = {}
+        # symbol -> events received before the snapshot arrived (None = synced)
+        self._pending: Dict[str, Optional[List[Dict]]] = {}
+        self.stats = {'events': 0, 'snapshots': 0, 'gaps': 0, 'reads': 0, 'overflows': 0}
+
+    def begin_sync(self, symbol: str):
+        """Starts buffering a symbol's events; its book is unavailable until the next snapshot."""
+        self._pending[symbol] = []
+
+    def needs_snapshot(self, symbol: str) -> bool:
+        return self._pending.get(symbol) is not None
+
+    def is_synced(self, symbol: str) -> bool:
+        return symbol in self._pending and self._pending[symbol] is None and symbol in self.books
+
+    def apply_snapshot(self, symbol: str, snapshot: Dict) -> bool:
+        """
+        Seeds the book from a REST snapshot (ccxt order book with 'nonce' = lastUpdateId)
+        and replays the buffered events. Returns False if the buffer does not connect.
+        """
+        last_update_id = snapshot.get('nonce')
+        if last_update_id is None:
+            return False
+        book = LocalOrderBook(symbol, self.max_levels)
+        book.load_snapshot(snapshot.get('bids') or [], snapshot.get('asks') or [], last_update_id)
+        buffered = self._pending.get(symbol) or []
+        self.books[symbol] = book
+        self._pending[symbol] = None
+        self.stats['snapshots'] += 1
+        for event in buffered:
+            if not self.apply_event(symbol, event):
+                return False
+        return True
+
+    def apply_event(self, symbol: str, event: Dict) -> bool:
+        """
+        Applies one depthUpdate event (U first id, u final id, pu previous final id on
+        futures). Returns False on a sequence gap, or when the pre-snapshot buffer is
+        full (the snapshot is not arriving); the book is then resynced.
+        """
+        self.stats['events'] += 1
+        pending = self._pending.get(symbol)
+        if pending is not None or symbol not in self._pending:
+            if pending is None:
+                self._pending[symbol] = pending = []
+            if len(pending) >= self.max_pending:
+                # Older events are useless to the next snapshot anyway; restart the buffer
+                self.stats['overflows'] += 1
+                self._pending[symbol] = [event]
+                return False
+            pending.append(event)
+            return True
+
+        book = self.books[symbol]
+        first, final = int(event['U']), int(event['u'])
+        last = book.last_update_id
+        if final < last:
+            return True  # already covered by the snapshot
+        if not book.streaming:
+            # First event after the snapshot must straddle lastUpdateId
+            connected = first <= last + 1
+        elif 'pu' in event:
+            connected = int(event['pu']) == last
+        else:
+            connected = first == last + 1
+        if not connected:
+            return self._gap(symbol)
+        book.apply(event.get('b') or [], event.get('a') or [], final)
+        book.streaming = True
+        return True
+
+    def _gap(self, symbol: str) -> bool:
+        self.stats['gaps'] += 1
+        self.begin_sync(symbol)
+        return False
+
+    def get(self, symbol: str) -> Optional[LocalOrderBook]:
+        """The symbol's book if it is synced and was updated within max_age seconds."""
+        if not self.is_synced(symbol):
+            return None
+        book = self.books[symbol]
+        if time.monotonic() - book.updated_at > self.max_age:
+            return None
+        return book
+
+    def order_book(self, symbol: str, limit: int = 50) -> Optional[Dict]:
+        """ccxt-shaped {'bids', 'asks'} with (limit, 2) arrays, for OrderBookAnalyzer / the executor."""
+        book = self.get(symbol)
+        if book is None:
+            return None
+        self.stats['reads'] += 1
+        return {
+            'symbol': symbol,
+            'bids': book.top('bids', limit),
+            'asks': book.top('asks', limit),
+            'nonce': book.last_update_id,
+        }
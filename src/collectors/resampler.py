@@ -0,0 +1,69 @@
+import numpy as np
+
+from src.collectors.candle_store import timeframe_to_ms, TS, OPEN, HIGH, LOW, CLOSE, VOLUME
+
+DAY_MS = 86400000
+# Binance weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * DAY_MS
+
+
+def can_resample(source_tf: str, target_tf: str) -> bool:
+    """True if target candles are whole multiples of source candles with exchange alignment."""
+    if target_tf.endswith('M') or source_tf.endswith('M'):
+        return False  # Calendar months are not fixed-length
+    try:
+        source_ms = timeframe_to_ms(source_tf)
+        target_ms = timeframe_to_ms(target_tf)
+    except Exception:
+        return False
+    return target_ms > source_ms and target_ms % source_ms == 0
+
+
+def bucket_starts(timestamps: np.ndarray, target_tf: str) -> np.ndarray:
+    """Open time of the exchange-aligned target candle containing each timestamp (UTC)."""
+    ts = np.asarray(timestamps, dtype=np.int64)
+    target_ms = timeframe_to_ms(target_tf)
+    offset = WEEK_OFFSET_MS if target_tf.endswith('w') else 0
+    return ts - (ts - offset) % target_ms
+
+
+def resample_ohlcv(rows, source_tf: str, target_tf: str) -> np.ndarray:
+    """
+    Aggregates source candles (N x 6, chronological) into target candles.
+
+    Only buckets backed by a contiguous run of source candles are returned: the leading
+    bucket is dropped if history starts mid-bucket, and anything up to the last gap is
+    dropped. The trailing bucket may be partial (still forming), like the exchange's.
+    """
+    if not can_resample(source_tf, target_tf):
+        raise ValueError(f"Cannot resample {source_tf} -> {target_tf}")
+    data = np.asarray(rows, dtype=np.float64)
+    if data.ndim != 2 or len(data) == 0:
+        return np.empty((0, 6), dtype=np.float64)
+
+    source_ms = timeframe_to_ms(source_tf)
+    per_bucket = timeframe_to_ms(target_tf) // source_ms
+    ts = data[:, TS].astype(np.int64)
+
+    # Keep only the part after the last gap in the source series
+    gaps = np.flatnonzero(np.diff(ts) != source_ms)
+    if len(gaps):
+        cut = gaps[-1] + 1
+        data, ts = data[cut:], ts[cut:]
+
+    buckets = bucket_starts(ts, target_tf)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    counts = np.diff(np.concatenate((starts, [len(ts)])))
+
+    out = np.empty((len(starts), 6), dtype=np.float64)
+    out[:, TS] = buckets[starts]
+    out[:, OPEN] = data[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(data[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(data[:, LOW], starts)
+    out[:, CLOSE] = data[np.concatenate((starts[1:], [len(ts)])) - 1, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(data[:, VOLUME], starts)
+
+    # Source is contiguous, so only the leading bucket can be incomplete (history starts mid-bucket)
+    if ts[0] != buckets[0] or (len(starts) > 1 and counts[0] != per_bucket):
+        out = out[1:]
+    return out
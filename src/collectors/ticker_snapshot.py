@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from config.settings import settings
+from src.collectors.exchange_client import exchange_call
+from src.utils.logger import log
+
+
+class TickerSnapshot:
+    """
+    Shared view of all tickers for the current cycle.
+
+    One bulk fetch_tickers serves every price lookup until the snapshot is older than
+    the freshness budget; concurrent callers wait for the same fetch. When the
+    !miniTicker@arr stream feeds it (apply_mini_tickers), REST is not needed at all.
+    """
+    def __init__(self, exchange=None, max_age: Optional[float] = None, market_type: Optional[str] = None):
+        self.exchange = exchange
+        # 'spot' or 'futures': which CCXT symbols the stream's market ids map to
+        self.market_type = market_type or settings.TRADING_MODE
+        self.max_age = max_age if max_age is not None else settings.TICKER_SNAPSHOT_MAX_AGE_SEC
+        self._tickers: Dict[str, Dict] = {}
+        self._fetched_at = 0.0
+        self._stream_at = 0.0
+        self._lock = asyncio.Lock()
+        # Binance market id (BTCUSDT) -> CCXT symbol (BTC/USDT, or BTC/USDT:USDT in futures mode)
+        self._id_map: Dict[str, str] = {}
+        self.stats = {'bulk_fetches': 0, 'single_fetches': 0, 'lookups': 0, 'stream_updates': 0}
+
+    def is_fresh(self) -> bool:
+        # The stream only patches a bulk baseline, so it can't make an empty snapshot fresh
+        if self._fetched_at == 0.0:
+            return False
+        now = time.monotonic()
+        return now - max(self._fetched_at, self._stream_at) <= self.max_age
+
+    def invalidate(self):
+        """Forces the next lookup to refetch (e.g. at the start of a cycle)."""
+        self._fetched_at = 0.0
+        self._stream_at = 0.0
+
+    async def refresh(self, force: bool = False) -> Dict[str, Dict]:
+        if not force and self._tickers and self.is_fresh():
+            return self._tickers
+        async with self._lock:
+            # Another caller may have refreshed while we waited
+            if not force and self._tickers and self.is_fresh():
+                return self._tickers
+            tickers = await exchange_call(self.exchange.fetch_tickers)
+            self._tickers = dict(tickers or {})
+            self._fetched_at = time.monotonic()
+            self.stats['bulk_fetches'] += 1
+        return self._tickers
+
+    async def get_all(self) -> Dict[str, Dict]:
+        self.stats['lookups'] += 1
+        return await self.refresh()
+
+    async def get(self, symbol: str) -> Optional[Dict]:
+        tickers = await self.get_all()
+        ticker = tickers.get(symbol)
+        if ticker is None:
+            # Not part of the bulk response (other market type / new listing): single fetch once
+            try:
+                ticker = await exchange_call(self.exchange.fetch_ticker, symbol)
+                self.stats['single_fetches'] += 1
+            except Exception as e:
+                log(f"⚠️ Ticker bulunamadı ({symbol}): {e}")
+                return None
+            if ticker:
+                self._tickers[symbol] = ticker
+        return ticker
+
+    async def get_price(self, symbol: str) -> float:
+        ticker = await self.get(symbol)
+        if not ticker or ticker.get('last') is None:
+            return 0.0
+        return float(ticker['last'])
+
+    def _symbol_for(self, market_id: str) -> Optional[str]:
+        if not self._id_map:
+            markets = getattr(self.exchange, 'markets', None) or {}
+            # Spot and perpetual markets share ids; keep the ones the executor trades
+            futures = self.market_type == 'futures'
+            self._id_map = {m.get('id'): s for s, m in markets.items() if m.get('id') and (':' in s) == futures}
+        return self._id_map.get(market_id)
+
+    def apply_mini_tickers(self, payload):
+        """
+        Merges a !miniTicker@arr payload (list of 24h mini tickers) into the snapshot.
+        Only a payload that updated at least one ticker counts towards freshness.
+        """
+        updated = 0
+        for item in payload or []:
+            try:
+                symbol = self._symbol_for(item['s'])
+                if symbol is None:
+                    continue
+                ticker = self._tickers.setdefault(symbol, {'symbol': symbol})
+                ticker.update({
+                    'last': float(item['c']),
+                    'close': float(item['c']),
+                    'open': float(item['o']),
+                    'high': float(item['h']),
+                    'low': float(item['l']),
+                    'baseVolume': float(item['v']),
+                    'quoteVolume': float(item['q']),
+                    'timestamp': int(item['E']),
+                })
+                updated += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+        if not updated:
+            return
+        self._stream_at = time.monotonic()
+        self.stats['stream_updates'] += 1
@@ -55,6 +55,7 @@ def resolve_state_file():
 STATE_FILE = resolve_state_file()
 LEARNING_FILE = "data/learning_data.json"
 LOG_FILE = os.getenv("LOG_FILE", "data/bot_activity.log")
+CORRELATION_FILE = os.getenv("CORRELATION_MATRIX_FILE", "data/correlation_matrix.json")
 
 def ensure_state_file(path: str):
     try:
@@ -681,7 +682,36 @@ else:
     else:
         st.info("Geçmiş işlem veya emir bulunamadı.")
 
-    # 4. Live Logs
+    # 4. Correlation Matrix (written by the bot's correlation engine each cycle)
+    st.markdown("---")
+    st.subheader("🔗 Korelasyon Matrisi (Getiriler)")
+    corr_data = load_json(CORRELATION_FILE)
+    if corr_data and corr_data.get('symbols'):
+        corr_symbols = corr_data['symbols']
+        df_corr = pd.DataFrame(corr_data['matrix'], index=corr_symbols, columns=corr_symbols, dtype=float)
+        updated = datetime.fromtimestamp(corr_data.get('updated_at', 0)).strftime('%Y-%m-%d %H:%M:%S')
+        st.caption(f"{len(corr_symbols)} sembol | {corr_data.get('timeframe')} x {corr_data.get('window')} mum | Son Güncelleme: {updated}")
+
+        held_symbols = [s for s in positions if s in df_corr.index] if positions else []
+        if held_symbols:
+            st.write("**Portföy Korelasyonları**")
+            st.dataframe(df_corr.loc[held_symbols, held_symbols].round(2), use_container_width=True)
+
+        pairs = df_corr.where(pd.DataFrame(
+            [[i < j for j in range(len(corr_symbols))] for i in range(len(corr_symbols))],
+            index=corr_symbols, columns=corr_symbols
+        )).stack()
+        top_pairs = pairs.sort_values(ascending=False).head(20).reset_index()
+        top_pairs.columns = ['Sembol 1', 'Sembol 2', 'Korelasyon']
+        st.write("**En Yüksek Korelasyonlu Çiftler**")
+        st.dataframe(top_pairs.round(3), use_container_width=True)
+
+        with st.expander("Tam Matris", expanded=False):
+            st.dataframe(df_corr.round(2), use_container_width=True, height=500)
+    else:
+        st.info("Korelasyon matrisi henüz oluşturulmadı.")
+
+    # 5. Live Logs
     st.markdown("---")
     st.subheader("📝 Canlı Loglar")
     
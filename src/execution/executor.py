@@ -7,17 +7,25 @@ from datetime import datetime
 from typing import Dict, Optional, Union, List, Any
 from binance.error import ClientError
 from src.utils.logger import log
+from src.collectors.exchange_client import exchange_call
+from src.collectors.ticker_snapshot import TickerSnapshot
+from src.collectors.order_book import OrderBookStore
 from src.utils.state_manager import StateManager
 from src.utils.exceptions import BotError, InsufficientBalanceError, ExchangeError
 from src.learning.brain import BotBrain
-from src.strategies.analyzer import TradeSignal
+from src.strategies.analyzer import ScanSignal, TradeSignal
 from src.execution.stop_loss_manager import StopLossManager
 from src.risk.position_sizer import PositionSizer
 from config.settings import settings
 
 class BinanceExecutor:
-    def __init__(self, exchange_client=None, is_tr: bool = False):
+    def __init__(self, exchange_client=None, is_tr: bool = False, ticker_snapshot: Optional[TickerSnapshot] = None,
+                 order_books: Optional[OrderBookStore] = None):
         self.exchange_spot = exchange_client
+        # Shared with the loader so one bulk fetch_tickers serves the whole cycle
+        self.tickers = ticker_snapshot or (TickerSnapshot(exchange_client) if exchange_client else None)
+        # Local L2 books (diff-depth stream); maker pricing skips the REST depth call when synced
+        self.order_books = order_books
         self.is_live = settings.LIVE_TRADING
         self.state_manager = StateManager(filepath=settings.STATE_FILE, stats_filepath=settings.STATS_FILE)
         self.brain = BotBrain()
@@ -135,7 +143,7 @@ class BinanceExecutor:
                          # settings.SYMBOLS might be BTC_TRY or BTC/USDT.
                          # If TR, it's BTC_TRY. If Global, likely BTC/USDT.
                          # We assume symbols are correct for the mode.
-                         await asyncio.to_thread(self.exchange_spot.set_leverage, settings.LEVERAGE, symbol)
+                         await exchange_call(self.exchange_spot.set_leverage, settings.LEVERAGE, symbol)
                      except Exception as e:
                          # Ignore symbol errors (might be invalid symbol)
                          pass
@@ -162,7 +170,7 @@ class BinanceExecutor:
             
             # 1. Get Positions
             # GET /sapi/v1/simple-earn/flexible/position
-            positions = await asyncio.to_thread(
+            positions = await exchange_call(
                 self.exchange_spot.sapi_get_simple_earn_flexible_position,
                 {'size': 100}
             )
@@ -186,7 +194,7 @@ class BinanceExecutor:
                 try:
                     # POST /sapi/v1/simple-earn/flexible/redeem
                     # API Error -1102 said 'amount' was missing, so we use 'amount' instead of 'redeemAmount'
-                    await asyncio.to_thread(
+                    await exchange_call(
                         self.exchange_spot.sapi_post_simple_earn_flexible_redeem,
                         {
                             'productId': product_id,
@@ -214,7 +222,7 @@ class BinanceExecutor:
         """
         try:
             # 1. Get Funding Balance
-            funding_balance = await asyncio.to_thread(self.exchange_spot.fetch_balance, {'type': 'funding'})
+            funding_balance = await exchange_call(self.exchange_spot.fetch_balance, {'type': 'funding'})
             total = funding_balance.get('total', {})
             
             transferred_count = 0
@@ -224,7 +232,7 @@ class BinanceExecutor:
                     try:
                         # POST /sapi/v1/asset/transfer
                         # type: FUNDING_MAIN
-                        await asyncio.to_thread(
+                        await exchange_call(
                             self.exchange_spot.sapi_post_asset_transfer,
                             {
                                 'type': 'FUNDING_MAIN',
@@ -258,11 +266,11 @@ class BinanceExecutor:
             log("🧹 Scanning for dust assets to convert to BNB...")
             
             # 1. Get Balances
-            balance_data = await asyncio.to_thread(self.exchange_spot.fetch_balance)
+            balance_data = await exchange_call(self.exchange_spot.fetch_balance)
             balances = balance_data.get('total', {})
             
             # 2. Get Tickers for Valuation
-            tickers = await asyncio.to_thread(self.exchange_spot.fetch_tickers)
+            tickers = await self.tickers.get_all()
             
             dust_candidates = []
             
@@ -310,7 +318,7 @@ class BinanceExecutor:
             
             # 3. Call API
             # Binance API expects 'asset': ['BTC', 'ETH']
-            response = await asyncio.to_thread(
+            response = await exchange_call(
                 self.exchange_spot.sapi_post_asset_dust,
                 {'asset': dust_candidates}
             )
@@ -379,13 +387,11 @@ class BinanceExecutor:
                 # Güncel fiyatı al (Değer kontrolü ve entry_price için)
                 current_price = 0.0
                 try:
-                    # Mevcut ticker varsa kullan, yoksa fetch
-                    # Ticker fetch maliyetli olabilir, bu yüzden sadece gerektiğinde
-                    ticker = await asyncio.to_thread(self.exchange_spot.fetch_ticker, symbol)
-                    current_price = float(ticker['last'])
-                except:
+                    # Döngü snapshot'ından okunur; bulk yanıtta yoksa tekil fetch yapılır
+                    current_price = await self.tickers.get_price(symbol)
+                except Exception:
                     # Ticker bulunamadıysa (örn delist olmuş veya yanlış pair), geç
-                    continue 
+                    continue
 
                 if current_price <= 0: continue
 
@@ -432,7 +438,7 @@ class BinanceExecutor:
                 return 0.0
 
             if not self.exchange_spot: return 0.0
-            balance = await asyncio.to_thread(self.exchange_spot.fetch_balance)
+            balance = await exchange_call(self.exchange_spot.fetch_balance)
             return float(balance.get('free', {}).get('USDT' if asset == 'TRY' else asset, 0.0))
 
         except Exception as e:
@@ -452,7 +458,7 @@ class BinanceExecutor:
             await self.transfer_funding_to_spot()
 
             # Global için ccxt fetch_balance
-            balance_data = await asyncio.to_thread(self.exchange_spot.fetch_balance)
+            balance_data = await exchange_call(self.exchange_spot.fetch_balance)
 
             wallet_assets = {}
             total_try_balance = 0.0
@@ -507,7 +513,7 @@ class BinanceExecutor:
             # Global Binance (ccxt)
             if not self.exchange_spot:
                 return 0.0
-            balance = await asyncio.to_thread(self.exchange_spot.fetch_balance)
+            balance = await exchange_call(self.exchange_spot.fetch_balance)
             usdt_total = float(balance.get('total', {}).get('USDT', 0.0))
             
             # Add value of other assets in paper_positions
@@ -547,7 +553,7 @@ class BinanceExecutor:
                 if self.is_live and settings.TRADING_MODE == 'futures':
                     try:
                         log(f"⚙️ Sniper Modu: Kaldıraç Ayarlanıyor ({symbol}): {current_leverage}x")
-                        await asyncio.to_thread(self.exchange_spot.set_leverage, current_leverage, symbol)
+                        await exchange_call(self.exchange_spot.set_leverage, current_leverage, symbol)
                     except Exception as e:
                         log(f"⚠️ Kaldıraç ayarlama hatası: {e}")
                 
@@ -578,7 +584,7 @@ class BinanceExecutor:
                     try:
                         # Mevcut kaldıracı kontrol etmek pahalı olabilir, direkt set ediyoruz
                         log(f"⚙️ Kaldıraç Ayarlanıyor ({symbol}): {target_leverage}x (Volatilite: %{params['volatility_pct']:.2f})")
-                        await asyncio.to_thread(self.exchange_spot.set_leverage, target_leverage, symbol)
+                        await exchange_call(self.exchange_spot.set_leverage, target_leverage, symbol)
                     except Exception as e:
                         log(f"⚠️ Kaldıraç ayarlama hatası: {e}")
                 
@@ -683,7 +689,7 @@ class BinanceExecutor:
             # Global / CCXT
             if self.exchange_spot:
                 if not self.exchange_spot.markets:
-                    await asyncio.to_thread(self.exchange_spot.load_markets)
+                    await exchange_call(self.exchange_spot.load_markets)
                 
                 if symbol in self.exchange_spot.markets:
                     market = self.exchange_spot.markets[symbol]
@@ -698,7 +704,7 @@ class BinanceExecutor:
             log(f"Sembol bilgi hatası: {e}")
             return None
 
-    async def execute_strategy(self, signals: Union[pd.DataFrame, TradeSignal, List[TradeSignal]], latest_scores: Dict[str, float] = None):
+    async def execute_strategy(self, signals: Union[pd.DataFrame, TradeSignal, ScanSignal, List[TradeSignal]], latest_scores: Dict[str, float] = None):
         """Sinyalleri işle"""
         # Günlük zarar limiti kontrolü (realized PnL yüzdesi üzerinden, legacy güvenlik katmanı)
         # Not: daily_realized_pnl, her işlemde yüzdesel PnL toplamı olarak tutuluyor.
@@ -710,7 +716,7 @@ class BinanceExecutor:
             return
 
         # Normalize input to a list of signals or rows
-        if isinstance(signals, TradeSignal):
+        if isinstance(signals, (TradeSignal, ScanSignal)):
             signal_items = [signals]
         elif isinstance(signals, list):
             signal_items = signals
@@ -737,8 +743,10 @@ class BinanceExecutor:
             log(f"⚠️ Geçersiz sinyal formatı: {type(signals)}")
             return
 
-        # Process TradeSignal objects
+        # Process TradeSignal objects (scan signals are validated here, before they reach positions/persistence)
         for sig in signal_items:
+            if isinstance(sig, ScanSignal):
+                sig = sig.to_trade_signal()
             symbol = sig.symbol
             action = sig.action
             price = sig.details.get('close', 0.0)
@@ -886,7 +894,7 @@ class BinanceExecutor:
                     attempt = 0
                     while True:
                         try:
-                            order = await asyncio.to_thread(
+                            order = await exchange_call(
                                 self.exchange_spot.create_market_buy_order,
                                 symbol,
                                 qty_to_send,
@@ -939,7 +947,7 @@ class BinanceExecutor:
                                 
                                 log(f"🛒 Global Alış Emri (RETRY): {symbol} - Yeni Miktar: {qty_to_send}")
                                 
-                                order = await asyncio.to_thread(
+                                order = await exchange_call(
                                     self.exchange_spot.create_market_buy_order,
                                     symbol,
                                     qty_to_send,
@@ -1016,10 +1024,9 @@ class BinanceExecutor:
         """Satış emri"""
         
         # Safety: If price is 0, try to fetch it
-        if price <= 0.0 and self.exchange_spot:
+        if price <= 0.0 and self.tickers:
              try:
-                 ticker = await asyncio.to_thread(self.exchange_spot.fetch_ticker, symbol)
-                 price = float(ticker['last'])
+                 price = await self.tickers.get_price(symbol)
                  log(f"⚠️ Fiyat 0.0 geldi, güncel fiyat çekildi: {price}")
              except Exception as e:
                  log(f"❌ Fiyat çekme hatası: {e}")
@@ -1109,7 +1116,7 @@ class BinanceExecutor:
                     attempt = 0
                     while True:
                         try:
-                            order = await asyncio.to_thread(
+                            order = await exchange_call(
                                 self.exchange_spot.create_market_sell_order,
                                 symbol,
                                 qty_to_send,
@@ -1252,10 +1259,12 @@ class BinanceExecutor:
         try:
             offset = float(getattr(settings, "EXEC_MAKER_OFFSET_PCT", 0.0005))
             timeout_sec = float(getattr(settings, "EXEC_MAKER_TIMEOUT_SEC", 2.0))
-            order_book = await asyncio.to_thread(self.exchange_spot.fetch_order_book, symbol, 5)
+            order_book = self.order_books.order_book(symbol, 5) if self.order_books is not None else None
+            if order_book is None:
+                order_book = await exchange_call(self.exchange_spot.fetch_order_book, symbol, 5)
             bids = order_book.get("bids") if isinstance(order_book, dict) else None
             asks = order_book.get("asks") if isinstance(order_book, dict) else None
-            if not bids or not asks:
+            if bids is None or asks is None or len(bids) == 0 or len(asks) == 0:
                 return False
             best_bid = float(bids[0][0])
             best_ask = float(asks[0][0])
@@ -1273,7 +1282,7 @@ class BinanceExecutor:
                 prefix = "kbMB" if side_lower == "buy" else "kbMS"
                 params["newClientOrderId"] = f"{prefix}{int(time.time()*1000)%100000000}"
             if side_lower == "buy":
-                order = await asyncio.to_thread(
+                order = await exchange_call(
                     self.exchange_spot.create_limit_buy_order,
                     symbol,
                     quantity,
@@ -1281,7 +1290,7 @@ class BinanceExecutor:
                     params
                 )
             else:
-                order = await asyncio.to_thread(
+                order = await exchange_call(
                     self.exchange_spot.create_limit_sell_order,
                     symbol,
                     quantity,
@@ -1293,7 +1302,7 @@ class BinanceExecutor:
             filled = 0.0
             status = ""
             while True:
-                current = await asyncio.to_thread(self.exchange_spot.fetch_order, order_id, symbol)
+                current = await exchange_call(self.exchange_spot.fetch_order, order_id, symbol)
                 status = str(current.get("status", ""))
                 filled = float(current.get("filled", 0.0) or 0.0)
                 if status in ("closed", "canceled", "expired"):
@@ -1305,7 +1314,7 @@ class BinanceExecutor:
             if status == "closed" and filled >= quantity * min_fill_pct and filled > 0:
                 return True
             try:
-                await asyncio.to_thread(self.exchange_spot.cancel_order, order_id, symbol)
+                await exchange_call(self.exchange_spot.cancel_order, order_id, symbol)
             except Exception:
                 pass
             return False
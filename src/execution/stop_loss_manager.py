@@ -4,15 +4,19 @@ import numpy as np
 from datetime import datetime
 from config.settings import settings
 from src.utils.logger import log
+from src.analysis.feature_frame import FeatureFrame
 
 class StopLossManager:
     def __init__(self):
         pass
 
     def calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
-        """Calculates ATR value from DataFrame."""
+        """Calculates ATR value from DataFrame (or reads it from the symbol's FeatureFrame)."""
         if df is None or len(df) < period + 1:
             return 0.0
+        if isinstance(df, FeatureFrame):
+            # Same Wilder smoothing as talib.ATR, on the True Range the analyzer already computed
+            return df.atr_last(period, 'wilder')
         
         try:
             high = df['high'].values
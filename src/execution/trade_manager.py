@@ -1,13 +1,18 @@
 import asyncio
+import contextvars
 import time
-import pandas as pd
-from typing import List, Dict, Optional, Any
-from src.strategies.analyzer import TradeSignal
+from collections import ChainMap
+from typing import List, Dict, Optional, Any, Callable, Awaitable
+from src.strategies.analyzer import ScanSignal, TradeSignal
 from src.utils.logger import log
 from config.settings import settings
 from src.utils.exceptions import BotError, NetworkError, ExchangeError, InsufficientBalanceError
 
 
+# Per-symbol scan deadline (asyncio.Timeout) of the running scan_symbols task, if any
+_scan_deadline: contextvars.ContextVar = contextvars.ContextVar('scan_deadline', default=None)
+
+
 class SignalValidator:
     def __init__(self, analyzer, executor, loader):
         self.analyzer = analyzer
@@ -37,7 +42,10 @@ class SignalValidator:
                 pre_signal.score
             )
 
-        adjusted_signal = pre_signal.model_copy(deep=True)
+        if isinstance(pre_signal, ScanSignal):
+            adjusted_signal = pre_signal.copy()
+        else:
+            adjusted_signal = pre_signal.model_copy(deep=True)
         base_score = float(pre_signal.score)
         adjusted_score = base_score + float(modifier)
         adjusted_signal.score = adjusted_score
@@ -82,7 +90,7 @@ class SignalValidator:
             try:
                 candles_4h = await self.loader.get_ohlcv(symbol, timeframe='4h', limit=30)
                 if candles_4h:
-                    regime_4h = self.analyzer.analyze_market_regime(candles_4h)
+                    regime_4h = self.analyzer.analyze_market_regime(candles_4h, symbol=symbol, timeframe='4h')
                     if regime_4h['trend'] == 'DOWN':
                         if hasattr(adjusted_signal, 'primary_strategy') and adjusted_signal.primary_strategy == "high_score_override":
                             log(f"🚀 {symbol}: 4h Trend is DOWN but High Score Override applies. Allowing ENTRY.")
@@ -106,33 +114,22 @@ class SignalValidator:
             if is_super_signal:
                 log(f"🚀 SUPER SIGNAL DETECTED ({adjusted_signal.score}): Bypassing Correlation Check for {symbol}")
             else:
-                is_correlated = False
                 try:
                     held_positions = await self.executor.get_open_positions()
                 except Exception:
                     held_positions = self.executor.paper_positions
 
-                for held_symbol in held_positions:
-                    if held_symbol == symbol:
-                        continue
-                    try:
-                        held_candles = await self.loader.get_ohlcv(held_symbol, timeframe='1h', limit=50)
-                        if held_candles:
-                            corr = self.analyzer.calculate_correlation(candles, held_candles)
-                            if corr > 0.85:
-                                log(f"🔗 Correlation Alert: {symbol} is highly correlated with held {held_symbol} ({corr:.2f}). Skipping.")
-                                self.brain.record_ghost_trade(
-                                    symbol,
-                                    current_price,
-                                    f"Correlation Filter: >0.85 with {held_symbol}",
-                                    adjusted_signal.score
-                                )
-                                is_correlated = True
-                                break
-                    except Exception as e:
-                        log(f"⚠️ Correlation check failed for {held_symbol}: {e}")
-
-                if is_correlated:
+                held = [h for h in held_positions if h != symbol]
+                corr, held_symbol = await self._max_held_correlation(symbol, candles, held)
+                max_corr = settings.CORRELATION_MAX_HELD
+                if corr is not None and corr > max_corr:
+                    log(f"🔗 Correlation Alert: {symbol} is highly correlated with held {held_symbol} ({corr:.2f}). Skipping.")
+                    self.brain.record_ghost_trade(
+                        symbol,
+                        current_price,
+                        f"Correlation Filter: >{max_corr:.2f} with {held_symbol}",
+                        adjusted_signal.score
+                    )
                     return None
 
         if adjusted_signal.action == "ENTRY":
@@ -155,6 +152,37 @@ class SignalValidator:
 
         return adjusted_signal
 
+    async def _max_held_correlation(self, symbol, candles, held):
+        """Highest correlation of `symbol` with the holdings: (value, held symbol) or (None, None)."""
+        if not held:
+            return None, None
+        if not settings.CORRELATION_ENGINE_ENABLED:
+            best, best_symbol = None, None
+            for held_symbol in held:
+                try:
+                    held_candles = await self.loader.get_ohlcv(held_symbol, timeframe='1h', limit=50)
+                    if held_candles:
+                        corr = self.analyzer.calculate_correlation(candles, held_candles)
+                        if best is None or corr > best:
+                            best, best_symbol = corr, held_symbol
+                except Exception as e:
+                    log(f"⚠️ Correlation check failed for {held_symbol}: {e}")
+            return best, best_symbol
+
+        engine = self.analyzer.correlation
+        # Symbols outside the scanned universe join the matrix with their own candles
+        engine.update({symbol: candles})
+        for held_symbol in held:
+            if held_symbol in engine:
+                continue
+            try:
+                held_candles = await self.loader.get_ohlcv(held_symbol, timeframe='1h', limit=50)
+                if held_candles:
+                    engine.update({held_symbol: held_candles})
+            except Exception as e:
+                log(f"⚠️ Correlation check failed for {held_symbol}: {e}")
+        return engine.max_correlation(symbol, held)
+
 class TradeManager:
     """
     Manages the high-level trading logic, including symbol processing,
@@ -174,6 +202,156 @@ class TradeManager:
         self.swap_last_seen = {}
         self.swap_last_buy = {}
 
+        # Concurrent scan: only one symbol may touch the wallet/positions at a time
+        self._execution_lock = asyncio.Lock()
+
+    async def _run_exclusive(self, func, *args, **kwargs):
+        """
+        Runs an order-placing coroutine under the execution lock.
+        The per-symbol scan deadline is suspended meanwhile, so a scan timeout never
+        cancels an order mid-flight nor drops the signal it executed; shielded as well
+        against any other cancellation.
+        """
+        async def _locked():
+            async with self._execution_lock:
+                return await func(*args, **kwargs)
+        deadline = _scan_deadline.get()
+        if deadline is None:
+            return await asyncio.shield(_locked())
+        when = deadline.when()
+        deadline.reschedule(None)
+        try:
+            return await asyncio.shield(_locked())
+        finally:
+            # An expired deadline fires at the next await, after the symbol has returned
+            deadline.reschedule(when)
+
+    async def _execute(self, signal: TradeSignal, latest_scores: Optional[Dict] = None):
+        return await self._run_exclusive(self.executor.execute_strategy, signal, latest_scores=latest_scores)
+
+    @staticmethod
+    def _is_excluded_symbol(symbol: str) -> bool:
+        """Stablecoins, fiat and wrapped BTC are never traded."""
+        base_currency = symbol.split('/')[0]
+        if base_currency in ['USDT', 'USDC', 'TUSD', 'FDUSD', 'DAI', 'USDP', 'USDe', 'XUSD', 'BUSD', 'EUR', 'PAX', 'U', 'UST', 'USDD', 'USDK', 'USDJ', 'VAI', 'WAI', 'CUSD', 'AEUR', 'EURI', 'GUSD', 'LUSD', 'FRAX', 'SUSD', 'WBTC', 'BTCB']:
+            return True
+        return base_currency.endswith(('USD', 'EUR')) and len(base_currency) <= 6
+
+    async def _prepare_universe(self, symbols: List[str], semaphore: asyncio.Semaphore):
+        """
+        Fetches the 1h candles of the whole scan list once, computes their indicators in one
+        batched pass, scores them with the ML ensemble in one matrix and feeds the new closed
+        candles into the correlation engine.
+        process_symbol_logic then reads the same candles from the loader cache and the
+        analyzer reuses the precomputed frame. Order books of the ORDERBOOK_TOP_K most
+        liquid candidates are fetched concurrently and analyzed in one vectorized pass.
+        """
+        async def _fetch(symbol: str):
+            async with semaphore:
+                try:
+                    return symbol, await self.loader.get_ohlcv(symbol, timeframe='1h', limit=50)
+                except Exception:
+                    return symbol, None
+
+        fetched = await asyncio.gather(*(_fetch(s) for s in symbols if not self._is_excluded_symbol(s)))
+        universe = {s: c for s, c in fetched if c}
+        if settings.BATCH_INDICATORS_ENABLED:
+            count = self.analyzer.prepare_batch(universe)
+            log(f"🧮 Toplu gösterge hesabı: {count}/{len(symbols)} sembol tek geçişte hesaplandı.")
+        if settings.ML_BATCH_INFERENCE_ENABLED and hasattr(self.analyzer, 'prepare_ml'):
+            count = self.analyzer.prepare_ml(universe)
+            if count:
+                log(f"🤖 Toplu ML tahmini: {count}/{len(symbols)} sembol tek matriste değerlendirildi.")
+        if settings.CORRELATION_ENGINE_ENABLED:
+            self.analyzer.correlation.update(universe)
+        if settings.ORDERBOOK_ANALYSIS_ENABLED and hasattr(self.loader, 'get_order_book'):
+            await self._prepare_order_books(universe, semaphore)
+
+    @staticmethod
+    def _order_book_candidates(universe: Dict[str, List[List]], top_k: int) -> List[str]:
+        """Most liquid symbols by quote volume of the last 24 candles."""
+        def quote_volume(candles):
+            return sum(float(c[4]) * float(c[5]) for c in candles[-24:])
+        ranked = sorted(universe, key=lambda s: quote_volume(universe[s]), reverse=True)
+        return ranked[:max(0, int(top_k))]
+
+    async def _prepare_order_books(self, universe: Dict[str, List[List]], semaphore: asyncio.Semaphore):
+        candidates = self._order_book_candidates(universe, settings.ORDERBOOK_TOP_K)
+
+        async def _fetch(symbol: str):
+            async with semaphore:
+                try:
+                    return symbol, await self.loader.get_order_book(symbol, limit=settings.ORDERBOOK_FETCH_LIMIT)
+                except Exception:
+                    return symbol, None
+
+        fetched = await asyncio.gather(*(_fetch(s) for s in candidates))
+        books = {s: book for s, book in fetched if book}
+        prices = {s: float(universe[s][-1][4]) for s in books}
+        count = self.analyzer.prepare_order_books(books, prices)
+        log(f"📚 Emir defteri analizi: {count}/{len(candidates)} aday tek geçişte değerlendirildi.")
+
+    async def scan_symbols(self, symbols: List[str], market_regime: Dict, latest_scores: Dict, current_prices_map: Dict,
+                           on_progress: Optional[Callable[[int, int, List[TradeSignal]], Awaitable[None]]] = None) -> List[Optional[TradeSignal]]:
+        """
+        Runs process_symbol_logic for all symbols with at most SCAN_CONCURRENCY in flight.
+
+        Each symbol writes prices/scores into its own scratch maps (reads still fall through
+        to the shared maps) which are merged into the shared maps once the symbol finishes.
+        A symbol exceeding SCAN_SYMBOL_TIMEOUT_SEC contributes nothing for this cycle; time
+        spent placing orders does not count towards the timeout.
+
+        Returns one entry per input symbol (None when there is no signal).
+        """
+        concurrency = max(1, int(settings.SCAN_CONCURRENCY))
+        timeout = float(settings.SCAN_SYMBOL_TIMEOUT_SEC)
+        semaphore = asyncio.Semaphore(concurrency)
+        total = len(symbols)
+        results: List[Optional[TradeSignal]] = [None] * total
+        found: List[TradeSignal] = []
+        done = 0
+
+        if (settings.BATCH_INDICATORS_ENABLED or settings.CORRELATION_ENGINE_ENABLED
+                or settings.ORDERBOOK_ANALYSIS_ENABLED or settings.ML_BATCH_INFERENCE_ENABLED) \
+                and hasattr(self.analyzer, 'prepare_batch'):
+            await self._prepare_universe(symbols, semaphore)
+
+        async def _scan_one(index: int, symbol: str):
+            nonlocal done
+            prices: Dict = {}
+            scores: Dict = {}
+            signal = None
+            async with semaphore:
+                try:
+                    async with asyncio.timeout(timeout) as deadline:
+                        token = _scan_deadline.set(deadline)
+                        try:
+                            signal = await self.process_symbol_logic(
+                                symbol,
+                                market_regime,
+                                ChainMap(scores, latest_scores),
+                                ChainMap(prices, current_prices_map)
+                            )
+                        finally:
+                            _scan_deadline.reset(token)
+                except asyncio.TimeoutError:
+                    log(f"⏱️ Scan timeout for {symbol} (>{timeout:.0f}s), skipped this cycle.")
+                    signal, prices, scores = None, {}, {}
+            current_prices_map.update(prices)
+            latest_scores.update(scores)
+            results[index] = signal
+            done += 1
+            if signal:
+                found.append(signal)
+            if on_progress:
+                try:
+                    await on_progress(done, total, found)
+                except Exception as e:
+                    log(f"⚠️ Scan progress callback error ({symbol}): {e}")
+
+        await asyncio.gather(*(_scan_one(i, s) for i, s in enumerate(symbols)))
+        return results
+
     async def process_symbol_logic(self, symbol: str, market_regime: Dict, latest_scores: Dict, current_prices_map: Dict) -> Optional[TradeSignal]:
         """
         Processes a single symbol: fetches data, runs analysis, checks safety/risk, 
@@ -181,12 +359,8 @@ class TradeManager:
         Also handles Risk Management (StopLoss) exits immediately.
         """
         try:
-            base_currency = symbol.split('/')[0]
-            if base_currency in ['USDT', 'USDC', 'TUSD', 'FDUSD', 'DAI', 'USDP', 'USDe', 'XUSD', 'BUSD', 'EUR', 'PAX', 'U', 'UST', 'USDD', 'USDK', 'USDJ', 'VAI', 'WAI', 'CUSD', 'AEUR', 'EURI', 'GUSD', 'LUSD', 'FRAX', 'SUSD', 'WBTC', 'BTCB']:
-                return None
-            if base_currency.endswith(('USD', 'EUR')) and len(base_currency) <= 6:
+            if self._is_excluded_symbol(symbol):
                 return None
-            
 
             # Fetch 1h candles
             candles = await self.loader.get_ohlcv(symbol, timeframe='1h', limit=50)
@@ -207,10 +381,10 @@ class TradeManager:
 
             # --- Grid Trading Check ---
             if market_regime and market_regime['trend'] == 'SIDEWAYS':
-                await self._handle_grid_trading(symbol, current_price, market_regime)
+                await self._run_exclusive(self._handle_grid_trading, symbol, current_price, market_regime)
 
-            exchange_client = getattr(self.loader, "exchange", None)
-            pre_signal = self.analyzer.analyze_spot(symbol, candles, exchange=exchange_client)
+            # MTF confirmation goes through the loader (cache/stream), never blocks the loop
+            pre_signal = await self.analyzer.analyze_spot_async(symbol, candles, loader=self.loader)
             
             signal = None
             if pre_signal:
@@ -223,13 +397,13 @@ class TradeManager:
             if risk_signal:
                 # If risk exit is triggered, we prioritize it and execute immediately
                 log(f"⚡ Risk Signal Detected for {symbol}: {risk_signal.action} (Score: {risk_signal.score:.2f})")
-                await self.executor.execute_strategy(risk_signal, latest_scores=latest_scores)
+                await self._execute(risk_signal, latest_scores=latest_scores)
                 return risk_signal # Return this as the signal for this cycle
 
             # --- Execute Spot Signal ---
             if signal:
                 log(f"⚡ Signal Detected for {symbol}: {signal.action} (Score: {signal.score:.2f})")
-                await self.executor.execute_strategy(signal, latest_scores=latest_scores)
+                await self._execute(signal, latest_scores=latest_scores)
                 return signal
 
             return None
@@ -242,59 +416,11 @@ class TradeManager:
             if signal and signal.score >= 25.0: # Only for excellent opportunities
                 log(f"⚔️ SNIPER MODE ACTIVATED: Attempting to free up capital for {symbol} (Score: {signal.score})")
                 try:
-                    # 1. Get all active positions
-                    positions = await self.executor.get_open_positions()
-                    if positions:
-                        # 2. Find the worst position (Lowest PnL or Oldest Stagnant)
-                        worst_position = None
-                        lowest_pnl = 9999.0
-                        
-                        for pos_symbol, pos_data in positions.items():
-                            # Skip if it's the same symbol (shouldn't happen but safety first)
-                            if pos_symbol == symbol:
-                                continue
-                                
-                            # Calculate PnL if current price is available
-                            current_price = current_prices_map.get(pos_symbol)
-                            if current_price:
-                                entry_price = float(pos_data.get('entry_price', 0))
-                                if entry_price > 0:
-                                    pnl = (current_price - entry_price) / entry_price * 100
-                                    if pnl < lowest_pnl:
-                                        lowest_pnl = pnl
-                                        worst_position = pos_symbol
-                        
-                        # 3. Force Sell the worst position
-                        if worst_position:
-                            log(f"⚔️ SNIPER EXECUTION: Selling {worst_position} (PnL: {lowest_pnl:.2f}%) to buy {symbol}")
-                            # Create a forced sell signal
-                            sell_signal = TradeSignal(
-                                symbol=worst_position,
-                                action="EXIT",
-                                direction="LONG", # Assuming Long
-                                score=-99.0, # Forced exit score
-                                estimated_yield=lowest_pnl,
-                                timestamp=int(time.time()),
-                                details={'reason': f'SNIPER_SWAP_FOR_{symbol}'}
-                            )
-                            # Execute Sell
-                            await self.executor.execute_strategy(sell_signal, latest_scores=latest_scores)
-                            
-                            # --- CRITICAL FIX: Wait for Balance Update ---
-                            # Binance needs time to process the sell and update USDT balance.
-                            log("⏳ Waiting 5 seconds for balance update...")
-                            await asyncio.sleep(5)
-                            
-                            await self.executor.sync_wallet_balances()
-                            
-                            log(f"⚔️ SNIPER RETRY: Re-attempting entry for {symbol}...")
-                            if signal:
-                                if signal.details is None:
-                                    signal.details = {}
-                                signal.details['force_all_in'] = True
-                            await self.executor.execute_strategy(signal, latest_scores=latest_scores)
-                            return signal
-                            
+                    forced = await self._run_exclusive(
+                        self._sniper_force_entry, symbol, signal, current_prices_map, latest_scores
+                    )
+                    if forced:
+                        return forced
                 except Exception as sniper_error:
                     log(f"❌ SNIPER MODE FAILED: {sniper_error}")
             
@@ -309,6 +435,62 @@ class TradeManager:
             log(f"⚠️ Error processing {symbol} [{e.__class__.__name__}]: {e}")
             return None
 
+    async def _sniper_force_entry(self, symbol: str, signal: TradeSignal, current_prices_map: Dict, latest_scores: Dict) -> Optional[TradeSignal]:
+        """Sells the worst open position and retries the entry. Caller must hold the execution lock."""
+        # 1. Get all active positions
+        positions = await self.executor.get_open_positions()
+        if positions:
+            # 2. Find the worst position (Lowest PnL or Oldest Stagnant)
+            worst_position = None
+            lowest_pnl = 9999.0
+            
+            for pos_symbol, pos_data in positions.items():
+                # Skip if it's the same symbol (shouldn't happen but safety first)
+                if pos_symbol == symbol:
+                    continue
+                    
+                # Calculate PnL if current price is available
+                current_price = current_prices_map.get(pos_symbol)
+                if current_price:
+                    entry_price = float(pos_data.get('entry_price', 0))
+                    if entry_price > 0:
+                        pnl = (current_price - entry_price) / entry_price * 100
+                        if pnl < lowest_pnl:
+                            lowest_pnl = pnl
+                            worst_position = pos_symbol
+            
+            # 3. Force Sell the worst position
+            if worst_position:
+                log(f"⚔️ SNIPER EXECUTION: Selling {worst_position} (PnL: {lowest_pnl:.2f}%) to buy {symbol}")
+                # Create a forced sell signal
+                sell_signal = TradeSignal(
+                    symbol=worst_position,
+                    action="EXIT",
+                    direction="LONG", # Assuming Long
+                    score=-99.0, # Forced exit score
+                    estimated_yield=lowest_pnl,
+                    timestamp=int(time.time()),
+                    details={'reason': f'SNIPER_SWAP_FOR_{symbol}'}
+                )
+                # Execute Sell
+                await self.executor.execute_strategy(sell_signal, latest_scores=latest_scores)
+                
+                # --- CRITICAL FIX: Wait for Balance Update ---
+                # Binance needs time to process the sell and update USDT balance.
+                log("⏳ Waiting 5 seconds for balance update...")
+                await asyncio.sleep(5)
+                
+                await self.executor.sync_wallet_balances()
+                
+                log(f"⚔️ SNIPER RETRY: Re-attempting entry for {symbol}...")
+                if signal:
+                    if signal.details is None:
+                        signal.details = {}
+                    signal.details['force_all_in'] = True
+                await self.executor.execute_strategy(signal, latest_scores=latest_scores)
+                return signal
+        return None
+
     async def _handle_grid_trading(self, symbol, current_price, market_regime):
         """Internal helper for Grid Trading logic"""
         if symbol not in self.grid_trader.active_grids:
@@ -350,16 +532,15 @@ class TradeManager:
     async def _check_risk_management(self, symbol, candles, current_price):
         """Checks for StopLoss/TakeProfit conditions"""
         if symbol in self.executor.paper_positions:
-            df_candles = None
+            features = None
             if candles:
                  try:
-                     df_candles = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                     for c in ['open', 'high', 'low', 'close', 'volume']:
-                         df_candles[c] = df_candles[c].astype(float)
+                     # Same FeatureFrame the analysis of this cycle used (ATR is not recomputed)
+                     features = self.analyzer.feature_frame(symbol, candles)
                  except Exception as e:
                      log(f"⚠️ Risk Data Prep Error ({symbol}): {e}")
             
-            risk_check = self.executor.check_risk_conditions(symbol, current_price, df_candles)
+            risk_check = self.executor.check_risk_conditions(symbol, current_price, features)
             action = risk_check.get('action')
             
             if action in ['CLOSE', 'PARTIAL_CLOSE']:
@@ -14,11 +14,14 @@ sys.path.append(os.getcwd())
 
 from config.settings import settings
 from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.exchange_client import exchange_call
+from src.collectors.binance_websocket import BinanceDepthStream, BinanceKlineStream, BinanceMiniTickerStream
 # from src.collectors.binance_tr_client import BinanceTRClient
 from src.collectors.funding_rate_loader import FundingRateLoader
 from src.strategies.analyzer import MarketAnalyzer, TradeSignal
 from src.execution.executor import BinanceExecutor
 from src.execution.trade_manager import TradeManager
+from src.ml.training import TrainingWorker
 from src.strategies.grid_trading import GridTrading
 from src.strategies.opportunity_manager import OpportunityManager
 from src.utils.logger import log
@@ -166,7 +169,7 @@ async def run_bot():
         log(f"⚠️ Sentiment Analyzer Init Failed: {e}")
         sentiment_analyzer = None
     grid_trader = GridTrading()
-    opportunity_manager = OpportunityManager()
+    opportunity_manager = OpportunityManager(correlation_engine=analyzer.correlation)
     
     # 4. Initialize Data Sources
     try:
@@ -184,7 +187,8 @@ async def run_bot():
     if hasattr(loader, 'exchange'):
         exchange_client = loader.exchange
         
-    executor = BinanceExecutor(exchange_client=exchange_client)
+    executor = BinanceExecutor(exchange_client=exchange_client, ticker_snapshot=getattr(loader, 'tickers', None),
+                               order_books=getattr(loader, 'local_books', None))
 
     # Initialize TradeManager
     trade_manager = TradeManager(
@@ -221,11 +225,11 @@ async def run_bot():
                 # Ensure markets are loaded
                 if not loader.exchange.markets:
                     log("⏳ Loading markets...")
-                    await asyncio.wait_for(asyncio.to_thread(loader.exchange.load_markets), timeout=60.0)
+                    await asyncio.wait_for(exchange_call(loader.exchange.load_markets), timeout=60.0)
                 
                 # Test connection with single ticker first
                 log("🔍 Testing connection with BTC/USDT...")
-                await asyncio.wait_for(asyncio.to_thread(loader.exchange.fetch_ticker, 'BTC/USDT'), timeout=10.0)
+                await asyncio.wait_for(exchange_call(loader.exchange.fetch_ticker, 'BTC/USDT'), timeout=10.0)
                 log("✅ Connection verified.")
 
                 # Filter symbols: USDT pairs only
@@ -234,7 +238,7 @@ async def run_bot():
                 # Fetch tickers to sort by volume (get top 100 liquid pairs to avoid junk)
                 log("📊 Fetching ALL tickers for volume analysis (this may take a moment)...")
                 # Increase timeout for full ticker fetch as it can be heavy (20MB+ data)
-                tickers = await asyncio.wait_for(asyncio.to_thread(loader.exchange.fetch_tickers), timeout=60.0)
+                tickers = await asyncio.wait_for(loader.tickers.get_all(), timeout=60.0)
                 log(f"DEBUG: Fetched {len(tickers)} tickers. Sample: {list(tickers.keys())[:5]}")
                 
                 active_symbols = []
@@ -279,6 +283,35 @@ async def run_bot():
 
     await executor.initialize()
     
+    # Live kline streams keep the candle store current (REST only for gap-fill)
+    kline_stream = None
+    if settings.KLINE_STREAM_ENABLED and not loader.mock:
+        kline_stream = BinanceKlineStream(loader, settings.SYMBOLS)
+        await kline_stream.start()
+        log(f"📡 Kline stream: {len(kline_stream.stream_names())} streams / {len(kline_stream.shards())} connections")
+
+    ticker_stream = None
+    if settings.TICKER_STREAM_ENABLED and not loader.mock:
+        ticker_stream = BinanceMiniTickerStream(loader.tickers)
+        await ticker_stream.start()
+        log("📡 Mini ticker stream started (!miniTicker@arr)")
+
+    depth_stream = None
+    if settings.LOCAL_ORDER_BOOK_ENABLED and not loader.mock and loader.local_books is not None:
+        # Local books for the most liquid symbols (bulk ticker snapshot, usually still fresh)
+        tickers = {}
+        try:
+            tickers = await asyncio.wait_for(loader.tickers.get_all(), timeout=60.0)
+        except Exception as e:
+            log(f"⚠️ Depth stream sembol sıralaması için ticker alınamadı: {e}")
+        depth_symbols = BinanceDepthStream.most_liquid(settings.SYMBOLS, tickers, settings.LOCAL_ORDER_BOOK_MAX_SYMBOLS)
+        depth_stream = BinanceDepthStream(loader, depth_symbols)
+        await depth_stream.start()
+        log(f"📡 Depth stream: {len(depth_stream.symbols)} yerel emir defteri (diff-depth)")
+
+    # Out-of-process ML training (publishes to the model registry; the ensemble hot-swaps it)
+    trainer = TrainingWorker() if settings.ML_TRAINING_INTERVAL_HOURS > 0 else None
+    
     # Initial Dashboard Update (Empty) to prevent "Collecting Data" stuck
     await update_dashboard_commentary(
         executor, 
@@ -327,6 +360,13 @@ async def run_bot():
             except Exception as e:
                 log(f"⚠️ Failed to update scan list for held positions: {e}")
 
+            if trainer:
+                if trainer.maybe_submit():
+                    log("🧠 ML eğitimi ayrı süreçte başlatıldı.")
+                trained = trainer.poll()
+                if trained:
+                    log(f"🧠 Yeni model sürümü yayınlandı: {trained['version']}")
+
             # Periodic Dust Cleanup (Every 20 loops ~ 10-20 mins)
             if loop_count % 20 == 0:
                  await executor.convert_dust_to_bnb()
@@ -354,7 +394,7 @@ async def run_bot():
                 # Using 1h to match main loop speed
                 btc_candles = await loader.get_ohlcv(btc_symbol, timeframe='1h', limit=50)
                 if btc_candles:
-                    market_regime = analyzer.analyze_market_regime(btc_candles)
+                    market_regime = analyzer.analyze_market_regime(btc_candles, symbol=btc_symbol)
                     log(f"🌍 Market Regime ({btc_symbol}): Trend={market_regime['trend']}, Volatility={market_regime['volatility']}")
                 else:
                     log(f"⚠️ Market Regime: No candles for {btc_symbol}, using default SIDEWAYS/LOW.")
@@ -370,31 +410,35 @@ async def run_bot():
             
             log(f"🔍 Scanning {len(settings.SYMBOLS)} symbols...")
 
-            for i, symbol in enumerate(settings.SYMBOLS):
+            symbols_to_scan = list(settings.SYMBOLS)
+
+            async def on_scan_progress(done, total, signals_so_far):
                 # Progress indicator every 20 symbols
-                if (i + 1) % 20 == 0:
-                    log(f"⏳ Scanned {i + 1}/{len(settings.SYMBOLS)} symbols...")
-                
+                if done % 20 == 0:
+                    log(f"⏳ Scanned {done}/{total} symbols...")
+
                 # Update Dashboard Commentary periodically (Every 50 symbols)
-                if (i + 1) % 50 == 0:
+                if done % 50 == 0:
                     await update_dashboard_commentary(
                         executor, 
                         opportunity_manager, 
                         market_regime, 
-                        all_market_signals, 
+                        signals_so_far, 
                         current_prices_map,
                         latest_scores
                     )
 
-                # Use TradeManager to process symbol
-                # Logic: Fetch Data -> Analyze -> Risk Check -> Execute if Signal
-                signal = await trade_manager.process_symbol_logic(
-                    symbol, 
-                    market_regime, 
-                    latest_scores, 
-                    current_prices_map
-                )
-                
+            # Use TradeManager to process symbols (bounded concurrency, see SCAN_CONCURRENCY)
+            # Logic: Fetch Data -> Analyze -> Risk Check -> Execute if Signal
+            scan_results = await trade_manager.scan_symbols(
+                symbols_to_scan,
+                market_regime,
+                latest_scores,
+                current_prices_map,
+                on_progress=on_scan_progress
+            )
+
+            for symbol, signal in zip(symbols_to_scan, scan_results):
                 if symbol in current_prices_map:
                     scanned_count += 1
                 
@@ -404,6 +448,12 @@ async def run_bot():
             
             if scanned_count > 0:
                 log(f"✅ Scan Complete. Checked {scanned_count} symbols. Found {signals_found} signals.")
+                if settings.CORRELATION_ENGINE_ENABLED:
+                    analyzer.correlation.export()
+                memo = analyzer.memo_stats()
+                log("🧠 Analiz memo: " + ", ".join(
+                    f"{name} {m['hits']}/{m['hits'] + m['misses']} hit" for name, m in memo.items()
+                ))
                 
                 # Update Ghost Trades (Paper Trail)
                 if current_prices_map:
@@ -462,6 +512,15 @@ async def run_bot():
     except Exception as e:
         log(f"Critical Error: {e}")
     finally:
+        if kline_stream:
+            await kline_stream.stop()
+        if ticker_stream:
+            await ticker_stream.stop()
+        if depth_stream:
+            await depth_stream.stop()
+        analyzer.ensemble.flush_snapshots()
+        if trainer:
+            trainer.shutdown()
         await loader.close()
         await executor.close()
 
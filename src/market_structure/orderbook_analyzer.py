@@ -1,11 +1,68 @@
 
 import logging
 import numpy as np
-from typing import Dict, List, Optional
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
 import time
 
+from config.settings import settings
+
 logger = logging.getLogger("OrderBookAnalyzer")
 
+IMBALANCE_LEVELS = 20   # Levels summed for bid/ask pressure
+AVERAGE_LEVELS = 50     # Levels (per side) the average order size is taken over
+WALL_LEVELS = 20        # Levels scanned for whale walls
+WALL_MAX_DISTANCE = 0.05  # Walls further than 5% from price are ignored
+
+
+def _depth(order_book: Dict, side: str) -> int:
+    levels = order_book.get(side)
+    return 0 if levels is None else len(levels)
+
+
+def _side_matrix(sides: List, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (symbols, depth) price and qty matrices for one side of many books. List books are
+    flattened through a single np.fromiter call; array books are copied in as they are.
+    Missing levels have NaN price and 0 qty so sums and masks ignore them.
+    """
+    n = len(sides)
+    px = np.full((n, depth), np.nan)
+    qty = np.zeros((n, depth))
+    listed = []
+    for i, side in enumerate(sides):
+        if isinstance(side, np.ndarray):
+            levels = side[:depth]
+            px[i, :len(levels)] = levels[:, 0]
+            qty[i, :len(levels)] = levels[:, 1]
+        else:
+            listed.append(i)
+    if not listed:
+        return px, qty
+
+    counts = np.array([min(len(sides[i]), depth) for i in listed], dtype=np.int64)
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(sides[i][:depth] for i in listed)), dtype=np.float64)
+    if len(flat) != 2 * counts.sum():
+        # Levels with extra fields (e.g. [price, qty, count]): keep the first two
+        flat = np.array([level[:2] for i in listed for level in sides[i][:depth]], dtype=np.float64).reshape(-1)
+    pairs = flat.reshape(-1, 2)
+    rows = np.repeat(np.asarray(listed), counts)
+    cols = np.arange(len(pairs)) - np.repeat(np.cumsum(counts) - counts, counts)
+    px[rows, cols] = pairs[:, 0]
+    qty[rows, cols] = pairs[:, 1]
+    return px, qty
+
+
+def stack_books(order_books: List[Dict], depth: int = AVERAGE_LEVELS) -> Dict[str, np.ndarray]:
+    """
+    Converts ccxt order books {'bids': [[price, qty], ...], 'asks': ...} of many symbols
+    into padded (symbols, depth) NumPy matrices, once per batch.
+    """
+    bid_px, bid_qty = _side_matrix([book.get('bids') for book in order_books], depth)
+    ask_px, ask_qty = _side_matrix([book.get('asks') for book in order_books], depth)
+    return {'bid_px': bid_px, 'bid_qty': bid_qty, 'ask_px': ask_px, 'ask_qty': ask_qty}
+
+
 class OrderBookAnalyzer:
     """
     Analyzes the order book (depth) to detect:
@@ -13,11 +70,15 @@ class OrderBookAnalyzer:
     2. Large Orders (Whale Walls)
     3. Support/Resistance Clusters
     4. Spoofing (Fake Walls - Simplified detection)
+
+    Books are converted to NumPy arrays once; analyze_batch evaluates many symbols
+    in one vectorized pass (imbalance, walls, spread, microprice, depth within N bps).
     """
     
-    def __init__(self):
+    def __init__(self, depth_bps: Optional[List[int]] = None):
         self.whale_threshold_ratio = 5.0 # Order size > 5x Average is considered Large
         self.imbalance_threshold = 1.5 # 1.5x Buy/Sell ratio indicates pressure
+        self.depth_bps = list(depth_bps if depth_bps is not None else settings.ORDERBOOK_DEPTH_BPS)
         
     def analyze_depth(self, order_book: Dict, current_price: float) -> Dict:
         """
@@ -26,74 +87,93 @@ class OrderBookAnalyzer:
         """
         if not order_book or 'bids' not in order_book or 'asks' not in order_book:
             return {}
-            
-        bids = order_book['bids'] # [[price, qty], ...]
-        asks = order_book['asks'] # [[price, qty], ...]
-        
-        if not bids or not asks:
+        return self.analyze_batch({'_': order_book}, {'_': current_price}).get('_', {})
+
+    def analyze_batch(self, order_books: Dict[str, Dict], prices: Dict[str, float]) -> Dict[str, Dict]:
+        """
+        Vectorized analyze_depth over many symbols: symbol -> analysis.
+        Symbols with an empty side (or no price) are left out.
+        """
+        symbols = [
+            symbol for symbol, order_book in order_books.items()
+            if order_book and prices.get(symbol) and _depth(order_book, 'bids') and _depth(order_book, 'asks')
+        ]
+        if not symbols:
             return {}
-            
-        # 1. Calculate Imbalance (Top 20 Depth)
-        limit = 20
-        bid_vol = sum([b[1] for b in bids[:limit]])
-        ask_vol = sum([a[1] for a in asks[:limit]])
-        
-        imbalance_ratio = 1.0
-        if ask_vol > 0:
-            imbalance_ratio = bid_vol / ask_vol
-            
-        pressure = "NEUTRAL"
-        if imbalance_ratio > self.imbalance_threshold:
-            pressure = "BUY_PRESSURE"
-        elif imbalance_ratio < (1 / self.imbalance_threshold):
-            pressure = "SELL_PRESSURE"
-            
-        # 2. Whale Detection (Large Orders)
-        # Calculate average order size in top 50
-        all_sizes = [b[1] for b in bids[:50]] + [a[1] for a in asks[:50]]
-        avg_size = np.mean(all_sizes) if all_sizes else 0
-        
-        whale_walls = []
-        
-        # Check Bids (Support Walls)
-        for p, q in bids[:20]:
-            if q > avg_size * self.whale_threshold_ratio:
-                dist = (current_price - p) / current_price
-                if dist < 0.05: # Within 5%
-                    whale_walls.append({
-                        'type': 'SUPPORT',
-                        'price': p,
-                        'qty': q,
-                        'strength': q / avg_size,
-                        'distance_pct': dist * 100
-                    })
-                    
-        # Check Asks (Resistance Walls)
-        for p, q in asks[:20]:
-            if q > avg_size * self.whale_threshold_ratio:
-                dist = (p - current_price) / current_price
-                if dist < 0.05: # Within 5%
-                    whale_walls.append({
-                        'type': 'RESISTANCE',
-                        'price': p,
-                        'qty': q,
-                        'strength': q / avg_size,
-                        'distance_pct': dist * 100
-                    })
-                    
-        # 3. Spread Analysis
-        best_bid = bids[0][0]
-        best_ask = asks[0][0]
+
+        m = stack_books([order_books[s] for s in symbols])
+        price = np.array([float(prices[s]) for s in symbols])
+        bid_px, bid_qty, ask_px, ask_qty = m['bid_px'], m['bid_qty'], m['ask_px'], m['ask_qty']
+
+        # 1. Imbalance (top 20)
+        bid_vol = bid_qty[:, :IMBALANCE_LEVELS].sum(axis=1)
+        ask_vol = ask_qty[:, :IMBALANCE_LEVELS].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            imbalance = np.where(ask_vol > 0, bid_vol / ask_vol, 1.0)
+
+        # 2. Whale walls: levels > ratio x average size (top 50 of both sides), within 5%
+        levels = (~np.isnan(bid_px)).sum(axis=1) + (~np.isnan(ask_px)).sum(axis=1)
+        avg_size = (bid_qty.sum(axis=1) + ask_qty.sum(axis=1)) / levels
+        limit = (avg_size * self.whale_threshold_ratio)[:, None]
+        bid_dist = (price[:, None] - bid_px[:, :WALL_LEVELS]) / price[:, None]
+        ask_dist = (ask_px[:, :WALL_LEVELS] - price[:, None]) / price[:, None]
+        with np.errstate(invalid='ignore'):
+            bid_walls = (bid_qty[:, :WALL_LEVELS] > limit) & (bid_dist < WALL_MAX_DISTANCE)
+            ask_walls = (ask_qty[:, :WALL_LEVELS] > limit) & (ask_dist < WALL_MAX_DISTANCE)
+
+        # 3. Spread, mid and microprice (top of book weighted by the opposite side's size)
+        best_bid, best_ask = bid_px[:, 0], ask_px[:, 0]
         spread = (best_ask - best_bid) / best_bid
-        
-        return {
-            'imbalance_ratio': float(imbalance_ratio),
-            'pressure': pressure,
-            'bid_volume_top20': float(bid_vol),
-            'ask_volume_top20': float(ask_vol),
-            'whale_walls': whale_walls,
-            'spread_pct': float(spread * 100)
-        }
+        mid = (best_bid + best_ask) / 2
+        top_size = bid_qty[:, 0] + ask_qty[:, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            microprice = np.where(top_size > 0, (best_bid * ask_qty[:, 0] + best_ask * bid_qty[:, 0]) / top_size, mid)
+
+        # 4. Quote notional resting within N bps of mid: (symbols, len(depth_bps))
+        bands = np.asarray(self.depth_bps, dtype=np.float64)[None, None, :] / 10000
+        with np.errstate(invalid='ignore'):
+            bid_in = bid_px[:, :, None] >= (mid[:, None, None] * (1 - bands))
+            ask_in = ask_px[:, :, None] <= (mid[:, None, None] * (1 + bands))
+        bid_depth = np.einsum('sl,slb->sb', np.nan_to_num(bid_px) * bid_qty, bid_in)
+        ask_depth = np.einsum('sl,slb->sb', np.nan_to_num(ask_px) * ask_qty, ask_in)
+
+        wall_hits = {'SUPPORT': np.argwhere(bid_walls).tolist(), 'RESISTANCE': np.argwhere(ask_walls).tolist()}
+        walls_by_symbol: Dict[int, List[Dict]] = {}
+        for kind, px, qty, dist in (('SUPPORT', bid_px, bid_qty, bid_dist), ('RESISTANCE', ask_px, ask_qty, ask_dist)):
+            for i, j in wall_hits[kind]:
+                walls_by_symbol.setdefault(i, []).append({
+                    'type': kind,
+                    'price': float(px[i, j]),
+                    'qty': float(qty[i, j]),
+                    'strength': float(qty[i, j] / avg_size[i]),
+                    'distance_pct': float(dist[i, j] * 100)
+                })
+
+        imbalance, bid_vol, ask_vol = imbalance.tolist(), bid_vol.tolist(), ask_vol.tolist()
+        spread, mid, microprice = (spread * 100).tolist(), mid.tolist(), microprice.tolist()
+        bid_depth, ask_depth = bid_depth.tolist(), ask_depth.tolist()
+        results = {}
+        for i, symbol in enumerate(symbols):
+            ratio = imbalance[i]
+            pressure = "NEUTRAL"
+            if ratio > self.imbalance_threshold:
+                pressure = "BUY_PRESSURE"
+            elif ratio < (1 / self.imbalance_threshold):
+                pressure = "SELL_PRESSURE"
+
+            results[symbol] = {
+                'imbalance_ratio': ratio,
+                'pressure': pressure,
+                'bid_volume_top20': bid_vol[i],
+                'ask_volume_top20': ask_vol[i],
+                'whale_walls': walls_by_symbol.get(i, []),
+                'spread_pct': spread[i],
+                'mid_price': mid[i],
+                'microprice': microprice[i],
+                'depth_bps': {str(bps): {'bid': bid_depth[i][k], 'ask': ask_depth[i][k]}
+                              for k, bps in enumerate(self.depth_bps)},
+            }
+        return results
         
     def get_score_impact(self, analysis: Dict) -> float:
         """
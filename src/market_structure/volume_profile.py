@@ -1,10 +1,81 @@
-import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 import logging
 
+from config.settings import settings
+from src.analysis.memo import AnalysisCache, closed_candle_key
+
 logger = logging.getLogger(__name__)
 
+def _bin_index(prices: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    """Bin of each price with right-closed bins and the lowest edge included (pd.cut semantics)."""
+    return np.clip(np.searchsorted(bins, prices, side='left') - 1, 0, len(bins) - 2)
+
+
+def _bin_volumes(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                 bins: np.ndarray, intrabar: bool = False) -> np.ndarray:
+    """
+    Volume per price bin. By default each candle's volume sits at its typical price;
+    with `intrabar` it is spread uniformly over the candle's high-low range.
+    """
+    n_bins = len(bins) - 1
+    if not intrabar:
+        typical = (high + low + close) / 3
+        return np.bincount(_bin_index(typical, bins), weights=volume, minlength=n_bins)
+    span = high - low
+    flat = span <= 0
+    # Share of each candle's range below every bin edge -> per-bin share by difference
+    with np.errstate(invalid='ignore', divide='ignore'):
+        below = np.clip((bins[None, :] - low[:, None]) / span[:, None], 0.0, 1.0)
+    shares = np.diff(below, axis=1)
+    out = volume[~flat] @ shares[~flat]
+    if flat.any():
+        out += np.bincount(_bin_index(close[flat], bins), weights=volume[flat], minlength=n_bins)
+    return out
+
+
+def profile_from_bins(volumes: np.ndarray, bins: np.ndarray, value_area_pct: float,
+                      first_bin: int = 0) -> Dict:
+    """
+    POC and Value Area from bin volumes.
+
+    The Value Area grows from the POC one bin at a time towards the heavier neighbour
+    (ties go down) until it holds `value_area_pct` of the volume or both neighbours are
+    empty. The walk runs on a plain float list (numpy scalar indexing dominates otherwise).
+    """
+    total_volume = float(volumes.sum())
+    max_vol_bin = int(np.argmax(volumes)) if total_volume > 0 else first_bin
+    price_step = bins[1] - bins[0]
+    target_volume = total_volume * value_area_pct
+
+    vols = volumes.tolist()
+    upper_idx = lower_idx = max_vol_bin
+    current_vol = vols[max_vol_bin]
+    n_bins = len(vols)
+    while current_vol < target_volume:
+        upper_vol = vols[upper_idx + 1] if upper_idx + 1 < n_bins else 0
+        lower_vol = vols[lower_idx - 1] if lower_idx - 1 >= 0 else 0
+        if upper_vol == 0 and lower_vol == 0:
+            break
+        if upper_vol > lower_vol:
+            upper_idx += 1
+            current_vol += upper_vol
+        else:
+            lower_idx -= 1
+            current_vol += lower_vol
+
+    return {
+        'poc': float(bins[max_vol_bin] + price_step / 2),
+        'vah': float(bins[upper_idx + 1]),
+        'val': float(bins[lower_idx]),
+        'total_volume': total_volume,
+        'range_high': float(bins[-1]),
+        'range_low': float(bins[0]),
+    }
+
+
 class VolumeProfileAnalyzer:
     """
     Analyzes Volume Profile (Price vs Volume) to find:
@@ -12,94 +83,72 @@ class VolumeProfileAnalyzer:
     - VAH (Value Area High): The highest price within the Value Area (70% of volume).
     - VAL (Value Area Low): The lowest price within the Value Area.
     - VWAP (Volume Weighted Average Price): Average price weighted by volume.
+
+    Bins are filled with np.bincount. With a symbol, a per-symbol IncrementalVolumeProfile
+    follows the candle window so only the candles rolling in/out touch the bins.
     """
-    def __init__(self, n_bins: int = 100, value_area_pct: float = 0.70):
+    def __init__(self, n_bins: int = 100, value_area_pct: float = 0.70, intrabar: Optional[bool] = None,
+                 incremental: Optional[bool] = None):
         self.n_bins = n_bins
         self.value_area_pct = value_area_pct
+        self.intrabar = settings.VOLUME_PROFILE_INTRABAR if intrabar is None else intrabar
+        self.incremental = settings.VOLUME_PROFILE_INCREMENTAL if incremental is None else incremental
+        self.memo = AnalysisCache()
+        self.states: Dict[Tuple[str, str], 'IncrementalVolumeProfile'] = {}
 
-    def calculate_profile(self, candles: List[List]) -> Dict:
+    def calculate_profile(self, candles: List[List], symbol: Optional[str] = None, timeframe: str = '1h') -> Dict:
         """
         Calculates Volume Profile metrics from a list of candles.
         Candles format: [timestamp, open, high, low, close, volume]
+
+        With a symbol the profile is memoized; the forming candle is part of the key
+        because its range and volume move every bin.
         """
         if not candles or len(candles) < 10:
             return {}
+        key = closed_candle_key(symbol, timeframe, candles, (self.n_bins, self.value_area_pct, self.intrabar)) if symbol else None
+        if key is None:
+            return self._calculate_profile(candles)
+        key += (tuple(candles[-1]),)
+        if self.incremental:
+            compute = lambda: self._incremental_profile(symbol, timeframe, candles)
+        else:
+            compute = lambda: self._calculate_profile(candles)
+        return dict(self.memo.get_or_compute(key, compute))
 
+    def _calculate_profile(self, candles: List[List]) -> Dict:
         try:
-            df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['close'] = df['close'].astype(float)
-            df['high'] = df['high'].astype(float)
-            df['low'] = df['low'].astype(float)
-            df['volume'] = df['volume'].astype(float)
+            data = np.asarray(candles, dtype=np.float64)
+            high, low, close, volume = data[:, 2], data[:, 3], data[:, 4], data[:, 5]
 
             # Determine Range
-            min_price = df['low'].min()
-            max_price = df['high'].max()
-            
+            min_price = low.min()
+            max_price = high.max()
             if min_price == max_price:
                 return {}
 
             # Create Price Bins
-            price_step = (max_price - min_price) / self.n_bins
             bins = np.linspace(min_price, max_price, self.n_bins + 1)
-            
-            # We assume volume is distributed uniformly across the candle's range for simplicity
-            # A more advanced way is to treat 'close' or 'typical price' as the volume location
-            # Here we use 'close' for speed, or Typical Price ((H+L+C)/3)
-            df['typical_price'] = (df['high'] + df['low'] + df['close']) / 3
-            
-            # Aggregate volume by price bins
-            # cut categorizes 'typical_price' into bins
-            df['bin'] = pd.cut(df['typical_price'], bins=bins, include_lowest=True, labels=False)
-            
-            # Group by bin and sum volume
-            volume_profile = df.groupby('bin')['volume'].sum()
-            
-            # Find POC (Point of Control) - Bin with max volume
-            max_vol_bin = volume_profile.idxmax()
-            # POC Price is the midpoint of the bin
-            poc_price = bins[max_vol_bin] + (price_step / 2)
-            
-            # Calculate Value Area (VA)
-            total_volume = volume_profile.sum()
-            target_volume = total_volume * self.value_area_pct
-            
-            # Start from POC and expand out
-            current_vol = volume_profile.get(max_vol_bin, 0)
-            
-            # Pointers
-            upper_idx = int(max_vol_bin)
-            lower_idx = int(max_vol_bin)
-            
-            # Expand until we reach 70%
-            while current_vol < target_volume:
-                # Look at next upper and lower bins
-                upper_vol = volume_profile.get(upper_idx + 1, 0) if (upper_idx + 1) < self.n_bins else 0
-                lower_vol = volume_profile.get(lower_idx - 1, 0) if (lower_idx - 1) >= 0 else 0
-                
-                if upper_vol == 0 and lower_vol == 0:
-                    break
-                    
-                if upper_vol > lower_vol:
-                    upper_idx += 1
-                    current_vol += upper_vol
-                else:
-                    lower_idx -= 1
-                    current_vol += lower_vol
-            
-            # Determine VAH and VAL
-            vah = bins[upper_idx + 1] # Upper bound of the highest bin
-            val = bins[lower_idx]     # Lower bound of the lowest bin
-            
-            return {
-                'poc': float(poc_price),
-                'vah': float(vah),
-                'val': float(val),
-                'total_volume': float(total_volume),
-                'range_high': float(max_price),
-                'range_low': float(min_price)
-            }
-            
+            volumes = _bin_volumes(high, low, close, volume, bins, self.intrabar)
+            first_bin = 0
+            if volumes.sum() <= 0:
+                # No volume at all: the POC falls back to the lowest occupied bin
+                anchor = np.where(high > low, low, close) if self.intrabar else (high + low + close) / 3
+                first_bin = int(_bin_index(anchor, bins).min())
+            return profile_from_bins(volumes, bins, self.value_area_pct, first_bin)
+
+        except Exception as e:
+            logger.error(f"Volume Profile Error: {e}")
+            return {}
+
+    def _incremental_profile(self, symbol: str, timeframe: str, candles: List[List]) -> Dict:
+        state = self.states.get((symbol, timeframe))
+        if state is None or not state.sync(candles[:-1]):
+            state = IncrementalVolumeProfile(self.n_bins, self.value_area_pct, self.intrabar)
+            state.sync(candles[:-1])
+            self.states[(symbol, timeframe)] = state
+        try:
+            return state.profile(candles[-1])
         except Exception as e:
             logger.error(f"Volume Profile Error: {e}")
             return {}
@@ -156,3 +205,141 @@ class VolumeProfileAnalyzer:
                 reason = "In Value Area (POC -> High)"
                 
         return score, reason
+
+
+class IncrementalVolumeProfile:
+    """
+    Volume profile of a rolling candle window with O(1) bin updates.
+
+    Closed candles rolling in/out add/remove their volume in place; the bins are only
+    rebuilt when the window's high/low range changes (an extreme enters or leaves).
+    A per-bin candle count resets emptied bins to exactly 0 so add/remove cycles do not
+    leave float residue. The forming candle is added on top in profile() without being
+    committed. Values match VolumeProfileAnalyzer on the same candles.
+    """
+    def __init__(self, n_bins: int = 100, value_area_pct: float = 0.70, intrabar: bool = False):
+        self.n_bins = n_bins
+        self.value_area_pct = value_area_pct
+        self.intrabar = intrabar
+        self.candles: Deque[Tuple[int, float, float, float, float]] = deque()  # ts, high, low, close, volume
+        self.bins: Optional[np.ndarray] = None
+        self.edges: List[float] = []
+        self.volumes: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None
+        self.stats = {'updates': 0, 'rebuilds': 0}
+
+    def sync(self, closed: List[List]) -> bool:
+        """
+        Aligns the window with `closed` (the caller's closed candles): appends the newer
+        ones and evicts those that dropped out of the front. Returns False when this is
+        not possible incrementally (older window start, gap) - the caller reseeds.
+        """
+        if not closed:
+            return False
+        first_ts = int(closed[0][0])
+        start = 0
+        if self.candles:
+            last_ts = self.candles[-1][0]
+            if first_ts < self.candles[0][0] or int(closed[-1][0]) < last_ts:
+                return False
+            start = len(closed)
+            while start > 0 and int(closed[start - 1][0]) > last_ts:
+                start -= 1
+            if start > 0 and int(closed[start - 1][0]) != last_ts:
+                return False
+            if start == 0 and first_ts > last_ts:
+                # Whole window replaced
+                self.candles.clear()
+                self.bins = None
+        for row in closed[start:]:
+            candle = (int(row[0]), float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+            self.candles.append(candle)
+            self._apply(candle, 1.0)
+        while self.candles and self.candles[0][0] < first_ts:
+            self._apply(self.candles.popleft(), -1.0)
+        self.stats['updates'] += 1
+        return len(self.candles) == len(closed)
+
+    def _apply(self, candle, sign: float):
+        if self.bins is None:
+            return
+        if candle[2] <= self.edges[0] or candle[1] >= self.edges[-1]:
+            # The candle is (or was) an extreme of the window: the range and every bin change
+            self.bins = None
+            return
+        first, last = self._span(candle, self.edges)
+        if self.intrabar and candle[1] > candle[2]:
+            self.volumes += sign * self._spread(candle, self.bins)
+        else:
+            self.volumes[first] += sign * candle[4]
+        self.counts[first:last + 1] += int(sign)
+        # Emptied bins are reset so add/remove cycles leave no float residue
+        touched = self.volumes[first:last + 1]
+        touched[self.counts[first:last + 1] == 0] = 0.0
+
+    def _span(self, candle, edges: List[float]) -> Tuple[int, int]:
+        """First and last bin a candle puts volume into (bisect on the edge list = _bin_index)."""
+        _, high, low, close, _ = candle
+        last_bin = len(edges) - 2
+        if not self.intrabar or high <= low:
+            price = (high + low + close) / 3 if not self.intrabar else close
+            k = min(max(bisect_left(edges, price) - 1, 0), last_bin)
+            return k, k
+        return (min(max(bisect_left(edges, low) - 1, 0), last_bin),
+                min(max(bisect_left(edges, high) - 1, 0), last_bin))
+
+    def _spread(self, candle, bins: np.ndarray) -> np.ndarray:
+        _, high, low, close, volume = candle
+        return _bin_volumes(np.array([high]), np.array([low]), np.array([close]), np.array([volume]), bins, True)
+
+    def _range(self) -> Tuple[float, float]:
+        return min(c[2] for c in self.candles), max(c[1] for c in self.candles)
+
+    def _rebuild(self, low: float, high: float):
+        self.bins = np.linspace(low, high, self.n_bins + 1)
+        self.edges = self.bins.tolist()
+        data = np.asarray(self.candles, dtype=np.float64)
+        high_, low_, close, volume = data[:, 1], data[:, 2], data[:, 3], data[:, 4]
+        self.volumes = _bin_volumes(high_, low_, close, volume, self.bins, self.intrabar)
+        if self.intrabar:
+            lo, hi = _bin_index(low_, self.bins), _bin_index(high_, self.bins)
+            flat = high_ <= low_
+            lo[flat] = hi[flat] = _bin_index(close[flat], self.bins)
+            # Candles per bin from +1 at the first and -1 after the last bin they cover
+            self.counts = np.cumsum(np.bincount(lo, minlength=self.n_bins + 1)[:self.n_bins]
+                                    - np.bincount(hi + 1, minlength=self.n_bins + 1)[:self.n_bins])
+        else:
+            self.counts = np.bincount(_bin_index((high_ + low_ + close) / 3, self.bins), minlength=self.n_bins)
+        self.stats['rebuilds'] += 1
+
+    def profile(self, forming: Optional[List] = None) -> Dict:
+        """Profile of the committed window plus the (uncommitted) forming candle [ts, o, h, l, c, v]."""
+        if not self.candles:
+            return {}
+        if self.bins is None:
+            self._rebuild(*self._range())
+        low, high = self.edges[0], self.edges[-1]
+        bins, volumes = self.bins, self.volumes
+        if forming is not None:
+            extra = (int(forming[0]), float(forming[2]), float(forming[3]), float(forming[4]), float(forming[5]))
+            if extra[2] < low or extra[1] > high:
+                # Only the forming candle widens the range: bin a preview, keep the committed bins
+                low, high = min(low, extra[2]), max(high, extra[1])
+                if low == high:
+                    return {}
+                bins = np.linspace(low, high, self.n_bins + 1)
+                data = np.asarray(list(self.candles) + [extra], dtype=np.float64)
+                volumes = _bin_volumes(data[:, 1], data[:, 2], data[:, 3], data[:, 4], bins, self.intrabar)
+            elif self.intrabar and extra[1] > extra[2]:
+                volumes = volumes + self._spread(extra, bins)
+            else:
+                volumes = volumes.copy()
+                volumes[self._span(extra, self.edges)[0]] += extra[4]
+        if low == high:
+            return {}
+        first_bin = 0
+        if volumes.sum() <= 0:
+            rows = list(self.candles) + ([extra] if forming is not None else [])
+            edges = bins.tolist()
+            first_bin = min(self._span(c, edges)[0] for c in rows)
+        return profile_from_bins(volumes, bins, self.value_area_pct, first_bin)
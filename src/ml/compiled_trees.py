@@ -0,0 +1,309 @@
+import json
+from typing import Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("CompiledTrees")
+
+# Per-node handling of NaN inputs
+MISSING_DEFAULT = 0   # NaN follows default_left (sklearn, XGBoost, LightGBM missing_type=NaN)
+MISSING_AS_ZERO = 1   # NaN is compared as 0.0 (LightGBM missing_type=None)
+MISSING_ZERO = 2      # NaN and 0.0 follow default_left (LightGBM missing_type=Zero)
+LGBM_ZERO_THRESHOLD = 1e-35
+
+NODE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'default_left', 'missing')
+
+
+class CompiledTrees:
+    """
+    One tree ensemble flattened into parallel node arrays (all trees concatenated).
+
+    Leaves point to themselves, so evaluation is `depth` rounds of vectorized gathers
+    over an (samples, trees) node matrix with no per-tree Python loop. `output` selects
+    how leaf values combine: 'mean' (random forest: average class-1 fraction) or
+    'logit' (boosting: sigmoid(scale * (sum + base))).
+    """
+    def __init__(self, roots: np.ndarray, depth: int, output: str, arrays: Dict[str, np.ndarray],
+                 base: float = 0.0, scale: float = 1.0, strict: bool = False, float32: bool = False):
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = int(depth)
+        self.output = output
+        self.base = float(base)
+        self.scale = float(scale)
+        # XGBoost goes left on x < split, sklearn/LightGBM on x <= threshold
+        self.strict = bool(strict)
+        # sklearn and XGBoost compare float32 inputs
+        self.float32 = bool(float32)
+        self.feature = np.asarray(arrays['feature'], dtype=np.int32)
+        self.threshold = np.asarray(arrays['threshold'], dtype=np.float64)
+        self.left = np.asarray(arrays['left'], dtype=np.int32)
+        self.right = np.asarray(arrays['right'], dtype=np.int32)
+        self.value = np.asarray(arrays['value'], dtype=np.float64)
+        self.default_left = np.asarray(arrays['default_left'], dtype=bool)
+        self.missing = np.asarray(arrays['missing'], dtype=np.int8)
+        self._zero_missing = bool((self.missing == MISSING_ZERO).any())
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """(samples, trees) leaf values."""
+        if self.float32:
+            X = X.astype(np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        handle_missing = self._zero_missing or bool(np.isnan(X).any())
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            threshold = self.threshold[node]
+            if handle_missing:
+                kind = self.missing[node]
+                nan = np.isnan(x)
+                x = np.where(nan & (kind == MISSING_AS_ZERO), 0.0, x)
+                missing = (nan & (kind != MISSING_AS_ZERO)) | ((kind == MISSING_ZERO) & (np.abs(x) <= LGBM_ZERO_THRESHOLD))
+                go_left = np.where(missing, self.default_left[node], x < threshold if self.strict else x <= threshold)
+            else:
+                go_left = x < threshold if self.strict else x <= threshold
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class-1 probability per sample."""
+        values = self.leaf_values(X)
+        if self.output == 'mean':
+            return values.mean(axis=1)
+        margin = self.scale * (values.sum(axis=1) + self.base)
+        return 1.0 / (1.0 + np.exp(-margin))
+
+    def meta(self) -> Dict:
+        return {'depth': self.depth, 'output': self.output, 'base': self.base, 'scale': self.scale,
+                'strict': self.strict, 'float32': self.float32}
+
+
+class CompiledEnsemble:
+    """
+    Soft-vote ensemble of CompiledTrees members over a fixed feature order.
+    Saved as a single .npz (node arrays + JSON metadata); loading needs only NumPy.
+    """
+    def __init__(self, members: Dict[str, CompiledTrees], feature_names: Sequence[str]):
+        self.members = members
+        self.feature_names = list(feature_names)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        total = np.zeros(len(X))
+        for member in self.members.values():
+            total += member.predict_proba(X)
+        return total / len(self.members)
+
+    def save(self, path: str):
+        arrays = {}
+        meta = {'feature_names': self.feature_names, 'members': {}}
+        for name, member in self.members.items():
+            meta['members'][name] = member.meta()
+            arrays[f"{name}.roots"] = member.roots
+            for key in NODE_ARRAYS:
+                arrays[f"{name}.{key}"] = getattr(member, key)
+        arrays['meta'] = np.array(json.dumps(meta))
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'CompiledEnsemble':
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            members = {}
+            for name, params in meta['members'].items():
+                arrays = {key: data[f"{name}.{key}"] for key in NODE_ARRAYS}
+                members[name] = CompiledTrees(data[f"{name}.roots"], arrays=arrays, **params)
+        return cls(members, meta['feature_names'])
+
+
+class _TreeBuilder:
+    """Accumulates nodes of several trees into flat arrays (leaves point to themselves)."""
+    def __init__(self):
+        self.columns = {key: [] for key in NODE_ARRAYS}
+        self.roots: List[int] = []
+        self.depth = 0
+        self.n_nodes = 0
+
+    def add_tree(self, feature, threshold, left, right, value, default_left, missing, depth):
+        offset = self.n_nodes
+        n = len(feature)
+        is_leaf = np.asarray(left) < 0
+        own = np.arange(n) + offset
+        self.columns['feature'].append(np.where(is_leaf, 0, feature))
+        self.columns['threshold'].append(np.where(is_leaf, 0.0, threshold))
+        self.columns['left'].append(np.where(is_leaf, own, np.asarray(left) + offset))
+        self.columns['right'].append(np.where(is_leaf, own, np.asarray(right) + offset))
+        self.columns['value'].append(np.asarray(value, dtype=np.float64))
+        self.columns['default_left'].append(np.asarray(default_left, dtype=bool))
+        self.columns['missing'].append(np.asarray(missing, dtype=np.int8))
+        self.roots.append(offset)
+        self.n_nodes += n
+        self.depth = max(self.depth, int(depth))
+
+    def build(self, output: str, **params) -> CompiledTrees:
+        arrays = {key: np.concatenate(parts) for key, parts in self.columns.items()}
+        return CompiledTrees(np.asarray(self.roots), self.depth, output, arrays, **params)
+
+
+def _node_depths(left: np.ndarray, right: np.ndarray) -> int:
+    depth = np.zeros(len(left), dtype=np.int64)
+    for i in range(len(left)):  # children always follow their parent
+        if left[i] >= 0:
+            depth[left[i]] = depth[right[i]] = depth[i] + 1
+    return int(depth.max()) if len(depth) else 0
+
+
+def _from_sklearn(model) -> CompiledTrees:
+    if len(getattr(model, 'classes_', ())) != 2:
+        raise ValueError("only binary classifiers are supported")
+    estimators = list(model.estimators_) if hasattr(model, 'estimators_') else [model]
+    builder = _TreeBuilder()
+    for estimator in estimators:
+        tree = getattr(estimator, 'tree_', None)
+        if tree is None or tree.n_outputs != 1 or tree.value.shape[2] != 2:
+            raise ValueError("only single-output binary trees are supported")
+        counts = tree.value[:, 0, :]
+        value = counts[:, 1] / counts.sum(axis=1)
+        left, right = tree.children_left, tree.children_right
+        go_left = getattr(tree, 'missing_go_to_left', None)
+        default_left = np.asarray(go_left, dtype=bool) if go_left is not None else np.zeros(len(left), dtype=bool)
+        builder.add_tree(tree.feature, tree.threshold, left, right, value, default_left,
+                         np.full(len(left), MISSING_DEFAULT), _node_depths(left, right))
+    return builder.build('mean', float32=True)
+
+
+def _from_lightgbm(model) -> CompiledTrees:
+    dump = model.booster_.dump_model()
+    objective = str(dump.get('objective', ''))
+    if not objective.startswith('binary') or dump.get('num_tree_per_iteration', 1) != 1:
+        raise ValueError(f"unsupported LightGBM objective: {objective}")
+    scale = 1.0
+    for part in objective.split():
+        if part.startswith('sigmoid:'):
+            scale = float(part.split(':', 1)[1])
+
+    missing_kinds = {'None': MISSING_AS_ZERO, 'Zero': MISSING_ZERO, 'NaN': MISSING_DEFAULT}
+    builder = _TreeBuilder()
+    for info in dump['tree_info']:
+        nodes = []   # (feature, threshold, left, right, value, default_left, missing)
+
+        def walk(node, depth):
+            index = len(nodes)
+            nodes.append(None)
+            if 'leaf_value' in node or 'split_feature' not in node:
+                nodes[index] = (0, 0.0, -1, -1, float(node.get('leaf_value', 0.0)), False, MISSING_DEFAULT)
+                return depth
+            if node.get('decision_type', '<=') != '<=':
+                raise ValueError("categorical LightGBM splits are not supported")
+            left_depth = walk(node['left_child'], depth + 1)
+            left_index = index + 1
+            right_index = len(nodes)
+            right_depth = walk(node['right_child'], depth + 1)
+            nodes[index] = (int(node['split_feature']), float(node['threshold']), left_index, right_index, 0.0,
+                            bool(node.get('default_left', True)), missing_kinds.get(node.get('missing_type', 'None'), MISSING_AS_ZERO))
+            return max(left_depth, right_depth)
+
+        depth = walk(info['tree_structure'], 0)
+        columns = list(zip(*nodes))
+        builder.add_tree(*columns, depth=depth)
+    return builder.build('logit', scale=scale)
+
+
+def _xgboost_base_margin(booster) -> float:
+    config = json.loads(booster.save_config())
+    learner = config['learner']
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"unsupported XGBoost objective: {objective}")
+    base_score = float(str(learner['learner_model_param']['base_score']).strip('[]').split(',')[0])
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _from_xgboost(model) -> CompiledTrees:
+    booster = model.get_booster()
+    names = booster.feature_names or []
+    index = {name: i for i, name in enumerate(names)}
+
+    def feature_index(split: str) -> int:
+        if split in index:
+            return index[split]
+        if split.startswith('f') and split[1:].isdigit():
+            return int(split[1:])
+        raise ValueError(f"unknown XGBoost feature: {split}")
+
+    builder = _TreeBuilder()
+    for dumped in booster.get_dump(dump_format='json'):
+        nodes = []
+        ids = {}
+
+        def walk(node, depth):
+            position = len(nodes)
+            ids[node['nodeid']] = position
+            nodes.append(node)
+            depth_max = depth
+            for child in node.get('children', []):
+                depth_max = max(depth_max, walk(child, depth + 1))
+            return depth_max
+
+        depth = walk(json.loads(dumped), 0)
+        feature, threshold, left, right, value, default_left = [], [], [], [], [], []
+        for node in nodes:
+            if 'leaf' in node:
+                feature.append(0)
+                threshold.append(0.0)
+                left.append(-1)
+                right.append(-1)
+                value.append(float(node['leaf']))
+                default_left.append(False)
+            else:
+                feature.append(feature_index(node['split']))
+                threshold.append(float(np.float32(node['split_condition'])))
+                left.append(ids[node['yes']])
+                right.append(ids[node['no']])
+                value.append(0.0)
+                default_left.append(node.get('missing', node['yes']) == node['yes'])
+        builder.add_tree(feature, threshold, left, right, value, default_left,
+                         [MISSING_DEFAULT] * len(nodes), depth)
+    return builder.build('logit', base=_xgboost_base_margin(booster), strict=True, float32=True)
+
+
+def compile_model(model) -> CompiledTrees:
+    """Converts a fitted sklearn tree/forest, LightGBM or XGBoost binary classifier."""
+    if hasattr(model, 'booster_'):
+        return _from_lightgbm(model)
+    if hasattr(model, 'get_booster'):
+        return _from_xgboost(model)
+    if hasattr(model, 'tree_') or hasattr(getattr(model, 'estimators_', None), '__len__'):
+        return _from_sklearn(model)
+    raise ValueError(f"unsupported model type: {type(model).__name__}")
+
+
+def compile_ensemble(models: Dict[str, object], X_check, tolerance: float = 1e-6) -> Optional[CompiledEnsemble]:
+    """
+    Compiles every model of the ensemble and checks the soft vote against the libraries'
+    predict_proba on X_check (a DataFrame with the training columns). Returns None (the
+    bot then keeps using the library models) if a model cannot be converted or deviates.
+    """
+    if not models:
+        return None
+    feature_names = list(X_check.columns)
+    X = X_check.to_numpy(dtype=np.float64)
+    members = {}
+    for name, model in models.items():
+        try:
+            member = compile_model(model)
+        except (ValueError, KeyError, AttributeError) as e:
+            logger.warning(f"{name} derlenemedi, kütüphane modeli kullanılacak: {e}")
+            return None
+        expected = np.asarray(model.predict_proba(X_check), dtype=np.float64)[:, 1]
+        error = float(np.max(np.abs(member.predict_proba(X) - expected))) if len(X) else 0.0
+        if error > tolerance:
+            logger.warning(f"{name} derlenmiş çıktısı sapıyor (max |Δp| = {error:.2e}), kullanılmayacak.")
+            return None
+        members[name] = member
+    return CompiledEnsemble(members, feature_names)
@@ -1,37 +1,76 @@
 
+import importlib.util
 import os
+import threading
+import time
 import joblib
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Tuple, Optional
 from datetime import datetime
 import logging
 
-# ML Libraries
-try:
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import accuracy_score, precision_score, classification_report
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    RandomForestClassifier = None
-    train_test_split = None
-    accuracy_score = None
-    precision_score = None
-    classification_report = None
-    SKLEARN_AVAILABLE = False
-
-try:
-    from xgboost import XGBClassifier
-except ImportError:
-    XGBClassifier = None
-try:
-    from lightgbm import LGBMClassifier
-except ImportError:
-    LGBMClassifier = None
+from config.settings import settings
+from src.analysis.feature_frame import FeatureFrame
+from src.ml.feature_store import PYARROW_AVAILABLE, FeatureStore
+from src.ml.compiled_trees import CompiledEnsemble, compile_ensemble
+from src.ml.model_registry import ModelRegistry
+from src.ml.walk_forward import (evaluate_walk_forward, purged_walk_forward_splits, set_threads, summarize_folds,
+                                 training_workers)
+
+# ML Libraries: imported on first use, so a bot serving a compiled model never loads them
+SKLEARN_AVAILABLE = importlib.util.find_spec('sklearn') is not None
 
 logger = logging.getLogger("EnsembleManager")
 
+
+def default_models() -> Dict[str, object]:
+    """Untrained estimators of the available libraries (rf, xgb, lgbm)."""
+    models = {}
+    if SKLEARN_AVAILABLE:
+        from sklearn.ensemble import RandomForestClassifier
+        models['rf'] = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
+    else:
+        logger.warning("sklearn not found. ML models disabled.")
+    try:
+        from xgboost import XGBClassifier
+        models['xgb'] = XGBClassifier(n_estimators=100, max_depth=6, learning_rate=0.1, random_state=42, eval_metric='logloss')
+    except ImportError:
+        pass
+    try:
+        from lightgbm import LGBMClassifier
+        models['lgbm'] = LGBMClassifier(n_estimators=100, max_depth=6, learning_rate=0.1, random_state=42, verbose=-1)
+    except ImportError:
+        pass
+    return models
+
+# Model inputs: scale-independent indicators plus price ratios (engineered from 'close')
+FINAL_FEATURES = [
+    'RSI', 'MACD', 'CCI', 'ADX', 'MFI',
+    'Stoch_RSI_K', 'Stoch_RSI_D', 'Williams_R',
+    'SMA_50_Ratio', 'SMA_200_Ratio',
+    'BB_Upper_Dist', 'BB_Lower_Dist',
+    'VWAP_Ratio'
+]
+# engineered feature -> (source column, f(close, source))
+RATIO_FEATURES = {
+    'SMA_50_Ratio': ('SMA_50', lambda close, v: close / v),
+    'SMA_200_Ratio': ('SMA_200', lambda close, v: close / v),
+    'BB_Upper_Dist': ('Bollinger_Upper', lambda close, v: (v - close) / close),
+    'BB_Lower_Dist': ('Bollinger_Lower', lambda close, v: (close - v) / close),
+    'VWAP_Ratio': ('VWAP', lambda close, v: close / v),
+}
+
+class ServedModels(NamedTuple):
+    """What inference serves; replaced as a whole (one assignment), never mutated."""
+    version: Optional[str] = None
+    # Library estimators (empty when a compiled version is served)
+    models: Dict[str, object] = {}
+    # Array-based trees exported at training time; evaluated with NumPy only
+    compiled: Optional[CompiledEnsemble] = None
+    trained: bool = False
+
+
 class EnsembleManager:
     def __init__(self, models_dir: str = None):
         if models_dir is None:
@@ -46,20 +85,12 @@ class EnsembleManager:
             except OSError as e:
                 logger.warning(f"Model dizini oluşturulamadı: {e}")
                 
-        self.models = {}
-        if SKLEARN_AVAILABLE:
-            self.models['rf'] = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
-        else:
-            logger.warning("sklearn not found. ML models disabled.")
-        
-        if XGBClassifier:
-            self.models['xgb'] = XGBClassifier(n_estimators=100, max_depth=6, learning_rate=0.1, random_state=42, eval_metric='logloss')
-        
-        if LGBMClassifier:
-            self.models['lgbm'] = LGBMClassifier(n_estimators=100, max_depth=6, learning_rate=0.1, random_state=42, verbose=-1)
+        # Served models/version; the hot reload swaps the whole snapshot at once
+        self._served = ServedModels()
+
+        if settings.FEATURE_STORE_ENABLED and not PYARROW_AVAILABLE:
+            logger.warning("pyarrow not found. ML snapshots fall back to ml_training_data.csv.")
 
-        
-        self.is_trained = False
         self.feature_columns = [
             'RSI', 'MACD', 'MACD_Signal', 'CCI', 'ADX', 'MFI', 
             'Stoch_RSI_K', 'Stoch_RSI_D', 'Williams_R', 
@@ -69,43 +100,88 @@ class EnsembleManager:
         
         self.last_load_time = 0
         self.last_check_time = 0
+        # Versioned models (manifest.json + versions/) written by the training worker
+        self.registry = ModelRegistry(self.models_dir)
+        self._manifest_mtime: Optional[float] = None
+        self._reload_thread: Optional[threading.Thread] = None
+        # Columnar snapshot store for training data (created on the first snapshot)
+        self.feature_store = None
         self.load_models()
 
+    # Views of the served snapshot; assigning one replaces the whole snapshot
+    @property
+    def models(self) -> Dict[str, object]:
+        return self._served.models
+
+    @models.setter
+    def models(self, models: Dict[str, object]):
+        self._served = self._served._replace(models=models)
+
+    @property
+    def compiled(self) -> Optional[CompiledEnsemble]:
+        return self._served.compiled
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self._served.version
+
+    @property
+    def is_trained(self) -> bool:
+        return self._served.trained
+
+    @is_trained.setter
+    def is_trained(self, trained: bool):
+        self._served = self._served._replace(trained=trained)
+
     def check_for_updates(self):
         """
-        Checks if model files have been updated and reloads them if necessary.
-        This allows 'Hot Reloading' without restarting the bot.
+        Hot reload: polls the registry manifest (one stat, at most every MODEL_RELOAD_CHECK_SEC)
+        and loads a newly published version in a background thread, so inference never
+        waits on joblib.load. The new version replaces the served snapshot in a single
+        assignment once everything has loaded; if a load fails the last good version stays active.
         """
-        import time
         now = time.time()
-        
-        # Check at most once per minute
-        if now - self.last_check_time < 60:
+        if now - self.last_check_time < settings.MODEL_RELOAD_CHECK_SEC:
             return
-
         self.last_check_time = now
-        should_reload = False
-        
-        for name in self.models.keys():
-            path = os.path.join(self.models_dir, f"{name}_model.pkl")
-            if os.path.exists(path):
-                try:
-                    mtime = os.path.getmtime(path)
-                    if mtime > self.last_load_time:
-                        should_reload = True
-                        logger.info(f"Yeni model dosyası tespit edildi: {name}")
-                        break
-                except OSError:
-                    pass
-        
-        if should_reload:
-            logger.info("Modeller yeniden yükleniyor (Hot Reload)...")
-            self.load_models()
 
-    def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return
+        mtime = self.registry.manifest_mtime()
+        if mtime is None or mtime == self._manifest_mtime:
+            return
+        self._manifest_mtime = mtime
+        logger.info("Yeni model manifesti tespit edildi, arka planda yükleniyor (Hot Reload)...")
+        self._reload_thread = threading.Thread(target=self._load_version, name="model-reload", daemon=True)
+        self._reload_thread.start()
+
+    def _load_version(self) -> bool:
+        manifest = self.registry.manifest()
+        if not manifest or not manifest.get('models') or manifest.get('version') == self.model_version:
+            return False
+        compiled, models = None, {}
+        try:
+            if settings.ML_COMPILED_INFERENCE_ENABLED and manifest.get('compiled'):
+                compiled = self.registry.load_compiled(manifest)
+            else:
+                models = self.registry.load(manifest)
+        except Exception as e:
+            logger.error(f"Model sürümü yüklenemedi ({manifest.get('version')}), mevcut modeller korunuyor: {e}")
+            return False
+        # Atomic swap: predict_proba_batch reads the snapshot once, so it sees either version whole
+        self._served = ServedModels(manifest['version'], models, compiled, True)
+        self.last_load_time = time.time()
+        served = f"derlenmiş: {', '.join(compiled.members)}" if compiled is not None else ', '.join(models)
+        logger.info(f"Model sürümü {manifest['version']} devreye alındı ({served}).")
+        return True
+
+    def prepare_features(self, df) -> pd.DataFrame:
         """
-        Extracts and normalizes features from the dataframe.
+        Extracts and normalizes features from the dataframe (or the symbol's shared FeatureFrame).
+        Only the model columns are materialized; the indicator frame itself is not copied.
         """
+        if isinstance(df, FeatureFrame):
+            df = df.df
         # Ensure we have all columns
         missing_cols = [col for col in self.feature_columns if col not in df.columns]
         if missing_cols:
@@ -114,45 +190,73 @@ class EnsembleManager:
             # We might need to compute ratios instead of raw values for some.
             pass
 
-        # Create a copy to avoid SettingWithCopy warnings
-        X = df.copy()
-        
         # Feature Engineering: Convert raw values to ratios/normalized forms where appropriate
         # This makes the model more robust to price scale differences
-        if 'close' in X.columns:
-            if 'SMA_50' in X.columns:
-                X['SMA_50_Ratio'] = X['close'] / X['SMA_50']
-            if 'SMA_200' in X.columns:
-                X['SMA_200_Ratio'] = X['close'] / X['SMA_200']
-            if 'Bollinger_Upper' in X.columns:
-                X['BB_Upper_Dist'] = (X['Bollinger_Upper'] - X['close']) / X['close']
-            if 'Bollinger_Lower' in X.columns:
-                X['BB_Lower_Dist'] = (X['close'] - X['Bollinger_Lower']) / X['close']
-            if 'VWAP' in X.columns:
-                X['VWAP_Ratio'] = X['close'] / X['VWAP']
-                
-        # Update feature list to use engineered features
-        # For this first version, we'll mix raw indicators (RSI, ADX are scale-independent)
-        # with engineered price ratios.
-        
-        final_features = [
-            'RSI', 'MACD', 'CCI', 'ADX', 'MFI', 
-            'Stoch_RSI_K', 'Stoch_RSI_D', 'Williams_R', 
-            'SMA_50_Ratio', 'SMA_200_Ratio', 
-            'BB_Upper_Dist', 'BB_Lower_Dist',
-            'VWAP_Ratio'
-        ]
-        
-        # Check availability again
-        available_features = [f for f in final_features if f in X.columns]
-        
-        return X[available_features].fillna(0)
+        X = {}
+        if 'close' in df.columns:
+            close = df['close']
+            for feature, (source, ratio) in RATIO_FEATURES.items():
+                if source in df.columns:
+                    X[feature] = ratio(close, df[source])
+
+        # Mix raw indicators (RSI, ADX are scale-independent) with engineered price ratios
+        available_features = [f for f in FINAL_FEATURES if f in X or f in df.columns]
+        columns = {f: X[f] if f in X else df[f] for f in available_features}
+        return pd.DataFrame(columns, index=df.index, columns=available_features).fillna(0)
+
+    def feature_row(self, df) -> Optional[Tuple[Tuple[str, ...], List[float]]]:
+        """
+        Model features of the last row only: (feature names, values), equal to
+        prepare_features(df).iloc[-1] without building the full feature table. None if empty.
+        """
+        if isinstance(df, FeatureFrame):
+            if df.empty:
+                return None
+            columns = df
+            last = lambda name: float(df.column(name)[-1])
+        else:
+            if df is None or df.empty:
+                return None
+            columns = df.columns
+            last = lambda name: float(df[name].iloc[-1])
+
+        names, values = [], []
+        close = last('close') if 'close' in columns else None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for feature in FINAL_FEATURES:
+                if feature in RATIO_FEATURES and close is not None and RATIO_FEATURES[feature][0] in columns:
+                    source, ratio = RATIO_FEATURES[feature]
+                    value = ratio(np.float64(close), np.float64(last(source)))
+                elif feature in columns:
+                    value = last(feature)
+                else:
+                    continue
+                names.append(feature)
+                values.append(0.0 if np.isnan(value) else float(value))
+        return tuple(names), values
+
+    def _feature_store(self) -> Optional[FeatureStore]:
+        if self.feature_store is None and settings.FEATURE_STORE_ENABLED and PYARROW_AVAILABLE:
+            self.feature_store = FeatureStore(FINAL_FEATURES)
+        return self.feature_store
 
     def save_snapshot(self, df: pd.DataFrame, symbol: str):
         """
-        Saves the current market state (features) for future training.
+        Saves the current market state (features) for future training: buffered into the
+        columnar feature store (FEATURE_STORE_ENABLED), else appended to ml_training_data.csv.
         """
         try:
+            store = self._feature_store()
+            if store is not None:
+                row = self.feature_row(df)
+                if row is None:
+                    return
+                close = df.last('close') if isinstance(df, FeatureFrame) else float(df['close'].iloc[-1])
+                store.append(symbol, int(datetime.now().timestamp()), close, dict(zip(*row)))
+                return
+
+            if isinstance(df, FeatureFrame):
+                df = df.df
             X = self.prepare_features(df)
             if X.empty:
                 return
@@ -174,93 +278,192 @@ class EnsembleManager:
         except Exception as e:
             logger.error(f"Snapshot kaydetme hatası: {e}")
 
-    def train(self, df: pd.DataFrame, target_col: str = 'Target'):
+    def flush_snapshots(self) -> int:
+        """Writes buffered snapshots to the feature store (call on shutdown)."""
+        if self.feature_store is None:
+            return 0
+        return self.feature_store.flush()
+
+    def train(self, df: pd.DataFrame, target_col: str = 'Target', folds: Optional[int] = None,
+              workers: Optional[int] = None):
         """
         Trains the ensemble models.
         Target should be 1 (Buy/Up) or 0 (Sell/Down/Neutral).
+
+        The models are scored on purged walk-forward folds (in parallel, see walk_forward.py),
+        then refit on all rows and published with the fold reports.
+        Returns {'models': mean fold metrics, 'folds': per-fold reports, 'seconds': ...}.
         """
+        started = time.perf_counter()
         X = self.prepare_features(df)
-        y = df[target_col]
+        y = df[target_col].to_numpy()
         
         if len(X) < 50:
             logger.warning("Yetersiz veri, eğitim atlandı.")
             return
-            
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        logger.info(f"Model eğitimi başlıyor. Veri seti: {len(X)} satır.")
-        
-        metrics = {}
+        from sklearn.base import clone
+
+        # Fit fresh copies so the served estimators are never modified while in use
+        templates = {name: clone(model) for name, model in self.models.items()} if self.models else default_models()
+
+        if 'timestamp' in df.columns:
+            timestamps = pd.to_numeric(df['timestamp'], errors='coerce').fillna(0).to_numpy()
+            if 'label_end' in df.columns:
+                # Time of the snapshot the label was read from (create_labels)
+                label_end = pd.to_numeric(df['label_end'], errors='coerce').fillna(np.inf).to_numpy()
+            else:
+                label_end = timestamps + settings.ML_WALK_FORWARD_PURGE_HOURS * 3600
+        else:
+            # Row order is time order; labels look one row ahead
+            timestamps = np.arange(len(X))
+            label_end = timestamps + 1
+        n_folds = int(folds if folds is not None else settings.ML_WALK_FORWARD_FOLDS)
+        workers = training_workers(workers)
+        splits = purged_walk_forward_splits(timestamps, n_folds, label_end)
         
-        for name, model in self.models.items():
+        logger.info(f"Model eğitimi başlıyor. Veri seti: {len(X)} satır, {len(splits)} walk-forward fold, {workers} işçi.")
+
+        reports = []
+        if splits:
+            reports = evaluate_walk_forward(templates, X, y, splits, workers=workers)
+            for report in reports:
+                ensemble = report.get('ensemble', {})
+                logger.info(f"Fold {report['fold']}: train {report['train_rows']} / test {report['test_rows']} satır, "
+                            f"ensemble acc {ensemble.get('accuracy', float('nan')):.4f}, {report['seconds']:.1f}s")
+        else:
+            logger.warning("Walk-forward için yeterli geçmiş yok, doğrulama atlandı.")
+        summary = summarize_folds(reports)
+
+        # Final fit on all rows, each model using every core
+        trained = {}
+        for name, model in templates.items():
             try:
-                model.fit(X_train, y_train)
-                preds = model.predict(X_test)
-                acc = accuracy_score(y_test, preds)
-                metrics[name] = acc
-                logger.info(f"{name} accuracy: {acc:.4f}")
-                
-                # Save model
-                joblib.dump(model, os.path.join(self.models_dir, f"{name}_model.pkl"))
+                previous = set_threads(model, workers)
+                model.fit(X, y)
+                set_threads(model, previous)   # inference stays single-threaded
+                trained[name] = model
+                logger.info(f"{name} walk-forward metrikleri: {summary.get(name, {})}")
             except Exception as e:
                 logger.error(f"{name} eğitimi başarısız: {e}")
-        
-        self.is_trained = True
-        logger.info("Ensemble eğitimi tamamlandı.")
+
+        metrics = {'models': summary, 'folds': reports, 'seconds': time.perf_counter() - started}
+        version = self.model_version
+        # Publish as a new registry version (the bot swaps it in on its next manifest check),
+        # with the array-based export when it reproduces the soft vote on the last test block
+        if trained:
+            X_check = X.iloc[splits[-1][1]] if splits else X.iloc[-max(1, len(X) // 5):]
+            compiled = None
+            try:
+                compiled = compile_ensemble(trained, X_check)
+            except Exception as e:
+                logger.warning(f"Derlenmiş model dışa aktarılamadı: {e}")
+            try:
+                version = self.registry.publish(trained, metrics, feature_names=list(X.columns), compiled=compiled)
+                self._manifest_mtime = self.registry.manifest_mtime()
+            except OSError as e:
+                logger.error(f"Model sürümü yayınlanamadı: {e}")
+            self._served = ServedModels(version, trained, None, True)
+        logger.info(f"Ensemble eğitimi tamamlandı ({metrics['seconds']:.1f}s).")
         return metrics
 
     def predict_proba(self, df: pd.DataFrame) -> float:
         """
         Returns the ensemble probability score (0.0 to 1.0) for the *last* row of the dataframe.
         """
+        return self.predict_proba_batch({None: df})[None]
+
+    def predict_proba_batch(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+        """
+        Ensemble probabilities for many symbols at once: the last feature row of every
+        frame (DataFrame or FeatureFrame) is stacked into one N x F matrix and each model
+        runs a single predict_proba over it. Symbols without features get 0.5 (neutral).
+        """
         # Hot reload check
         self.check_for_updates()
-        
-        if not self.is_trained:
-            return 0.5 # Neutral
-            
-        X = self.prepare_features(df)
-        if X.empty:
-            return 0.5
-            
-        # Take the last row (current market state)
-        last_row = X.iloc[[-1]]
-        
-        probas = []
-        for name, model in self.models.items():
-            try:
-                # Class 1 is 'Buy' usually
-                p = model.predict_proba(last_row)[0][1]
-                probas.append(p)
-            except Exception as e:
-                logger.error(f"Tahmin hatası ({name}): {e}")
-                
-        if not probas:
-            return 0.5
-            
-        # Soft Voting (Average)
-        avg_proba = sum(probas) / len(probas)
-        return avg_proba
+
+        result = {symbol: 0.5 for symbol in frames}
+        # One read of the served snapshot: a concurrent hot swap cannot mix two versions
+        served = self._served
+        models, compiled = served.models, served.compiled
+        if not served.trained:
+            return result
+
+        # Frames normally share one feature set; group defensively by the available columns
+        groups: Dict[Tuple[str, ...], Tuple[List, List]] = {}
+        for symbol, df in frames.items():
+            row = self.feature_row(df)
+            if row is None or not row[0]:
+                continue
+            symbols, rows = groups.setdefault(row[0], ([], []))
+            symbols.append(symbol)
+            rows.append(row[1])
+
+        for names, (symbols, rows) in groups.items():
+            if compiled is not None:
+                for symbol, proba in zip(symbols, self._predict_compiled(compiled, names, rows)):
+                    result[symbol] = float(proba)
+                continue
+            X = pd.DataFrame(rows, columns=list(names))
+            total = np.zeros(len(symbols))
+            voted = 0
+            for name, model in models.items():
+                try:
+                    # Align to the columns the model was trained on (absent feature = 0, as fillna)
+                    trained_on = getattr(model, 'feature_names_in_', None)
+                    X_model = X
+                    if trained_on is not None and list(trained_on) != list(names):
+                        X_model = X.reindex(columns=list(trained_on), fill_value=0.0)
+                    # Class 1 is 'Buy' usually
+                    total += np.asarray(model.predict_proba(X_model), dtype=np.float64)[:, 1]
+                    voted += 1
+                except Exception as e:
+                    logger.error(f"Tahmin hatası ({name}): {e}")
+            if not voted:
+                continue
+            # Soft Voting (Average)
+            for symbol, proba in zip(symbols, total / voted):
+                result[symbol] = float(proba)
+        return result
+
+    @staticmethod
+    def _predict_compiled(compiled: CompiledEnsemble, names: Tuple[str, ...], rows: List[List[float]]) -> np.ndarray:
+        """Soft vote of the compiled trees; columns follow the training order (absent feature = 0)."""
+        X = np.asarray(rows, dtype=np.float64)
+        if list(names) != compiled.feature_names:
+            aligned = np.zeros((len(rows), len(compiled.feature_names)))
+            position = {name: i for i, name in enumerate(names)}
+            for j, name in enumerate(compiled.feature_names):
+                if name in position:
+                    aligned[:, j] = X[:, position[name]]
+            X = aligned
+        return compiled.predict_proba(X)
 
     def load_models(self):
-        import time
+        """
+        Startup load: the registry's current version, or the legacy flat
+        `<name>_model.pkl` files when no manifest has been published yet.
+        """
+        self._manifest_mtime = self.registry.manifest_mtime()
+        if self._manifest_mtime is not None and self._load_version():
+            return
+        models = default_models()
+
         loaded_count = 0
-        for name in self.models.keys():
+        for name in models.keys():
             path = os.path.join(self.models_dir, f"{name}_model.pkl")
             if os.path.exists(path):
                 try:
-                    self.models[name] = joblib.load(path)
+                    models[name] = joblib.load(path)
                     loaded_count += 1
                 except Exception as e:
                     logger.error(f"Model yüklenemedi ({name}): {e}")
         
         self.last_load_time = time.time()
+        self._served = ServedModels(None, models, None, loaded_count > 0 or loaded_count == len(models))
         
-        if loaded_count == len(self.models):
-            self.is_trained = True
+        if loaded_count == len(models):
             logger.info("Tüm modeller başarıyla yüklendi.")
         elif loaded_count > 0:
-            self.is_trained = True
-            logger.warning(f"{loaded_count}/{len(self.models)} model yüklendi.")
+            logger.warning(f"{loaded_count}/{len(models)} model yüklendi.")
         else:
             logger.info("Henüz eğitilmiş model bulunamadı.")
@@ -0,0 +1,175 @@
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+import logging
+
+import pandas as pd
+
+from config.settings import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    ds = None
+    pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger("FeatureStore")
+
+KEY_COLUMNS = ['timestamp', 'symbol', 'close']
+PARTITION_KEY = 'date'
+
+
+def _day(timestamp: int) -> str:
+    return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class FeatureStore:
+    """
+    Append-only columnar store for ML feature snapshots (replaces ml_training_data.csv).
+
+    Snapshots are buffered in memory and flushed in batches as Parquet files under
+    day partitions (`<root>/date=YYYY-MM-DD/part-*.parquet`). The schema is fixed by
+    `feature_columns`: a column the indicator frame does not provide is stored as null
+    and reported once, instead of silently disappearing from the file. Retention drops
+    whole partitions; read() prunes partitions by date and pushes the remaining
+    timestamp/symbol predicates down to the Parquet scan.
+    """
+    def __init__(self, feature_columns: List[str], root: Optional[str] = None,
+                 flush_rows: Optional[int] = None, flush_interval: Optional[float] = None,
+                 retention_days: Optional[int] = None):
+        self.feature_columns = list(feature_columns)
+        self.columns = KEY_COLUMNS + self.feature_columns
+        self.root = root or os.path.join(os.getcwd(), settings.FEATURE_STORE_DIR)
+        self.flush_rows = int(flush_rows if flush_rows is not None else settings.FEATURE_STORE_FLUSH_ROWS)
+        self.flush_interval = float(flush_interval if flush_interval is not None else settings.FEATURE_STORE_FLUSH_SEC)
+        self.retention_days = int(retention_days if retention_days is not None else settings.FEATURE_STORE_RETENTION_DAYS)
+        self.schema = None
+        if PYARROW_AVAILABLE:
+            self.schema = pa.schema([('timestamp', pa.int64()), ('symbol', pa.string()), ('close', pa.float64())]
+                                    + [(name, pa.float64()) for name in self.feature_columns])
+        self._buffer: Dict[str, List] = {name: [] for name in self.columns}
+        self._last_flush = time.monotonic()
+        self._seq = 0
+        self._reported_missing = set()
+        self.stats = {'appended': 0, 'flushed': 0, 'files': 0, 'dropped_partitions': 0, 'missing': {}}
+
+    def __len__(self) -> int:
+        return len(self._buffer['timestamp'])
+
+    def append(self, symbol: str, timestamp: int, close: float, features: Dict[str, float]):
+        """Buffers one snapshot; flushes when the batch is full or flush_interval has passed."""
+        self._buffer['timestamp'].append(int(timestamp))
+        self._buffer['symbol'].append(symbol)
+        self._buffer['close'].append(float(close))
+        missing = []
+        for name in self.feature_columns:
+            value = features.get(name)
+            if value is None:
+                missing.append(name)
+            self._buffer[name].append(None if value is None else float(value))
+        if missing:
+            for name in missing:
+                self.stats['missing'][name] = self.stats['missing'].get(name, 0) + 1
+            new = set(missing) - self._reported_missing
+            if new:
+                self._reported_missing.update(new)
+                logger.warning(f"Feature store: şemadaki kolonlar üretilmiyor, null yazılıyor: {sorted(new)}")
+        self.stats['appended'] += 1
+
+        if len(self) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes the buffered snapshots as one Parquet file per day partition. Returns the row count."""
+        rows = len(self)
+        self._last_flush = time.monotonic()
+        if not rows:
+            return 0
+        buffer, self._buffer = self._buffer, {name: [] for name in self.columns}
+        if not PYARROW_AVAILABLE:
+            logger.error("pyarrow bulunamadı, feature snapshot'ları yazılamadı.")
+            return 0
+
+        table = pa.Table.from_pydict(buffer, schema=self.schema)
+        days = [_day(ts) for ts in buffer['timestamp']]
+        try:
+            for day in sorted(set(days)):
+                mask = pa.array([d == day for d in days])
+                part = table.filter(mask) if len(set(days)) > 1 else table
+                directory = os.path.join(self.root, f"{PARTITION_KEY}={day}")
+                os.makedirs(directory, exist_ok=True)
+                self._seq += 1
+                path = os.path.join(directory, f"part-{int(time.time() * 1000)}-{os.getpid()}-{self._seq}.parquet")
+                pq.write_table(part, f"{path}.tmp")
+                os.replace(f"{path}.tmp", path)
+                self.stats['files'] += 1
+        except OSError as e:
+            logger.error(f"Feature store yazma hatası: {e}")
+            return 0
+        self.stats['flushed'] += rows
+        self.enforce_retention()
+        return rows
+
+    def partitions(self) -> List[str]:
+        """Day partitions on disk, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f"{PARTITION_KEY}="
+        return sorted(name[len(prefix):] for name in os.listdir(self.root)
+                      if name.startswith(prefix) and os.path.isdir(os.path.join(self.root, name)))
+
+    def enforce_retention(self, now: Optional[float] = None) -> int:
+        """Deletes partitions older than retention_days (whole directories, no rewrite)."""
+        if self.retention_days <= 0:
+            return 0
+        now = now if now is not None else time.time()
+        cutoff = _day(now - timedelta(days=self.retention_days).total_seconds())
+        dropped = 0
+        for day in self.partitions():
+            if day < cutoff:
+                shutil.rmtree(os.path.join(self.root, f"{PARTITION_KEY}={day}"), ignore_errors=True)
+                dropped += 1
+        self.stats['dropped_partitions'] += dropped
+        return dropped
+
+    def read(self, columns: Optional[List[str]] = None, start: Optional[int] = None, end: Optional[int] = None,
+             symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Snapshots with start <= timestamp < end (unix seconds) for the given symbols.
+        Only partitions overlapping the range are opened; the filter is evaluated in the scan.
+        """
+        columns = list(columns) if columns is not None else self.columns
+        days = self.partitions()
+        if start is not None:
+            days = [d for d in days if d >= _day(start)]
+        if end is not None:
+            days = [d for d in days if d <= _day(end)]
+        if not PYARROW_AVAILABLE or not days:
+            return pd.DataFrame(columns=columns)
+
+        files = []
+        for day in days:
+            directory = os.path.join(self.root, f"{PARTITION_KEY}={day}")
+            files.extend(os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                         if name.endswith('.parquet'))
+        if not files:
+            return pd.DataFrame(columns=columns)
+
+        predicate = None
+        for expression in (
+            ds.field('timestamp') >= int(start) if start is not None else None,
+            ds.field('timestamp') < int(end) if end is not None else None,
+            ds.field('symbol').isin(list(symbols)) if symbols is not None else None,
+        ):
+            if expression is not None:
+                predicate = expression if predicate is None else predicate & expression
+
+        dataset = ds.dataset(files, schema=self.schema, format='parquet')
+        return dataset.to_table(columns=columns, filter=predicate).to_pandas()
@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import logging
+
+import joblib
+
+from config.settings import settings
+from src.ml.compiled_trees import CompiledEnsemble
+
+logger = logging.getLogger("ModelRegistry")
+
+MANIFEST_FILE = 'manifest.json'
+VERSIONS_DIR = 'versions'
+COMPILED_FILE = 'compiled.npz'
+
+
+class ModelRegistry:
+    """
+    Versioned model store shared by the training worker and the bot.
+
+    Each training run writes its models into `versions/<version>/` and then publishes
+    them by atomically replacing `manifest.json` (written to a temp file + os.replace),
+    so a reader never sees a half-written version. The bot polls the manifest alone
+    (one stat) instead of every model file. Older versions beyond `keep` are pruned.
+    """
+    def __init__(self, root: str, keep: Optional[int] = None):
+        self.root = root
+        self.keep = int(keep if keep is not None else settings.MODEL_REGISTRY_KEEP_VERSIONS)
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+
+    def manifest_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.manifest_path)
+        except OSError:
+            return None
+
+    def manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def versions(self) -> List[str]:
+        directory = os.path.join(self.root, VERSIONS_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(v for v in os.listdir(directory) if os.path.isdir(os.path.join(directory, v)))
+
+    def publish(self, models: Dict[str, object], metrics: Optional[Dict] = None,
+                feature_names: Optional[List[str]] = None, compiled: Optional[CompiledEnsemble] = None) -> str:
+        """
+        Writes the models (and their compiled array export, if any) as a new version and
+        makes it current. Returns the version id.
+        """
+        version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f') + f"-{os.getpid()}"
+        directory = os.path.join(self.root, VERSIONS_DIR, version)
+        os.makedirs(directory, exist_ok=True)
+        files = {}
+        for name, model in models.items():
+            filename = f"{name}_model.pkl"
+            joblib.dump(model, os.path.join(directory, filename))
+            files[name] = os.path.join(VERSIONS_DIR, version, filename)
+        compiled_path = None
+        if compiled is not None:
+            compiled.save(os.path.join(directory, COMPILED_FILE))
+            compiled_path = os.path.join(VERSIONS_DIR, version, COMPILED_FILE)
+
+        manifest = {
+            'version': version,
+            'created_at': time.time(),
+            'models': files,
+            'compiled': compiled_path,
+            'metrics': metrics or {},
+            'feature_names': list(feature_names) if feature_names is not None else None,
+        }
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+        logger.info(f"Model sürümü yayınlandı: {version} ({', '.join(files)})")
+        self.prune(current=version)
+        return version
+
+    def load(self, manifest: Dict) -> Dict[str, object]:
+        """Loads every model of a manifest; raises if any of them fails (no partial versions)."""
+        return {name: joblib.load(os.path.join(self.root, path)) for name, path in manifest['models'].items()}
+
+    def load_compiled(self, manifest: Dict) -> CompiledEnsemble:
+        """The version's array-based trees (NumPy only, no ML library import)."""
+        return CompiledEnsemble.load(os.path.join(self.root, manifest['compiled']))
+
+    def prune(self, current: Optional[str] = None) -> int:
+        """Deletes all but the newest `keep` versions (never the current one)."""
+        if self.keep <= 0:
+            return 0
+        versions = self.versions()
+        stale = [v for v in versions[:-self.keep] if v != current]
+        for version in stale:
+            shutil.rmtree(os.path.join(self.root, VERSIONS_DIR, version), ignore_errors=True)
+        return len(stale)
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from src.ml.ensemble_manager import FINAL_FEATURES, SKLEARN_AVAILABLE, EnsembleManager
+from src.ml.feature_store import PYARROW_AVAILABLE, FeatureStore
+from src.ml.walk_forward import max_rows_for_memory
+
+logger = logging.getLogger("Trainer")
+
+# Label: next snapshot's return above this covers commission
+TARGET_THRESHOLD = 0.002
+
+
+def create_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Generates target labels based on future price movements.
+    """
+    logger.info("Generating labels from historical data...")
+
+    # Sort by symbol and time
+    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
+    df = df.sort_values(['symbol', 'timestamp'])
+
+    # Group by symbol
+    df['next_close'] = df.groupby('symbol')['close'].shift(-1)
+    # When the label becomes known; snapshots are irregular, so this can be hours or days later
+    df['label_end'] = df.groupby('symbol')['timestamp'].shift(-1)
+
+    # Calculate return
+    df['return'] = (df['next_close'] - df['close']) / df['close']
+
+    # Define Target: 1 if return > 0.2% (commission cover), else 0
+    df['Target'] = (df['return'] > TARGET_THRESHOLD).astype(int)
+
+    # Drop rows with NaN (last row of each symbol)
+    df = df.dropna(subset=['next_close'])
+
+    logger.info(f"Labels generated. Positive samples: {df['Target'].sum()} / {len(df)}")
+    return df
+
+
+def load_feature_store() -> pd.DataFrame:
+    """
+    Snapshots from the columnar feature store, newest rows up to the training memory cap
+    (ML_TRAINING_MAX_MEMORY_MB). Only the timestamp column is scanned to find the cut-off,
+    so older partitions are never loaded. Schema columns that were never produced (all
+    null) are dropped so the models are trained on the same feature set the live frames provide.
+    """
+    if not PYARROW_AVAILABLE:
+        return pd.DataFrame()
+    store = FeatureStore(FINAL_FEATURES)
+    start = None
+    max_rows = max_rows_for_memory(8 * len(store.columns))
+    if max_rows:
+        timestamps = store.read(columns=['timestamp'])['timestamp'].to_numpy()
+        if len(timestamps) > max_rows:
+            start = int(np.partition(timestamps, len(timestamps) - max_rows)[len(timestamps) - max_rows])
+            logger.info(f"Bellek sınırı: en yeni {max_rows} / {len(timestamps)} satır kullanılacak")
+    df = store.read(start=start)
+    if df.empty:
+        return df
+    logger.info(f"Feature store: {len(df)} rows from {len(store.partitions())} partitions")
+    df = df.dropna(axis=1, how='all')
+    if max_rows and len(df) > max_rows:
+        df = df.sort_values('timestamp').iloc[-max_rows:]
+    return df
+
+
+def load_legacy_csv(data_path: str) -> pd.DataFrame:
+    logger.info(f"Loading data from {data_path}...")
+    # Use on_bad_lines='skip' to handle corrupted rows
+    df = pd.read_csv(data_path, on_bad_lines='skip', engine='python')
+    logger.info(f"Data loaded: {len(df)} rows")
+
+    # Prune the file to prevent infinite growth (Rolling Window), sized by the memory cap
+    max_rows = max_rows_for_memory(8 * df.shape[1])
+    if max_rows and len(df) > max_rows:
+        logger.info(f"Trimming data to last {max_rows} rows for memory safety and storage...")
+        df = df.iloc[-max_rows:]
+
+        # Write back the trimmed version to disk (Data Rotation)
+        try:
+            df.to_csv(data_path, index=False)
+            logger.info(f"✅ Data file pruned to last {max_rows} rows.")
+        except Exception as e:
+            logger.error(f"Failed to save pruned data: {e}")
+    return df
+
+
+def load_training_data() -> pd.DataFrame:
+    """Feature store first, legacy ml_training_data.csv as fallback; labelled if needed."""
+    df = load_feature_store()
+    if df.empty:
+        data_path = os.path.join(os.getcwd(), 'data', 'ml_training_data.csv')
+        if not os.path.exists(data_path):
+            logger.error(f"Training data not found (feature store empty, no {data_path})")
+            return pd.DataFrame()
+        df = load_legacy_csv(data_path)
+
+    # Check if we need to label the data
+    if 'Target' not in df.columns:
+        if 'close' in df.columns and 'symbol' in df.columns:
+            df = create_labels(df)
+        else:
+            logger.error("Data missing 'close' or 'symbol' columns, cannot generate labels.")
+            return pd.DataFrame()
+    return df
+
+
+def train_and_publish(models_dir: Optional[str] = None) -> Optional[Dict]:
+    """
+    One training run: load + label the data, fit the ensemble and publish it as a new
+    registry version. Runs in the training worker process (or the train_models.py CLI).
+    Returns {'version', 'metrics'} or None when nothing was published.
+    """
+    try:
+        df = load_training_data()
+    except Exception as e:
+        logger.error(f"Failed to load data: {e}")
+        return None
+    if df.empty:
+        return None
+
+    if not SKLEARN_AVAILABLE:
+        logger.error("No ML models available (sklearn missing?).")
+        return None
+    # A compiled-only active version leaves ensemble.models empty; train() builds fresh estimators
+    ensemble = EnsembleManager(models_dir=models_dir)
+    previous = ensemble.model_version
+
+    logger.info("Training models using target: Target")
+    metrics = ensemble.train(df, target_col='Target')
+    if not ensemble.is_trained or ensemble.model_version in (None, previous):
+        return None
+    return {'version': ensemble.model_version, 'metrics': metrics}
+
+
+class TrainingWorker:
+    """
+    Runs train_and_publish in a separate process (spawned, one at a time) so fitting
+    never shares the bot's event loop or GIL. The bot does not wait for the result:
+    the worker publishes into the model registry and EnsembleManager hot-swaps the new
+    version on its next manifest check.
+    """
+    def __init__(self, models_dir: Optional[str] = None, interval_hours: Optional[float] = None):
+        self.models_dir = models_dir
+        self.interval = float(interval_hours if interval_hours is not None else settings.ML_TRAINING_INTERVAL_HOURS) * 3600
+        self.last_submit = 0.0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._future: Optional[Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def submit(self) -> bool:
+        """Starts a training run unless one is already in flight."""
+        if self.running:
+            return False
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self._future = self._pool.submit(train_and_publish, self.models_dir)
+        self.last_submit = time.time()
+        return True
+
+    def maybe_submit(self) -> bool:
+        """Submits a run when the training interval has passed (interval <= 0 disables it)."""
+        if self.interval <= 0 or time.time() - self.last_submit < self.interval:
+            return False
+        return self.submit()
+
+    def poll(self) -> Optional[Dict]:
+        """Result of a finished run (once), None while running or when it failed."""
+        if self._future is None or not self._future.done():
+            return None
+        future, self._future = self._future, None
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Eğitim süreci başarısız: {e}")
+            return None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+
+logger = logging.getLogger("WalkForward")
+
+# Fold worker state, sent once per process through the pool initializer
+_FOLD_DATA: Dict = {}
+
+
+def training_workers(workers: Optional[int] = None) -> int:
+    workers = int(workers if workers is not None else settings.ML_TRAINING_WORKERS)
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def set_threads(model, n_jobs: Optional[int]) -> Optional[int]:
+    """Sets n_jobs on tree ensembles (the only default models that use it); returns the previous value."""
+    params = model.get_params() if hasattr(model, 'get_params') else {}
+    if 'n_jobs' not in params or 'n_estimators' not in params:
+        return None
+    model.set_params(n_jobs=n_jobs)
+    return params['n_jobs']
+
+
+def max_rows_for_memory(bytes_per_row: int, memory_mb: Optional[float] = None, workers: Optional[int] = None) -> int:
+    """
+    Rows that fit the training memory cap: the frame, the feature matrix and one copy per
+    fold worker are alive at the same time. memory_mb <= 0 disables the cap.
+    """
+    memory_mb = float(memory_mb if memory_mb is not None else settings.ML_TRAINING_MAX_MEMORY_MB)
+    if memory_mb <= 0:
+        return 0
+    copies = training_workers(workers) + 2
+    return max(1, int(memory_mb * 1024 * 1024 // (max(1, bytes_per_row) * copies)))
+
+
+def purged_walk_forward_splits(timestamps: np.ndarray, n_folds: int, label_end: np.ndarray,
+                               min_train: int = 50) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Expanding-window folds over time: the sorted rows are cut into n_folds + 1 blocks,
+    fold k tests on block k and trains on the older rows whose label was known before
+    the block starts (label_end < first test timestamp). Labels look ahead to the next
+    snapshot, so a row's label can overlap the test block by hours; those rows are purged.
+    Folds with fewer than `min_train` training rows are skipped.
+    Returns (train_idx, test_idx) positional index pairs.
+    """
+    timestamps = np.asarray(timestamps)
+    label_end = np.asarray(label_end)
+    order = np.argsort(timestamps, kind='stable')
+    blocks = np.array_split(order, n_folds + 1)
+    folds = []
+    for test_idx in blocks[1:]:
+        if not len(test_idx):
+            continue
+        test_start = timestamps[test_idx].min()
+        train_idx = order[(timestamps[order] < test_start) & (label_end[order] < test_start)]
+        if len(train_idx) >= min_train:
+            folds.append((train_idx, test_idx))
+    return folds
+
+
+def _init_fold_worker(X: np.ndarray, y: np.ndarray, columns: List[str], models: Dict[str, object]):
+    _FOLD_DATA.update(X=X, y=y, columns=columns, models=models)
+
+
+def _run_fold(fold: int, train_idx: np.ndarray, test_idx: np.ndarray) -> Dict:
+    """Fits fresh copies of every model on one fold and scores them on its test block."""
+    from sklearn.base import clone
+    from sklearn.metrics import accuracy_score, precision_score, roc_auc_score
+
+    X, y, columns = _FOLD_DATA['X'], _FOLD_DATA['y'], _FOLD_DATA['columns']
+    X_train = pd.DataFrame(X[train_idx], columns=columns)
+    X_test = pd.DataFrame(X[test_idx], columns=columns)
+    y_train, y_test = y[train_idx], y[test_idx]
+    started = time.perf_counter()
+
+    report = {'fold': fold, 'train_rows': int(len(train_idx)), 'test_rows': int(len(test_idx)), 'models': {}}
+    if len(np.unique(y_train)) < 2:
+        report['skipped'] = 'single class in training window'
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+    probas = []
+    for name, template in _FOLD_DATA['models'].items():
+        model = clone(template)
+        set_threads(model, 1)   # the pool already uses every core
+        fit_started = time.perf_counter()
+        try:
+            model.fit(X_train, y_train)
+        except Exception as e:
+            report['models'][name] = {'error': str(e)}
+            continue
+        proba = np.asarray(model.predict_proba(X_test), dtype=np.float64)[:, 1]
+        probas.append(proba)
+        scores = {
+            'accuracy': float(accuracy_score(y_test, proba > 0.5)),
+            'precision': float(precision_score(y_test, proba > 0.5, zero_division=0)),
+            'fit_seconds': time.perf_counter() - fit_started,
+        }
+        if len(np.unique(y_test)) == 2:
+            scores['auc'] = float(roc_auc_score(y_test, proba))
+        report['models'][name] = scores
+
+    if probas:
+        vote = np.mean(probas, axis=0)
+        report['ensemble'] = {
+            'accuracy': float(accuracy_score(y_test, vote > 0.5)),
+            'precision': float(precision_score(y_test, vote > 0.5, zero_division=0)),
+        }
+        if len(np.unique(y_test)) == 2:
+            report['ensemble']['auc'] = float(roc_auc_score(y_test, vote))
+    report['seconds'] = time.perf_counter() - started
+    return report
+
+
+def evaluate_walk_forward(models: Dict[str, object], X: pd.DataFrame, y: np.ndarray,
+                          folds: List[Tuple[np.ndarray, np.ndarray]], workers: Optional[int] = None) -> List[Dict]:
+    """
+    Scores unfitted `models` on every fold. Folds run in parallel in a spawned process
+    pool (the data is shipped once per worker); workers <= 1 runs them in-process.
+    Returns one report per fold (rows, per-model and ensemble metrics, seconds).
+    """
+    workers = min(training_workers(workers), len(folds))
+    initargs = (X.to_numpy(dtype=np.float32), np.asarray(y), list(X.columns), models)
+    if workers <= 1:
+        _init_fold_worker(*initargs)
+        try:
+            return [_run_fold(i, train_idx, test_idx) for i, (train_idx, test_idx) in enumerate(folds)]
+        finally:
+            _FOLD_DATA.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_fold_worker, initargs=initargs) as pool:
+        futures = [pool.submit(_run_fold, i, train_idx, test_idx) for i, (train_idx, test_idx) in enumerate(folds)]
+        return [future.result() for future in futures]
+
+
+def summarize_folds(reports: List[Dict]) -> Dict:
+    """Mean of each model's (and the ensemble's) fold metrics."""
+    summary: Dict[str, Dict[str, float]] = {}
+    for report in reports:
+        entries = dict(report.get('models', {}))
+        if 'ensemble' in report:
+            entries['ensemble'] = report['ensemble']
+        for name, scores in entries.items():
+            for metric, value in scores.items():
+                if isinstance(value, float) and metric != 'fit_seconds':
+                    summary.setdefault(name, {}).setdefault(metric, []).append(value)
+    return {name: {metric: float(np.mean(values)) for metric, values in metrics.items()}
+            for name, metrics in summary.items()}
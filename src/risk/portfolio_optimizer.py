@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional, Union
 from src.utils.logger import logger
+from src.analysis.correlation import log_returns
 
 class PortfolioOptimizer:
     """
@@ -9,14 +10,17 @@ class PortfolioOptimizer:
     Implements Modern Portfolio Theory (MPT) concepts to reduce risk.
     """
     
-    def __init__(self, correlation_threshold: float = 0.75):
+    def __init__(self, correlation_threshold: float = 0.75, correlation_engine=None):
         """
         Args:
             correlation_threshold: Max allowed correlation between assets (0.0 to 1.0).
                                  If a new asset has >0.75 correlation with any existing asset,
                                  it might be rejected or penalized.
+            correlation_engine: Optional CorrelationEngine; when it knows the symbols the
+                                 check is a matrix lookup instead of a DataFrame corr().
         """
         self.correlation_threshold = correlation_threshold
+        self.correlation_engine = correlation_engine
 
     def calculate_correlation_matrix(self, price_data: Dict[str, pd.Series]) -> pd.DataFrame:
         """
@@ -37,7 +41,8 @@ class PortfolioOptimizer:
                              candidate_prices: pd.Series) -> Dict:
         """
         Checks if adding a candidate symbol would increase portfolio risk 
-        due to high correlation with existing assets.
+        due to high correlation with existing assets. Correlation is measured on
+        log returns, with or without the engine.
         
         Args:
             portfolio_prices: Dict of {symbol: price_series} for current holdings.
@@ -55,6 +60,18 @@ class PortfolioOptimizer:
                 "reason": "Portfolio is empty"
             }
             
+        engine = self.correlation_engine
+        if engine is not None and candidate_symbol in engine:
+            max_corr, most_correlated = engine.max_correlation(candidate_symbol, portfolio_prices.keys())
+            if max_corr is not None:
+                is_safe = max_corr < self.correlation_threshold
+                return {
+                    "is_safe": is_safe,
+                    "max_correlation": max_corr,
+                    "correlated_with": most_correlated,
+                    "reason": f"Max correlation {max_corr:.2f} with {most_correlated}"
+                }
+
         # Combine data
         data = portfolio_prices.copy()
         data[candidate_symbol] = candidate_prices
@@ -67,7 +84,8 @@ class PortfolioOptimizer:
             logger.error(f"Error constructing correlation dataframe: {e}")
             return {"is_safe": True, "max_correlation": 0.0, "reason": "Data error"}
         
-        if len(df) < 30: # Need at least 30 common data points for valid correlation
+        returns = pd.DataFrame(log_returns(df.to_numpy(dtype=float)), columns=df.columns).dropna()
+        if len(returns) < 30: # Need at least 30 common returns for valid correlation
              return {
                  "is_safe": True, 
                  "max_correlation": 0.0, 
@@ -75,13 +93,13 @@ class PortfolioOptimizer:
              }
 
         # Calculate Correlation Matrix
-        corr_matrix = df.corr()
+        corr_matrix = returns.corr()
         
         # Get correlations for the candidate symbol
         if candidate_symbol not in corr_matrix:
              return {"is_safe": True, "max_correlation": 0.0, "reason": "Candidate dropped during alignment"}
 
-        candidate_corrs = corr_matrix[candidate_symbol].drop(candidate_symbol)
+        candidate_corrs = corr_matrix[candidate_symbol].drop(candidate_symbol).dropna()
         
         if candidate_corrs.empty:
              return {"is_safe": True, "max_correlation": 0.0, "reason": "No overlap"}
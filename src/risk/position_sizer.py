@@ -15,7 +15,8 @@ class PositionSizer:
         
     def calculate_position_params(self, symbol: str, df: pd.DataFrame, total_balance: float, regime: str = 'NEUTRAL') -> Dict:
         """
-        Calculates optimal position size and leverage based on volatility using DataFrame.
+        Calculates optimal position size and leverage based on volatility using DataFrame
+        (or the symbol's FeatureFrame, whose ATR is already computed).
         """
         # 1. Calculate Volatility
         vol_pct = self.vol_calculator.get_volatility_pct(df)
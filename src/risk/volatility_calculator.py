@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from typing import Optional
 
+from src.analysis.feature_frame import FeatureFrame
+
 class VolatilityCalculator:
     """
     Calculates volatility based on ATR and Price.
@@ -34,7 +36,10 @@ class VolatilityCalculator:
         """
         Returns the current volatility as a percentage of price.
         Formula: (ATR / Close) * 100
+        Accepts the symbol's FeatureFrame, whose ATR is computed once per cycle.
         """
+        if isinstance(df, FeatureFrame):
+            return df.volatility_pct(period)
         if df.empty or len(df) < period:
             return 0.0
             
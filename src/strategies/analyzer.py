@@ -8,6 +8,11 @@ from src.ml.ensemble_manager import EnsembleManager
 from src.market_structure.orderbook_analyzer import OrderBookAnalyzer
 from src.market_structure.volume_profile import VolumeProfileAnalyzer
 from src.analysis.market_regime import MarketRegimeDetector
+from src.analysis.incremental import IncrementalIndicators
+from src.analysis.indicators import IndicatorFrame, compute_indicators, compute_indicators_batch
+from src.analysis.correlation import CorrelationEngine, log_returns
+from src.analysis.feature_frame import FeatureFrame, FeatureFrameBook, candles_key
+from src.analysis.memo import AnalysisCache, closed_candle_key, param_hash
 from src.strategies.funding_aware_strategy import FundingAwareStrategy
 from src.collectors.funding_rate_loader import FundingRateLoader
 from src.strategies.strategy_manager import StrategyManager
@@ -25,10 +30,63 @@ class TradeSignal(BaseModel):
     @field_validator("score")
     @classmethod
     def clamp_score(cls, v: float) -> float:
-        max_cap = 40.0
-        if settings.USE_MOCK_DATA:
-            max_cap = 20.0
-        return max(-20.0, min(max_cap, float(v)))
+        return _clamp_score(v)
+
+
+def _clamp_score(v: float) -> float:
+    max_cap = 40.0
+    if settings.USE_MOCK_DATA:
+        max_cap = 20.0
+    return max(-20.0, min(max_cap, float(v)))
+
+
+class ScanSignal:
+    """
+    Slotted signal for the scan hot path (analyze_spot_async -> validation -> swap logic).
+
+    Same fields as TradeSignal but no pydantic validation per symbol; the close history is
+    a read-only view of the shared FeatureFrame column instead of a 50-element list in
+    `details`. to_trade_signal() is the boundary into persistence / execution.
+    """
+    __slots__ = ('symbol', 'action', 'direction', 'score', 'estimated_yield', 'timestamp',
+                 'details', 'primary_strategy', 'price_history')
+
+    def __init__(self, symbol: str, action: str, direction: str, score: float, estimated_yield: float,
+                 timestamp: int, details: Dict, primary_strategy: Optional[str] = None,
+                 price_history: Optional[np.ndarray] = None):
+        self.symbol = symbol
+        self.action = action
+        self.direction = direction
+        self.score = _clamp_score(score)
+        self.estimated_yield = float(estimated_yield)
+        self.timestamp = int(timestamp)
+        self.details = details
+        self.primary_strategy = primary_strategy
+        self.price_history = price_history
+
+    def copy(self) -> 'ScanSignal':
+        """Copy whose details dict can be edited; nested details and the price view are shared."""
+        return ScanSignal(self.symbol, self.action, self.direction, self.score, self.estimated_yield,
+                          self.timestamp, dict(self.details), self.primary_strategy, self.price_history)
+
+    def to_trade_signal(self) -> TradeSignal:
+        details = dict(self.details)
+        if self.price_history is not None:
+            details['price_history'] = self.price_history.tolist()
+        return TradeSignal(symbol=self.symbol, action=self.action, direction=self.direction, score=self.score,
+                           estimated_yield=self.estimated_yield, timestamp=self.timestamp, details=details,
+                           primary_strategy=self.primary_strategy)
+
+    def __repr__(self) -> str:
+        return f"ScanSignal(symbol={self.symbol!r}, action={self.action!r}, score={self.score:.2f})"
+
+
+def price_history(signal) -> Optional[Any]:
+    """Close history of a ScanSignal (array view) or TradeSignal (details list); None if absent."""
+    history = getattr(signal, 'price_history', None)
+    if history is None and signal is not None:
+        history = signal.details.get('price_history')
+    return history if history is not None and len(history) else None
 
 class MarketAnalyzer:
     def __init__(self, funding_loader: Optional[FundingRateLoader] = None):
@@ -50,250 +108,166 @@ class MarketAnalyzer:
         
         # Strategy Manager (Multi-Strategy Framework)
         self.strategy_manager = StrategyManager()
+        # symbol -> (candles key, IndicatorFrame) from the last prepare_batch
+        self._batch_frames: Dict[str, tuple] = {}
+        # Universe-wide returns correlation (fed by the scan pre-pass, read by validators / swaps)
+        self.correlation = CorrelationEngine()
+        # symbol -> FeatureFrame of the current cycle (shared with risk / ML consumers)
+        self.features = FeatureFrameBook()
+        # Closed-candle memo: indicator frames (+ incremental state for the forming row) and regimes
+        self.memo = AnalysisCache()
+        # symbol -> order book analysis of the current cycle (prepare_order_books)
+        self.order_books: Dict[str, Dict] = {}
+        # symbol -> (candle window key, ensemble probability) of the current cycle (prepare_ml)
+        self.ml_probs: Dict[str, tuple] = {}
         
         # Funding Strategy
         self.funding_strategy = None
         if funding_loader:
             self.funding_strategy = FundingAwareStrategy(funding_loader)
 
-    def calculate_indicators(self, candles: List[List]) -> pd.DataFrame:
+    def calculate_indicator_frame(self, candles: List[List], symbol: Optional[str] = None,
+                                  timeframe: str = '1h') -> Optional[IndicatorFrame]:
         """
-        Calculates RSI and Moving Averages using Pandas.
+        Indicator set on contiguous float64 arrays (see src/analysis/indicators.py).
         Candles format: [timestamp, open, high, low, close, volume]
-        """
-        if not candles or len(candles) < self.sma_long_period:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['close'] = df['close'].astype(float)
-        df['high'] = df['high'].astype(float)
-        df['low'] = df['low'].astype(float)
-        
-        # --- PRO UPDATE: SMA -> EMA (Daha hızlı tepki) ---
-        # Eski: SMA 7/25 -> Yeni: EMA 9/21
-        df['EMA_Short'] = df['close'].ewm(span=9, adjust=False).mean()
-        df['EMA_Long'] = df['close'].ewm(span=21, adjust=False).mean()
-
-        # Ayrıca uyumluluk için klasik SMA (rolling mean) hesaplıyoruz
-        # (Birim testleri SMA bekliyor; EMA değerleri de ayrı olarak tutuluyor)
-        df['SMA_Short'] = df['close'].rolling(window=7).mean()
-        df['SMA_Long'] = df['close'].rolling(window=25).mean()
-        
-        # Volume Analysis
-        df['SMA_Volume'] = df['volume'].rolling(window=20).mean()
-        df['Volume_Ratio'] = df['volume'] / df['SMA_Volume']
-        
-        # Volatility (Standard Deviation of Returns)
-        df['Returns'] = df['close'].pct_change()
-        df['Volatility'] = df['Returns'].rolling(window=20).std() * 100 # In percentage
-        
-        # MACD
-        exp12 = df['close'].ewm(span=12, adjust=False).mean()
-        exp26 = df['close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp12 - exp26
-        df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        
-        # Bollinger Bands
-        df['BB_Middle'] = df['close'].rolling(window=20).mean()
-        df['BB_Std'] = df['close'].rolling(window=20).std()
-        df['BB_Upper'] = df['BB_Middle'] + (df['BB_Std'] * 2)
-        df['BB_Lower'] = df['BB_Middle'] - (df['BB_Std'] * 2)
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=self.rsi_period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.rsi_period).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # --- PRO UPDATE: Dynamic RSI Thresholds ---
-        # Trend gücüne (ADX) göre RSI eşiklerini esnet
-        # ADX henüz hesaplanmadı, aşağıda hesaplanacak, o yüzden önce ADX hesapla
-
-
-        # Stochastic RSI
-        min_val = df['RSI'].rolling(window=14).min()
-        max_val = df['RSI'].rolling(window=14).max()
-        denom = max_val - min_val
-        df['Stoch_RSI'] = np.where(denom == 0, 0.5, (df['RSI'] - min_val) / denom)
-        
-        # --- SuperTrend Calculation ---
-        atr_period = 10
-        atr_multiplier = 3.0
-        
-        # ATR
-        df['tr1'] = df['high'] - df['low']
-        df['tr2'] = abs(df['high'] - df['close'].shift())
-        df['tr3'] = abs(df['low'] - df['close'].shift())
-        df['TR'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-        df['ATR'] = df['TR'].rolling(window=atr_period).mean()
-        
-        # Basic Bands
-        hl2 = (df['high'] + df['low']) / 2
-        df['ST_Upper_Basic'] = hl2 + (atr_multiplier * df['ATR'])
-        df['ST_Lower_Basic'] = hl2 - (atr_multiplier * df['ATR'])
-        
-        # Final Bands
-        df['ST_Upper'] = df['ST_Upper_Basic']
-        df['ST_Lower'] = df['ST_Lower_Basic']
-        df['SuperTrend'] = df['ST_Upper'] # Default init
-        df['ST_Direction'] = 1 # 1: Bullish (Price > ST), -1: Bearish
-        
-        # Iterative calculation for SuperTrend (requires loop as it depends on previous values)
-        # Note: Vectorizing this fully is hard, using a fast loop
-        st_upper = df['ST_Upper_Basic'].values.copy()
-        st_lower = df['ST_Lower_Basic'].values.copy()
-        close = df['close'].values
-        st = np.zeros(len(df))
-        direction = np.zeros(len(df))
-        
-        # Init first value
-        st[0] = st_upper[0]
-        direction[0] = 1
-        
-        for i in range(1, len(df)):
-            # Final Upper Band
-            if st_upper[i] < st_upper[i-1] or close[i-1] > st_upper[i-1]:
-                st_upper[i] = st_upper[i]
-            else:
-                st_upper[i] = st_upper[i-1]
-                
-            # Final Lower Band
-            if st_lower[i] > st_lower[i-1] or close[i-1] < st_lower[i-1]:
-                st_lower[i] = st_lower[i]
-            else:
-                st_lower[i] = st_lower[i-1]
-                
-            # SuperTrend Logic
-            if direction[i-1] == 1: # Was Bullish
-                if close[i] <= st_lower[i-1]: # Breakdown
-                    direction[i] = -1
-                    st[i] = st_upper[i]
-                else:
-                    direction[i] = 1
-                    st[i] = st_lower[i]
-            else: # Was Bearish
-                if close[i] >= st_upper[i-1]: # Breakout
-                    direction[i] = 1
-                    st[i] = st_lower[i]
-                else:
-                    direction[i] = -1
-                    st[i] = st_upper[i]
-                    
-        df['SuperTrend'] = st
-        df['ST_Direction'] = direction
-
-        # --- CCI (Commodity Channel Index) ---
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        sma_tp = tp.rolling(window=20).mean()
-        mad = tp.rolling(window=20).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
-        df['CCI'] = (tp - sma_tp) / (0.015 * mad)
-
-        # --- ADX (Average Directional Index) ---
-        # TR is already calculated above
-        up_move = df['high'].diff()
-        down_move = -df['low'].diff()
-        
-        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-        
-        # Smooth DM and TR (Wilder's Smoothing usually 14)
-        adx_period = 14
-        df['plus_di'] = 100 * pd.Series(plus_dm).ewm(alpha=1/adx_period, adjust=False).mean() / df['TR'].ewm(alpha=1/adx_period, adjust=False).mean()
-        df['minus_di'] = 100 * pd.Series(minus_dm).ewm(alpha=1/adx_period, adjust=False).mean() / df['TR'].ewm(alpha=1/adx_period, adjust=False).mean()
-        
-        dx = 100 * abs(df['plus_di'] - df['minus_di']) / (df['plus_di'] + df['minus_di'])
-        df['ADX'] = dx.ewm(alpha=1/adx_period, adjust=False).mean()
-
-        # --- PRO UPDATE: Dynamic RSI Logic ---
-        # Trend varsa (ADX > 25) RSI limitlerini esnet
-        # Güçlü Trend: Aşırı alım 70 -> 80, Aşırı satım 30 -> 40 (Trend yönüne göre)
-        df['RSI_Overbought'] = 70
-        df['RSI_Oversold'] = 30
-        
-        # Eğer ADX > 25 ise Trend var demektir
-        trend_mask = df['ADX'] > 25
-        # Uptrend (+DI > -DI)
-        uptrend_mask = trend_mask & (df['plus_di'] > df['minus_di'])
-        # Downtrend (-DI > +DI)
-        downtrend_mask = trend_mask & (df['minus_di'] > df['plus_di'])
-        
-        # Yükseliş trendinde RSI 80'e kadar çıkabilir, erken satma!
-        df.loc[uptrend_mask, 'RSI_Overbought'] = 80
-        df.loc[uptrend_mask, 'RSI_Oversold'] = 40 # Düşüşlerde 40 destek olur
-        
-        # Düşüş trendinde RSI 20'ye kadar inebilir, erken alma!
-        df.loc[downtrend_mask, 'RSI_Overbought'] = 60 # Tepkiler cılız kalır
-        df.loc[downtrend_mask, 'RSI_Oversold'] = 20
 
-        # --- MFI (Money Flow Index) ---
-        typical_price = (df['high'] + df['low'] + df['close']) / 3
-        money_flow = typical_price * df['volume']
-        
-        positive_flow = np.where(typical_price > typical_price.shift(1), money_flow, 0)
-        negative_flow = np.where(typical_price < typical_price.shift(1), money_flow, 0)
-        
-        positive_mf = pd.Series(positive_flow).rolling(window=14).sum()
-        negative_mf = pd.Series(negative_flow).rolling(window=14).sum()
-        
-        mfi_ratio = positive_mf / negative_mf
-        df['MFI'] = 100 - (100 / (1 + mfi_ratio))
-
-        # --- VWAP (Volume Weighted Average Price) ---
-        # Rolling VWAP over the loaded window (usually 500 candles)
-        # For intraday, typically anchored to start of day, but rolling 24h (approx 24 candles for 1h) is also useful.
-        # Here we calculate Cumulative VWAP for the dataframe window to see the "Session" fair price.
-        cum_pv = (typical_price * df['volume']).cumsum()
-        cum_vol = df['volume'].cumsum()
-        df['VWAP'] = cum_pv / cum_vol
-        
-        # Also useful: Rolling VWAP (e.g., 24 periods for 1h chart ~ 1 day)
-        df['VWAP_24'] = (typical_price * df['volume']).rolling(window=24).sum() / df['volume'].rolling(window=24).sum()
-
-        # --- Pattern Recognition (Simple) ---
-        # 1. Doji: Open and Close are very close
-        body_size = abs(df['close'] - df['open'])
-        candle_range = df['high'] - df['low']
-        df['is_doji'] = body_size <= (candle_range * 0.1) # Body is less than 10% of range
-        
-        # 2. Hammer: Small body at top, long lower wick
-        lower_wick = np.minimum(df['open'], df['close']) - df['low']
-        upper_wick = df['high'] - np.maximum(df['open'], df['close'])
-        df['is_hammer'] = (lower_wick > 2 * body_size) & (upper_wick < body_size)
-        
-        # 3. Bullish Engulfing
-        # Previous candle red, Current candle green, Current body covers previous body
-        prev_open = df['open'].shift(1)
-        prev_close = df['close'].shift(1)
-        df['is_bullish_engulfing'] = (
-            (df['close'] > df['open']) & # Green
-            (prev_close < prev_open) & # Red
-            (df['open'] < prev_close) & # Open lower than prev close
-            (df['close'] > prev_open)   # Close higher than prev open
-        )
+        With a symbol the closed-candle part is memoized until the next candle closes;
+        only the forming (last) row is re-evaluated, incrementally.
+        """
+        if candles is None or len(candles) < self.sma_long_period:
+            return None
+        key = closed_candle_key(symbol, timeframe, candles, param_hash(self)) if symbol else None
+        if key is None or not self.memo.enabled:
+            return compute_indicators(candles)
+
+        cached = self.memo.get(key)
+        if cached is None:
+            frame = compute_indicators(candles)
+            self.memo.put(key, (frame, IncrementalIndicators.from_candles(candles[:-1])))
+            return frame.replace_last({})
+        frame, closed_state = cached
+        return frame.replace_last(closed_state.update(candles[-1], closed=False))
+
+    def prepare_batch(self, candles_by_symbol: Dict[str, List[List]]) -> int:
+        """
+        Computes indicators for a whole universe in one vectorized pass.
+        Histories of equal length are stacked into a (symbols, time, OHLCV) array; analyze_spot
+        then uses the per-symbol view instead of recomputing. Returns the number of symbols prepared.
+        """
+        groups: Dict[int, List[str]] = {}
+        for symbol, candles in candles_by_symbol.items():
+            if candles is not None and len(candles) >= self.sma_long_period:
+                groups.setdefault(len(candles), []).append(symbol)
+
+        frames = {}
+        for symbols in groups.values():
+            try:
+                data = np.asarray([candles_by_symbol[s] for s in symbols], dtype=np.float64)
+                batch = compute_indicators_batch(data)
+            except (ValueError, TypeError) as e:
+                logger.log(f"⚠️ Toplu gösterge hesabı başarısız ({len(symbols)} sembol): {e}")
+                continue
+            for i, symbol in enumerate(symbols):
+                frames[symbol] = (candles_key(candles_by_symbol[symbol]), batch.frame(i))
+        self._batch_frames = frames
+        return len(frames)
+
+    def prepare_order_books(self, order_books: Dict[str, Dict], prices: Dict[str, float]) -> int:
+        """
+        Analyzes the order books of this cycle's candidates in one vectorized pass.
+        _score_spot reads the result when no book is passed in explicitly. Returns the count.
+        """
+        self.order_books = self.orderbook_analyzer.analyze_batch(order_books, prices)
+        return len(self.order_books)
 
-        return df
+    def prepare_ml(self, candles_by_symbol: Dict[str, List[List]]) -> int:
+        """
+        Runs the ML ensemble once over the latest feature row of the whole universe
+        (N x F matrix, one predict_proba per model). _score_spot reads the probability
+        while the symbol's candle window is unchanged. Returns the count.
+        """
+        self.ml_probs = {}
+        self.ensemble.check_for_updates()
+        if not self.ensemble.is_trained:
+            return 0
+        frames = {}
+        for symbol, candles in candles_by_symbol.items():
+            features = self.feature_frame(symbol, candles)
+            if features is not None:
+                frames[symbol] = features
+        probs = self.ensemble.predict_proba_batch(frames)
+        self.ml_probs = {symbol: (frames[symbol].key, prob) for symbol, prob in probs.items()}
+        return len(self.ml_probs)
+
+    def _batch_frame(self, symbol: str, candles: List[List]) -> Optional[IndicatorFrame]:
+        cached = self._batch_frames.get(symbol)
+        if cached is None or not candles or cached[0] != candles_key(candles):
+            return None
+        return cached[1]
 
-    def analyze_market_regime(self, candles: List[List]) -> Dict[str, str]:
+    def feature_frame(self, symbol: str, candles: List[List]) -> Optional[FeatureFrame]:
+        """
+        The symbol's FeatureFrame for this candle window, computed once per cycle (batch view,
+        memo or a fresh pass) and shared read-only with risk, sizing, regime and ML code.
+        """
+        if not candles:
+            return None
+        features = self.features.get(symbol, candles)
+        if features is not None:
+            self.features.stats['reused'] += 1
+            return features
+        table = self._batch_frame(symbol, candles)
+        if table is None:
+            table = self.calculate_indicators(candles, symbol=symbol)
+            if table.empty:
+                return None
+        self.features.stats['built'] += 1
+        return self.features.put(FeatureFrame(symbol, table, candles_key(candles)))
+
+    def calculate_indicators(self, candles: List[List], symbol: Optional[str] = None,
+                             timeframe: str = '1h') -> pd.DataFrame:
+        """
+        Pandas adapter over calculate_indicator_frame for strategy code that expects a DataFrame.
+        Columns are the same as before (EMA/SMA, MACD, BB, RSI, SuperTrend, CCI, ADX, MFI, VWAP, patterns).
+        """
+        frame = self.calculate_indicator_frame(candles, symbol=symbol, timeframe=timeframe)
+        if frame is None:
+            return pd.DataFrame()
+        return frame.to_pandas()
+
+    def memo_stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters of the closed-candle memos (indicators + regime, votes, volume profile)."""
+        return {
+            'analyzer': self.memo.summary(),
+            'strategy_votes': self.strategy_manager.memo.summary(),
+            'volume_profile': self.vp_analyzer.memo.summary(),
+        }
+
+    def analyze_market_regime(self, candles: List[List], symbol: Optional[str] = None,
+                              timeframe: str = '1h') -> Dict[str, str]:
         """
         Analyzes the market regime based on BTC (or Index) candles.
         Returns: {'trend': 'UP'|'DOWN'|'SIDEWAYS', 'volatility': 'HIGH'|'LOW'}
+        Only closed candles are read, so with a symbol the result is memoized per candle.
         """
-        df = self.calculate_indicators(candles)
-        if df.empty:
+        key = closed_candle_key(symbol, timeframe, candles, ('regime', param_hash(self))) if symbol else None
+        return dict(self.memo.get_or_compute(key, lambda: self._market_regime(candles)))
+
+    def _market_regime(self, candles: List[List]) -> Dict[str, str]:
+        frame = self.calculate_indicator_frame(candles)
+        if frame is None:
             return {'trend': 'SIDEWAYS', 'volatility': 'LOW'}
             
-        last = df.iloc[-2]
-        
         # Trend Detection using SMA50 vs SMA200 (if available) or SMA25
         # Since we use SMA_Long (25) in calculate_indicators, let's use that as proxy for now
-        sma_long = last['SMA_Long']
-        close = last['close']
+        sma_long = frame.last('SMA_Long', -2)
+        close = frame.last('close', -2)
         
         # Bollinger Band Width for Volatility
-        bb_upper = last['BB_Upper']
-        bb_lower = last['BB_Lower']
-        bb_middle = last['BB_Middle']
+        bb_upper = frame.last('BB_Upper', -2)
+        bb_lower = frame.last('BB_Lower', -2)
+        bb_middle = frame.last('BB_Middle', -2)
         
         bb_width = 0
         if bb_middle > 0:
@@ -313,7 +287,8 @@ class MarketAnalyzer:
 
     def calculate_correlation(self, candles1: List[List], candles2: List[List]) -> float:
         """
-        Calculates Pearson correlation coefficient between two sets of candles.
+        Calculates Pearson correlation coefficient between the log returns of two sets
+        of candles (same measure as CorrelationEngine).
         Returns value between -1.0 and 1.0
         """
         if not candles1 or not candles2:
@@ -333,7 +308,8 @@ class MarketAnalyzer:
         if len(merged) < 20: # Need enough data points
             return 0.0
             
-        return merged['close_1'].corr(merged['close_2'])
+        returns = log_returns(merged[['close_1', 'close_2']].to_numpy(dtype=float))
+        return pd.DataFrame(returns).corr().iloc[0, 1]
 
     def analyze_spot(self, symbol: str, candles: List[List], 
                      rsi_modifier: float = 0, is_blocked: bool = False, 
@@ -345,7 +321,52 @@ class MarketAnalyzer:
                      exchange: Any = None) -> Optional[TradeSignal]:
         """
         Spot Strategy: Trend Following + RSI + Volume/Volatility Checks + Sentiment + Indicator Consensus
+        Note: MTF confirmation via `exchange` blocks; inside the event loop use analyze_spot_async.
+        """
+        features = self.feature_frame(symbol, candles)
+        if features is None:
+            return None
+        df = features.df
+        
+        # --- Multi-Strategy Framework (Phase 5) ---
+        strategy_result = self.strategy_manager.analyze_all(df, symbol, exchange=exchange)
+        signal = self._score_spot(symbol, candles, df, strategy_result, rsi_modifier, is_blocked, weights,
+                                  indicator_weights, market_regime, sentiment_score, order_book, features)
+        return signal.to_trade_signal() if signal is not None else None
+
+    async def analyze_spot_async(self, symbol: str, candles: List[List], 
+                                 rsi_modifier: float = 0, is_blocked: bool = False, 
+                                 weights: Dict[str, float] = None, 
+                                 indicator_weights: Dict[str, float] = None, 
+                                 market_regime: Dict = None, 
+                                 sentiment_score: float = 0.0,
+                                 order_book: Optional[Dict] = None,
+                                 loader: Any = None) -> Optional[ScanSignal]:
+        """
+        Same as analyze_spot, but the MTF confirmation (15m/1h/4h) is fetched concurrently
+        through the loader and never blocks the event loop. Returns the slotted ScanSignal
+        of the scan hot path; convert with to_trade_signal() where a TradeSignal is needed.
         """
+        features = self.feature_frame(symbol, candles)
+        if features is None:
+            return None
+        df = features.df
+        
+        strategy_result = await self.strategy_manager.analyze_all_async(df, symbol, loader=loader)
+        return self._score_spot(symbol, candles, df, strategy_result, rsi_modifier, is_blocked, weights,
+                                indicator_weights, market_regime, sentiment_score, order_book, features)
+
+    def _score_spot(self, symbol: str, candles: List[List], df: pd.DataFrame, strategy_result: Dict,
+                    rsi_modifier: float = 0, is_blocked: bool = False, 
+                    weights: Dict[str, float] = None, 
+                    indicator_weights: Dict[str, float] = None, 
+                    market_regime: Dict = None, 
+                    sentiment_score: float = 0.0,
+                    order_book: Optional[Dict] = None,
+                    features: Optional[FeatureFrame] = None) -> Optional[ScanSignal]:
+        """Scores the indicator frame using the (MTF-confirmed) strategy vote."""
+        if features is None:
+            features = FeatureFrame(symbol, df)
         if weights is None:
             weights = {}
         if indicator_weights is None:
@@ -362,14 +383,10 @@ class MarketAnalyzer:
         w_oversold = weights.get("oversold_bounce", 1.0)
         w_sentiment = weights.get("sentiment", 0.5) # Weight for sentiment impact
         
-        df = self.calculate_indicators(candles)
-        if df.empty:
-            return None
-            
         funding_rate_pct = 0.0
 
         # --- Market Regime Detection (Phase 3) ---
-        regime_data = self.regime_detector.detect_regime(df)
+        regime_data = self.regime_detector.detect_regime(features)
         detected_regime = regime_data['regime'] # TRENDING, RANGING, NEUTRAL
         is_no_trade = regime_data['is_no_trade_zone']
         
@@ -437,9 +454,6 @@ class MarketAnalyzer:
         score = 0.0
         primary_strategy = "unknown"
         
-        # --- Multi-Strategy Framework (Phase 5) ---
-        strategy_result = self.strategy_manager.analyze_all(df, symbol, exchange=exchange)
-        
         # Base Action & Score from Strategy Manager
         action = strategy_result['action']
         score = strategy_result['weighted_score']
@@ -460,7 +474,11 @@ class MarketAnalyzer:
         # --- ML Ensemble Score ---
         # Get probability from Ensemble Models (RandomForest, XGBoost, LightGBM)
         # Default is 0.5 (Neutral) if models are not trained.
-        ml_prob = self.ensemble.predict_proba(df)
+        cached_ml = self.ml_probs.get(symbol)
+        if cached_ml is not None and features.key is not None and cached_ml[0] == features.key:
+            ml_prob = cached_ml[1]
+        else:
+            ml_prob = self.ensemble.predict_proba(features)
         
         # Map Probability to Score:
         # 0.5 -> 0.0
@@ -470,9 +488,10 @@ class MarketAnalyzer:
         score += ml_score_contribution
         
         # --- Order Book Analysis Score ---
-        ob_analysis = {}
+        ob_analysis = self.order_books.get(symbol, {})
         if order_book:
             ob_analysis = self.orderbook_analyzer.analyze_depth(order_book, close)
+        if ob_analysis:
             ob_score = self.orderbook_analyzer.get_score_impact(ob_analysis)
             score += ob_score
             
@@ -483,7 +502,7 @@ class MarketAnalyzer:
         ob_spread_pct = float(ob_analysis.get('spread_pct', 0.0)) if ob_analysis else 0.0
 
         # --- Volume Profile Analysis Score ---
-        vp_profile = self.vp_analyzer.calculate_profile(candles)
+        vp_profile = self.vp_analyzer.calculate_profile(candles, symbol=symbol)
         vp_score, vp_reason = self.vp_analyzer.get_score_impact(close, vp_profile)
         score += vp_score
         if vp_score != 0:
@@ -606,7 +625,7 @@ class MarketAnalyzer:
         # Data Collection for ML
         # Save snapshot if significant score or random sample (1%)
         if abs(score) > 5.0 or np.random.random() < 0.01:
-            self.ensemble.save_snapshot(df, symbol)
+            self.ensemble.save_snapshot(features, symbol)
             
         # Clamp score to expected range to avoid extreme values from combined
         # indicator/ML contributions (keeps unit tests stable)
@@ -622,7 +641,7 @@ class MarketAnalyzer:
         _atr_val = float(last_row.get('ATR', 0.0))
         _volatility_pct = ( _atr_val / close * 100.0 ) if close > 0 else 0.0
 
-        return TradeSignal(
+        return ScanSignal(
             symbol=symbol,
             action=action,
             direction="LONG",
@@ -644,15 +663,17 @@ class MarketAnalyzer:
                 "orderbook_pressure": ob_pressure,
                 "orderbook_imbalance": float(ob_imbalance),
                 "orderbook_spread_pct": float(ob_spread_pct),
+                "orderbook_microprice": float(ob_analysis.get('microprice', 0.0)) if ob_analysis else 0.0,
+                "orderbook_depth_bps": ob_analysis.get('depth_bps', {}) if ob_analysis else {},
                 "ml_prob": float(ml_prob) if 'ml_prob' in locals() else 0.0,
                 "indicators": strategy_result.get('strategy_details', {}),
                 "regime": detected_regime,
                 "is_no_trade_zone": is_no_trade,
                 "primary_strategy": primary_strategy,
                 "bb_width": float(regime_data.get('bb_width', 0.0)),
-                "price_history": df['close'].astype(float).tail(50).tolist() # Last 50 candles for correlation
             },
-            primary_strategy=primary_strategy
+            primary_strategy=primary_strategy,
+            price_history=features.column('close')[-50:]  # Last 50 candles for correlation (read-only view)
         )
 
     def analyze(self, market_data: Dict) -> Optional[TradeSignal]:
@@ -1,15 +1,19 @@
+import asyncio
 import ccxt
+import numpy as np
 import pandas as pd
 import talib as ta
 from typing import Dict, Optional, Any
 from src.utils.logger import logger
+from src.collectors.exchange_client import sync_twin
 
 def fetch_data(symbol: str, timeframe: str, exchange: Any, limit: int = 100) -> Optional[pd.DataFrame]:
     """
     Fetches OHLCV data compatible with both CCXT and BinanceTRClient.
     """
     try:
-        # CCXT Exchange
+        # CCXT Exchange (async clients can't be awaited here, use the blocking twin)
+        exchange = sync_twin(exchange)
         if hasattr(exchange, 'fetch_ohlcv'):
             ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
         else:
@@ -35,57 +39,45 @@ def fetch_data(symbol: str, timeframe: str, exchange: Any, limit: int = 100) ->
         logger.log(f"❌ Exception fetching data for {symbol} {timeframe}: {e}")
         return None
 
-def analyze_single_timeframe(symbol: str, timeframe: str, exchange: Any) -> Dict:
+MTF_TIMEFRAMES = ('15m', '1h', '4h')
+MIN_MTF_CANDLES = 50 # Need enough data for indicators
+
+
+def _no_data_result(error: str = 'Insufficient Data') -> Dict:
+    return {
+        'direction': 'NEUTRAL',
+        'trend_strength': 'WEAK',
+        'indicators': {},
+        'confidence': 0.0,
+        'error': error
+    }
+
+
+def _evaluate_timeframe(symbol: str, timeframe: str, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> Dict:
     """
-    Analyzes a single timeframe using technical indicators.
-    
-    Args:
-        symbol (str): Trading pair (e.g., 'BTC/USDT')
-        timeframe (str): Timeframe (e.g., '15m', '1h', '4h')
-        exchange (Any): CCXT exchange instance or BinanceTRClient
-    
-    Returns:
-        dict: Analysis results
+    EMA cross / RSI / MACD votes + ADX trend strength on float64 arrays.
     """
-    
-    # 1. Fetch Data
-    df = fetch_data(symbol, timeframe, exchange)
-    if df is None:
-        return {
-            'direction': 'NEUTRAL',
-            'trend_strength': 'WEAK',
-            'indicators': {},
-            'confidence': 0.0,
-            'error': 'Insufficient Data'
-        }
-    
-    # 2. Indicators
     try:
         # --- Trend (EMA Cross) ---
-        df['ema_20'] = ta.EMA(df['close'], timeperiod=20)
-        df['ema_50'] = ta.EMA(df['close'], timeperiod=50)
-        
-        ema_20 = df['ema_20'].iloc[-1]
-        ema_50 = df['ema_50'].iloc[-1]
+        ema_20 = ta.EMA(close, timeperiod=20)[-1]
+        ema_50 = ta.EMA(close, timeperiod=50)[-1]
         
         ema_cross = 'BULLISH' if ema_20 > ema_50 else 'BEARISH'
         
         # --- Momentum (RSI) ---
-        df['rsi'] = ta.RSI(df['close'], timeperiod=14)
-        rsi_val = df['rsi'].iloc[-1]
+        rsi_val = ta.RSI(close, timeperiod=14)[-1]
         rsi_signal = 'BULLISH' if rsi_val > 50 else 'BEARISH'
         
         # --- MACD ---
-        macd, signal, hist = ta.MACD(df['close'], fastperiod=12, slowperiod=26, signalperiod=9)
-        hist_val = hist.iloc[-1]
+        macd, signal, hist = ta.MACD(close, fastperiod=12, slowperiod=26, signalperiod=9)
+        hist_val = hist[-1]
         macd_signal = 'BULLISH' if hist_val > 0 else 'BEARISH'
         
         # --- ADX (Trend Strength) ---
-        df['adx'] = ta.ADX(df['high'], df['low'], df['close'], timeperiod=14)
-        adx_val = df['adx'].iloc[-1]
+        adx_val = ta.ADX(high, low, close, timeperiod=14)[-1]
         trend_strength = 'STRONG' if adx_val > 25 else 'WEAK'
         
-        # 3. Voting System
+        # Voting System
         bullish_votes = sum([
             ema_cross == 'BULLISH',
             rsi_signal == 'BULLISH',
@@ -94,24 +86,13 @@ def analyze_single_timeframe(symbol: str, timeframe: str, exchange: Any) -> Dict
         
         bearish_votes = 3 - bullish_votes
         
-        # 4. Decision
+        # Decision (strict: only a STRONG trend produces a direction, weak trend means ranging)
         direction = 'NEUTRAL'
         
         if bullish_votes >= 2 and trend_strength == 'STRONG':
             direction = 'LONG'
         elif bearish_votes >= 2 and trend_strength == 'STRONG':
             direction = 'SHORT'
-        elif trend_strength == 'WEAK':
-             # Even if votes align, weak trend might mean ranging
-             # But let's follow the prompt logic: "else: direction = NEUTRAL"
-             # The prompt logic says:
-             # if bullish_votes >= 2 and trend_strength == 'STRONG': LONG
-             # elif bearish_votes >= 2 and trend_strength == 'STRONG': SHORT
-             # else: NEUTRAL
-             direction = 'NEUTRAL'
-             
-        # Optional: Allow Entry in Weak Trend if all 3 indicators agree?
-        # Prompt says strict check on STRONG trend. sticking to prompt.
         
         return {
             'direction': direction,
@@ -127,29 +108,58 @@ def analyze_single_timeframe(symbol: str, timeframe: str, exchange: Any) -> Dict
         
     except Exception as e:
         logger.log(f"❌ Analysis error for {symbol} {timeframe}: {e}")
-        return {
-            'direction': 'NEUTRAL',
-            'trend_strength': 'WEAK',
-            'indicators': {},
-            'confidence': 0.0,
-            'error': str(e)
-        }
+        return _no_data_result(str(e))
 
-def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
-    """
-    Analyzes 3 timeframes (15m, 1h, 4h) and generates a consensus.
+
+def analyze_single_timeframe(symbol: str, timeframe: str, exchange: Any) -> Dict:
     """
-    # 1. Analyze Timeframes
-    tf_15m = analyze_single_timeframe(symbol, '15m', exchange)
-    tf_1h = analyze_single_timeframe(symbol, '1h', exchange)
-    tf_4h = analyze_single_timeframe(symbol, '4h', exchange)
+    Analyzes a single timeframe using technical indicators.
     
-    # 2. Weights (Conceptually used for importance, but logic is rule-based below)
-    # 4h is most important (Trend)
-    # 1h is intermediate
-    # 15m is entry trigger
+    Args:
+        symbol (str): Trading pair (e.g., 'BTC/USDT')
+        timeframe (str): Timeframe (e.g., '15m', '1h', '4h')
+        exchange (Any): CCXT exchange instance or BinanceTRClient
     
-    # 3. Consensus Logic
+    Returns:
+        dict: Analysis results
+    """
+    df = fetch_data(symbol, timeframe, exchange)
+    if df is None:
+        return _no_data_result()
+    
+    return _evaluate_timeframe(
+        symbol, timeframe,
+        df['close'].to_numpy(dtype=np.float64),
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64)
+    )
+
+
+def analyze_timeframes(symbol: str, frames: Dict[str, Any]) -> Dict[str, Dict]:
+    """
+    Evaluates all timeframes in one pass from raw OHLCV lists
+    (one float64 conversion per frame, no DataFrame construction).
+    Missing frames or fetch errors count as 'Insufficient Data'.
+    """
+    results = {}
+    for timeframe, ohlcv in frames.items():
+        if isinstance(ohlcv, BaseException) or not ohlcv or len(ohlcv) < MIN_MTF_CANDLES:
+            results[timeframe] = _no_data_result()
+            continue
+        arr = np.asarray([row[:6] for row in ohlcv], dtype=np.float64)
+        results[timeframe] = _evaluate_timeframe(symbol, timeframe, arr[:, 4], arr[:, 2], arr[:, 3])
+    return results
+
+
+def build_consensus(tf_15m: Dict, tf_1h: Dict, tf_4h: Dict) -> Dict:
+    """
+    Consensus rules across 15m (entry trigger), 1h (intermediate) and 4h (trend).
+    """
+    timeframes = {
+        '15m': tf_15m,
+        '1h': tf_1h,
+        '4h': tf_4h
+    }
     directions = [tf_15m['direction'], tf_1h['direction'], tf_4h['direction']]
     
     # Scenario 1: PERFECT ALIGNMENT (Ideal)
@@ -159,11 +169,7 @@ def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
             'consensus': True,
             'direction': directions[0],
             'confidence_multiplier': 1.30, # %30 bonus
-            'timeframes': {
-                '15m': tf_15m,
-                '1h': tf_1h,
-                '4h': tf_4h
-            },
+            'timeframes': timeframes,
             'blocking_reason': None,
             'analysis_summary': f"Perfect alignment - All timeframes {directions[0]}"
         }
@@ -177,11 +183,7 @@ def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
                 'consensus': False,
                 'direction': 'NEUTRAL',
                 'confidence_multiplier': 0.0,
-                'timeframes': {
-                    '15m': tf_15m,
-                    '1h': tf_1h,
-                    '4h': tf_4h
-                },
+                'timeframes': timeframes,
                 'blocking_reason': f"4H counter-trend detected. 15m/1h={tf_15m['direction']} but 4h={tf_4h['direction']}",
                 'analysis_summary': "Major timeframe divergence - BLOCKED"
             }
@@ -192,11 +194,7 @@ def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
             'consensus': True,
             'direction': tf_4h['direction'],
             'confidence_multiplier': 1.15, # %15 bonus
-            'timeframes': {
-                '15m': tf_15m,
-                '1h': tf_1h,
-                '4h': tf_4h
-            },
+            'timeframes': timeframes,
             'blocking_reason': None,
             'analysis_summary': f"Strong alignment (4h+1h) - 15m noise ignored. Direction: {tf_4h['direction']}"
         }
@@ -206,11 +204,31 @@ def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
         'consensus': False,
         'direction': 'NEUTRAL',
         'confidence_multiplier': 0.0,
-        'timeframes': {
-            '15m': tf_15m,
-            '1h': tf_1h,
-            '4h': tf_4h
-        },
+        'timeframes': timeframes,
         'blocking_reason': "No clear consensus across timeframes",
         'analysis_summary': f"Mixed signals: 15m={tf_15m['direction']}, 1h={tf_1h['direction']}, 4h={tf_4h['direction']}"
     }
+
+
+def multi_timeframe_analyzer(symbol: str, exchange: Any) -> Dict:
+    """
+    Analyzes 3 timeframes (15m, 1h, 4h) and generates a consensus.
+    Blocking: fetches synchronously from the exchange.
+    """
+    tf_15m = analyze_single_timeframe(symbol, '15m', exchange)
+    tf_1h = analyze_single_timeframe(symbol, '1h', exchange)
+    tf_4h = analyze_single_timeframe(symbol, '4h', exchange)
+    return build_consensus(tf_15m, tf_1h, tf_4h)
+
+
+async def multi_timeframe_analyzer_async(symbol: str, loader: Any, limit: int = 100) -> Dict:
+    """
+    Non-blocking variant: the three timeframes are fetched concurrently through the
+    loader (cache / candle store / kline stream) and evaluated in one pass.
+    """
+    frames = await asyncio.gather(
+        *(loader.get_ohlcv(symbol, timeframe=tf, limit=limit) for tf in MTF_TIMEFRAMES),
+        return_exceptions=True
+    )
+    results = analyze_timeframes(symbol, dict(zip(MTF_TIMEFRAMES, frames)))
+    return build_consensus(results['15m'], results['1h'], results['4h'])
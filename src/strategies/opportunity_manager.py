@@ -1,6 +1,6 @@
 from typing import Dict, List, Optional
 import pandas as pd
-from src.strategies.analyzer import TradeSignal
+from src.strategies.analyzer import TradeSignal, price_history
 from src.utils.logger import log
 from config.settings import settings
 from src.risk.portfolio_optimizer import PortfolioOptimizer
@@ -21,10 +21,10 @@ class OpportunityManager:
        VE (Yeni Fırsat Portföy ile Aşırı Korele Değilse) -> Değişim (Swap) önerir.
     """
     
-    def __init__(self, min_score_diff: float = 5.0, min_hold_time: int | None = None):
+    def __init__(self, min_score_diff: float = 5.0, min_hold_time: int | None = None, correlation_engine=None):
         self.min_score_diff = min_score_diff
         self.min_hold_time = min_hold_time if min_hold_time is not None else getattr(settings, "OPP_MIN_HOLD_SECONDS", 3600)
-        self.portfolio_optimizer = PortfolioOptimizer(correlation_threshold=0.80)
+        self.portfolio_optimizer = PortfolioOptimizer(correlation_threshold=settings.CORRELATION_SWAP_MAX, correlation_engine=correlation_engine)
 
     def _get_net_score(self, signal: TradeSignal) -> float:
         if not signal:
@@ -77,9 +77,10 @@ class OpportunityManager:
 
             est_price = data.get('entry_price', 0.0)
             s_sig = signal_map.get(symbol)
-            if s_sig and s_sig.details.get('price_history'):
+            s_history = price_history(s_sig)
+            if s_history is not None:
                 try:
-                    est_price = float(pd.Series(s_sig.details['price_history']).iloc[-1])
+                    est_price = float(s_history[-1])
                 except Exception:
                     pass
             est_value = data.get('quantity', 0.0) * est_price
@@ -156,11 +157,12 @@ class OpportunityManager:
                 if s_sym == worst_asset['symbol']:
                     continue
                 
-                s_signal = signal_map.get(s_sym)
-                if s_signal and s_signal.details.get('price_history'):
-                    portfolio_prices[s_sym] = pd.Series(s_signal.details['price_history'])
+                s_history = price_history(signal_map.get(s_sym))
+                if s_history is not None:
+                    portfolio_prices[s_sym] = pd.Series(s_history)
             
-            candidate_prices = pd.Series(candidate.details.get('price_history', []))
+            c_history = price_history(candidate)
+            candidate_prices = pd.Series(c_history if c_history is not None else [], dtype=float)
             
             # Risk Analizi
             risk_analysis = self.portfolio_optimizer.check_correlation_risk(
@@ -266,10 +268,11 @@ class OpportunityManager:
         for s_sym in portfolio.keys():
             if s_sym == worst_asset['symbol']:
                 continue
-            s_signal = signal_map.get(s_sym)
-            if s_signal and s_signal.details.get('price_history'):
-                portfolio_prices[s_sym] = pd.Series(s_signal.details['price_history'])
-        candidate_prices = pd.Series(signal_map.get(best_opportunity.symbol).details.get('price_history', [])) if signal_map.get(best_opportunity.symbol) else pd.Series([])
+            s_history = price_history(signal_map.get(s_sym))
+            if s_history is not None:
+                portfolio_prices[s_sym] = pd.Series(s_history)
+        c_history = price_history(signal_map.get(best_opportunity.symbol))
+        candidate_prices = pd.Series(c_history if c_history is not None else [], dtype=float)
         risk_analysis = self.portfolio_optimizer.check_correlation_risk(
             portfolio_prices,
             best_opportunity.symbol,
@@ -278,9 +281,10 @@ class OpportunityManager:
 
         est_sell_price = None
         w_signal = signal_map.get(worst_asset['symbol'])
-        if w_signal and w_signal.details.get('price_history'):
+        w_history = price_history(w_signal)
+        if w_history is not None:
             try:
-                est_sell_price = float(pd.Series(w_signal.details['price_history']).iloc[-1])
+                est_sell_price = float(w_history[-1])
             except Exception:
                 est_sell_price = None
         if est_sell_price is None:
@@ -4,8 +4,9 @@ from config.settings import settings
 from src.strategies.breakout_strategy import BreakoutStrategy
 from src.strategies.mean_reversion_strategy import MeanReversionStrategy
 from src.strategies.momentum_strategy import MomentumStrategy
-from src.strategies.multi_timeframe import multi_timeframe_analyzer
+from src.strategies.multi_timeframe import multi_timeframe_analyzer, multi_timeframe_analyzer_async
 from src.utils.logger import logger
+from src.analysis.memo import AnalysisCache, closed_frame_key, param_hash
 
 class StrategyManager:
     """
@@ -20,8 +21,10 @@ class StrategyManager:
         
         # Voting Threshold (e.g., 0.6 means 60% of total weight must agree)
         self.consensus_threshold = settings.CONSENSUS_THRESHOLD
+        # Votes only read closed candles: memoized until the next close (MTF is re-checked every call)
+        self.memo = AnalysisCache()
 
-    def analyze_all(self, df: pd.DataFrame, symbol: str, exchange: Any = None) -> Dict[str, Any]:
+    def analyze_all(self, df: pd.DataFrame, symbol: str, exchange: Any = None, timeframe: str = '1h') -> Dict[str, Any]:
         """
         Runs all strategies and aggregates the results.
         
@@ -29,7 +32,44 @@ class StrategyManager:
             df (pd.DataFrame): Candle data for the primary timeframe (usually 1h or 15m)
             symbol (str): Trading pair symbol
             exchange (Any, optional): Exchange client for fetching MTF data. Defaults to None.
+                Blocking - prefer analyze_all_async inside the event loop.
         """
+        vote = self.cached_vote(df, symbol, timeframe)
+        
+        mtf_result = None
+        if vote['action'] == "ENTRY" and exchange:
+            try:
+                # 3-Layer Confirmation (15m, 1h, 4h)
+                mtf_result = multi_timeframe_analyzer(symbol, exchange)
+            except Exception as e:
+                logger.log(f"❌ MTF Analysis failed for {symbol}: {e}")
+        
+        return self.apply_mtf(vote, symbol, mtf_result, checked=vote['action'] == "ENTRY" and bool(exchange))
+
+    async def analyze_all_async(self, df: pd.DataFrame, symbol: str, loader: Any = None, timeframe: str = '1h') -> Dict[str, Any]:
+        """
+        Same as analyze_all, but the MTF confirmation fetches 15m/1h/4h concurrently
+        through the loader instead of blocking the event loop.
+        """
+        vote = self.cached_vote(df, symbol, timeframe)
+        
+        mtf_result = None
+        if vote['action'] == "ENTRY" and loader is not None:
+            try:
+                mtf_result = await multi_timeframe_analyzer_async(symbol, loader)
+            except Exception as e:
+                logger.log(f"❌ MTF Analysis failed for {symbol}: {e}")
+        
+        return self.apply_mtf(vote, symbol, mtf_result, checked=vote['action'] == "ENTRY" and loader is not None)
+
+    def cached_vote(self, df: pd.DataFrame, symbol: str, timeframe: str = '1h') -> Dict[str, Any]:
+        """_vote memoized per (symbol, timeframe, last closed candle, strategy parameters)."""
+        key = closed_frame_key(symbol, timeframe, df, param_hash(self, *self.strategies))
+        vote = self.memo.get_or_compute(key, lambda: self._vote(df))
+        return {**vote, 'strategy_details': dict(vote['strategy_details'])}
+
+    def _vote(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Weighted voting of the sub-strategies on the primary timeframe."""
         results = []
         total_weight = 0.0
         weighted_score = 0.0 # Entry Score
@@ -74,48 +114,57 @@ class StrategyManager:
                     best_s_score = res['score']
                     primary_strategy = res['strategy']
         
-        # --- Multi-Timeframe Confirmation (MTF) ---
-        mtf_result = {}
+        return {
+            "action": final_action,
+            "vote_ratio": vote_ratio,
+            "weighted_score": weighted_score,
+            "primary_strategy": primary_strategy,
+            "strategy_details": details
+        }
+
+    def apply_mtf(self, vote: Dict[str, Any], symbol: str, mtf_result: Optional[Dict], checked: bool = True) -> Dict[str, Any]:
+        """
+        Applies the Multi-Timeframe Confirmation (block / consensus bonus) to a vote.
+        """
+        final_action = vote['action']
+        weighted_score = vote['weighted_score']
+        primary_strategy = vote['primary_strategy']
+        details = vote['strategy_details']
         
         # Stats tracking
         self.stats = getattr(self, 'stats', {'mtf_checks': 0, 'mtf_consensus': 0, 'mtf_blocks': 0})
-
-        if final_action == "ENTRY" and exchange:
-            try:
-                self.stats['mtf_checks'] += 1
-                # 3-Layer Confirmation (15m, 1h, 4h)
-                mtf_result = multi_timeframe_analyzer(symbol, exchange)
-                
-                # Check for Blocking Condition (e.g., 4H Counter-Trend)
-                if not mtf_result.get('consensus', True):
-                    final_action = "HOLD"
-                    primary_strategy = "blocked_by_mtf"
-                    self.stats['mtf_blocks'] += 1
-                    logger.log(f"DEBUG: 🚫 {symbol} MTF Block: {mtf_result.get('blocking_reason', 'No consensus')}")
-                
-                # Check for Consensus Bonus
-                elif mtf_result.get('consensus'):
-                    self.stats['mtf_consensus'] += 1
-                    bonus = mtf_result.get('confidence_multiplier', 1.0)
-                    if bonus > 1.0:
-                        old_score = weighted_score
-                        weighted_score *= bonus
-                        logger.log(f"DEBUG: ✨ {symbol} MTF Consensus! Score: {old_score:.2f} -> {weighted_score:.2f}")
-                        
-                        # YENİ: Final skor kontrolü
-                        if weighted_score < 0.60:
-                            final_action = "HOLD"
-                            primary_strategy = "mtf_score_too_low"
-                            logger.log(f"DEBUG: ⚠️ {symbol} MTF bonus sonrası bile yetersiz: {weighted_score:.2f}")
-                        
-                details['mtf_analysis'] = mtf_result
-                
-            except Exception as e:
-                logger.log(f"❌ MTF Analysis failed for {symbol}: {e}")
+        
+        if checked:
+            self.stats['mtf_checks'] += 1
+        
+        if final_action == "ENTRY" and mtf_result is not None:
+            # Check for Blocking Condition (e.g., 4H Counter-Trend)
+            if not mtf_result.get('consensus', True):
+                final_action = "HOLD"
+                primary_strategy = "blocked_by_mtf"
+                self.stats['mtf_blocks'] += 1
+                logger.log(f"DEBUG: 🚫 {symbol} MTF Block: {mtf_result.get('blocking_reason', 'No consensus')}")
+            
+            # Check for Consensus Bonus
+            elif mtf_result.get('consensus'):
+                self.stats['mtf_consensus'] += 1
+                bonus = mtf_result.get('confidence_multiplier', 1.0)
+                if bonus > 1.0:
+                    old_score = weighted_score
+                    weighted_score *= bonus
+                    logger.log(f"DEBUG: ✨ {symbol} MTF Consensus! Score: {old_score:.2f} -> {weighted_score:.2f}")
+                    
+                    # YENİ: Final skor kontrolü
+                    if weighted_score < 0.60:
+                        final_action = "HOLD"
+                        primary_strategy = "mtf_score_too_low"
+                        logger.log(f"DEBUG: ⚠️ {symbol} MTF bonus sonrası bile yetersiz: {weighted_score:.2f}")
+                    
+            details['mtf_analysis'] = mtf_result
         
         return {
             "action": final_action,
-            "vote_ratio": vote_ratio,
+            "vote_ratio": vote['vote_ratio'],
             "weighted_score": weighted_score,
             "primary_strategy": primary_strategy,
             "strategy_details": details
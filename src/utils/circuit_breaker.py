@@ -2,6 +2,10 @@ import time
 from typing import Callable, Any
 from functools import wraps
 
+class CircuitOpenError(Exception):
+    """Çağrı yapılmadan reddedildi (devre açık); çağrılan sembolün kendi hatası değil"""
+
+
 class CircuitBreaker:
     """API hataları için devre kesici pattern"""
     def __init__(self, failure_threshold: int = 5, timeout: int = 60, recovery_timeout: int = 300):
@@ -32,7 +36,7 @@ class CircuitBreaker:
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         if self.is_open():
-            raise Exception(f"Circuit breaker OPEN - API çağrısı engellendi. {self.recovery_timeout}s sonra tekrar denenecek.")
+            raise CircuitOpenError(f"Circuit breaker OPEN - API çağrısı engellendi. {self.recovery_timeout}s sonra tekrar denenecek.")
         
         try:
             result = func(*args, **kwargs)
@@ -42,6 +46,19 @@ class CircuitBreaker:
             self.on_failure()
             raise
 
+    async def call_async(self, func: Callable, *args, **kwargs) -> Any:
+        """Aynı semantik, coroutine döndüren fonksiyonlar için"""
+        if self.is_open():
+            raise CircuitOpenError(f"Circuit breaker OPEN - API çağrısı engellendi. {self.recovery_timeout}s sonra tekrar denenecek.")
+        
+        try:
+            result = await func(*args, **kwargs)
+            self.on_success()
+            return result
+        except Exception as e:
+            self.on_failure()
+            raise
+
 # Decorator versiyonu
 def circuit_breaker(failure_threshold=5, timeout=60):
     breaker = CircuitBreaker(failure_threshold, timeout)
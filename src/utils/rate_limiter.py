@@ -1,8 +1,11 @@
 import time
 from collections import deque
 from threading import Lock
+from typing import Dict, Optional, Tuple
 
 import asyncio
+from config.settings import settings
+from src.utils.logger import log
 
 class RateLimiter:
     """Token bucket algoritması ile rate limiting"""
@@ -29,3 +32,216 @@ class RateLimiter:
         """Gerekirse bekle"""
         while not self.allow_request():
             await asyncio.sleep(0.1)
+
+
+# Binance IP/account limits per market (exchangeInfo.rateLimits), window in seconds
+BINANCE_LIMITS = {
+    'spot': {
+        'weight': {60: 6000},
+        'raw': {300: 61000},
+        'orders': {10: 100, 86400: 200000},
+    },
+    'futures': {
+        'weight': {60: 2400},
+        'raw': {},
+        'orders': {10: 300, 60: 1200},
+    },
+}
+
+_INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_ORDER_METHODS = {'create_order', 'create_market_order', 'create_limit_order', 'create_market_buy_order',
+                  'create_market_sell_order', 'create_limit_buy_order', 'create_limit_sell_order'}
+
+
+def _stepped(limit: Optional[int], steps, default: int) -> int:
+    """Weight for a `limit` parameter from (max_limit, weight) steps."""
+    if limit is None:
+        return default
+    for max_limit, weight in steps:
+        if limit <= max_limit:
+            return weight
+    return steps[-1][1]
+
+
+def request_weight(method: str, args=(), kwargs=None, market: str = 'spot') -> Tuple[int, int]:
+    """
+    (request weight, order count) of a CCXT unified call on Binance.
+    Unknown/implicit endpoints are charged a weight of 1.
+    """
+    kwargs = kwargs or {}
+    futures = market == 'futures'
+
+    def arg(index, name):
+        if name in kwargs:
+            return kwargs[name]
+        return args[index] if len(args) > index else None
+
+    if method == 'fetch_ohlcv':
+        limit = arg(3, 'limit')
+        if futures:
+            return _stepped(limit, ((99, 1), (499, 2), (1000, 5), (1500, 10)), 2), 0
+        return 2, 0
+    if method == 'fetch_order_book':
+        limit = arg(1, 'limit')
+        if futures:
+            return _stepped(limit, ((50, 2), (100, 5), (500, 10), (1000, 20)), 2), 0
+        return _stepped(limit, ((100, 5), (500, 25), (1000, 50), (5000, 250)), 5), 0
+    if method == 'fetch_tickers':
+        symbols = arg(0, 'symbols')
+        if symbols:
+            return (len(symbols) if futures else min(80, 2 * len(symbols))), 0
+        return (40 if futures else 80), 0
+    if method == 'fetch_ticker':
+        return (1 if futures else 2), 0
+    if method in ('fetch_balance', 'fetch_positions'):
+        return (5 if futures else 20), 0
+    if method in ('fetch_funding_rates', 'fetch_open_orders'):
+        return (10 if futures else 6), 0
+    if method == 'load_markets':
+        return (1 if futures else 20), 0
+    if method in _ORDER_METHODS:
+        return 1, 1
+    return 1, 0
+
+
+class _Window:
+    """Fixed counter window aligned to wall-clock boundaries, the way Binance counts."""
+    def __init__(self, limit: int, interval: int):
+        self.limit = limit
+        self.interval = interval
+        self.start = 0.0
+        self.used = 0
+
+    def _roll(self, now: float):
+        start = now - now % self.interval
+        if start != self.start:
+            self.start = start
+            self.used = 0
+
+    def delay(self, cost: int, limit: float, now: float) -> float:
+        self._roll(now)
+        # A single request bigger than the budget still goes through on an empty window
+        if self.used == 0 or self.used + cost <= limit:
+            return 0.0
+        return self.start + self.interval - now
+
+    def charge(self, cost: int, now: float):
+        self._roll(now)
+        self.used += cost
+
+    def sync(self, used: int, now: float):
+        self._roll(now)
+        # Local count may include requests still in flight, the server may include other clients
+        self.used = max(self.used, used)
+
+
+class BinanceRateLimiter:
+    """
+    asyncio-native limiter that charges Binance request weight instead of request count.
+
+    Separate pools for request weight, raw requests and order rate. Counters are synced
+    from X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* response headers and waiters sleep
+    exactly until their window resets (no polling). Data requests only use `headroom`
+    of the weight budget, the rest is kept for orders; orders have their own queue so
+    they never wait behind a backlog of market data requests.
+    """
+    def __init__(self, market: str = 'spot', headroom: Optional[float] = None, clock=time.time):
+        limits = BINANCE_LIMITS['futures' if market == 'futures' else 'spot']
+        self.market = market
+        self.headroom = headroom if headroom is not None else settings.RATE_LIMIT_HEADROOM
+        self._clock = clock
+        self.windows: Dict[str, Dict[int, _Window]] = {
+            kind: {interval: _Window(limit, interval) for interval, limit in pools.items()}
+            for kind, pools in limits.items()
+        }
+        self._blocked_until = 0.0
+        self._data_lock = asyncio.Lock()
+        self._order_lock = asyncio.Lock()
+        self.stats = {'requests': 0, 'weight': 0, 'orders': 0, 'waits': 0, 'waited_sec': 0.0, 'bans': 0}
+
+    def _delay(self, weight: int, orders: int, now: float) -> float:
+        delay = max(0.0, self._blocked_until - now)
+        weight_share = 1.0 if orders else self.headroom
+        for window in self.windows['weight'].values():
+            delay = max(delay, window.delay(weight, window.limit * weight_share, now))
+        for window in self.windows['raw'].values():
+            delay = max(delay, window.delay(1, window.limit * weight_share, now))
+        if orders:
+            for window in self.windows['orders'].values():
+                delay = max(delay, window.delay(orders, window.limit, now))
+        return delay
+
+    def _charge(self, weight: int, orders: int, now: float):
+        for window in self.windows['weight'].values():
+            window.charge(weight, now)
+        for window in self.windows['raw'].values():
+            window.charge(1, now)
+        if orders:
+            for window in self.windows['orders'].values():
+                window.charge(orders, now)
+        self.stats['requests'] += 1
+        self.stats['weight'] += weight
+        self.stats['orders'] += orders
+
+    async def acquire(self, weight: int = 1, orders: int = 0):
+        """Waits until the request fits into every pool, then charges it."""
+        async with (self._order_lock if orders else self._data_lock):
+            while True:
+                now = self._clock()
+                delay = self._delay(weight, orders, now)
+                if delay <= 0:
+                    self._charge(weight, orders, now)
+                    return
+                self.stats['waits'] += 1
+                self.stats['waited_sec'] += delay
+                await asyncio.sleep(delay)
+
+    async def wait_if_needed(self, weight: int = 1):
+        await self.acquire(weight)
+
+    def update_from_headers(self, headers: Optional[Dict]):
+        """Syncs counters from Binance usage headers (X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-10S, ...)."""
+        if not headers:
+            return
+        now = self._clock()
+        for key, value in headers.items():
+            name = str(key).lower()
+            if name.startswith('x-mbx-used-weight-'):
+                kind, suffix = 'weight', name[len('x-mbx-used-weight-'):]
+            elif name.startswith('x-mbx-order-count-'):
+                kind, suffix = 'orders', name[len('x-mbx-order-count-'):]
+            else:
+                continue
+            try:
+                interval = int(suffix[:-1]) * _INTERVAL_UNITS[suffix[-1]]
+                window = self.windows[kind].get(interval)
+                if window is not None:
+                    window.sync(int(value), now)
+            except (KeyError, ValueError, IndexError):
+                continue
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Blocks every pool after a 429/418 until Retry-After has passed."""
+        wait = float(retry_after) if retry_after else settings.RATE_LIMIT_BAN_BACKOFF_SEC
+        self._blocked_until = max(self._blocked_until, self._clock() + wait)
+        self.stats['bans'] += 1
+        log(f"⛔ Binance rate limit aşıldı, {wait:.0f}s tüm istekler durduruldu")
+
+    def usage(self) -> Dict[str, Dict[int, int]]:
+        now = self._clock()
+        out = {}
+        for kind, pools in self.windows.items():
+            for window in pools.values():
+                window._roll(now)
+            out[kind] = {interval: window.used for interval, window in pools.items()}
+        return out
+
+
+_shared_limiters: Dict[str, BinanceRateLimiter] = {}
+
+
+def shared_rate_limiter(market: str = 'spot') -> BinanceRateLimiter:
+    """Binance limits are per IP, so every client of one market type shares a limiter."""
+    if market not in _shared_limiters:
+        _shared_limiters[market] = BinanceRateLimiter(market)
+    return _shared_limiters[market]
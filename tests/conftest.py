@@ -0,0 +1,9 @@
+import pytest
+
+from config.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def _isolated_candle_archive(tmp_path, monkeypatch):
+    # Keep loader/backtester candle archives out of the working tree
+    monkeypatch.setattr(settings, "CANDLE_ARCHIVE_DIR", str(tmp_path / "candles"))
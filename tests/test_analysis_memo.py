@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis.indicators import compute_indicators
+from src.analysis.memo import AnalysisCache
+from src.market_structure.volume_profile import VolumeProfileAnalyzer
+from src.strategies.analyzer import MarketAnalyzer
+from src.strategies.strategy_manager import StrategyManager
+
+
+def _candles(n=60, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return [[i * 3600000, float(c), float(c) + 1.0, float(c) - 1.0, float(c), float(rng.uniform(50, 150))]
+            for i, c in enumerate(close)]
+
+
+def test_lru_eviction_and_counters():
+    cache = AnalysisCache(maxsize=2, enabled=True)
+    calls = []
+
+    def compute(v):
+        calls.append(v)
+        return v
+
+    cache.get_or_compute('a', lambda: compute(1))
+    cache.get_or_compute('b', lambda: compute(2))
+    assert cache.get_or_compute('a', lambda: compute(99)) == 1   # refreshes 'a'
+    cache.get_or_compute('c', lambda: compute(3))                 # evicts 'b'
+    cache.get_or_compute('b', lambda: compute(4))
+
+    assert calls == [1, 2, 3, 4]
+    assert cache.stats == {'hits': 1, 'misses': 4, 'evictions': 2}
+    assert len(cache) == 2
+
+
+def test_indicators_memoized_and_forming_row_reevaluated():
+    analyzer = MarketAnalyzer()
+    candles = _candles()
+    analyzer.calculate_indicators(candles, symbol='AAA/USDT')
+
+    # Same closed history, forming candle moved
+    forming = [row[:] for row in candles]
+    forming[-1][2] += 3.0
+    forming[-1][4] += 2.5
+    forming[-1][5] += 40.0
+    df = analyzer.calculate_indicators(forming, symbol='AAA/USDT')
+
+    assert analyzer.memo.stats['hits'] == 1
+    expected = compute_indicators(forming).to_pandas()
+    pd.testing.assert_frame_equal(df, expected, check_exact=False, rtol=1e-9)
+
+    # Next candle closes: new key
+    analyzer.calculate_indicators(forming[1:] + [[forming[-1][0] + 3600000] + forming[-1][1:]], symbol='AAA/USDT')
+    assert analyzer.memo.stats['misses'] == 2
+
+
+def test_regime_and_votes_reuse_closed_candle_results():
+    analyzer = MarketAnalyzer()
+    candles = _candles()
+    first = analyzer.analyze_market_regime(candles, symbol='BTC/USDT')
+    moved = [row[:] for row in candles]
+    moved[-1][4] *= 1.5
+    assert analyzer.analyze_market_regime(moved, symbol='BTC/USDT') == first
+    assert analyzer.memo.stats['hits'] == 1
+
+    manager = StrategyManager()
+    calls = []
+    for strategy in manager.strategies:
+        original = strategy.analyze
+        strategy.analyze = lambda df, original=original: calls.append(1) or original(df)
+    df = compute_indicators(candles).to_pandas()
+    manager.analyze_all(df, 'BTC/USDT')
+    manager.analyze_all(compute_indicators(moved).to_pandas(), 'BTC/USDT')
+    assert len(calls) == len(manager.strategies)
+
+    manager.consensus_threshold = 0.1  # parameter change invalidates the memo
+    manager.analyze_all(df, 'BTC/USDT')
+    assert len(calls) == 2 * len(manager.strategies)
+
+
+def test_volume_profile_memo_keyed_on_forming_candle():
+    vp = VolumeProfileAnalyzer()
+    candles = _candles()
+    profile = vp.calculate_profile(candles, symbol='AAA/USDT')
+    assert vp.calculate_profile(candles, symbol='AAA/USDT') == profile
+    moved = [row[:] for row in candles]
+    moved[-1][5] *= 10
+    vp.calculate_profile(moved, symbol='AAA/USDT')
+    assert vp.memo.stats == {'hits': 1, 'misses': 2, 'evictions': 0}
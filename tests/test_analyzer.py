@@ -1,8 +1,9 @@
+import asyncio
 import unittest
 import pandas as pd
 import numpy as np
 from unittest.mock import MagicMock
-from src.strategies.analyzer import MarketAnalyzer, TradeSignal
+from src.strategies.analyzer import MarketAnalyzer, ScanSignal, TradeSignal, price_history
 
 class TestMarketAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -83,6 +84,62 @@ class TestMarketAnalyzer(unittest.TestCase):
         # verifying exact score is hard without mocking everything.
         self.assertTrue(signal.score < 10) # Should not be super high
 
+    def test_prepared_order_book_feeds_spot_details(self):
+        book = {
+            'bids': [[148.9 - i * 0.01, 30.0] for i in range(30)],
+            'asks': [[149.1 + i * 0.01, 10.0] for i in range(30)],
+        }
+        self.assertEqual(self.analyzer.prepare_order_books({"BTC/USDT": book}, {"BTC/USDT": 149.0}), 1)
+        signal = self.analyzer.analyze_spot("BTC/USDT", self.candles)
+
+        self.assertEqual(signal.details['orderbook_pressure'], 'BUY_PRESSURE')
+        self.assertAlmostEqual(signal.details['orderbook_imbalance'], 3.0)
+        self.assertGreater(signal.details['orderbook_microprice'], 0.0)
+
+        # Next cycle without a book for the symbol: no stale analysis
+        self.analyzer.prepare_order_books({}, {})
+        signal = self.analyzer.analyze_spot("BTC/USDT", self.candles)
+        self.assertIsNone(signal.details['orderbook_pressure'])
+
+    def test_scan_signal_matches_trade_signal(self):
+        scan = asyncio.run(self.analyzer.analyze_spot_async("BTC/USDT", self.candles))
+        self.assertIsInstance(scan, ScanSignal)
+        self.assertNotIn('price_history', scan.details)
+        self.assertFalse(scan.price_history.flags.writeable)
+        self.assertEqual(len(price_history(scan)), 50)
+
+        signal = self.analyzer.analyze_spot("BTC/USDT", self.candles)
+        converted = scan.to_trade_signal()
+        self.assertEqual(converted.score, signal.score)
+        self.assertEqual(converted.details['price_history'], [c[4] for c in self.candles[-50:]])
+        self.assertEqual(price_history(signal), converted.details['price_history'])
+
+        # Validation edits a copy; the scan result stays untouched
+        copy = scan.copy()
+        copy.score, copy.details['custom_edge_score'] = 99.0, 1.0
+        self.assertNotIn('custom_edge_score', scan.details)
+        self.assertLessEqual(ScanSignal('X', 'HOLD', 'LONG', 99.0, 0.0, 0, {}).score, 40.0)
+
+    def test_prepared_ml_probability_is_reused(self):
+        class Model:
+            calls = 0
+            def predict_proba(self, X):
+                Model.calls += 1
+                return np.tile([0.2, 0.8], (len(X), 1))
+
+        self.analyzer.ensemble.models = {"m": Model()}
+        self.analyzer.ensemble.is_trained = True
+        self.assertEqual(self.analyzer.prepare_ml({"BTC/USDT": self.candles, "ETH/USDT": self.candles[:60]}), 2)
+        self.assertEqual(Model.calls, 1)
+
+        signal = self.analyzer.analyze_spot("BTC/USDT", self.candles)
+        self.assertEqual(Model.calls, 1)
+        self.assertAlmostEqual(signal.details['ml_prob'], 0.8)
+
+        # A new candle window falls back to a single-symbol prediction
+        self.analyzer.analyze_spot("BTC/USDT", self.candles[:-1])
+        self.assertEqual(Model.calls, 2)
+
     def test_analyze_market_regime(self):
         regime = self.analyzer.analyze_market_regime(self.candles)
         self.assertIn('trend', regime)
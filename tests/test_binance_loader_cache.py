@@ -41,3 +41,75 @@ async def test_get_ohlcv_cache_returns_cached_data(monkeypatch):
     assert isinstance(data1, list) and isinstance(data2, list)
     assert loader.exchange.calls == 1
     assert data1 == data2
+
+
+class SlowExchange(FakeExchange):
+    def __init__(self, fail_symbols=()):
+        super().__init__()
+        self.fail_symbols = set(fail_symbols)
+
+    async def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        await asyncio.sleep(0.02)
+        if symbol in self.fail_symbols:
+            self.calls += 1
+            raise Exception("Invalid symbol")
+        return super().fetch_ohlcv(symbol, timeframe, limit=limit)
+
+
+def _live_loader(exchange):
+    loader = BinanceDataLoader()
+    loader.mock = False
+    loader.candle_store = None
+    loader.exchange = exchange
+    return loader
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch():
+    loader = _live_loader(SlowExchange())
+
+    results = await asyncio.gather(
+        loader.get_ohlcv("AAA/USDT", timeframe="1h", limit=50),
+        loader.get_ohlcv("AAA/USDT", timeframe="1h", limit=50),
+        loader.get_ohlcv("AAA/USDT", timeframe="1h", limit=20),
+        loader.get_ohlcv("BBB/USDT", timeframe="1h", limit=50),
+    )
+
+    assert loader.exchange.calls == 2
+    assert results[0] == results[1]
+    assert results[2] == results[0][-20:]
+    assert loader.fetch_stats['coalesced'] == 2
+    assert loader._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_failing_symbol_is_negative_cached(monkeypatch):
+    loader = _live_loader(SlowExchange(fail_symbols={"DEAD/USDT"}))
+
+    assert await loader.get_ohlcv("DEAD/USDT", timeframe="1h", limit=50) == []
+    assert await loader.get_ohlcv("DEAD/USDT", timeframe="1h", limit=50) == []
+    assert loader.exchange.calls == 1
+    assert loader.fetch_stats['negative_hits'] == 1
+
+    # Backoff doubles on repeated failures
+    retry_at, _ = loader._failures["DEAD/USDT_1h"]
+    monkeypatch.setattr(time, "time", lambda: retry_at + 1)
+    await loader.get_ohlcv("DEAD/USDT", timeframe="1h", limit=50)
+    assert loader.exchange.calls == 2
+    assert loader._failures["DEAD/USDT_1h"][1] == 2
+    assert loader._failures["DEAD/USDT_1h"][0] - (retry_at + 1) == pytest.approx(120.0)
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_does_not_back_off_symbols():
+    loader = _live_loader(SlowExchange())
+    loader.circuit_breaker.state = "OPEN"
+    loader.circuit_breaker.last_failure_time = time.time()
+
+    assert await loader.get_ohlcv("BTC/USDT", timeframe="1h", limit=50) == []
+    assert loader.exchange.calls == 0
+    assert loader._failures == {} and loader.fetch_stats['breaker_rejects'] == 1
+
+    # As soon as the breaker recovers the symbol is fetched again (no per-symbol backoff left over)
+    loader.circuit_breaker.on_success()
+    assert len(await loader.get_ohlcv("BTC/USDT", timeframe="1h", limit=50)) == 50
@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import Backtester
+from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.candle_archive import CandleArchive
+
+HOUR = 3600000
+
+
+def _rows(start, count):
+    return [[start + i * HOUR, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 + i] for i in range(count)]
+
+
+def test_append_only_closed_and_read_slices(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    now = 10 * HOUR + 60_000
+    assert archive.append("BTC/USDT", "1h", _rows(0, 11), now_ms=now) == 10  # 10h candle still forming
+    assert archive.append("BTC/USDT", "1h", _rows(5 * HOUR, 6), now_ms=now) == 0  # already archived
+
+    out = archive.read("BTC/USDT", "1h", since=3 * HOUR, until=7 * HOUR)
+    assert [int(t) for t in out[:, 0]] == [3 * HOUR, 4 * HOUR, 5 * HOUR, 6 * HOUR]
+    assert out[0, 4] == 4.5
+    assert len(archive.read("BTC/USDT", "1h", limit=3)) == 3
+    assert archive.last_ts("BTC/USDT", "1h") == 9 * HOUR
+
+
+def test_recover_trims_torn_append(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    archive.append("ETH/USDT", "1h", _rows(0, 5), now_ms=100 * HOUR)
+    # Simulate a crash after writing part of a row to a single column
+    with open(os.path.join(archive._dir("ETH/USDT", "1h"), "close.bin"), "ab") as f:
+        f.write(b"\x00" * 12)
+    fresh = CandleArchive(str(tmp_path))
+    assert fresh.count("ETH/USDT", "1h") == 5
+    assert fresh.read("ETH/USDT", "1h")[-1, 4] == 5.5
+
+
+class PagedExchange:
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.calls += 1
+        return [list(c) for c in self.candles if c[0] >= since][:limit]
+
+
+def test_backfill_is_resumable_and_prepends_history(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    candles = _rows(0, 50)
+    exchange = PagedExchange(candles[:30])
+    archive.backfill(exchange, "SOL/USDT", "1h", since=10 * HOUR, until=50 * HOUR, page_limit=7)
+    assert archive.last_ts("SOL/USDT", "1h") == 29 * HOUR
+
+    # Resume: only the missing tail is requested, then older history is prepended
+    exchange.candles = candles
+    archive.backfill(exchange, "SOL/USDT", "1h", since=0, until=50 * HOUR, page_limit=100)
+    ts = archive.read("SOL/USDT", "1h")[:, 0]
+    assert len(ts) == 50 and np.all(np.diff(ts) == HOUR)
+
+
+def test_backtester_reuses_archive_without_network(tmp_path, monkeypatch):
+    archive = CandleArchive(str(tmp_path))
+    import src.backtest as bmod
+    now_ms = 1_000 * HOUR + 1
+    monkeypatch.setattr(bmod.time, "time", lambda: now_ms / 1000)
+    archive.append("AAA/USDT", "1h", _rows(now_ms - now_ms % HOUR - 48 * HOUR, 48), now_ms=now_ms)
+
+    class NoNetwork:
+        def __init__(self, *a, **k):
+            raise AssertionError("network used")
+    monkeypatch.setattr(bmod.ccxt, "binance", NoNetwork)
+
+    df = Backtester("AAA/USDT", "1h").fetch_data(days=1, archive=archive)
+    assert len(df) == 23  # closed candles opened after now - 1 day
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_gap_after_downtime_is_visible_and_backfilled(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    candles = _rows(0, 300)
+    archive.append("BTC/USDT", "1h", candles[:40], now_ms=400 * HOUR)
+    # Restart after downtime: the refetch starts 201h after the last archived candle
+    archive.append("BTC/USDT", "1h", candles[241:260], now_ms=400 * HOUR)
+    assert archive.gaps("BTC/USDT", "1h") == [(40 * HOUR, 241 * HOUR)]
+    assert archive.gaps("BTC/USDT", "1h", since=250 * HOUR) == []
+
+    exchange = PagedExchange(candles)
+    archive.backfill(exchange, "BTC/USDT", "1h", since=0, until=260 * HOUR, page_limit=50)
+    out = archive.read("BTC/USDT", "1h")
+    assert archive.gaps("BTC/USDT", "1h") == []
+    assert len(out) == 260 and np.all(np.diff(out[:, 0]) == HOUR)
+    assert out[100].tolist() == candles[100]
+    assert archive.last_ts("BTC/USDT", "1h") == 259 * HOUR
+
+
+def test_backtester_backfills_a_gapped_archive(tmp_path, monkeypatch):
+    archive = CandleArchive(str(tmp_path))
+    import src.backtest as bmod
+    now_ms = 1_000 * HOUR + 1
+    monkeypatch.setattr(bmod.time, "time", lambda: now_ms / 1000)
+    candles = _rows(now_ms - now_ms % HOUR - 48 * HOUR, 48)
+    archive.append("AAA/USDT", "1h", candles[:30], now_ms=now_ms)
+    archive.append("AAA/USDT", "1h", candles[35:], now_ms=now_ms)   # first/last cover the range, 5 missing
+
+    exchange = PagedExchange(candles)
+    monkeypatch.setattr(bmod.ccxt, "binance", lambda *a, **k: exchange)
+    df = Backtester("AAA/USDT", "1h").fetch_data(days=1, archive=archive)
+    assert exchange.calls > 0
+    assert len(df) == 23 and (df["timestamp"].diff().dropna() == pd.Timedelta(hours=1)).all()
+
+
+def test_backtester_later_run_fetches_only_the_tail(tmp_path, monkeypatch):
+    archive = CandleArchive(str(tmp_path))
+    import src.backtest as bmod
+    now_ms = 1_000 * HOUR + 1
+    candles = _rows(now_ms - now_ms % HOUR - 48 * HOUR, 48)
+    archive.append("AAA/USDT", "1h", candles[:38], now_ms=now_ms)   # previous run, 10 hours ago
+
+    class Recording(PagedExchange):
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+            self.since = getattr(self, "since", []) + [since]
+            return super().fetch_ohlcv(symbol, timeframe, since, limit)
+
+    exchange = Recording(candles)
+    monkeypatch.setattr(bmod.time, "time", lambda: now_ms / 1000)
+    monkeypatch.setattr(bmod.ccxt, "binance", lambda *a, **k: exchange)
+    df = Backtester("AAA/USDT", "1h").fetch_data(days=1, archive=archive)
+
+    # Delta fetch: the first page starts right after the archived tail, nothing older is asked for
+    assert exchange.since[0] == candles[38][0] and min(exchange.since) == candles[38][0]
+    assert len(df) == 23 and archive.last_ts("AAA/USDT", "1h") == candles[-1][0]
+
+
+@pytest.mark.asyncio
+async def test_loader_warm_restart_uses_delta(tmp_path):
+    class Exchange(PagedExchange):
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+            self.calls += 1
+            self.last = (since, limit)
+            if since is None:
+                return [list(c) for c in self.candles[-limit:]]
+            return [list(c) for c in self.candles if c[0] >= since][:limit]
+
+    import time as _time
+    now = int(_time.time() * 1000)
+    start = now - now % HOUR - 299 * HOUR
+    candles = _rows(start, 300)
+
+    first = BinanceDataLoader()
+    first.mock = False
+    first.exchange = Exchange(candles)
+
+    async def no_wait():
+        return None
+    first.rate_limiter.wait_if_needed = no_wait
+    await first.get_ohlcv("AAA/USDT", "1h", limit=100)
+    assert first.exchange.last == (None, 200)
+
+    restarted = BinanceDataLoader()
+    restarted.mock = False
+    restarted.exchange = Exchange(candles)
+    restarted.rate_limiter.wait_if_needed = no_wait
+    data = await restarted.get_ohlcv("AAA/USDT", "1h", limit=100)
+    assert restarted.exchange.last[0] == candles[-2][0]  # delta from the last archived candle
+    assert data[-1] == candles[-1]
@@ -0,0 +1,88 @@
+import pytest
+
+from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.candle_store import CandleRingBuffer, CandleStore, timeframe_to_ms
+
+HOUR = 3600000
+
+
+def _row(ts, close=1.0):
+    return [ts, close, close + 1, close - 1, close, 10.0]
+
+
+def test_ring_buffer_wraps_and_keeps_order():
+    buf = CandleRingBuffer(capacity=4)
+    buf.merge([_row(i * HOUR, float(i)) for i in range(6)])
+
+    assert len(buf) == 4
+    assert buf.first_ts == 2 * HOUR
+    assert buf.last_ts == 5 * HOUR
+    assert [r[0] for r in buf.tail()] == [2 * HOUR, 3 * HOUR, 4 * HOUR, 5 * HOUR]
+    assert [r[4] for r in buf.tail(2)] == [4.0, 5.0]
+    assert isinstance(buf.tail(1)[0][0], int)
+
+
+def test_merge_updates_forming_candle_in_place():
+    buf = CandleRingBuffer(capacity=10)
+    buf.merge([_row(0, 1.0), _row(HOUR, 2.0)])
+    appended = buf.merge([_row(HOUR, 2.5), _row(2 * HOUR, 3.0)])
+
+    assert appended == 1
+    assert [r[4] for r in buf.tail()] == [1.0, 2.5, 3.0]
+
+
+def test_store_delta_since_and_gap_detection():
+    store = CandleStore(capacity=100)
+    store.replace("AAA/USDT", "1h", [_row(i * HOUR) for i in range(50)])
+    last = 49 * HOUR
+
+    assert store.delta_since("AAA/USDT", "1h", 50, now_ms=last + HOUR + 5) == last
+    # Not enough stored candles or too far behind -> full refetch
+    assert store.delta_since("AAA/USDT", "1h", 60, now_ms=last) is None
+    assert store.delta_since("AAA/USDT", "1h", 50, now_ms=last + 60 * HOUR) is None
+
+    assert store.merge_delta("AAA/USDT", "1h", [_row(last), _row(last + HOUR)])
+    assert not store.merge_delta("AAA/USDT", "1h", [_row(last + 5 * HOUR)])
+    assert store.stats['gap_resync'] == 1
+    assert timeframe_to_ms("4h") == 4 * HOUR
+
+
+class DeltaExchange:
+    """Serves a fixed candle history that grows by one candle per tick()."""
+    def __init__(self, count):
+        self.candles = [_row(i * HOUR, 100.0 + i) for i in range(count)]
+        self.requests = []
+
+    def tick(self):
+        ts = self.candles[-1][0] + HOUR
+        self.candles.append(_row(ts, 100.0 + len(self.candles)))
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        if since is None:
+            rows = self.candles[-limit:]
+        else:
+            rows = [c for c in self.candles if c[0] >= since][:limit]
+        self.requests.append((since, len(rows)))
+        return [list(r) for r in rows]
+
+
+@pytest.mark.asyncio
+async def test_loader_fetches_only_new_candles(monkeypatch):
+    loader = BinanceDataLoader()
+    loader.mock = False
+    loader.exchange = DeltaExchange(300)
+
+    async def no_wait():
+        return None
+    loader.rate_limiter.wait_if_needed = no_wait
+    monkeypatch.setattr("src.collectors.candle_store.time.time", lambda: loader.exchange.candles[-1][0] / 1000 + 60)
+
+    first = await loader.get_ohlcv("AAA/USDT", "1h", limit=100, use_cache=False)
+    loader.exchange.tick()
+    second = await loader.get_ohlcv("AAA/USDT", "1h", limit=100, use_cache=False)
+
+    assert len(first) == len(second) == 100
+    assert second[-1] == loader.exchange.candles[-1]
+    assert second[:-1] == first[1:]
+    # Delta request asked from the last stored candle and returned just 2 rows
+    assert loader.exchange.requests[-1] == (first[-1][0], 2)
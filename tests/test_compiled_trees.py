@@ -0,0 +1,141 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.compiled_trees import CompiledEnsemble, compile_ensemble, compile_model
+from src.ml.ensemble_manager import SKLEARN_AVAILABLE, EnsembleManager
+from src.ml.training import train_and_publish
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 5)), columns=["RSI", "MACD", "CCI", "ADX", "MFI"])
+    y = ((X["RSI"] + X["MACD"] * X["CCI"] + rng.normal(0, 0.5, n)) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_forest_export_matches_predict_proba(tmp_path):
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+    X, y = _data()
+    models = {
+        "rf": RandomForestClassifier(n_estimators=30, max_depth=8, random_state=42).fit(X[:500], y[:500]),
+        "et": ExtraTreesClassifier(n_estimators=20, random_state=1).fit(X[:500], y[:500]),
+    }
+    compiled = compile_ensemble(models, X[500:])
+    assert compiled is not None and compiled.feature_names == list(X.columns)
+
+    path = str(tmp_path / "compiled.npz")
+    compiled.save(path)
+    loaded = CompiledEnsemble.load(path)
+
+    check = X[500:].copy()
+    check.iloc[::5, 2] = np.nan
+    expected = np.mean([m.predict_proba(check)[:, 1] for m in models.values()], axis=0)
+    np.testing.assert_allclose(loaded.predict_proba(check.to_numpy()), expected, atol=1e-12)
+
+
+def test_lightgbm_dump_with_missing_types():
+    leaf = lambda v: {"leaf_value": v}
+    dump = {
+        "objective": "binary sigmoid:1",
+        "tree_info": [
+            {"tree_structure": {"split_feature": 0, "threshold": 0.5, "decision_type": "<=", "default_left": False,
+                                "missing_type": "NaN", "left_child": leaf(-1.0), "right_child": {
+                                    "split_feature": 1, "threshold": 0.0, "decision_type": "<=", "default_left": True,
+                                    "missing_type": "Zero", "left_child": leaf(0.5), "right_child": leaf(2.0)}}},
+            {"tree_structure": {"split_feature": 1, "threshold": -1.0, "decision_type": "<=", "default_left": True,
+                                "missing_type": "None", "left_child": leaf(0.25), "right_child": leaf(-0.25)}},
+            {"tree_structure": leaf(0.1)},
+        ],
+    }
+    booster = type("Booster", (), {"dump_model": lambda self: dump})()
+    model = type("LGBM", (), {"booster_": booster})()
+    trees = compile_model(model)
+
+    X = np.array([[0.0, 5.0], [1.0, 0.0], [1.0, 3.0], [np.nan, np.nan], [2.0, -2.0]])
+    raw = np.array([
+        -1.0 - 0.25 + 0.1,   # x0 <= 0.5; tree 2: 5 > -1
+        0.5 - 0.25 + 0.1,    # x1 == 0 is missing on the Zero node -> default left
+        2.0 - 0.25 + 0.1,
+        0.5 - 0.25 + 0.1,    # NaN: default right, then missing left; tree 2 compares NaN as 0
+        0.5 + 0.25 + 0.1,    # -2 <= 0 and -2 <= -1
+    ])
+    np.testing.assert_allclose(trees.predict_proba(X), 1 / (1 + np.exp(-raw)))
+
+
+def test_xgboost_dump_strict_split_and_base_score():
+    tree = {"nodeid": 0, "split": "MACD", "split_condition": 1.0, "yes": 1, "no": 2, "missing": 2,
+            "children": [{"nodeid": 1, "leaf": -0.4}, {"nodeid": 2, "leaf": 0.3}]}
+
+    class Booster:
+        feature_names = ["RSI", "MACD"]
+
+        def get_dump(self, dump_format="json"):
+            return [json.dumps(tree)]
+
+        def save_config(self):
+            return json.dumps({"learner": {"objective": {"name": "binary:logistic"},
+                                           "learner_model_param": {"base_score": "[6E-1]"}}})
+
+    model = type("XGB", (), {"get_booster": lambda self: Booster()})()
+    trees = compile_model(model)
+    X = np.array([[0.0, 0.5], [0.0, 1.0], [0.0, np.nan]])
+    margin = np.log(0.6 / 0.4) + np.array([-0.4, 0.3, 0.3])   # x < 1.0 goes left; 1.0 and NaN go right
+    np.testing.assert_allclose(trees.predict_proba(X), 1 / (1 + np.exp(-margin)))
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_bot_serves_compiled_version_without_ml_libraries(tmp_path):
+    X, y = _data(300)
+    df = X.assign(close=100.0, Target=y)
+    trainer = EnsembleManager(models_dir=str(tmp_path))
+    trainer.train(df)
+    manifest = trainer.registry.manifest()
+    assert manifest["compiled"]
+
+    bot = EnsembleManager(models_dir=str(tmp_path))
+    assert bot.compiled is not None and bot.models == {}
+    frames = {f"S{i}": df.iloc[: 50 + i] for i in range(20)}
+    expected = trainer.predict_proba_batch(frames)
+    got = bot.predict_proba_batch(frames)
+    for symbol in frames:
+        assert got[symbol] == pytest.approx(expected[symbol], abs=1e-12)
+
+    script = (
+        "import sys, pandas as pd\n"
+        "from src.ml.ensemble_manager import EnsembleManager\n"
+        f"em = EnsembleManager(models_dir={str(tmp_path)!r})\n"
+        "df = pd.DataFrame({'RSI': [1.0], 'MACD': [0.5], 'CCI': [0.0], 'ADX': [0.0], 'MFI': [0.0], 'close': [1.0]})\n"
+        "p = em.predict_proba(df)\n"
+        "print(em.compiled is not None, 0.0 <= p <= 1.0, any(m.startswith('sklearn') for m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert out.stdout.split() == ["True", "True", "False"], out.stderr
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_training_again_after_a_compiled_version_is_active(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    X, _ = _data(240, seed=3)
+    X.assign(timestamp=np.arange(len(X)) * 3600, symbol=["AAA/USDT", "BBB/USDT"] * (len(X) // 2),
+             close=100 + np.cumsum(np.random.default_rng(3).normal(0, 1, len(X)))
+             ).to_csv(os.path.join("data", "ml_training_data.csv"), index=False)
+    models_dir = str(tmp_path / "models")
+
+    first = train_and_publish(models_dir)
+    assert first is not None
+    assert EnsembleManager(models_dir=models_dir).models == {}   # the trainer now starts from a compiled-only version
+
+    second = train_and_publish(models_dir)
+    assert second is not None and second["version"] != first["version"]
+    assert json.load(open(os.path.join(models_dir, "manifest.json")))["version"] == second["version"]
@@ -0,0 +1,116 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import settings
+from src.analysis.correlation import CorrelationEngine, pairwise_correlation
+from src.execution.trade_manager import SignalValidator
+from src.risk.portfolio_optimizer import PortfolioOptimizer
+from src.strategies.analyzer import MarketAnalyzer
+
+HOUR = 3600000
+
+
+def _universe(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 0.01, n)
+    returns = {
+        'BTC/USDT': base,
+        'ETH/USDT': base * 0.9 + rng.normal(0, 0.002, n),
+        'DOGE/USDT': rng.normal(0, 0.01, n),
+    }
+    return {s: [[i * HOUR, 0, 0, 0, float(100 * np.exp(np.cumsum(r)[i])), 1.0] for i in range(n)]
+            for s, r in returns.items()}
+
+
+def test_pairwise_matches_pandas_with_missing_values():
+    rng = np.random.default_rng(1)
+    r = rng.normal(0, 0.01, (48, 6))
+    r[rng.random(r.shape) < 0.1] = np.nan
+    expected = pd.DataFrame(r).corr(min_periods=20).to_numpy()
+    np.testing.assert_allclose(pairwise_correlation(r, 20), expected, atol=1e-12, equal_nan=True)
+
+
+def test_engine_lookups_match_aligned_returns():
+    universe = _universe()
+    engine = CorrelationEngine(window=48, min_periods=30)
+    engine.update(universe)
+
+    closes = pd.DataFrame({s: [row[4] for row in c[:-1]] for s, c in universe.items()})
+    expected = np.log(closes).diff().tail(48).corr()
+    assert abs(engine.correlation('BTC/USDT', 'ETH/USDT') - expected.loc['BTC/USDT', 'ETH/USDT']) < 1e-12
+
+    corr, other = engine.max_correlation('ETH/USDT', ['BTC/USDT', 'DOGE/USDT', 'XRP/USDT'])
+    assert other == 'BTC/USDT' and corr > 0.9
+    assert engine.max_correlation('XRP/USDT', ['BTC/USDT']) == (None, None)
+    assert engine.stats['rebuilds'] == 1
+
+
+def test_update_only_appends_new_closed_candles_and_aligns_gaps():
+    universe = _universe()
+    engine = CorrelationEngine(window=48, min_periods=30)
+    engine.update({s: c[:50] for s, c in universe.items()})
+    engine.update({s: c[:52] for s, c in universe.items()})
+    assert [ts for ts, _ in engine._closes['BTC/USDT']][-1] == 50 * HOUR
+    assert len(engine._closes['BTC/USDT']) == 49
+
+    # A symbol with a missing candle still aligns on timestamps
+    gappy = [row for row in universe['ETH/USDT'][:52] if row[0] != 40 * HOUR]
+    engine.update({'GAP/USDT': gappy})
+    assert engine.correlation('GAP/USDT', 'BTC/USDT') > 0.9
+    assert engine.matrix_frame(['BTC/USDT', 'GAP/USDT']).shape == (2, 2)
+
+
+def test_portfolio_optimizer_and_dashboard_export(tmp_path):
+    engine = CorrelationEngine(window=48, min_periods=30)
+    engine.update(_universe())
+    optimizer = PortfolioOptimizer(correlation_threshold=0.8, correlation_engine=engine)
+
+    risk = optimizer.check_correlation_risk({'BTC/USDT': pd.Series(dtype=float)}, 'ETH/USDT', pd.Series(dtype=float))
+    assert not risk['is_safe'] and risk['correlated_with'] == 'BTC/USDT'
+
+    path = engine.export(str(tmp_path / 'corr.json'))
+    with open(path) as f:
+        payload = json.load(f)
+    assert payload['symbols'] == engine.symbols
+    assert payload['matrix'][0][0] == 1.0
+
+
+def test_engine_and_fallback_agree_on_swap_decision():
+    universe = _universe(n=50)
+    engine = CorrelationEngine(window=48, min_periods=30)
+    engine.update(universe)
+    closes = {s: pd.Series([row[4] for row in c[:-1]]) for s, c in universe.items()}
+    with_engine = PortfolioOptimizer(settings.CORRELATION_SWAP_MAX, correlation_engine=engine)
+    fallback = PortfolioOptimizer(settings.CORRELATION_SWAP_MAX)
+
+    decisions = {}
+    for candidate in ('ETH/USDT', 'DOGE/USDT'):
+        a = with_engine.check_correlation_risk({'BTC/USDT': closes['BTC/USDT']}, candidate, closes[candidate])
+        b = fallback.check_correlation_risk({'BTC/USDT': closes['BTC/USDT']}, candidate, closes[candidate])
+        assert a['is_safe'] == b['is_safe']
+        assert a['max_correlation'] == pytest.approx(b['max_correlation'], abs=1e-9)
+        decisions[candidate] = a['is_safe']
+    assert decisions == {'ETH/USDT': False, 'DOGE/USDT': True}
+    assert engine.stats['lookups'] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('engine_enabled', [True, False])
+async def test_held_correlation_measure_matches_with_and_without_engine(monkeypatch, engine_enabled):
+    monkeypatch.setattr(settings, 'CORRELATION_ENGINE_ENABLED', engine_enabled)
+    universe = _universe(n=50)
+    analyzer = MarketAnalyzer()
+    analyzer.correlation = CorrelationEngine(window=48, min_periods=30)
+    loader = MagicMock()
+    loader.get_ohlcv = AsyncMock(return_value=universe['BTC/USDT'])
+    executor = MagicMock()
+    validator = SignalValidator(analyzer, executor, loader)
+
+    for symbol, correlated in (('ETH/USDT', True), ('DOGE/USDT', False)):
+        corr, held = await validator._max_held_correlation(symbol, universe[symbol], ['BTC/USDT'])
+        assert held == 'BTC/USDT'
+        assert bool(corr > settings.CORRELATION_MAX_HELD) == correlated
@@ -1,7 +1,9 @@
 import os
 from tempfile import TemporaryDirectory
 
+import numpy as np
 import pandas as pd
+import pytest
 
 from src.ml.ensemble_manager import EnsembleManager
 
@@ -51,3 +53,48 @@ def test_predict_proba_handles_model_error_and_returns_neutral(monkeypatch):
         prob = em.predict_proba(df)
         assert prob == 0.5
 
+
+
+class CountingModel:
+    def __init__(self, weights):
+        self.weights = weights
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        p = 1.0 / (1.0 + np.exp(-(np.asarray(X, dtype=float) @ self.weights)))
+        return np.column_stack([1.0 - p, p])
+
+
+def _frame(seed, n=30):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    df = pd.DataFrame({
+        "RSI": rng.uniform(20, 80, n), "MACD": rng.normal(0, 1, n), "CCI": rng.normal(0, 100, n),
+        "ADX": rng.uniform(10, 40, n), "MFI": rng.uniform(20, 80, n),
+        "SMA_50": close * 0.99, "Bollinger_Upper": close + 2, "Bollinger_Lower": close - 2,
+        "VWAP": np.nan, "close": close,
+    })
+    return df
+
+
+def test_batch_inference_matches_single_row_and_runs_each_model_once():
+    with TemporaryDirectory() as tmpdir:
+        em = EnsembleManager(models_dir=tmpdir)
+        first, second = CountingModel(np.linspace(-0.01, 0.01, 9)), CountingModel(np.linspace(0.01, -0.01, 9))
+        em.models = {"a": first, "b": second}
+        em.is_trained = True
+
+        frames = {f"S{i}/USDT": _frame(i) for i in range(12)}
+        frames["EMPTY/USDT"] = pd.DataFrame()
+        probs = em.predict_proba_batch(frames)
+        assert first.calls == [12] and second.calls == [12]
+        assert probs["EMPTY/USDT"] == 0.5
+
+        for symbol, df in frames.items():
+            if df.empty:
+                continue
+            last_row = em.prepare_features(df).iloc[[-1]]
+            expected = (first.predict_proba(last_row)[0][1] + second.predict_proba(last_row)[0][1]) / 2
+            assert probs[symbol] == pytest.approx(expected, rel=1e-12)
+            assert em.predict_proba(df) == pytest.approx(expected, rel=1e-12)
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from src.collectors import exchange_client
+from src.collectors.exchange_client import create_exchange, exchange_call, close_exchange, is_async_exchange
+from src.utils.circuit_breaker import CircuitBreaker
+
+
+@pytest.mark.asyncio
+async def test_exchange_call_runs_sync_function_in_worker_thread():
+    main_thread = threading.get_ident()
+
+    def fetch(symbol, limit=1):
+        return (symbol, limit, threading.get_ident() != main_thread)
+
+    assert await exchange_call(fetch, "BTC/USDT", limit=5) == ("BTC/USDT", 5, True)
+
+
+@pytest.mark.asyncio
+async def test_exchange_call_awaits_coroutine_and_uses_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=300)
+
+    async def ok():
+        return 42
+
+    async def boom():
+        raise RuntimeError("down")
+
+    assert await exchange_call(ok, breaker=breaker) == 42
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await exchange_call(boom, breaker=breaker)
+    assert breaker.state == "OPEN"
+    with pytest.raises(Exception, match="Circuit breaker OPEN"):
+        await exchange_call(ok, breaker=breaker)
+
+
+@pytest.mark.asyncio
+async def test_async_backend_keeps_ccxt_session_and_closes():
+    if not exchange_client.async_backend_available():
+        pytest.skip("ccxt.async_support not available")
+    exchange = create_exchange({'enableRateLimit': True}, backend='async')
+    assert is_async_exchange(exchange)
+
+    # ccxt opens the session itself (certifi cafile SSL context) on the first request
+    exchange.open()
+    session = exchange.session
+    assert session is not None and exchange.own_session
+    assert exchange.ssl_context is not None and exchange.ssl_context is not True
+
+    await close_exchange(exchange)
+    assert session.closed
+
+
+def test_default_backend_is_sync(monkeypatch):
+    # The async backend is opt-in
+    assert type(exchange_client.settings).model_fields['EXCHANGE_BACKEND'].default == 'sync'
+    monkeypatch.setattr(exchange_client.settings, 'EXCHANGE_BACKEND', 'sync')
+    assert not is_async_exchange(create_exchange({'enableRateLimit': True}))
+
+
+def test_sync_backend_is_plain_ccxt():
+    exchange = create_exchange({'enableRateLimit': True}, backend='sync')
+    assert not is_async_exchange(exchange)
+
+
+@pytest.mark.asyncio
+async def test_sync_twin_mirrors_async_client():
+    if not exchange_client.async_backend_available():
+        pytest.skip("ccxt.async_support not available")
+    exchange = create_exchange({'enableRateLimit': True, 'options': {'defaultType': 'spot'}}, backend='async')
+    twin = exchange_client.sync_twin(exchange)
+    assert not is_async_exchange(twin)
+    assert exchange_client.sync_twin(exchange) is twin
+    await close_exchange(exchange)
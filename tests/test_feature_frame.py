@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+
+from src.analysis.feature_frame import FeatureFrame, FeatureFrameBook
+from src.analysis.market_regime import MarketRegimeDetector
+from src.execution.stop_loss_manager import StopLossManager
+from src.ml.ensemble_manager import EnsembleManager
+from src.risk.volatility_calculator import VolatilityCalculator
+
+
+def _candles(n=80, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return [[i * 3600000, float(c), float(c + abs(rng.normal())), float(c - abs(rng.normal())),
+             float(c + rng.normal(0, 0.3)), 100.0] for i, c in enumerate(close)]
+
+
+def _df(candles):
+    return pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+
+def test_atr_variants_match_legacy_calculations():
+    candles = _candles()
+    features = FeatureFrame.from_candles('AAA/USDT', candles)
+    arr = np.asarray(candles)
+
+    expected = talib.ATR(arr[:, 2], arr[:, 3], arr[:, 4], timeperiod=14)
+    np.testing.assert_allclose(features.atr(14, 'wilder'), expected, rtol=1e-12, equal_nan=True)
+    assert StopLossManager().calculate_atr(features) == pytest.approx(StopLossManager().calculate_atr(_df(candles)), rel=1e-12)
+
+    sma = VolatilityCalculator.calculate_atr(_df(candles), 14).to_numpy()
+    np.testing.assert_allclose(features.atr(14), sma, rtol=1e-9, equal_nan=True)
+    assert VolatilityCalculator.get_volatility_pct(features) == pytest.approx(
+        VolatilityCalculator.get_volatility_pct(_df(candles)), rel=1e-9)
+
+
+def test_columns_are_read_only_and_computed_once():
+    features = FeatureFrame.from_candles('AAA/USDT', _candles())
+    assert features.atr(14, 'wilder') is features.atr(14, 'wilder')
+    with pytest.raises(ValueError):
+        features.column('close')[0] = 0.0
+    with pytest.raises(ValueError):
+        features.atr(14)[0] = 0.0
+    assert features.df is features.df
+
+
+def test_book_reuses_frame_until_window_changes():
+    book = FeatureFrameBook()
+    candles = _candles()
+    first = book.get_or_build('AAA/USDT', candles)
+    assert book.get_or_build('AAA/USDT', candles) is first
+
+    moved = [row[:] for row in candles]
+    moved[-1][4] += 1.0
+    assert book.get_or_build('AAA/USDT', moved) is not first
+    assert book.stats == {'reused': 1, 'built': 2}
+
+
+def test_consumers_accept_the_shared_frame(tmp_path):
+    candles = _candles()
+    features = FeatureFrame.from_candles('AAA/USDT', candles)
+
+    assert MarketRegimeDetector().detect_regime(features) == MarketRegimeDetector().detect_regime(features.df)
+
+    ensemble = EnsembleManager(models_dir=str(tmp_path))
+    X = ensemble.prepare_features(features)
+    pd.testing.assert_frame_equal(X, ensemble.prepare_features(features.df))
+    assert list(X.columns) == ['RSI', 'MACD', 'CCI', 'ADX', 'MFI', 'VWAP_Ratio']
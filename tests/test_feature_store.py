@@ -0,0 +1,95 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.feature_store import PYARROW_AVAILABLE, FeatureStore
+
+pytestmark = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+
+DAY = 86400
+FEATURES = ['RSI', 'MACD', 'Williams_R']
+
+
+def _fill(store, start, rows, step=3600, symbols=('AAA/USDT', 'BBB/USDT')):
+    for i in range(rows):
+        ts = start + i * step
+        store.append(symbols[i % len(symbols)], ts, 100.0 + i, {'RSI': 50.0 + i, 'MACD': -1.0 * i})
+
+
+def test_buffered_flush_partitions_by_day_with_fixed_schema(tmp_path):
+    store = FeatureStore(FEATURES, root=str(tmp_path), flush_rows=10, flush_interval=3600, retention_days=0)
+    start = 1_700_000_000 - 1_700_000_000 % DAY
+    _fill(store, start, 9)
+    assert len(store) == 9 and store.partitions() == []   # still buffered
+
+    _fill(store, start + 9 * 3600, 31)                       # 40 rows over two days
+    store.flush()
+    assert len(store) == 0 and store.stats['flushed'] == 40
+    assert len(store.partitions()) == 2
+
+    df = store.read()
+    assert list(df.columns) == ['timestamp', 'symbol', 'close'] + FEATURES
+    assert len(df) == 40
+    # Williams_R is never produced: stored as null and reported, not silently dropped
+    assert df['Williams_R'].isna().all()
+    assert store.stats['missing'] == {'Williams_R': 40}
+
+
+def test_read_prunes_partitions_and_filters(tmp_path):
+    store = FeatureStore(FEATURES, root=str(tmp_path), flush_rows=1000, flush_interval=3600, retention_days=0)
+    start = 1_700_000_000 - 1_700_000_000 % DAY
+    _fill(store, start, 24 * 5)
+    store.flush()
+    assert len(store.partitions()) == 5
+
+    df = store.read(columns=['timestamp', 'symbol', 'RSI'], start=start + 2 * DAY, end=start + 3 * DAY,
+                    symbols=['AAA/USDT'])
+    assert list(df.columns) == ['timestamp', 'symbol', 'RSI']
+    assert len(df) == 12
+    assert df['timestamp'].between(start + 2 * DAY, start + 3 * DAY - 1).all()
+    assert set(df['symbol']) == {'AAA/USDT'}
+    assert store.read(start=start + 10 * DAY).empty
+
+
+def test_retention_drops_whole_partitions(tmp_path):
+    store = FeatureStore(FEATURES, root=str(tmp_path), flush_rows=1000, flush_interval=3600, retention_days=2)
+    now = time.time()
+    _fill(store, int(now) - 5 * DAY, 5, step=DAY)
+    store.flush()   # flush applies retention
+
+    days = store.partitions()
+    assert len(days) == 2
+    assert store.stats['dropped_partitions'] == 3
+    assert len(store.read()) == 2
+
+
+def test_ensemble_snapshots_go_to_the_store(tmp_path, monkeypatch):
+    from config.settings import settings
+    from src.analysis.feature_frame import FeatureFrame
+    from src.ml.ensemble_manager import EnsembleManager
+
+    monkeypatch.setattr(settings, 'FEATURE_STORE_ENABLED', True)
+    monkeypatch.setattr(settings, 'FEATURE_STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.chdir(tmp_path)
+
+    rng = np.random.default_rng(2)
+    close = 100 + np.cumsum(rng.normal(0, 1, 80))
+    candles = [[i * 3600000, c, c + 1, c - 1, c, 100.0] for i, c in enumerate(close)]
+    features = FeatureFrame.from_candles('AAA/USDT', candles)
+
+    ensemble = EnsembleManager(models_dir=str(tmp_path / 'models'))
+    ensemble.save_snapshot(features, 'AAA/USDT')
+    ensemble.save_snapshot(features.df, 'AAA/USDT')
+    assert ensemble.flush_snapshots() == 2
+    assert not os.path.exists(tmp_path / 'data' / 'ml_training_data.csv')
+
+    df = ensemble.feature_store.read()
+    expected = ensemble.prepare_features(features).iloc[-1]
+    for row in range(2):
+        for name, value in expected.items():
+            assert df[name].iloc[row] == pytest.approx(value)
+        assert df['close'].iloc[row] == pytest.approx(close[-1])
+    assert pd.isna(df['Williams_R']).all()
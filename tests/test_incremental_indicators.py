@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+
+from src.analysis.incremental import IncrementalIndicators
+from src.analysis.indicators import compute_indicators
+
+HOUR = 3600000
+
+
+def _candles(n=200, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    rows = []
+    for i in range(n):
+        high = max(open_[i], close[i]) + abs(rng.normal())
+        low = min(open_[i], close[i]) - abs(rng.normal())
+        rows.append([i * HOUR, float(open_[i]), float(high), float(low), float(close[i]), float(abs(rng.normal(100, 30)))])
+    for i in range(40, 50):
+        rows[i][1:5] = [100.0] * 4
+    return rows
+
+
+def _assert_matches(values, frame, index):
+    for name, value in values.items():
+        expected = frame[name][index]
+        if isinstance(value, float):
+            assert np.isclose(value, expected, rtol=1e-9, atol=1e-9, equal_nan=True), name
+        else:
+            assert value == expected, name
+
+
+def test_incremental_matches_batch_engine():
+    candles = _candles()
+    frame = compute_indicators(candles)
+    state = IncrementalIndicators(HOUR)
+    for i, row in enumerate(candles):
+        values = state.update(row, closed=True)
+        _assert_matches(values, frame, i)
+
+
+def test_forming_candle_does_not_change_committed_state():
+    candles = _candles()
+    state = IncrementalIndicators.from_candles(candles[:-1], HOUR)
+    before = json.dumps(state.snapshot())
+
+    forming = list(candles[-1])
+    preview = state.update(forming, closed=False)
+    forming[4] += 5.0
+    preview_2 = state.update(forming, closed=False)
+
+    assert json.dumps(state.snapshot()) == before
+    assert preview_2['close'] == preview['close'] + 5.0
+    _assert_matches(state.update(candles[-1], closed=True), compute_indicators(candles), -1)
+    # Replayed closed candle is ignored
+    assert state.update(candles[-1], closed=True)['timestamp'] == candles[-1][0]
+    assert state.count == len(candles)
+
+
+def test_snapshot_restore_round_trip():
+    candles = _candles()
+    state = IncrementalIndicators.from_candles(candles[:150], HOUR)
+    restored = IncrementalIndicators.restore(json.loads(json.dumps(state.snapshot())))
+
+    for row in candles[150:]:
+        a = state.update(row)
+        b = restored.update(row)
+    assert a.keys() == b.keys()
+    assert all(np.isclose(a[k], b[k], equal_nan=True) for k in a)
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis.indicators import COLUMNS, compute_indicators, compute_indicators_batch, ema
+
+
+def _candles(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    rows = []
+    for i in range(n):
+        high = max(open_[i], close[i]) + abs(rng.normal())
+        low = min(open_[i], close[i]) - abs(rng.normal())
+        rows.append([i * 3600000, float(open_[i]), float(high), float(low), float(close[i]), float(abs(rng.normal(100, 30)))])
+    # Flat stretch: zero ranges, 0/0 RSI and DX
+    for i in range(30, 40):
+        rows[i][1:5] = [100.0] * 4
+    return rows
+
+
+def test_ema_matches_pandas_including_gaps():
+    rng = np.random.default_rng(0)
+    x = rng.normal(0, 1, 2000)
+    for alpha in (2.0 / 10, 1.0 / 14, 2.0 / 27):
+        expected = pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+        np.testing.assert_allclose(ema(x, alpha), expected, rtol=1e-10, atol=1e-12)
+
+    x[:3] = np.nan
+    x[50:55] = np.nan
+    expected = pd.Series(x).ewm(alpha=1.0 / 14, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(ema(x, 1.0 / 14), expected, rtol=1e-10, equal_nan=True)
+
+
+def test_indicators_match_pandas_reference():
+    candles = _candles()
+    frame = compute_indicators(candles)
+    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+    delta = df['close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+    np.testing.assert_allclose(frame['RSI'], rsi.to_numpy(), rtol=1e-9, equal_nan=True)
+
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mad = tp.rolling(20).apply(lambda w: np.mean(np.abs(w - np.mean(w))), raw=True)
+    cci = (tp - tp.rolling(20).mean()) / (0.015 * mad)
+    np.testing.assert_allclose(frame['CCI'], cci.to_numpy(), rtol=1e-9, equal_nan=True)
+
+    exp12 = df['close'].ewm(span=12, adjust=False).mean()
+    exp26 = df['close'].ewm(span=26, adjust=False).mean()
+    np.testing.assert_allclose(frame['MACD'], (exp12 - exp26).to_numpy(), rtol=1e-9)
+
+    bb_std = df['close'].rolling(20).std()
+    np.testing.assert_allclose(frame['BB_Std'], bb_std.to_numpy(), rtol=1e-9, equal_nan=True)
+
+    vwap = (tp * df['volume']).cumsum() / df['volume'].cumsum()
+    np.testing.assert_allclose(frame['VWAP'], vwap.to_numpy(), rtol=1e-12)
+
+    assert set(np.unique(frame['ST_Direction'])) <= {-1.0, 1.0}
+    assert frame['is_doji'][35]
+
+
+def test_supertrend_matches_original_loop():
+    candles = _candles()
+    frame = compute_indicators(candles)
+    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+    tr = pd.concat([df['high'] - df['low'], (df['high'] - df['close'].shift()).abs(),
+                    (df['low'] - df['close'].shift()).abs()], axis=1).max(axis=1)
+    atr = tr.rolling(10).mean()
+    hl2 = (df['high'] + df['low']) / 2
+    upper = (hl2 + 3.0 * atr).to_numpy().copy()
+    lower = (hl2 - 3.0 * atr).to_numpy().copy()
+    close = df['close'].to_numpy()
+    st, direction = np.zeros(len(df)), np.zeros(len(df))
+    st[0], direction[0] = upper[0], 1
+    for i in range(1, len(df)):
+        if not (upper[i] < upper[i-1] or close[i-1] > upper[i-1]):
+            upper[i] = upper[i-1]
+        if not (lower[i] > lower[i-1] or close[i-1] < lower[i-1]):
+            lower[i] = lower[i-1]
+        if direction[i-1] == 1:
+            direction[i], st[i] = (-1, upper[i]) if close[i] <= lower[i-1] else (1, lower[i])
+        else:
+            direction[i], st[i] = (1, lower[i]) if close[i] >= upper[i-1] else (-1, upper[i])
+
+    np.testing.assert_array_equal(frame['ST_Direction'], direction)
+    np.testing.assert_allclose(frame['SuperTrend'], st, rtol=1e-12, equal_nan=True)
+
+
+def test_frame_api_and_pandas_adapter():
+    frame = compute_indicators(_candles(60))
+
+    assert len(frame) == 60
+    assert 'ADX' in frame
+    assert frame.last('close') == frame['close'][-1]
+    assert frame.last('missing', default=0.0) == 0.0
+
+    df = frame.to_pandas()
+    assert tuple(df.columns) == COLUMNS
+    assert df['timestamp'].dtype == np.int64
+    assert df['RSI_Overbought'].dtype == np.int64
+    assert df['is_hammer'].dtype == bool
+
+
+def test_batch_matches_per_symbol_computation():
+    universe = [_candles(120, seed=s) for s in range(12)]
+    batch = compute_indicators_batch(np.asarray(universe))
+
+    assert len(batch) == 12
+    for i, candles in enumerate(universe):
+        single = compute_indicators(candles)
+        view = batch.frame(i)
+        for name in COLUMNS:
+            np.testing.assert_allclose(view[name], single[name], rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+def test_analyzer_reuses_batch_frames_until_candles_change():
+    from unittest.mock import patch
+    from src.strategies.analyzer import MarketAnalyzer
+
+    analyzer = MarketAnalyzer()
+    universe = {'A/USDT': _candles(50, seed=1), 'B/USDT': _candles(50, seed=2),
+                'C/USDT': _candles(60, seed=3), 'SHORT/USDT': _candles(50, seed=4)[:10]}
+    assert analyzer.prepare_batch(universe) == 3
+
+    with patch.object(analyzer, 'calculate_indicators', wraps=analyzer.calculate_indicators) as single:
+        df = analyzer.feature_frame('C/USDT', universe['C/USDT']).df
+        assert single.call_count == 0
+        np.testing.assert_allclose(df['RSI'], compute_indicators(universe['C/USDT'])['RSI'], equal_nan=True)
+
+        # Forming candle moved: the precomputed frame is stale
+        moved = [row[:] for row in universe['A/USDT']]
+        moved[-1][4] += 1.0
+        analyzer.feature_frame('A/USDT', moved)
+        assert single.call_count == 1
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.binance_websocket import BinanceKlineStream
+
+HOUR = 3600000
+
+
+class CountingExchange:
+    def __init__(self, last_ts):
+        self.last_ts = last_ts
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.calls += 1
+        start = since if since is not None else self.last_ts - (limit - 1) * HOUR
+        rows = []
+        ts = start
+        while ts <= self.last_ts and len(rows) < limit:
+            rows.append([ts, 1.0, 2.0, 0.5, 1.5, 10.0])
+            ts += HOUR
+        return rows
+
+
+def _kline(symbol_id, ts, close, closed=False, tf='1h'):
+    return {'stream': f"{symbol_id.lower()}@kline_{tf}", 'data': {
+        'e': 'kline', 's': symbol_id,
+        'k': {'t': ts, 'o': '1', 'h': '3', 'l': '0.5', 'c': str(close), 'v': '12', 'x': closed, 'i': tf},
+    }}
+
+
+def _loader(last_ts):
+    loader = BinanceDataLoader()
+    loader.mock = False
+    loader.exchange = CountingExchange(last_ts)
+
+    async def no_wait():
+        return None
+    loader.rate_limiter.wait_if_needed = no_wait
+    return loader
+
+
+def test_streams_are_sharded_per_connection_limit():
+    loader = _loader(0)
+    symbols = [f"C{i}/USDT" for i in range(5)]
+    stream = BinanceKlineStream(loader, symbols, timeframes=['15m', '1h', '4h'], streams_per_connection=4)
+
+    shards = stream.shards()
+    assert [len(s) for s in shards] == [4, 4, 4, 3]
+    assert shards[0][0] == "c0usdt@kline_15m"
+    assert stream.stream_symbol("BTC/USDT:USDT") == "BTCUSDT"
+
+
+@pytest.mark.asyncio
+async def test_stream_updates_serve_get_ohlcv_from_memory():
+    last = 500 * HOUR
+    loader = _loader(last)
+    stream = BinanceKlineStream(loader, ["BTC/USDT"], timeframes=['1h'])
+
+    stream._begin_fill([("BTC/USDT", "1h")])
+    await stream.process_message(_kline("BTCUSDT", last, 9.0))
+    assert stream.stats['dropped'] == 1  # ignored while REST fill is pending
+
+    await stream._gap_fill([("BTC/USDT", "1h")])
+    rest_calls = loader.exchange.calls
+
+    await stream.process_message(_kline("BTCUSDT", last, 9.0))
+    await stream.process_message(_kline("BTCUSDT", last + HOUR, 9.5))
+    data = await loader.get_ohlcv("BTC/USDT", "1h", limit=50, use_cache=False)
+
+    assert loader.exchange.calls == rest_calls
+    assert data[-1][0] == last + HOUR and data[-1][4] == 9.5
+    assert data[-2][4] == 9.0
+
+
+@pytest.mark.asyncio
+async def test_stream_gap_triggers_rest_refill():
+    last = 500 * HOUR
+    loader = _loader(last)
+    stream = BinanceKlineStream(loader, ["BTC/USDT"], timeframes=['1h'])
+    await stream._gap_fill([("BTC/USDT", "1h")])
+
+    loader.exchange.last_ts = last + 3 * HOUR
+    await stream.process_message(_kline("BTCUSDT", last + 3 * HOUR, 7.0))
+    assert not loader.candle_store.is_live("BTC/USDT", "1h")
+
+    await asyncio.gather(*stream._fill_tasks)
+    assert loader.candle_store.get("BTC/USDT", "1h").last_ts == last + 3 * HOUR
+    assert ("BTC/USDT", "1h") not in stream._filling
+
+
+async def test_failing_gap_fill_honors_negative_cache():
+    last = 500 * HOUR
+    loader = _loader(last)
+    stream = BinanceKlineStream(loader, ["BTC/USDT"], timeframes=['1h'])
+    await stream._gap_fill([("BTC/USDT", "1h")])
+    calls = loader.exchange.calls
+
+    def down(*args, **kwargs):
+        raise RuntimeError("exchange down")
+    loader.exchange.fetch_ohlcv = down
+    # Every message that cannot merge asks for a fill; only the first one reaches REST
+    for i in range(5):
+        await stream.process_message(_kline("BTCUSDT", last + (3 + i) * HOUR, 7.0))
+        await asyncio.gather(*stream._fill_tasks)
+    assert loader.fetch_stats['failures'] == 1
+    assert loader.fetch_stats['negative_hits'] == 4
+    assert loader.exchange.calls == calls
@@ -0,0 +1,114 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import settings
+from src.ml.ensemble_manager import SKLEARN_AVAILABLE, EnsembleManager, ServedModels
+from src.ml.model_registry import ModelRegistry
+from src.ml.training import TrainingWorker
+
+
+class ConstantModel:
+    def __init__(self, p):
+        self.p = p
+
+    def predict_proba(self, X):
+        return np.tile([1.0 - self.p, self.p], (len(X), 1))
+
+
+def _features(n=60):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"RSI": rng.uniform(20, 80, n), "MACD": rng.normal(0, 1, n), "close": np.linspace(100, 110, n)})
+
+
+def _reload(ensemble):
+    ensemble.last_check_time = 0
+    ensemble.check_for_updates()
+    if ensemble._reload_thread is not None:
+        ensemble._reload_thread.join(timeout=10)
+
+
+def test_publish_writes_versions_and_atomic_manifest(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=2)
+    versions = [registry.publish({"rf": ConstantModel(p)}, {"rf": p}, ["RSI"]) for p in (0.1, 0.2, 0.3)]
+
+    manifest = registry.manifest()
+    assert manifest["version"] == versions[-1]
+    assert manifest["metrics"] == {"rf": 0.3} and manifest["feature_names"] == ["RSI"]
+    assert registry.versions() == versions[1:]            # pruned to `keep`
+    assert not os.path.exists(registry.manifest_path + ".tmp")
+    assert registry.load(manifest)["rf"].p == 0.3
+
+
+def test_bot_hot_swaps_new_version_and_keeps_last_good(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_RELOAD_CHECK_SEC", 0.0)
+    registry = ModelRegistry(str(tmp_path))
+    first = registry.publish({"rf": ConstantModel(0.7)})
+
+    ensemble = EnsembleManager(models_dir=str(tmp_path))   # startup load from the manifest
+    assert ensemble.model_version == first
+    assert ensemble.predict_proba(_features()) == pytest.approx(0.7)
+
+    _reload(ensemble)   # manifest unchanged: no reload
+    assert ensemble._reload_thread is None
+
+    second = registry.publish({"rf": ConstantModel(0.9), "lgbm": ConstantModel(0.7)})
+    os.utime(registry.manifest_path, (1, 1))   # distinct mtime even on coarse filesystems
+    _reload(ensemble)
+    assert ensemble.model_version == second
+    assert ensemble.predict_proba(_features()) == pytest.approx(0.8)
+
+    # A broken version is not swapped in
+    third = registry.publish({"rf": ConstantModel(0.1)})
+    with open(os.path.join(str(tmp_path), registry.manifest()["models"]["rf"]), "wb") as f:
+        f.write(b"corrupted")
+    os.utime(registry.manifest_path, (2, 2))
+    _reload(ensemble)
+    assert ensemble.model_version == second != third
+    assert ensemble.predict_proba(_features()) == pytest.approx(0.8)
+
+
+def test_swap_during_inference_serves_one_version_whole(tmp_path):
+    ensemble = EnsembleManager(models_dir=str(tmp_path))
+    new = ServedModels("v2", {"rf": ConstantModel(0.1)}, None, True)
+
+    class SwappingModel(ConstantModel):
+        def predict_proba(self, X):
+            ensemble._served = new     # what the reload thread does, mid-batch
+            return super().predict_proba(X)
+
+    ensemble._served = ServedModels("v1", {"a": SwappingModel(0.7), "b": ConstantModel(0.9)}, None, True)
+    assert ensemble.predict_proba(_features()) == pytest.approx(0.8)   # v1 only
+    assert ensemble.model_version == "v2" and ensemble.models is new.models
+    assert ensemble.predict_proba(_features()) == pytest.approx(0.1)
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_training_worker_publishes_from_a_separate_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    rng = np.random.default_rng(1)
+    n = 240
+    pd.DataFrame({
+        "RSI": rng.uniform(20, 80, n), "MACD": rng.normal(0, 1, n), "CCI": rng.normal(0, 100, n),
+        "timestamp": np.arange(n) * 3600, "symbol": ["AAA/USDT", "BBB/USDT"] * (n // 2),
+        "close": 100 + np.cumsum(rng.normal(0, 1, n)),
+    }).to_csv(os.path.join("data", "ml_training_data.csv"), index=False)
+
+    models_dir = str(tmp_path / "models")
+    worker = TrainingWorker(models_dir=models_dir, interval_hours=0)
+    assert not worker.maybe_submit()          # interval 0: scheduling disabled
+    assert worker.submit()
+    assert not worker.submit()                # one run at a time
+    worker._future.result(timeout=120)
+    result = worker.poll()
+    worker.shutdown()
+
+    with open(os.path.join(models_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    assert result["version"] == manifest["version"]
+    assert manifest["feature_names"] == ["RSI", "MACD", "CCI"]
+    assert EnsembleManager(models_dir=models_dir).model_version == manifest["version"]
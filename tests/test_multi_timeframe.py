@@ -1,3 +1,5 @@
+import asyncio
+import pytest
 import src.strategies.multi_timeframe as mtf
 
 
@@ -32,3 +34,46 @@ def test_mtf_4h_1h_align(monkeypatch):
     assert res["consensus"] is True
     assert res["direction"] == "LONG"
     assert res["confidence_multiplier"] == 1.15
+
+
+def _trend_candles(n, step):
+    rows = []
+    price = 100.0
+    for i in range(n):
+        price += step + (0.3 if i % 3 == 0 else -0.1)
+        rows.append([i * 60_000, price - 0.05, price + 0.4, price - 0.4, price, 10.0 + i])
+    return rows
+
+
+class ConcurrentLoader:
+    def __init__(self, frames):
+        self.frames = frames
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_ohlcv(self, symbol, timeframe='1h', limit=100, use_cache=True):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return self.frames[timeframe][-limit:]
+
+
+@pytest.mark.asyncio
+async def test_mtf_async_fetches_concurrently_and_matches_sync():
+    frames = {"15m": _trend_candles(120, 0.5), "1h": _trend_candles(120, 0.4), "4h": _trend_candles(30, 0.4)}
+    loader = ConcurrentLoader(frames)
+
+    res = await mtf.multi_timeframe_analyzer_async("AAA/USDT", loader)
+    assert loader.peak == 3
+    assert res["timeframes"]["4h"]["error"] == "Insufficient Data"
+
+    class SyncExchange:
+        def fetch_ohlcv(self, symbol, timeframe, limit=100):
+            return frames[timeframe][-limit:]
+
+    sync_res = mtf.multi_timeframe_analyzer("AAA/USDT", SyncExchange())
+    assert sync_res["consensus"] == res["consensus"]
+    for tf in ("15m", "1h"):
+        assert sync_res["timeframes"][tf]["direction"] == res["timeframes"][tf]["direction"]
+        assert sync_res["timeframes"][tf]["indicators"]["rsi"] == pytest.approx(res["timeframes"][tf]["indicators"]["rsi"])
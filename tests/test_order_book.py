@@ -0,0 +1,156 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.binance_websocket import BinanceDepthStream
+from src.collectors.order_book import LocalOrderBook, OrderBookStore
+from src.market_structure.orderbook_analyzer import OrderBookAnalyzer
+
+
+def _snapshot(nonce, mid=100.0, levels=10):
+    return {
+        'nonce': nonce,
+        'bids': [[mid - 0.1 * (i + 1), 1.0] for i in range(levels)],
+        'asks': [[mid + 0.1 * (i + 1), 1.0] for i in range(levels)],
+    }
+
+
+def _event(first, final, bids=(), asks=(), symbol_id='AAAUSDT', **extra):
+    return {'e': 'depthUpdate', 's': symbol_id, 'U': first, 'u': final,
+            'b': [[str(p), str(q)] for p, q in bids], 'a': [[str(p), str(q)] for p, q in asks], **extra}
+
+
+def test_sorted_levels_insert_update_and_delete():
+    book = LocalOrderBook('AAA/USDT')
+    book.load_snapshot([[99.0, 1.0], [99.5, 2.0]], [[100.5, 1.0], [101.0, 3.0]], 10)
+    book.apply([[99.7, 4.0], [99.0, 0.0]], [[100.5, 2.5], [100.8, 1.0]], 11)
+
+    assert book.top('bids', 5).tolist() == [[99.7, 4.0], [99.5, 2.0]]
+    assert book.top('asks', 5).tolist() == [[100.5, 2.5], [100.8, 1.0], [101.0, 3.0]]
+    assert book.spread_pct() == pytest.approx((100.5 - 99.7) / 99.7 * 100)
+    # mid = 100.1; 50 bps band reaches 99.5995 on the bid side and 100.6005 on the ask side
+    assert book.depth('bids', 50) == pytest.approx(99.7 * 4.0)
+    assert book.depth('asks', 50) == pytest.approx(100.5 * 2.5)
+
+
+def test_snapshot_replays_buffered_events_and_drops_covered_ones():
+    store = OrderBookStore(max_levels=100, max_age=60)
+    store.begin_sync('AAA/USDT')
+    store.apply_event('AAA/USDT', _event(95, 100, bids=[(99.9, 5.0)]))      # covered by the snapshot
+    store.apply_event('AAA/USDT', _event(101, 105, asks=[(100.1, 0.0)]))   # straddles lastUpdateId
+    store.apply_event('AAA/USDT', _event(106, 107, bids=[(99.95, 2.0)]))
+    assert store.get('AAA/USDT') is None
+
+    assert store.apply_snapshot('AAA/USDT', _snapshot(102))
+    book = store.get('AAA/USDT')
+    assert book.last_update_id == 107
+    assert book.best_bid() == 99.95
+    assert book.best_ask() == pytest.approx(100.2)   # 100.1 was removed
+    assert [lvl[1] for lvl in store.order_book('AAA/USDT', 3)['bids']] == [2.0, 1.0, 1.0]
+
+
+def test_sequence_gap_forces_resync():
+    store = OrderBookStore(max_levels=100, max_age=60)
+    store.begin_sync('AAA/USDT')
+    store.apply_snapshot('AAA/USDT', _snapshot(10))
+    assert store.apply_event('AAA/USDT', _event(11, 12))
+    assert not store.apply_event('AAA/USDT', _event(14, 15))   # 13 missing
+    assert store.get('AAA/USDT') is None and store.needs_snapshot('AAA/USDT')
+    assert store.stats['gaps'] == 1
+
+    # Futures streams chain on pu (previous final update id)
+    store.apply_snapshot('AAA/USDT', _snapshot(20))
+    assert store.apply_event('AAA/USDT', _event(18, 22, pu=17))
+    assert store.apply_event('AAA/USDT', _event(25, 30, pu=22))
+    assert not store.apply_event('AAA/USDT', _event(33, 35, pu=31))
+
+
+def test_depth_stream_feeds_loader_without_rest(monkeypatch):
+    loader = BinanceDataLoader()
+    loader.mock = False
+    loader.local_books = OrderBookStore(max_levels=100, max_age=60)
+    calls = []
+
+    class Exchange:
+        def fetch_order_book(self, symbol, limit=None):
+            calls.append(limit)
+            return _snapshot(50)
+
+    loader.exchange = Exchange()
+
+    async def no_wait():
+        return None
+    loader.rate_limiter.wait_if_needed = no_wait
+
+    async def run():
+        stream = BinanceDepthStream(loader, ['AAA/USDT'])
+        stream.running = True
+        loader.local_books.begin_sync('AAA/USDT')
+        stream.process_message({'stream': 'aaausdt@depth@100ms', 'data': _event(49, 52, bids=[(99.95, 3.0)])})
+        await stream._sync(['AAA/USDT'])
+        stream.process_message({'stream': 'aaausdt@depth@100ms', 'data': _event(53, 53, asks=[(100.05, 4.0)])})
+
+        book = await loader.get_order_book('AAA/USDT', limit=5)
+        analysis = OrderBookAnalyzer().analyze_depth(book, 100.0)
+        return book, analysis
+
+    book, analysis = asyncio.run(run())
+    assert len(calls) == 1   # only the snapshot went over REST
+    assert isinstance(book['bids'], np.ndarray)
+    assert book['bids'][0].tolist() == [99.95, 3.0]
+    assert book['asks'][0].tolist() == [100.05, 4.0]
+    assert analysis['spread_pct'] == pytest.approx(0.1 / 99.95 * 100)
+
+
+def test_pending_buffer_is_capped():
+    store = OrderBookStore(max_levels=100, max_age=60, max_pending=3)
+    store.begin_sync('AAA/USDT')
+    assert all(store.apply_event('AAA/USDT', _event(i, i)) for i in range(3))
+    assert not store.apply_event('AAA/USDT', _event(3, 3))     # overflow: buffer restarts, resync requested
+    assert store.stats['overflows'] == 1 and store._pending['AAA/USDT'] == [_event(3, 3)]
+    assert store.apply_snapshot('AAA/USDT', _snapshot(2))
+    assert store.get('AAA/USDT').last_update_id == 3
+
+
+def test_failed_snapshots_drop_buffer_and_retry_with_backoff(monkeypatch):
+    loader = BinanceDataLoader()
+    loader.local_books = OrderBookStore(max_levels=100, max_age=60, max_pending=50)
+    snapshots = []
+
+    async def get_order_book(symbol, limit=None, use_local=True):
+        snapshots.append(symbol)
+        return _snapshot(2000) if len(snapshots) > 7 else None   # REST down for 7 attempts
+    loader.get_order_book = get_order_book
+
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    async def fast_sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+    monkeypatch.setattr(asyncio, 'sleep', fast_sleep)
+
+    async def run():
+        stream = BinanceDepthStream(loader, ['AAA/USDT'])
+        stream.running = True
+        loader.local_books.begin_sync('AAA/USDT')
+        await stream._sync_shard(['AAA/USDT'])          # 3 attempts fail -> buffer dropped, retry scheduled
+        assert loader.local_books._pending['AAA/USDT'] == []
+        for i in range(200):                             # events keep coming while it waits
+            stream.process_message({'data': _event(900 + i, 900 + i)})
+        assert len(loader.local_books._pending['AAA/USDT']) <= 50
+        assert len(stream._resyncs) == 1 and stream.stats['resyncs'] == 1   # overflows reuse the pending retry
+        await stream._resyncs['AAA/USDT']
+        return stream
+
+    stream = asyncio.run(run())
+    assert loader.local_books.is_synced('AAA/USDT')
+    assert len(snapshots) == 8 and stream.stats['sync_failures'] == 2    # rounds of 3, 3, then 2 attempts
+    assert [d for d in sleeps if d >= 2.0] == [2.0, 4.0]   # backoff between the retry rounds
+
+
+def test_depth_symbols_are_ranked_by_volume():
+    tickers = {'A/USDT': {'quoteVolume': 10.0}, 'B/USDT': {'quoteVolume': 500.0}, 'C/USDT': {'quoteVolume': None}}
+    assert BinanceDepthStream.most_liquid(['A/USDT', 'B/USDT', 'C/USDT', 'D/USDT'], tickers, 2) == ['B/USDT', 'A/USDT']
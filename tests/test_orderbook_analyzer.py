@@ -28,3 +28,39 @@ def test_orderbook_sell_pressure_and_resistance_wall():
     assert analysis["pressure"] in ("SELL_PRESSURE", "NEUTRAL")
     score = oba.get_score_impact(analysis)
     assert score <= -0.5
+
+
+def test_batch_matches_single_book_and_adds_microstructure():
+    oba = OrderBookAnalyzer(depth_bps=[10, 50])
+    books = {
+        "AAA/USDT": make_orderbook(bid_qty=20.0, ask_qty=5.0, big_wall={"side": "bid", "qty": 500.0}),
+        "BBB/USDT": make_orderbook(bid_qty=5.0, ask_qty=20.0, big_wall={"side": "ask", "qty": 500.0}),
+        "EMPTY/USDT": {"bids": [], "asks": [[1.0, 1.0]]},
+    }
+    prices = {s: 100.0 for s in books}
+    batch = oba.analyze_batch(books, prices)
+
+    assert set(batch) == {"AAA/USDT", "BBB/USDT"}
+    for symbol in batch:
+        assert batch[symbol] == oba.analyze_depth(books[symbol], prices[symbol])
+
+    a = batch["AAA/USDT"]
+    assert a["pressure"] == "BUY_PRESSURE"
+    assert [w["type"] for w in a["whale_walls"]] == ["SUPPORT"]
+    best_bid, best_ask = books["AAA/USDT"]["bids"][0], books["AAA/USDT"]["asks"][0]
+    expected_micro = (best_bid[0] * best_ask[1] + best_ask[0] * best_bid[1]) / (best_bid[1] + best_ask[1])
+    assert abs(a["microprice"] - expected_micro) < 1e-9
+    # Wider band holds at least as much resting notional
+    assert a["depth_bps"]["50"]["bid"] >= a["depth_bps"]["10"]["bid"] > 0
+
+
+def test_array_and_extra_field_levels_are_accepted():
+    import numpy as np
+    oba = OrderBookAnalyzer()
+    book = {
+        "bids": [[100.0 - 0.01 * i, 2.0, 7] for i in range(10)],   # [price, qty, count]
+        "asks": np.array([[100.01 + 0.01 * i, 1.0] for i in range(10)]),
+    }
+    analysis = oba.analyze_depth(book, 100.0)
+    assert analysis["imbalance_ratio"] == 2.0
+    assert analysis["bid_volume_top20"] == 20.0
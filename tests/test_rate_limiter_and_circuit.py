@@ -1,4 +1,5 @@
 import time
+import pytest
 from src.utils.rate_limiter import RateLimiter
 from src.utils.circuit_breaker import CircuitBreaker
 
@@ -52,3 +53,100 @@ def test_circuit_breaker_open_and_half_open(monkeypatch):
     assert cb.state == "HALF_OPEN"
     assert cb.call(ok) == 42
     assert cb.state == "CLOSED"
+
+
+class FakeClock:
+    def __init__(self, now=1_000_040.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_weights_follow_binance_endpoints():
+    from src.utils.rate_limiter import request_weight
+
+    assert request_weight('fetch_tickers') == (80, 0)
+    assert request_weight('fetch_tickers', market='futures') == (40, 0)
+    assert request_weight('fetch_order_book', ('BTC/USDT', 500)) == (25, 0)
+    assert request_weight('fetch_order_book', ('BTC/USDT',), {'limit': 5}, market='futures') == (2, 0)
+    assert request_weight('fetch_ohlcv', ('BTC/USDT', '1h'), {'limit': 1000}, market='futures') == (5, 0)
+    assert request_weight('create_order', ('BTC/USDT', 'market', 'buy', 1)) == (1, 1)
+    assert request_weight('sapi_get_asset_dribblet') == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_weight_limiter_sleeps_until_window_reset(monkeypatch):
+    from src.utils import rate_limiter as rl_module
+
+    clock = FakeClock()
+    limiter = rl_module.BinanceRateLimiter('futures', headroom=0.5, clock=clock)  # 1200 weight for data
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+    monkeypatch.setattr(rl_module.asyncio, "sleep", fake_sleep)
+
+    for _ in range(30):
+        await limiter.acquire(40)  # 1200 weight
+    assert sleeps == []
+
+    await limiter.acquire(40)
+    # Window started at 1_000_040 - 20 -> wakes exactly at the next minute boundary
+    assert sleeps == [pytest.approx(40.0)]
+    assert limiter.usage()['weight'][60] == 40
+
+
+@pytest.mark.asyncio
+async def test_weight_limiter_syncs_headers_and_reserves_orders(monkeypatch):
+    from src.utils import rate_limiter as rl_module
+
+    clock = FakeClock()
+    limiter = rl_module.BinanceRateLimiter('spot', headroom=0.9, clock=clock)
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+    monkeypatch.setattr(rl_module.asyncio, "sleep", fake_sleep)
+
+    # Another process on the same IP already used most of the budget
+    limiter.update_from_headers({'x-mbx-used-weight-1m': '5390', 'X-MBX-ORDER-COUNT-10S': '3'})
+    assert limiter.usage()['weight'][60] == 5390
+    assert limiter.usage()['orders'][10] == 3
+
+    # Orders may use the reserved 10% that data requests can't
+    await limiter.acquire(1, orders=1)
+    assert sleeps == []
+    await limiter.acquire(20)
+    assert len(sleeps) == 1
+
+    limiter.penalize(retry_after=120)
+    await limiter.acquire(1)
+    assert sleeps[-1] == pytest.approx(120.0)
+    assert limiter.stats['bans'] == 1
+
+
+@pytest.mark.asyncio
+async def test_exchange_call_charges_attached_limiter():
+    from src.collectors.exchange_client import attach_rate_limiter, exchange_call
+    from src.utils.rate_limiter import BinanceRateLimiter
+
+    class Exchange:
+        enableRateLimit = True
+        last_response_headers = None
+
+        def fetch_tickers(self):
+            self.last_response_headers = {'X-MBX-USED-WEIGHT-1M': '500'}
+            return {}
+
+    exchange = Exchange()
+    limiter = BinanceRateLimiter('spot', clock=FakeClock())
+    attach_rate_limiter(exchange, limiter)
+
+    await exchange_call(exchange.fetch_tickers)
+
+    assert exchange.enableRateLimit is False
+    assert limiter.stats['weight'] == 80
+    assert limiter.usage()['weight'][60] == 500
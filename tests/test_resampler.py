@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.collectors.binance_loader import BinanceDataLoader
+from src.collectors.resampler import bucket_starts, can_resample, resample_ohlcv
+
+HOUR = 3600000
+DAY = 24 * HOUR
+
+
+def _hourly(start_ts, count):
+    rows = []
+    for i in range(count):
+        o = 100.0 + i
+        rows.append([start_ts + i * HOUR, o, o + 2, o - 1, o + 0.5, 1.0 + i])
+    return rows
+
+
+def test_resample_1h_to_4h_aligned_buckets():
+    # Starts at 02:00 UTC -> first (partial) 00:00 bucket is dropped, last bucket is forming
+    start = 10 * DAY + 2 * HOUR
+    rows = _hourly(start, 12)
+    out = resample_ohlcv(rows, '1h', '4h')
+
+    assert [int(t) for t in out[:, 0]] == [10 * DAY + 4 * HOUR, 10 * DAY + 8 * HOUR, 10 * DAY + 12 * HOUR]
+    first = rows[2:6]
+    assert out[0, 1] == first[0][1]
+    assert out[0, 2] == max(r[2] for r in first)
+    assert out[0, 3] == min(r[3] for r in first)
+    assert out[0, 4] == first[-1][4]
+    assert out[0, 5] == pytest.approx(sum(r[5] for r in first))
+    # Forming bucket built from the 2 hours available so far
+    assert out[-1, 5] == pytest.approx(rows[-2][5] + rows[-1][5])
+
+
+def test_resample_drops_history_before_gap():
+    rows = _hourly(0, 8) + _hourly(12 * HOUR, 8)
+    out = resample_ohlcv(rows, '1h', '4h')
+    assert int(out[0, 0]) == 12 * HOUR
+    assert len(out) == 2
+
+
+def test_weekly_buckets_start_on_monday():
+    monday = 4 * DAY  # 1970-01-05
+    ts = np.array([monday - 1, monday, monday + 6 * DAY + 1])
+    assert list(bucket_starts(ts, '1w')) == [monday - 7 * DAY, monday, monday]
+    assert can_resample('1d', '1w') and can_resample('1h', '4h')
+    assert not can_resample('4h', '1h') and not can_resample('1d', '1M')
+
+
+class HistoryExchange:
+    def __init__(self, hourly):
+        self.hourly = hourly
+        self.requests = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+        self.requests.append((timeframe, since, limit))
+        if timeframe == '1h':
+            return [list(r) for r in self.hourly[-limit:]]
+        out = resample_ohlcv([r for r in self.hourly if since is None or r[0] >= since], '1h', timeframe)
+        return [[int(r[0])] + list(r[1:]) for r in out[:limit]]
+
+
+@pytest.mark.asyncio
+async def test_loader_derives_4h_and_fetches_only_missing_history():
+    hourly = _hourly(100 * DAY, 24 * 30)
+    loader = BinanceDataLoader()
+    loader.mock = False
+    loader.exchange = HistoryExchange(hourly)
+
+    async def no_wait():
+        return None
+    loader.rate_limiter.wait_if_needed = no_wait
+
+    await loader.get_ohlcv("AAA/USDT", "1h", limit=50)  # warm-up: 200 hourly candles
+    assert loader.exchange.requests == [('1h', None, 200)]
+
+    four_h = await loader.get_ohlcv("AAA/USDT", "4h", limit=30)
+    assert loader.exchange.requests[1:] == []  # 200h -> 50 buckets held locally
+    assert four_h[-1][0] == int(bucket_starts(np.array([hourly[-1][0]]), '4h')[0])
+    assert np.all(np.diff([r[0] for r in four_h]) == 4 * HOUR)
+
+    four_h = await loader.get_ohlcv("AAA/USDT", "4h", limit=80, use_cache=False)
+    tf, since, limit = loader.exchange.requests[-1]
+    assert tf == '4h' and limit == 30
+    assert len(four_h) == 80
+    assert np.all(np.diff([r[0] for r in four_h]) == 4 * HOUR)
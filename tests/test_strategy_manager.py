@@ -1,3 +1,4 @@
+import pytest
 import pandas as pd
 from types import SimpleNamespace
 from src.strategies.strategy_manager import StrategyManager
@@ -60,3 +61,28 @@ def test_strategy_manager_mtf_blocks_entry(monkeypatch):
     assert res["action"] == "HOLD"
     assert res["strategy_details"].get("mtf_analysis", {}).get("consensus") is False
 
+
+
+@pytest.mark.asyncio
+async def test_strategy_manager_async_mtf_bonus_via_loader(monkeypatch):
+    df = make_df()
+    sm = StrategyManager()
+    sm.strategies = [
+        FakeStrategy("S1", 0.7, "ENTRY", 0.7),
+        FakeStrategy("S2", 0.3, "HOLD", 0.0),
+    ]
+    seen = []
+
+    async def fake_mtf_async(symbol, loader):
+        seen.append((symbol, loader))
+        return {"consensus": True, "confidence_multiplier": 1.30}
+
+    import src.strategies.strategy_manager as smod
+    monkeypatch.setattr(smod, "multi_timeframe_analyzer_async", fake_mtf_async)
+
+    loader = SimpleNamespace()
+    res = await sm.analyze_all_async(df, "AAA/USDT", loader=loader)
+    assert seen == [("AAA/USDT", loader)]
+    assert res["action"] == "ENTRY"
+    assert abs(res["weighted_score"] - 0.91) < 1e-9
+    assert sm.stats["mtf_consensus"] == 1
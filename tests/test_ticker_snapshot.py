@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from src.collectors.ticker_snapshot import TickerSnapshot
+
+
+class TickerExchange:
+    def __init__(self):
+        self.bulk_calls = 0
+        self.single_calls = []
+        self.markets = {
+            'BTC/USDT': {'id': 'BTCUSDT'},
+            'ETH/USDT': {'id': 'ETHUSDT'},
+            'BTC/USDT:USDT': {'id': 'BTCUSDT'},
+        }
+
+    async def fetch_tickers(self):
+        self.bulk_calls += 1
+        await asyncio.sleep(0.01)
+        return {'BTC/USDT': {'symbol': 'BTC/USDT', 'last': 50000.0},
+                'ETH/USDT': {'symbol': 'ETH/USDT', 'last': 3000.0}}
+
+    async def fetch_ticker(self, symbol):
+        self.single_calls.append(symbol)
+        if symbol == 'NEW/USDT':
+            return {'symbol': symbol, 'last': 1.5}
+        raise Exception("bad symbol")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_bulk_fetch():
+    exchange = TickerExchange()
+    snapshot = TickerSnapshot(exchange, max_age=60)
+
+    prices = await asyncio.gather(*(snapshot.get_price(s) for s in ['BTC/USDT', 'ETH/USDT'] * 10))
+
+    assert exchange.bulk_calls == 1
+    assert prices[:2] == [50000.0, 3000.0]
+    assert snapshot.stats['lookups'] == 20
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_refetched():
+    exchange = TickerExchange()
+    snapshot = TickerSnapshot(exchange, max_age=0)
+
+    await snapshot.get_price('BTC/USDT')
+    await asyncio.sleep(0.001)
+    await snapshot.get_price('BTC/USDT')
+    assert exchange.bulk_calls == 2
+
+    snapshot.max_age = 60
+    snapshot.invalidate()
+    await snapshot.get_price('BTC/USDT')
+    await snapshot.get_price('ETH/USDT')
+    assert exchange.bulk_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_missing_symbol_falls_back_to_single_fetch_once():
+    exchange = TickerExchange()
+    snapshot = TickerSnapshot(exchange, max_age=60)
+
+    assert await snapshot.get_price('NEW/USDT') == 1.5
+    assert await snapshot.get_price('NEW/USDT') == 1.5
+    assert exchange.single_calls == ['NEW/USDT']
+
+    assert await snapshot.get_price('DEAD/USDT') == 0.0
+
+
+@pytest.mark.asyncio
+async def test_mini_ticker_stream_keeps_snapshot_fresh():
+    exchange = TickerExchange()
+    snapshot = TickerSnapshot(exchange, max_age=60)
+
+    # Stream data alone does not count as a full snapshot
+    snapshot.apply_mini_tickers([{'s': 'BTCUSDT', 'c': '51000', 'o': '1', 'h': '2', 'l': '0.5',
+                                  'v': '10', 'q': '100', 'E': 1}])
+    assert not snapshot.is_fresh()
+
+    await snapshot.get_all()
+    snapshot.apply_mini_tickers([{'s': 'BTCUSDT', 'c': '52000', 'o': '1', 'h': '2', 'l': '0.5',
+                                  'v': '10', 'q': '100', 'E': 2},
+                                 {'s': 'UNKNOWN', 'c': '1'}])
+
+    assert await snapshot.get_price('BTC/USDT') == 52000.0
+    assert exchange.bulk_calls == 1
+    assert snapshot.stats['stream_updates'] == 2
+
+
+@pytest.mark.asyncio
+async def test_futures_stream_updates_perpetual_symbols_only():
+    exchange = TickerExchange()
+    snapshot = TickerSnapshot(exchange, max_age=0.05, market_type='futures')
+    await snapshot.get_all()
+    await asyncio.sleep(0.1)
+    assert not snapshot.is_fresh()
+
+    # No futures market for ETHUSDT: nothing updated, so the snapshot stays stale
+    snapshot.apply_mini_tickers([{'s': 'ETHUSDT', 'c': '3100', 'o': '1', 'h': '2', 'l': '0.5',
+                                  'v': '10', 'q': '100', 'E': 1}])
+    assert not snapshot.is_fresh() and snapshot.stats['stream_updates'] == 0
+
+    snapshot.apply_mini_tickers([{'s': 'BTCUSDT', 'c': '52000', 'o': '1', 'h': '2', 'l': '0.5',
+                                  'v': '10', 'q': '100', 'E': 2}])
+    assert snapshot.is_fresh()
+    assert snapshot._tickers['BTC/USDT:USDT']['last'] == 52000.0
+    assert snapshot._tickers['BTC/USDT']['last'] == 50000.0
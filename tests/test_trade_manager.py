@@ -38,17 +38,17 @@ class TestTradeManager(unittest.IsolatedAsyncioTestCase):
         # Setup
         symbol = 'BTC/USDT'
         self.loader.get_ohlcv.return_value = [[1, 100, 110, 90, 100, 1000]]
-        self.analyzer.analyze_spot.return_value = TradeSignal(
+        self.analyzer.analyze_spot_async = AsyncMock(return_value=TradeSignal(
             symbol=symbol, action='ENTRY', score=0.9, direction='LONG', 
             estimated_yield=0.1, timestamp=123, details={}
-        )
+        ))
         self.executor.execute_strategy.side_effect = InsufficientBalanceError("Not enough funds")
         self.executor.brain.check_safety.return_value = {'safe': True}
         self.executor.brain.get_weights.return_value = {}
         self.executor.brain.get_indicator_weights.return_value = {}
         
         with patch.object(self.trade_manager, '_validate_signal', new_callable=AsyncMock) as mock_validate:
-             mock_validate.return_value = self.analyzer.analyze_spot.return_value
+             mock_validate.return_value = self.analyzer.analyze_spot_async.return_value
              
              with patch.object(self.trade_manager, '_check_risk_management', new_callable=AsyncMock) as mock_risk:
                  mock_risk.return_value = None
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock, AsyncMock
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.execution.trade_manager import TradeManager
+from src.strategies.analyzer import TradeSignal
+from config.settings import settings
+
+
+def _make_manager():
+    executor = AsyncMock()
+    executor.brain = MagicMock()
+    executor.paper_positions = {}
+    grid_trader = AsyncMock()
+    grid_trader.active_grids = {}
+    return TradeManager(AsyncMock(), MagicMock(), executor, MagicMock(), grid_trader, AsyncMock())
+
+
+def _signal(symbol):
+    return TradeSignal(symbol=symbol, action='ENTRY', direction='LONG', score=10.0,
+                       estimated_yield=0.0, timestamp=0, details={})
+
+
+@pytest.mark.asyncio
+async def test_scan_symbols_bounded_concurrency_and_order(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CONCURRENCY", 3)
+    tm = _make_manager()
+    in_flight = 0
+    peak = 0
+
+    async def fake_process(symbol, regime, scores, prices):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later symbols finish first
+        await asyncio.sleep(0.01 * (10 - int(symbol[1:])))
+        prices[symbol] = float(symbol[1:])
+        scores[symbol] = {'score': 1.0}
+        in_flight -= 1
+        return _signal(symbol) if int(symbol[1:]) % 2 == 0 else None
+
+    tm.process_symbol_logic = fake_process
+    symbols = [f"S{i}" for i in range(8)]
+    progress = []
+
+    async def on_progress(done, total, found):
+        progress.append((done, total))
+
+    latest_scores, prices_map = {}, {}
+    results = await tm.scan_symbols(symbols, {}, latest_scores, prices_map, on_progress=on_progress)
+
+    assert peak == 3
+    assert [r.symbol if r else None for r in results] == ["S0", None, "S2", None, "S4", None, "S6", None]
+    assert set(prices_map) == set(symbols)
+    assert set(latest_scores) == set(symbols)
+    assert [p[0] for p in progress] == list(range(1, 9))
+
+
+@pytest.mark.asyncio
+async def test_scan_symbols_timeout_discards_partial_writes(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "SCAN_SYMBOL_TIMEOUT_SEC", 0.05)
+    tm = _make_manager()
+
+    async def fake_process(symbol, regime, scores, prices):
+        prices[symbol] = 1.0
+        if symbol == "SLOW/USDT":
+            await asyncio.sleep(1)
+        return _signal(symbol)
+
+    tm.process_symbol_logic = fake_process
+    prices_map = {}
+    results = await tm.scan_symbols(["FAST/USDT", "SLOW/USDT"], {}, {}, prices_map)
+
+    assert results[0].symbol == "FAST/USDT"
+    assert results[1] is None
+    assert prices_map == {"FAST/USDT": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_scan_timeout_does_not_cover_order_execution(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "SCAN_SYMBOL_TIMEOUT_SEC", 0.05)
+    tm = _make_manager()
+    executed = []
+
+    async def slow_execute(signal, latest_scores=None):
+        await asyncio.sleep(0.2)
+        executed.append(signal.symbol)
+
+    async def fake_process(symbol, regime, scores, prices):
+        prices[symbol] = 1.0
+        if symbol == "ORDER/USDT":
+            # Slow order: outlives the deadline, its signal is still reported
+            signal = _signal(symbol)
+            await tm._execute(signal)
+            return signal
+        # Grid order first, then analysis overruns the (restored) deadline
+        await tm._run_exclusive(asyncio.sleep, 0.1)
+        await asyncio.sleep(1)
+        return _signal(symbol)
+
+    tm.executor.execute_strategy = slow_execute
+    tm.process_symbol_logic = fake_process
+    prices_map = {}
+    results = await tm.scan_symbols(["ORDER/USDT", "GRID/USDT"], {}, {}, prices_map)
+
+    assert executed == ["ORDER/USDT"]
+    assert results[0].symbol == "ORDER/USDT"
+    assert results[1] is None
+    assert prices_map == {"ORDER/USDT": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_scan_survives_failing_progress_callback(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_CONCURRENCY", 2)
+    tm = _make_manager()
+
+    async def fake_process(symbol, regime, scores, prices):
+        return _signal(symbol)
+
+    async def broken_progress(done, total, found):
+        raise RuntimeError("progress sink down")
+
+    tm.process_symbol_logic = fake_process
+    results = await tm.scan_symbols(["A/USDT", "B/USDT"], {}, {}, {}, on_progress=broken_progress)
+    assert [r.symbol for r in results] == ["A/USDT", "B/USDT"]
+
+
+@pytest.mark.asyncio
+async def test_execute_is_serialised_and_survives_cancellation():
+    tm = _make_manager()
+    active = 0
+    peak = 0
+    completed = []
+
+    async def slow_execute(signal, latest_scores=None):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        completed.append(signal.symbol)
+
+    tm.executor.execute_strategy = slow_execute
+
+    await asyncio.gather(tm._execute(_signal("A/USDT")), tm._execute(_signal("B/USDT")))
+    assert peak == 1
+
+    # A scan timeout must not abort an order that is already being placed
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(tm._execute(_signal("C/USDT")), timeout=0.005)
+    await asyncio.sleep(0.05)
+    assert completed[-1] == "C/USDT"
+
+
+@pytest.mark.asyncio
+async def test_prepare_universe_feeds_order_books_of_most_liquid_candidates(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_INDICATORS_ENABLED", False)
+    monkeypatch.setattr(settings, "CORRELATION_ENGINE_ENABLED", False)
+    monkeypatch.setattr(settings, "ORDERBOOK_TOP_K", 2)
+    tm = _make_manager()
+    volumes = {"AAA/USDT": 10.0, "BBB/USDT": 1000.0, "CCC/USDT": 100.0}
+
+    async def get_ohlcv(symbol, timeframe='1h', limit=50):
+        return [[i, 1.0, 1.0, 1.0, 1.0, volumes[symbol]] for i in range(30)]
+
+    async def get_order_book(symbol, limit=50):
+        return {"bids": [[0.99, 1.0]], "asks": [[1.01, 1.0]]}
+
+    tm.loader.get_ohlcv = get_ohlcv
+    tm.loader.get_order_book = get_order_book
+    await tm._prepare_universe(list(volumes), asyncio.Semaphore(4))
+
+    books, prices = tm.analyzer.prepare_order_books.call_args[0]
+    assert set(books) == {"BBB/USDT", "CCC/USDT"}
+    assert prices == {"BBB/USDT": 1.0, "CCC/USDT": 1.0}
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.market_structure.volume_profile import IncrementalVolumeProfile, VolumeProfileAnalyzer
+
+
+def _candles(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    rows = []
+    for i, c in enumerate(close):
+        o = c + rng.normal(0, 0.3)
+        high = max(o, c) + abs(rng.normal(0, 0.5))
+        low = min(o, c) - abs(rng.normal(0, 0.5))
+        volume = 0.0 if rng.random() < 0.05 else float(rng.uniform(10, 500))
+        rows.append([i * 3600000, float(o), float(high), float(low), float(c), volume])
+    return rows
+
+
+def _pandas_profile(candles, n_bins=100, value_area_pct=0.70):
+    """The original pd.cut/groupby implementation, kept as the reference."""
+    df = pd.DataFrame(candles, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    bins = np.linspace(df['low'].min(), df['high'].max(), n_bins + 1)
+    df['bin'] = pd.cut((df['high'] + df['low'] + df['close']) / 3, bins=bins, include_lowest=True, labels=False)
+    vp = df.groupby('bin')['volume'].sum()
+    poc_bin = vp.idxmax()
+    target = vp.sum() * value_area_pct
+    upper = lower = int(poc_bin)
+    current = vp.get(poc_bin, 0)
+    while current < target:
+        up = vp.get(upper + 1, 0) if upper + 1 < n_bins else 0
+        down = vp.get(lower - 1, 0) if lower - 1 >= 0 else 0
+        if up == 0 and down == 0:
+            break
+        if up > down:
+            upper += 1
+            current += up
+        else:
+            lower -= 1
+            current += down
+    return {'poc': bins[poc_bin] + (bins[1] - bins[0]) / 2, 'vah': bins[upper + 1], 'val': bins[lower],
+            'total_volume': vp.sum(), 'range_high': bins[-1], 'range_low': bins[0]}
+
+
+def _assert_same(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        assert a[k] == pytest.approx(b[k], rel=1e-9), k
+
+
+def test_binned_profile_matches_pandas_reference():
+    candles = _candles()
+    vp = VolumeProfileAnalyzer(incremental=False, intrabar=False)
+    for window in (10, 50, 100, 300):
+        _assert_same(vp.calculate_profile(candles[:window]), _pandas_profile(candles[:window]))
+
+
+def test_incremental_rolling_window_matches_full_rebuild():
+    candles = _candles()
+    inc = VolumeProfileAnalyzer(incremental=True, intrabar=False)
+    full = VolumeProfileAnalyzer(incremental=False, intrabar=False)
+    for end in range(101, len(candles)):
+        window = [row[:] for row in candles[end - 100:end]]
+        window[-1][4] += 0.25  # forming candle keeps moving
+        _assert_same(inc.calculate_profile(window, symbol='AAA/USDT'), full.calculate_profile(window))
+
+    state = inc.states[('AAA/USDT', '1h')]
+    assert len(state.candles) == 99
+    assert state.stats['rebuilds'] < state.stats['updates']
+
+
+def test_intrabar_distribution_incremental_and_volume_preserved():
+    candles = _candles(200, seed=8)
+    full = VolumeProfileAnalyzer(incremental=False, intrabar=True)
+    profile = full.calculate_profile(candles[:100])
+    assert profile['total_volume'] == pytest.approx(sum(row[5] for row in candles[:100]))
+    assert profile['val'] <= profile['poc'] <= profile['vah']
+
+    inc = VolumeProfileAnalyzer(incremental=True, intrabar=True)
+    for end in range(101, 200):
+        window = candles[end - 100:end]
+        _assert_same(inc.calculate_profile(window, symbol='AAA/USDT'), full.calculate_profile(window))
+
+
+def test_state_reseeds_on_gap_and_empties_bins_exactly():
+    candles = _candles(150)
+    state = IncrementalVolumeProfile(n_bins=50)
+    assert state.sync(candles[:60])
+    state.profile()
+    assert state.sync(candles[10:70])
+    assert not state.sync(candles[20:65] + candles[72:80])  # gap: caller reseeds
+    assert state.sync(candles[75:130])  # window moved past the old one: starts over
+    assert len(state.candles) == 55 and state.bins is None
+
+    # Every candle rolled through the window: emptied bins hold exactly 0
+    state = IncrementalVolumeProfile(n_bins=50)
+    state.sync(candles[:60])
+    state.profile()
+    for start in range(1, 90):
+        state.sync(candles[start:start + 60])
+    state.profile()
+    assert np.all(state.volumes[state.counts == 0] == 0.0)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.ml.ensemble_manager import SKLEARN_AVAILABLE, EnsembleManager
+from src.ml.training import create_labels
+from src.ml.walk_forward import (evaluate_walk_forward, max_rows_for_memory, purged_walk_forward_splits,
+                                 summarize_folds)
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=["RSI", "MACD", "CCI", "ADX"])
+    y = ((X["RSI"] + X["MACD"] + rng.normal(0, 0.5, n)) > 0).astype(int).to_numpy()
+    return X, y
+
+
+def _models():
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    return {"rf": RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0),
+            "lr": LogisticRegression()}
+
+
+def test_splits_are_expanding_and_purged():
+    timestamps = np.arange(600) * 60            # one row per minute
+    rng = np.random.default_rng(0)
+    shuffled = rng.permutation(timestamps)       # multi-symbol snapshots are not stored in time order
+    folds = purged_walk_forward_splits(shuffled, n_folds=5, label_end=shuffled + 3600, min_train=50)
+
+    assert len(folds) == 4                       # first block has no history before the purge gap
+    previous = 0
+    for train_idx, test_idx in folds:
+        test_start = shuffled[test_idx].min()
+        assert shuffled[train_idx].max() < test_start - 3600
+        assert len(train_idx) > previous
+        previous = len(train_idx)
+    assert np.array_equal(np.sort(np.concatenate([t for _, t in folds])), np.sort(np.argsort(shuffled)[200:]))
+
+
+def test_rows_are_purged_by_their_label_end():
+    # Two symbols snapshotted irregularly: BBB's next snapshot comes a day later
+    df = pd.DataFrame({
+        "symbol": ["AAA"] * 4 + ["BBB"] * 2,
+        "timestamp": [0, 3600, 7200, 10800, 3600, 90000],
+        "close": [100.0, 101.0, 102.0, 103.0, 50.0, 51.0],
+    })
+    labelled = create_labels(df)
+    ends = {(s, t): e for s, t, e in zip(labelled["symbol"], labelled["timestamp"], labelled["label_end"])}
+    assert ends == {("AAA", 0): 3600, ("AAA", 3600): 7200, ("AAA", 7200): 10800, ("BBB", 3600): 90000}
+
+    timestamps = np.array([0, 1800, 3600, 7200, 10800])
+    label_end = np.array([3600, 7200, 90000, 10800, 14400])
+    (train_idx, test_idx), = purged_walk_forward_splits(timestamps, n_folds=1, label_end=label_end, min_train=1)
+    assert list(test_idx) == [3, 4]
+    # Rows 1 and 2 predate the test block but their labels end at/after its start
+    assert list(train_idx) == [0]
+
+
+def test_memory_cap_rows():
+    # 100 MB over (2 workers + frame + matrix) copies of 80-byte rows
+    assert max_rows_for_memory(80, memory_mb=100, workers=2) == 100 * 1024 * 1024 // (80 * 4)
+    assert max_rows_for_memory(80, memory_mb=0, workers=2) == 0    # cap disabled
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_fold_reports_match_between_serial_and_parallel():
+    X, y = _data()
+    folds = purged_walk_forward_splits(np.arange(len(X)), n_folds=3, label_end=np.arange(len(X)) + 1)
+    serial = evaluate_walk_forward(_models(), X, y, folds, workers=1)
+    parallel = evaluate_walk_forward(_models(), X, y, folds, workers=2)
+
+    assert [r["fold"] for r in parallel] == [0, 1, 2]
+    for a, b in zip(serial, parallel):
+        assert a["train_rows"] == b["train_rows"] and a["test_rows"] == b["test_rows"]
+        scores_a, scores_b = {**a["models"], "ensemble": a["ensemble"]}, {**b["models"], "ensemble": b["ensemble"]}
+        for name in ("rf", "lr", "ensemble"):
+            assert scores_a[name]["accuracy"] == pytest.approx(scores_b[name]["accuracy"])
+        assert a["seconds"] >= a["models"]["rf"]["fit_seconds"]
+
+    summary = summarize_folds(serial)
+    assert set(summary) == {"rf", "lr", "ensemble"}
+    assert summary["ensemble"]["accuracy"] > 0.7 and "auc" in summary["rf"]
+
+
+@pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="sklearn not installed")
+def test_train_reports_folds_and_publishes(tmp_path):
+    X, y = _data(400)
+    df = X.assign(close=100.0, Target=y, timestamp=np.arange(len(X)) * 3600)
+    ensemble = EnsembleManager(models_dir=str(tmp_path))
+    metrics = ensemble.train(df, folds=4, workers=1)
+
+    assert ensemble.is_trained and ensemble.model_version is not None
+    # 2h purge on hourly rows: two rows dropped in front of every 80-row test block
+    assert [f["train_rows"] for f in metrics["folds"]] == [78, 158, 238, 318]
+    assert set(metrics["models"]) >= {"ensemble"}
+    assert ensemble.registry.manifest()["metrics"]["folds"][0]["fold"] == 0